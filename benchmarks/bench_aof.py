@@ -0,0 +1,68 @@
+"""
+Бенчмарк журнала команд: пропускная способность SET без журнала и с
+appendfsync no / everysec / always.
+
+CLIENTS соединений одновременно выполняют SET по одной команде, каждое
+ждет ответа перед следующей. Благодаря group commit команды всех клиентов
+за итерацию цикла событий пишутся одним write (и при always — одним
+fsync), поэтому с ростом числа клиентов always догоняет остальные режимы.
+
+Запуск:
+    python benchmarks/bench_aof.py
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.server.tcp_server import TCPServer
+
+CLIENTS = (1, 50)
+REQUESTS = 20_000
+
+
+def start_server(directory: str, appendonly: bool, fsync: str) -> TCPServer:
+    server = TCPServer(host="127.0.0.1", port=0, dir=directory, appendonly=appendonly, appendfsync=fsync)
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_until_complete, args=(server.start(),), daemon=True)
+    thread.start()
+    while not server.port or server._persistence.loading:
+        time.sleep(0.01)
+    return server
+
+
+async def client(port: int, number: int, requests: int) -> None:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    for i in range(requests):
+        writer.write(f"SET key:{number}:{i} value-{i}\r\n".encode())
+        head = await reader.readline()
+        if head.startswith(b"$"):
+            await reader.readline()
+    writer.close()
+    await writer.wait_closed()
+
+
+async def run(port: int, clients: int) -> float:
+    started = time.perf_counter()
+    await asyncio.gather(*(client(port, number, REQUESTS // clients) for number in range(clients)))
+    return REQUESTS / (time.perf_counter() - started)
+
+
+def main():
+    for name, appendonly, fsync in (("off", False, "no"), ("no", True, "no"),
+                                    ("everysec", True, "everysec"), ("always", True, "always")):
+        with tempfile.TemporaryDirectory() as directory:
+            server = start_server(directory, appendonly, fsync)
+            results = [asyncio.run(run(server.port, clients)) for clients in CLIENTS]
+            size = server._persistence.aof.size if server._persistence.aof is not None else 0
+            server._persistence.disable_aof()
+        line = ", ".join(f"{clients} clients {ops:,.0f} SET/s" for clients, ops in zip(CLIENTS, results))
+        print(f"AOF {name:<9} {line}; log {size / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
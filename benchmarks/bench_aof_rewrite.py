@@ -0,0 +1,80 @@
+"""
+Бенчмарк перезаписи журнала: размер журнала и время загрузки при запуске
+до и после BGREWRITEAOF, задержка записей во время перезаписи.
+
+KEYS ключей перезаписываются UPDATES раз, поэтому журнал в UPDATES раз
+больше данных, а загрузка выполняет каждую команду. После BGREWRITEAOF
+журнал — базовый снимок текущих данных, который загружается пакетно.
+Пока дочерний процесс пишет снимок, записи продолжаются в новый файл
+команд; выводятся p50 и максимум их задержки.
+
+Запуск:
+    python benchmarks/bench_aof_rewrite.py
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.server.databases import Databases
+
+KEYS = 100_000
+UPDATES = 10
+
+
+def open_databases(directory: str) -> Databases:
+    databases = Databases(16)
+    databases.persistence.dir = directory
+    databases.persistence.appendonly = True
+    databases.persistence.appendfsync = "no"
+    return databases
+
+
+def measure_load(directory: str) -> float:
+    databases = open_databases(directory)
+    started = time.perf_counter()
+    databases.persistence.load()
+    elapsed = time.perf_counter() - started
+    assert databases[0].size() == KEYS
+    databases.persistence.disable_aof()
+    return elapsed
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        databases = open_databases(directory)
+        databases.persistence.load()
+        persistence, handler = databases.persistence, databases.handlers[0]
+        for update in range(UPDATES):
+            for i in range(KEYS):
+                handler.handle("SET", [f"key:{i}", f"value-{i}-{update}"])
+            persistence.aof.flush()
+        before = persistence.aof_current_size
+        load_before = measure_load(directory)
+
+        started = time.perf_counter()
+        persistence.bgrewriteaof()
+        samples = []
+        i = 0
+        while persistence.aof_rewrite_in_progress or len(samples) < 1000:
+            began = time.perf_counter()
+            handler.handle("SET", [f"key:{i % KEYS}", "during-rewrite"])
+            samples.append(time.perf_counter() - began)
+            i += 1
+        rewrite = time.perf_counter() - started
+        after = persistence.aof_current_size
+        persistence.disable_aof()
+        load_after = measure_load(directory)
+
+    samples.sort()
+    print(f"{KEYS} keys x {UPDATES} updates")
+    print(f"before rewrite: AOF {before / 1e6:.1f} MB, load {load_before:.2f} s")
+    print(f"after rewrite:  AOF {after / 1e6:.1f} MB, load {load_after:.2f} s (rewrite {rewrite:.2f} s)")
+    print(f"SET during rewrite: p50 {samples[len(samples) // 2] * 1e6:.1f} us, "
+          f"max {samples[-1] * 1e3:.2f} ms ({len(samples)} writes)")
+
+
+if __name__ == "__main__":
+    main()
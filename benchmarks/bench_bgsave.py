@@ -0,0 +1,91 @@
+"""
+Бенчмарк сохранения снимков: задержка GET во время BGSAVE по сравнению с
+простоем и с блокирующим SAVE.
+
+В базу записывается KEYS ключей, затем клиент непрерывно выполняет GET и
+измеряет задержку каждого запроса (p50, p99, максимум): без сохранения,
+пока идет BGSAVE (fork, снимок пишет дочерний процесс) и во время SAVE
+(снимок пишется под блокировкой, клиенты ждут). Отдельно выводится время
+самого fork и размер файла.
+
+Запуск:
+    python benchmarks/bench_bgsave.py
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.client import RedisClient
+from src.server.tcp_server import TCPServer
+
+KEYS = 500_000
+BATCH = 400
+
+
+def start_server(directory: str) -> TCPServer:
+    server = TCPServer(host="127.0.0.1", port=0, dir=directory)
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_until_complete, args=(server.start(),), daemon=True)
+    thread.start()
+    while not server.port:
+        time.sleep(0.01)
+    return server
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    return (samples[len(samples) // 2] * 1e3, samples[int(len(samples) * 0.99)] * 1e3, samples[-1] * 1e3)
+
+
+def measure_gets(client: RedisClient, busy) -> list:
+    """Задержки GET, пока busy() возвращает True (не меньше 1000 запросов)."""
+    samples = []
+    while busy() or len(samples) < 1000:
+        started = time.perf_counter()
+        client.get("key:42")
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        server = start_server(directory)
+        persistence = server._persistence
+        with RedisClient(port=server.port) as client:
+            for start in range(0, KEYS, BATCH):
+                client.mset({f"key:{i}": f"value-{i}" * 4 for i in range(start, start + BATCH)})
+
+            idle = measure_gets(client, lambda: False)
+
+            started = time.perf_counter()
+            assert client._execute("BGSAVE") == "Background saving started"
+            fork_ms = (time.perf_counter() - started) * 1e3
+            during_bgsave = measure_gets(client, lambda: persistence.bgsave_in_progress)
+
+            done = threading.Event()
+
+            def blocking_save():
+                with RedisClient(port=server.port) as saving:
+                    saving._execute("SAVE")
+                done.set()
+
+            saver = threading.Thread(target=blocking_save)
+            saver.start()
+            time.sleep(0.01)
+            during_save = measure_gets(client, lambda: not done.is_set())
+            saver.join()
+
+        size = os.path.getsize(persistence.path)
+        print(f"{KEYS} keys, snapshot {size / 1e6:.1f} MB, BGSAVE reply (fork) {fork_ms:.1f} ms")
+        for name, samples in (("idle", idle), ("during BGSAVE", during_bgsave), ("during SAVE", during_save)):
+            p50, p99, worst = percentiles(samples)
+            print(f"GET {name:<14} p50 {p50:.3f} ms, p99 {p99:.3f} ms, max {worst:.1f} ms ({len(samples)} requests)")
+
+
+if __name__ == "__main__":
+    main()
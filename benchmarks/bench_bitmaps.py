@@ -0,0 +1,55 @@
+"""
+Бенчмарк битовых карт: BITCOUNT/BITOP/BITPOS на карте из 100M бит (~12MB).
+
+Запуск:
+    python benchmarks/bench_bitmaps.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.server import bitops
+from src.server.command_handler import CommandHandler
+from src.server.storage import Storage
+
+BITS = 100_000_000
+REPEAT = 5
+
+
+def measure(label: str, func) -> None:
+    """Выполняет func REPEAT раз и печатает лучшее время."""
+    best = float("inf")
+    for _ in range(REPEAT):
+        started = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - started)
+    print(f"{label:<32} {best * 1000:9.2f} ms   result={result}")
+
+
+def main():
+    storage = Storage()
+    handler = CommandHandler(storage)
+    size = BITS // 8
+    storage.setrange("dau:1", 0, os.urandom(size))
+    storage.setrange("dau:2", 0, os.urandom(size))
+    backend = "numpy" if bitops._np is not None else "int.from_bytes"
+    print(f"bitmap size: {size / 1024 / 1024:.1f} MB, popcount backend: {backend}")
+
+    measure("BITCOUNT dau:1", lambda: handler.handle("BITCOUNT", ["dau:1"])[1])
+    measure("BITCOUNT dau:1 0 -1 BIT", lambda: handler.handle("BITCOUNT", ["dau:1", "0", "-1", "BIT"])[1])
+    measure("BITOP AND dest dau:1 dau:2", lambda: handler.handle("BITOP", ["AND", "dest", "dau:1", "dau:2"])[1])
+    measure("BITOP OR dest dau:1 dau:2", lambda: handler.handle("BITOP", ["OR", "dest", "dau:1", "dau:2"])[1])
+
+    storage.setrange("sparse", size - 1, b"\x01")
+    measure("BITPOS sparse 1", lambda: handler.handle("BITPOS", ["sparse", "1"])[1])
+
+    # Поразрядный цикл для сравнения (на 1% данных)
+    sample = storage.get_buffer("dau:1")[:size // 100]
+    measure("per-bit loop (1% of bitmap)",
+            lambda: sum((byte >> i) & 1 for byte in sample for i in range(8)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Бенчмарк кеширования на стороне клиента: повторное чтение горячего ключа
+через RedisClient без кеша (каждый GET — круг запрос-ответ по TCP) и с
+кешем, который сервер поддерживает актуальным через CLIENT TRACKING.
+
+Дополнительно измеряется задержка инвалидации: время от SET другим
+клиентом до исчезновения ключа из локального кеша. Кеш проверяется в
+двух режимах: RESP2 (инвалидации на отдельном соединении) и RESP3
+(push-кадры на том же соединении).
+
+Запуск:
+    python benchmarks/bench_client_cache.py
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.client import RedisClient
+from src.server.tcp_server import TCPServer
+
+ROUNDS = 5_000
+INVALIDATIONS = 200
+
+
+def start_server() -> TCPServer:
+    server = TCPServer(host="127.0.0.1", port=0)
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_until_complete, args=(server.start(),), daemon=True)
+    thread.start()
+    while not server.port:
+        time.sleep(0.01)
+    return server
+
+
+def bench_reads(port: int, cache_size: int, protocol: int = 2) -> float:
+    with RedisClient(port=port, cache_size=cache_size, protocol=protocol) as client:
+        client.set("hot", "x" * 100)
+        started = time.perf_counter()
+        for _ in range(ROUNDS):
+            client.get("hot")
+        return (time.perf_counter() - started) / ROUNDS
+
+
+def bench_invalidation(port: int, protocol: int = 2) -> float:
+    total = 0.0
+    with RedisClient(port=port, cache_size=16, protocol=protocol) as cached, RedisClient(port=port) as writer:
+        for i in range(INVALIDATIONS):
+            writer.set("hot", i)
+            cached.get("hot")
+            started = time.perf_counter()
+            writer.set("hot", -i)
+            while "hot" in cached._cache:
+                if protocol == 3:
+                    cached._read_pending_pushes()
+                time.sleep(0)
+            total += time.perf_counter() - started
+    return total / INVALIDATIONS
+
+
+def main():
+    server = start_server()
+    uncached = bench_reads(server.port, 0)
+    for protocol in (2, 3):
+        cached = bench_reads(server.port, 1024, protocol)
+        print(f"RESP{protocol}: GET without cache {uncached * 1e6:.1f} us, with cache {cached * 1e6:.2f} us "
+              f"({uncached / cached:.0f}x), invalidation latency (SET -> dropped from cache) "
+              f"{bench_invalidation(server.port, protocol) * 1e6:.0f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Бенчмарк серверных функций: перевод между двумя счетчиками
+(GET, GET, SET, SET) отдельными командами против одного FCALL.
+
+Сравнивается выполнение в процессе (обработчик команд) и через TCP
+с клиентом RedisClient, где каждая команда — отдельный круг запрос-ответ.
+
+Запуск:
+    python benchmarks/bench_functions.py
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.client import RedisClient
+from src.server.command_handler import CommandHandler
+from src.server.storage import Storage
+from src.server.tcp_server import TCPServer
+
+ROUNDS = 20_000
+TCP_ROUNDS = 2_000
+
+LIBRARY = '''#!python name=bank
+def transfer(keys, args):
+    amount = int(args[0])
+    source = int(redis.call("GET", keys[0]))
+    target = int(redis.call("GET", keys[1]))
+    redis.call("SET", keys[0], source - amount)
+    redis.call("SET", keys[1], target + amount)
+    return source - amount
+
+redis.register_function("transfer", transfer)
+'''
+
+
+def bench_in_process():
+    handler = CommandHandler(Storage())
+    handler.handle("FUNCTION", ["LOAD", LIBRARY])
+    handler.handle("MSET", ["a", "1000000000", "b", "0"])
+
+    started = time.perf_counter()
+    for _ in range(ROUNDS):
+        source = int(handler.handle("GET", ["a"])[1])
+        target = int(handler.handle("GET", ["b"])[1])
+        handler.handle("SET", ["a", str(source - 1)])
+        handler.handle("SET", ["b", str(target + 1)])
+    per_commands = (time.perf_counter() - started) / ROUNDS
+
+    started = time.perf_counter()
+    for _ in range(ROUNDS):
+        handler.handle("FCALL", ["transfer", "2", "a", "b", "1"])
+    per_fcall = (time.perf_counter() - started) / ROUNDS
+    print(f"in-process: 4 commands {per_commands * 1e6:.1f} us, FCALL {per_fcall * 1e6:.1f} us")
+
+
+def bench_tcp():
+    server = TCPServer(host="127.0.0.1", port=0)
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_until_complete, args=(server.start(),), daemon=True)
+    thread.start()
+    while not server.port:
+        time.sleep(0.01)
+
+    with RedisClient(port=server.port) as client:
+        client.function_load(LIBRARY)
+        client.mset({"a": 1_000_000_000, "b": 0})
+        started = time.perf_counter()
+        for _ in range(TCP_ROUNDS):
+            source = int(client.get("a"))
+            target = int(client.get("b"))
+            client.set("a", source - 1)
+            client.set("b", target + 1)
+        per_commands = (time.perf_counter() - started) / TCP_ROUNDS
+
+        started = time.perf_counter()
+        for _ in range(TCP_ROUNDS):
+            client.fcall("transfer", ["a", "b"], [1])
+        per_fcall = (time.perf_counter() - started) / TCP_ROUNDS
+    print(f"TCP:        4 commands {per_commands * 1e6:.0f} us, FCALL {per_fcall * 1e6:.0f} us "
+          f"({per_commands / per_fcall:.1f}x)")
+
+
+def main():
+    bench_in_process()
+    bench_tcp()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Бенчмарк геоиндекса: GEOSEARCH по радиусу на большом наборе точек.
+
+Запуск:
+    python benchmarks/bench_geo.py [количество точек]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.server.command_handler import CommandHandler
+from src.server.storage import Storage
+
+POINTS = 1_000_000
+BATCH = 10_000
+SEARCHES = 2_000
+
+
+def main():
+    points = int(sys.argv[1]) if len(sys.argv) > 1 else POINTS
+    storage = Storage()
+    handler = CommandHandler(storage)
+    rnd = random.Random(42)
+
+    started = time.perf_counter()
+    for first in range(0, points, BATCH):
+        args = ["places"]
+        for i in range(first, min(first + BATCH, points)):
+            args += [str(rnd.uniform(-180, 180)), str(rnd.uniform(-85, 85)), f"p{i}"]
+        handler.handle("GEOADD", args)
+    elapsed = time.perf_counter() - started
+    print(f"GEOADD: {points / elapsed:,.0f} points/sec")
+
+    for radius_km in (1, 10, 100):
+        found = 0
+        started = time.perf_counter()
+        for _ in range(SEARCHES):
+            lon, lat = rnd.uniform(-180, 180), rnd.uniform(-80, 80)
+            _, result = handler.handle(
+                "GEOSEARCH", ["places", "FROMLONLAT", str(lon), str(lat), "BYRADIUS", str(radius_km), "km"]
+            )
+            found += len(result)
+        elapsed = time.perf_counter() - started
+        print(f"GEOSEARCH BYRADIUS {radius_km} km: {elapsed / SEARCHES * 1e6:.1f} us/op "
+              f"({found / SEARCHES:.1f} results on average)")
+
+
+if __name__ == "__main__":
+    main()
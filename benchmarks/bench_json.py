@@ -0,0 +1,52 @@
+"""
+Бенчмарк JSON: изменение одного поля в документе ~200KB и чтение документа.
+
+Сравнивается JSON.NUMINCRBY + JSON.GET с кэшем сериализации по узлам
+и полная сериализация json.dumps после каждого изменения.
+
+Запуск:
+    python benchmarks/bench_json.py
+"""
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.server.command_handler import CommandHandler
+from src.server.storage import Storage
+
+SECTIONS = 200
+UPDATES = 2_000
+
+
+def main():
+    document = {
+        f"section{i}": {"counter": 0, "items": [{"id": j, "name": f"item-{j}"} for j in range(40)]}
+        for i in range(SECTIONS)
+    }
+    text = json.dumps(document)
+    storage = Storage()
+    handler = CommandHandler(storage)
+    handler.handle("JSON.SET", ["doc", "$", text])
+    handler.handle("JSON.GET", ["doc"])
+    print(f"document size: {len(text) / 1024:.0f} KB")
+
+    started = time.perf_counter()
+    for i in range(UPDATES):
+        handler.handle("JSON.NUMINCRBY", ["doc", f"$.section{i % SECTIONS}.counter", "1"])
+        handler.handle("JSON.GET", ["doc"])
+    elapsed = time.perf_counter() - started
+    print(f"JSON.NUMINCRBY + JSON.GET (cached): {elapsed / UPDATES * 1e6:.0f} us/op")
+
+    started = time.perf_counter()
+    for i in range(UPDATES):
+        document[f"section{i % SECTIONS}"]["counter"] += 1
+        json.dumps(document, separators=(",", ":"), ensure_ascii=False)
+    elapsed = time.perf_counter() - started
+    print(f"update + full json.dumps:           {elapsed / UPDATES * 1e6:.0f} us/op")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Бенчмарк загрузки снимка при запуске: ключей в секунду и МБ/с.
+
+Снимок из KEYS ключей (строки, часть с TTL, и небольшие хэши) пишется
+SAVE, затем загружается в новый набор баз так, как это делает сервер при
+запуске: через mmap с потоковым декодированием и без сборок мусора. Для
+сравнения тот же снимок загружается прежним способом: файл целиком
+читается в память, сборщик мусора включен.
+
+Запуск:
+    python benchmarks/bench_load.py
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.server import snapshot
+from src.server.databases import Databases
+
+KEYS = 1_000_000
+
+
+def build(directory: str) -> Databases:
+    databases = Databases(16)
+    databases.persistence.dir = directory
+    storage = databases[0]
+    storage.mset({f"key:{i}": f"value-{i}" for i in range(0, KEYS, 2)})
+    for i in range(1, KEYS, 2):
+        if i % 4 == 1:
+            storage.set(f"key:{i}", f"value-{i}", ttl=3600)
+        else:
+            storage.hset(f"key:{i}", {"field": str(i), "other": "x"})
+    return databases
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        databases = build(directory)
+        databases.persistence.save()
+        path = databases.persistence.path
+        size = os.path.getsize(path)
+        del databases
+
+        results = []
+        restored = Databases(16)
+        restored.persistence.dir = directory
+        started = time.perf_counter()
+        loaded = restored.persistence.load()
+        results.append(("mmap, streaming", time.perf_counter() - started))
+
+        for storage in restored.storages:
+            storage.clear()
+        with open(path, "rb") as file:
+            started = time.perf_counter()
+            snapshot.load(file.read(), restored.storages)
+            results.append(("read() whole file", time.perf_counter() - started))
+
+        print(f"{loaded} keys, snapshot {size / 1e6:.1f} MB")
+        for name, seconds in results:
+            print(f"{name:<18} {seconds:.2f} s, {loaded / seconds / 1e3:.0f}K keys/s, {size / seconds / 1e6:.1f} MB/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Бенчмарк пакетного чтения: 100 команд GET против одной MGET на 100 ключей.
+
+Сравнивается выполнение в процессе (обработчик команд + форматирование
+ответа) и через TCP с клиентом RedisClient.
+
+Запуск:
+    python benchmarks/bench_mget.py
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.client import RedisClient
+from src.server.command_handler import CommandHandler
+from src.server.command_parser import CommandParser
+from src.server.storage import Storage
+from src.server.tcp_server import TCPServer
+
+BATCH = 100
+ROUNDS = 2_000
+TCP_ROUNDS = 100
+
+
+def bench_in_process(keys):
+    storage = Storage()
+    handler = CommandHandler(storage)
+    handler.handle("MSET", [item for key in keys for item in (key, "v" * 32)])
+    format_response = CommandParser.format_response
+
+    started = time.perf_counter()
+    for _ in range(ROUNDS):
+        for key in keys:
+            format_response(handler.handle("GET", [key])[1])
+    per_get = (time.perf_counter() - started) / ROUNDS
+
+    started = time.perf_counter()
+    for _ in range(ROUNDS):
+        format_response(handler.handle("MGET", keys)[1])
+    per_mget = (time.perf_counter() - started) / ROUNDS
+    print(f"in-process: {BATCH} x GET {per_get * 1e6:.0f} us, MGET {per_mget * 1e6:.0f} us "
+          f"({per_get / per_mget:.1f}x)")
+
+
+def bench_tcp(keys):
+    server = TCPServer(host="127.0.0.1", port=0)
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_until_complete, args=(server.start(),), daemon=True)
+    thread.start()
+    while not server.port:
+        time.sleep(0.01)
+
+    with RedisClient(port=server.port) as client:
+        client.mset({key: "v" * 32 for key in keys})
+        started = time.perf_counter()
+        for _ in range(TCP_ROUNDS):
+            for key in keys:
+                client.get(key)
+        per_get = (time.perf_counter() - started) / TCP_ROUNDS
+
+        started = time.perf_counter()
+        for _ in range(TCP_ROUNDS):
+            client.mget(*keys)
+        per_mget = (time.perf_counter() - started) / TCP_ROUNDS
+    print(f"TCP:        {BATCH} x GET {per_get * 1e3:.2f} ms, MGET {per_mget * 1e3:.2f} ms "
+          f"({per_get / per_mget:.1f}x)")
+
+
+def main():
+    keys = [f"key:{i}" for i in range(BATCH)]
+    bench_in_process(keys)
+    bench_tcp(keys)
+
+
+if __name__ == "__main__":
+    main()
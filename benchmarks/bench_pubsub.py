@@ -0,0 +1,78 @@
+"""
+Бенчмарк PUBLISH на большое число подписчиков.
+
+Подписчики — реальные TCP соединения с сервером в том же процессе.
+Время одного PUBLISH сравнивается с нижней границей: циклом записи
+уже готового кадра в транспорты тех же соединений.
+
+Запуск:
+    python benchmarks/bench_pubsub.py [число подписчиков]
+"""
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.server.tcp_server import TCPServer
+
+ROUNDS = 20
+
+
+async def drain(reader):
+    while await reader.read(65536):
+        pass
+
+
+async def main(count: int):
+    server = TCPServer(host="127.0.0.1", port=0)
+    task = asyncio.create_task(server.start())
+    while not server.port:
+        await asyncio.sleep(0.01)
+
+    connections = []
+    for _ in range(count):
+        reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+        writer.write(b"SUBSCRIBE invalidations\r\n")
+        await reader.readline()
+        connections.append((reader, writer))
+    readers = [asyncio.create_task(drain(reader)) for reader, _ in connections]
+    pubsub = server._storage.pubsub
+    while pubsub.numsub("invalidations") < count:
+        await asyncio.sleep(0.01)
+
+    message = "user:42"
+    total = 0.0
+    for _ in range(ROUNDS):
+        started = time.perf_counter()
+        assert pubsub.publish("invalidations", message) == count
+        total += time.perf_counter() - started
+        await asyncio.sleep(0.05)
+    per_publish = total / ROUNDS
+
+    transports = [subscriber.transport for subscriber in pubsub.channels["invalidations"]]
+    frame = b"*3\r\n$7\r\nmessage\r\n$13\r\ninvalidations\r\n$7\r\nuser:42\r\n"
+    total = 0.0
+    for _ in range(ROUNDS):
+        started = time.perf_counter()
+        for transport in transports:
+            transport.write(frame)
+        total += time.perf_counter() - started
+        await asyncio.sleep(0.05)
+    per_writes = total / ROUNDS
+
+    print(f"PUBLISH to {count} subscribers: {per_publish * 1e3:.2f} ms "
+          f"({per_publish / count * 1e6:.2f} us per subscriber), "
+          f"raw transport writes: {per_writes * 1e3:.2f} ms ({per_publish / per_writes:.2f}x)")
+
+    for _, writer in connections:
+        writer.close()
+    for reader_task in readers:
+        reader_task.cancel()
+    await server.stop()
+    task.cancel()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000))
@@ -0,0 +1,112 @@
+"""
+Бенчмарк репликации: время полной синхронизации, пропускная способность
+записи ведущего без реплики и с репликой, отставание реплики.
+
+Ведущий и реплика — отдельные процессы entrypoint.py. Ведущий заполняется
+KEYS ключами, затем запускается реплика и измеряется время до
+master_link_status:up. Запись — конвейер SET пакетами по PIPELINE команд;
+отставание — время от ответа на последний SET до того, как
+slave_repl_offset реплики догонит master_repl_offset ведущего.
+
+Запуск:
+    python benchmarks/bench_replication.py
+"""
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+
+KEYS = 200_000
+WRITES = 100_000
+PIPELINE = 100
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def spawn(port: int, replicaof: str = None) -> subprocess.Popen:
+    env = dict(os.environ, REDIS_HOST="127.0.0.1", REDIS_PORT=str(port))
+    if replicaof is not None:
+        env["REDIS_REPLICAOF"] = replicaof
+    return subprocess.Popen([sys.executable, os.path.join(ROOT, "entrypoint.py")], env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+async def connect(port: int):
+    while True:
+        try:
+            return await asyncio.open_connection("127.0.0.1", port)
+        except OSError:
+            await asyncio.sleep(0.05)
+
+
+async def read_reply(reader) -> bytes:
+    head = await reader.readline()
+    if head.startswith(b"$") and head.strip() != b"$-1":
+        return (await reader.readexactly(int(head[1:]) + 2))[:-2]
+    return head.strip()
+
+
+async def info(reader, writer) -> dict:
+    writer.write(b"INFO replication\r\n")
+    text = await read_reply(reader)
+    return dict(line.split(":", 1) for line in text.decode().split("\r\n") if ":" in line)
+
+
+async def write_batch(reader, writer, prefix: str, count: int) -> float:
+    started = time.perf_counter()
+    for start in range(0, count, PIPELINE):
+        writer.write(b"".join(f"SET {prefix}:{i} value-{i}\r\n".encode() for i in range(start, start + PIPELINE)))
+        for _ in range(PIPELINE):
+            await read_reply(reader)
+    return count / (time.perf_counter() - started)
+
+
+async def scenario(master_port: int, replica_port: int) -> None:
+    mr, mw = await connect(master_port)
+    await write_batch(mr, mw, "key", KEYS)
+    alone = await write_batch(mr, mw, "alone", WRITES)
+
+    started = time.perf_counter()
+    replica = spawn(replica_port, f"127.0.0.1 {master_port}")
+    try:
+        rr, rw = await connect(replica_port)
+        while (await info(rr, rw)).get("master_link_status") != "up":
+            await asyncio.sleep(0.01)
+        full_sync = time.perf_counter() - started
+
+        replicated = await write_batch(mr, mw, "replicated", WRITES)
+        written = time.perf_counter()
+        target = (await info(mr, mw))["master_repl_offset"]
+        while (await info(rr, rw))["slave_repl_offset"] != target:
+            await asyncio.sleep(0.001)
+        lag = time.perf_counter() - written
+    finally:
+        replica.terminate()
+        replica.wait()
+
+    print(f"full sync of {KEYS} keys: {full_sync:.2f} s")
+    print(f"SET pipeline x{PIPELINE}, no replica:  {alone:,.0f} ops/s")
+    print(f"SET pipeline x{PIPELINE}, one replica: {replicated:,.0f} ops/s")
+    print(f"replica caught up {lag * 1e3:.1f} ms after the last reply")
+
+
+def main():
+    master_port, replica_port = free_port(), free_port()
+    master = spawn(master_port)
+    try:
+        asyncio.run(scenario(master_port, replica_port))
+    finally:
+        master.terminate()
+        master.wait()
+
+
+if __name__ == "__main__":
+    main()
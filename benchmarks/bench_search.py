@@ -0,0 +1,43 @@
+"""
+Бенчмарк FT.SEARCH: пересечение числового диапазона и тега на 200K хэшей.
+
+Запуск:
+    python benchmarks/bench_search.py [количество хэшей]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.server.command_handler import CommandHandler
+from src.server.storage import Storage
+
+CITIES = ["berlin", "paris", "rome", "oslo", "madrid", "vienna", "prague", "lisbon"]
+QUERIES = 200
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    rng = random.Random(1)
+    storage = Storage()
+    handler = CommandHandler(storage)
+    handler.handle("FT.CREATE", ["idx", "PREFIX", "1", "user:", "SCHEMA", "age", "NUMERIC", "city", "TAG"])
+
+    started = time.perf_counter()
+    for i in range(count):
+        handler.handle("HSET", [f"user:{i}", "age", str(rng.randint(18, 80)), "city", rng.choice(CITIES)])
+    elapsed = time.perf_counter() - started
+    print(f"HSET with index: {count / elapsed:,.0f} ops/sec")
+
+    for query in ("@age:[30 40] @city:{berlin}", "@age:[30 30] @city:{berlin}", "@age:[18 80] @city:{berlin}"):
+        started = time.perf_counter()
+        for _ in range(QUERIES):
+            _, result = handler.handle("FT.SEARCH", ["idx", query, "LIMIT", "0", "10"])
+        elapsed = time.perf_counter() - started
+        print(f"FT.SEARCH {query!r}: {result[0]} matches, {elapsed / QUERIES * 1e3:.2f} ms/op")
+
+
+if __name__ == "__main__":
+    main()
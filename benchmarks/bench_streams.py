@@ -0,0 +1,47 @@
+"""
+Бенчмарк stream: пропускная способность XADD и поиск диапазонов XRANGE.
+
+Запуск:
+    python benchmarks/bench_streams.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.server.command_handler import CommandHandler
+from src.server.storage import Storage
+
+APPENDS = 200_000
+RANGES = 20_000
+
+
+def main():
+    storage = Storage()
+    handler = CommandHandler(storage)
+
+    args = ["events", "MAXLEN", "~", "100000", "*", "type", "click", "user", "42"]
+    started = time.perf_counter()
+    for _ in range(APPENDS):
+        handler.handle("XADD", args)
+    elapsed = time.perf_counter() - started
+    print(f"XADD via CommandHandler: {APPENDS / elapsed:,.0f} appends/sec "
+          f"(length after trim: {handler.handle('XLEN', ['events'])[1]})")
+
+    _, entries = handler.handle("XRANGE", ["events", "-", "+", "COUNT", "1"])
+    first_ms = int(entries[0][0].split("-")[0])
+    _, entries = handler.handle("XREVRANGE", ["events", "+", "-", "COUNT", "1"])
+    last_ms = int(entries[0][0].split("-")[0])
+    span = max(last_ms - first_ms, 1)
+
+    started = time.perf_counter()
+    for i in range(RANGES):
+        start = first_ms + (i * 7919) % span
+        handler.handle("XRANGE", ["events", str(start), "+", "COUNT", "10"])
+    elapsed = time.perf_counter() - started
+    print(f"XRANGE seek + 10 entries: {elapsed / RANGES * 1e6:.1f} us/op")
+
+
+if __name__ == "__main__":
+    main()
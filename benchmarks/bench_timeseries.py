@@ -0,0 +1,45 @@
+"""
+Бенчмарк time series: TS.ADD и агрегация часового диапазона в TS.RANGE.
+
+Запуск:
+    python benchmarks/bench_timeseries.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.server.command_handler import CommandHandler
+from src.server.storage import Storage
+
+SAMPLES = 86_400
+QUERIES = 500
+HOUR_MS = 3_600_000
+
+
+def main():
+    for encoding in ("UNCOMPRESSED", "COMPRESSED"):
+        storage = Storage()
+        handler = CommandHandler(storage)
+        handler.handle("TS.CREATE", ["cpu", "ENCODING", encoding])
+
+        started = time.perf_counter()
+        for i in range(SAMPLES):
+            handler.handle("TS.ADD", ["cpu", str(i * 1000), str(i % 100 / 3)])
+        elapsed = time.perf_counter() - started
+        _, info = handler.handle("TS.INFO", ["cpu"])
+        info = dict(zip(info[::2], info[1::2]))
+        print(f"{encoding}: TS.ADD {SAMPLES / elapsed:,.0f} samples/sec, "
+              f"{info['memoryUsage'] / SAMPLES:.1f} bytes/sample")
+
+        started = time.perf_counter()
+        for i in range(QUERIES):
+            start = (i * 7919 * 1000) % (SAMPLES * 1000 - HOUR_MS)
+            handler.handle("TS.RANGE", ["cpu", str(start), str(start + HOUR_MS), "AGGREGATION", "avg", "60000"])
+        elapsed = time.perf_counter() - started
+        print(f"{encoding}: TS.RANGE 1h AGGREGATION avg 60s: {elapsed / QUERIES * 1e3:.2f} ms/op")
+
+
+if __name__ == "__main__":
+    main()
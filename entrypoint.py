@@ -16,8 +16,15 @@ async def main():
     
     host = os.getenv('REDIS_HOST', '0.0.0.0')  # Слушаем все интерфейсы в докере
     port = int(os.getenv('REDIS_PORT', '6379'))  # Стандартный Redis порт
-
-    server = TCPServer(host=host, port=port)
+    databases = int(os.getenv('REDIS_DATABASES', '16'))
+    data_dir = os.getenv('REDIS_DIR')  # Каталог снимков (загружается при запуске)
+    save = os.getenv('REDIS_SAVE')  # Интервалы автосохранения, например "3600 1 300 100"
+    appendonly = os.getenv('REDIS_APPENDONLY', 'no').lower() == 'yes'  # Журнал команд AOF
+    appendfsync = os.getenv('REDIS_APPENDFSYNC', 'everysec')  # always | everysec | no
+    replicaof = os.getenv('REDIS_REPLICAOF')  # "host port" — запуск репликой
+
+    server = TCPServer(host=host, port=port, databases=databases, dir=data_dir, save=save,
+                       appendonly=appendonly, appendfsync=appendfsync, replicaof=replicaof)
 
     try:
         await server.start()
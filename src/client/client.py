@@ -2,8 +2,17 @@
 Redis-совместимый клиент для mini-redis-server.
 """
 import socket
+import threading
 import time
-from typing import Any, Optional, Union, List
+from collections import OrderedDict, deque
+from contextlib import suppress
+from typing import Any, Deque, Dict, Optional, Union, List
+
+INVALIDATE_CHANNEL = "__redis__:invalidate"
+
+
+class Push(list):
+    """Push-кадр RESP3: сообщение Pub/Sub или инвалидация, пришедшие вне очереди ответов."""
 
 
 class RedisClient:
@@ -11,7 +20,8 @@ class RedisClient:
     Поддерживает основные команды Redis с автоматическим парсингом ответов.
     """
 
-    def __init__(self, host: str = 'localhost', port: int = 6379, timeout: float = 5.0):
+    def __init__(self, host: str = 'localhost', port: int = 6379, timeout: float = 5.0, cache_size: int = 0,
+                 protocol: int = 2):
         """
         Инициализация клиента.
 
@@ -19,12 +29,28 @@ class RedisClient:
             host: Хост сервера
             port: Порт сервера
             timeout: Таймаут соединения в секундах
+            cache_size: Размер локального LRU-кеша значений GET (0 — без кеша).
+                Кеш включает CLIENT TRACKING и сбрасывает ключи по инвалидациям
+                сервера, которые в RESP2 приходят на отдельное соединение, а в
+                RESP3 — push-кадрами по тому же соединению.
+            protocol: Версия протокола (2 или 3); 3 согласуется командой HELLO
         """
         self.host = host
         self.port = port
         self.timeout = timeout
         self._socket: Optional[socket.socket] = None
+        self._reader = None
         self._connected = False
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, Optional[str]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        # ключи, запрошенные с сервера: False, если инвалидация пришла во время запроса
+        self._cache_pending: Dict[str, bool] = {}
+        self._cache_active = False
+        self._listener: Optional["RedisClient"] = None
+        self.protocol = protocol
+        # сообщения Pub/Sub, пришедшие push-кадрами (RESP3)
+        self._messages: Deque[Push] = deque()
 
     def connect(self) -> bool:
         """
@@ -37,112 +63,233 @@ class RedisClient:
             self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
             self._socket.settimeout(self.timeout)
             self._socket.connect((self.host, self.port))
+            self._reader = self._socket.makefile('rb')
             self._connected = True
+            if self.protocol == 3:
+                self._execute("HELLO", 3)
+            if self.cache_size:
+                self._enable_cache()
             return True
         except Exception as e:
             print(f"Connection failed: {e}")
             self._connected = False
             return False
 
+    def _enable_cache(self) -> None:
+        """
+        Включает CLIENT TRACKING: в RESP3 инвалидации приходят по этому же
+        соединению, в RESP2 открывается отдельное соединение для них.
+        """
+        if self.protocol == 3:
+            self._execute("CLIENT", "TRACKING", "ON")
+            self._cache_active = True
+            return
+        listener = RedisClient(self.host, self.port, self.timeout)
+        if not listener.connect():
+            raise ConnectionError("Cannot open invalidation connection")
+        listener_id = listener._execute("CLIENT", "ID")
+        listener._execute("SUBSCRIBE", INVALIDATE_CHANNEL)
+        self._execute("CLIENT", "TRACKING", "ON", "REDIRECT", listener_id)
+        # соединение только читает сообщения, поэтому ждет их без таймаута
+        listener._socket.settimeout(None)
+        self._listener = listener
+        self._cache_active = True
+        threading.Thread(target=self._listen_invalidations, args=(listener,), daemon=True).start()
+
+    def _listen_invalidations(self, listener: "RedisClient") -> None:
+        """Фоновый поток: применяет сообщения __redis__:invalidate к локальному кешу."""
+        while True:
+            try:
+                message = listener._read_reply()
+            except (ConnectionError, OSError, ValueError, RedisError):
+                break
+            if isinstance(message, list) and len(message) == 3 and message[0] == "message":
+                self._invalidate(message[2])
+        # без инвалидаций кешу нельзя доверять
+        with self._cache_lock:
+            self._cache_active = False
+            self._cache.clear()
+
+    def _invalidate(self, keys: Optional[List[str]]) -> None:
+        """Удаляет ключи из кеша; None — сброс всего кеша (FLUSHDB, FLUSHALL, SWAPDB)."""
+        with self._cache_lock:
+            if keys is None:
+                self._cache.clear()
+                for key in self._cache_pending:
+                    self._cache_pending[key] = False
+                return
+            for key in keys:
+                self._cache.pop(key, None)
+                if key in self._cache_pending:
+                    self._cache_pending[key] = False
+
+    def _handle_push(self, message: Push) -> None:
+        """Применяет инвалидацию или откладывает сообщение Pub/Sub для get_message()."""
+        if len(message) == 2 and message[0] == "invalidate":
+            self._invalidate(message[1])
+        else:
+            self._messages.append(message)
+
+    def _read_pending_pushes(self) -> None:
+        """Без ожидания читает push-кадры, уже пришедшие по соединению."""
+        while True:
+            self._socket.setblocking(False)
+            try:
+                pending = self._reader.peek(1)
+            except OSError:
+                pending = b""
+            finally:
+                self._socket.settimeout(self.timeout)
+            if not pending:
+                return
+            message = self._read_reply()
+            if isinstance(message, Push):
+                self._handle_push(message)
+
+    def subscribe(self, *channels: str) -> None:
+        """
+        SUBSCRIBE по соединению RESP3: после подписки соединению по-прежнему
+        доступны все команды, а сообщения читаются через get_message().
+        """
+        if self.protocol != 3:
+            raise RedisError("subscribe() requires protocol=3")
+        self._send_payload("SUBSCRIBE", *channels)
+        confirmed = 0
+        while confirmed < len(channels):
+            message = self._read_reply()
+            if isinstance(message, Push) and message[0] == "subscribe":
+                confirmed += 1
+            elif isinstance(message, Push):
+                self._handle_push(message)
+
+    def get_message(self, timeout: float = 0.0) -> Optional[List[Any]]:
+        """
+        Возвращает следующее сообщение Pub/Sub (["message", канал, сообщение]) или None.
+
+        Args:
+            timeout: Сколько секунд ждать сообщение, если его еще нет
+        """
+        deadline = time.monotonic() + timeout
+        while not self._messages:
+            self._read_pending_pushes()
+            if self._messages or time.monotonic() >= deadline:
+                break
+            time.sleep(0.001)
+        return list(self._messages.popleft()) if self._messages else None
+
     def disconnect(self):
         """Отключение от сервера."""
+        if self._listener is not None:
+            # shutdown будит поток, ожидающий сообщения в recv, close этого не делает
+            with suppress(OSError):
+                self._listener._socket.shutdown(socket.SHUT_RDWR)
+            self._listener.disconnect()
+            self._listener = None
+        if self._reader:
+            try:
+                self._reader.close()
+            except:
+                pass
         if self._socket:
             try:
                 self._socket.close()
             except:
                 pass
+        self._reader = None
         self._socket = None
         self._connected = False
 
-    def _send_command(self, command: str) -> str:
+    def _execute(self, *args: Any) -> Any:
         """
-        Отправка команды серверу.
+        Отправка команды RESP-массивом и чтение полного ответа.
+
+        В отличие от inline-формата аргументы могут содержать пробелы,
+        а ответ читается целиком, включая вложенные массивы и null-элементы.
 
         Args:
-            command: Команда в формате inline
+            args: Имя команды и аргументы
 
         Returns:
-            Ответ сервера как строка
+            Распарсенный ответ
         """
         if not self._connected or not self._socket:
             raise ConnectionError("Not connected to server")
 
         try:
-            self._socket.send(f"{command}\r\n".encode())
-
-            response = b""
-            while True:
-                chunk = self._socket.recv(1024)
-                if not chunk:
-                    break
-                response += chunk
-                if response.endswith(b"\r\n"):
-                    break
-
-            return response.decode('utf-8', errors='replace').strip()
-
-        except Exception as e:
+            self._send_payload(*args)
+            reply = self._read_reply()
+            # push-кадры RESP3 могут прийти раньше ответа
+            while isinstance(reply, Push):
+                self._handle_push(reply)
+                reply = self._read_reply()
+            return reply
+        except OSError as e:
             raise ConnectionError(f"Command failed: {e}")
 
-    def _parse_response(self, response: str) -> Any:
-        """
-        Парсинг ответа сервера в формате RESP.
-
-        Args:
-            response: Ответ сервера
-
-        Returns:
-            Распарсенное значение
-        """
-        if not response:
+    def _send_payload(self, *args: Any) -> None:
+        """Отправляет команду RESP-массивом."""
+        payload = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode()
+            payload.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        self._socket.sendall(b"".join(payload))
+
+    def _read_reply(self) -> Any:
+        """Читает один RESP-ответ из сокета."""
+        line = self._reader.readline()
+        if not line:
+            raise ConnectionError("Connection closed by server")
+        prefix, body = line[:1], line[1:].rstrip(b"\r\n")
+        if prefix == b"+":
+            return body.decode('utf-8', errors='replace')
+        if prefix == b"-":
+            raise RedisError(body.decode('utf-8', errors='replace'))
+        if prefix == b":":
+            return int(body)
+        if prefix == b"$":
+            length = int(body)
+            if length < 0:
+                return None
+            return self._read_bulk(length).decode('utf-8', errors='replace')
+        if prefix == b"*":
+            count = int(body)
+            if count < 0:
+                return None
+            return [self._read_reply() for _ in range(count)]
+        # типы RESP3
+        if prefix == b"_":
             return None
-
-        # Обработка простых строк
-        if response.startswith('+'):
-            return response[1:] 
-
-        # Обработка ошибок
-        if response.startswith('-'):
-            raise RedisError(response[1:])
-
-        # Обработка целых чисел
-        if response.startswith(':'):
-            try:
-                return int(response[1:])
-            except ValueError:
-                return response[1:]
-
-        # Обработка bulk strings
-        if response.startswith('$'):
-            lines = response.split('\r\n')
-            if len(lines) >= 2:
-                try:
-                    length = int(lines[0][1:])
-                    if length == -1:
-                        return None
-                    return lines[1]
-                except (ValueError, IndexError):
-                    pass
-
-        # Обработка массивов (упрощенная)
-        if response.startswith('*'):
-            lines = response.split('\r\n')
-            if len(lines) >= 2:
-                try:
-                    count = int(lines[0][1:])
-                    result = []
-                    idx = 1
-                    for _ in range(count):
-                        if idx + 1 < len(lines):
-
-                            result.append(lines[idx + 1])
-                            idx += 2
-                    return result
-                except (ValueError, IndexError):
-                    pass
-
-
-        return response
+        if prefix == b"#":
+            return body == b"t"
+        if prefix == b",":
+            return float(body)
+        if prefix == b"(":
+            return int(body)
+        if prefix in (b"=", b"!"):
+            text = self._read_bulk(int(body)).decode('utf-8', errors='replace')
+            if prefix == b"!":
+                raise RedisError(text)
+            # verbatim string начинается с формата: "txt:..."
+            return text[4:]
+        if prefix == b"%":
+            return {self._read_reply(): self._read_reply() for _ in range(int(body))}
+        if prefix == b"~":
+            return [self._read_reply() for _ in range(int(body))]
+        if prefix == b">":
+            return Push(self._read_reply() for _ in range(int(body)))
+        if prefix == b"|":
+            # атрибуты ответа пропускаются
+            for _ in range(2 * int(body)):
+                self._read_reply()
+            return self._read_reply()
+        raise RedisError(f"Protocol error: unexpected reply {line!r}")
+
+    def _read_bulk(self, length: int) -> bytes:
+        """Читает тело bulk-строки длиной length байт и завершающий CRLF."""
+        data = self._reader.read(length + 2)
+        if len(data) < length + 2:
+            raise ConnectionError("Connection closed by server")
+        return data[:-2]
 
     # Команды Redis
     def set(self, key: str, value: Any, ex: Optional[int] = None, px: Optional[int] = None) -> bool:
@@ -158,14 +305,14 @@ class RedisClient:
         Returns:
             True если успешно
         """
-        cmd = f"SET {key} {value}"
+        args: List[Any] = ["SET", key, value]
         if ex is not None:
-            cmd += f" EX {ex}"
+            args += ["EX", ex]
         elif px is not None:
-            cmd += f" PX {px}"
+            args += ["PX", px]
 
-        response = self._send_command(cmd)
-        result = self._parse_response(response)
+        result = self._execute(*args)
+        self._forget(key)
         return result == "OK"
 
     def get(self, key: str) -> Optional[str]:
@@ -178,8 +325,63 @@ class RedisClient:
         Returns:
             Значение или None
         """
-        response = self._send_command(f"GET {key}")
-        return self._parse_response(response)
+        if not self.cache_size:
+            return self._execute("GET", key)
+
+        if self.protocol == 3:
+            # инвалидации, уже пришедшие по соединению, применяются до чтения кеша
+            self._read_pending_pushes()
+        with self._cache_lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+            self._cache_pending[key] = True
+        try:
+            value = self._execute("GET", key)
+        finally:
+            with self._cache_lock:
+                # значение кешируется, только если за время запроса ключ не инвалидировали
+                if self._cache_pending.pop(key, False) and self._cache_active:
+                    self._cache[key] = value
+                    if len(self._cache) > self.cache_size:
+                        self._cache.popitem(last=False)
+        return value
+
+    def _forget(self, *keys: str) -> None:
+        """Удаляет из локального кеша ключи, измененные этим клиентом."""
+        if self.cache_size:
+            with self._cache_lock:
+                for key in keys:
+                    self._cache.pop(key, None)
+
+    def mget(self, *keys: str) -> List[Optional[str]]:
+        """
+        MGET команда: значения нескольких ключей за один запрос.
+
+        Args:
+            keys: Ключи
+
+        Returns:
+            Значения в порядке ключей (None для отсутствующих)
+        """
+        return self._execute("MGET", *keys)
+
+    def mset(self, mapping: Dict[str, Any], nx: bool = False) -> bool:
+        """
+        MSET (или MSETNX при nx=True) команда: запись нескольких значений за один запрос.
+
+        Args:
+            mapping: Ключи и значения
+            nx: Записать только если ни один из ключей не существует
+
+        Returns:
+            True если значения записаны
+        """
+        args = [item for pair in mapping.items() for item in pair]
+        self._forget(*mapping)
+        if nx:
+            return self._execute("MSETNX", *args) == 1
+        return self._execute("MSET", *args) == "OK"
 
     def delete(self, *keys: str) -> int:
         """
@@ -191,9 +393,9 @@ class RedisClient:
         Returns:
             Количество удаленных ключей
         """
-        cmd = f"DEL {' '.join(keys)}"
-        response = self._send_command(cmd)
-        return self._parse_response(response)
+        result = self._execute("DEL", *keys)
+        self._forget(*keys)
+        return result
 
     def exists(self, *keys: str) -> int:
         """
@@ -205,9 +407,7 @@ class RedisClient:
         Returns:
             Количество существующих ключей
         """
-        cmd = f"EXISTS {' '.join(keys)}"
-        response = self._send_command(cmd)
-        return self._parse_response(response)
+        return self._execute("EXISTS", *keys)
 
     def ttl(self, key: str) -> int:
         """
@@ -219,8 +419,7 @@ class RedisClient:
         Returns:
             TTL в секундах (-2 если не существует, -1 если бессрочный)
         """
-        response = self._send_command(f"TTL {key}")
-        return self._parse_response(response)
+        return self._execute("TTL", key)
 
     def expire(self, key: str, seconds: int) -> bool:
         """
@@ -233,9 +432,7 @@ class RedisClient:
         Returns:
             True если TTL установлен
         """
-        response = self._send_command(f"EXPIRE {key} {seconds}")
-        result = self._parse_response(response)
-        return bool(result)
+        return bool(self._execute("EXPIRE", key, seconds))
 
     def keys(self, pattern: str = "*") -> List[str]:
         """
@@ -247,12 +444,41 @@ class RedisClient:
         Returns:
             Список ключей
         """
-        response = self._send_command(f"KEYS {pattern}")
-        result = self._parse_response(response)
+        result = self._execute("KEYS", pattern)
         if isinstance(result, list):
             return result
         return []
 
+    def function_load(self, code: str, replace: bool = False) -> str:
+        """
+        FUNCTION LOAD команда: загрузка библиотеки серверных функций.
+
+        Args:
+            code: Код библиотеки с заголовком `#!python name=<библиотека>`
+            replace: Заменить уже загруженную библиотеку с тем же именем
+
+        Returns:
+            Имя библиотеки
+        """
+        if replace:
+            return self._execute("FUNCTION", "LOAD", "REPLACE", code)
+        return self._execute("FUNCTION", "LOAD", code)
+
+    def fcall(self, function: str, keys: Optional[List[str]] = None, args: Optional[List[Any]] = None) -> Any:
+        """
+        FCALL команда: вызов серверной функции за один запрос.
+
+        Args:
+            function: Имя функции
+            keys: Ключи, с которыми работает функция
+            args: Остальные аргументы
+
+        Returns:
+            Значение, возвращенное функцией
+        """
+        keys = keys or []
+        return self._execute("FCALL", function, len(keys), *keys, *(args or []))
+
     def __enter__(self):
         """Контекстный менеджер."""
         self.connect()
@@ -0,0 +1,459 @@
+"""
+Журнал команд (append-only file, AOF).
+
+Каждая команда, изменившая данные через CommandHandler.handle, кодируется
+в RESP и дописывается в буфер журнала. Буфер сбрасывается в файл одной
+записью на итерацию цикла событий (group commit): команды всех клиентов,
+обработанные за итерацию, попадают на диск одним системным вызовом.
+Политика appendfsync определяет, когда данные сбрасываются на диск:
+
+    always    fsync после каждой записи пакета, ответы ждут его окончания
+    everysec  fsync раз в секунду в фоновом потоке
+    no        fsync выполняет операционная система
+
+Журнал состоит из файлов в каталоге appendonlydir: базового снимка
+(формат SAVE) и файлов с командами после него; их список хранит манифест
+в формате Redis 7 (`file <имя> seq <n> type b|i`). При запуске базовый
+снимок загружается пакетно, а команды выполняются прямо обработчиками баз
+без разбора сетевого протокола и форматирования ответов.
+
+Команды с относительным временем (EXPIRE, SET EX, GETEX PX) пишутся с
+абсолютным временем истечения, XADD и TS.ADD с `*` — с фактическим
+идентификатором, XCLAIM и XAUTOCLAIM, зависящие от времени простоя, —
+фактически переданными записями, CL.THROTTLE — сохраненным TAT с PXAT,
+а FCALL — командами, которые функция выполнила. Эффекты
+EXEC и FCALL из нескольких команд обрамляются MULTI/EXEC; транзакция,
+оборванная в конце файла, при загрузке не выполняется.
+"""
+import os
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .stream import Stream, StreamIDError, format_id, parse_id
+
+FSYNC_POLICIES = ("always", "everysec", "no")
+
+# команды, которые пишутся в журнал при успехе, хотя не меняют ключи хранилища
+SCHEMA_COMMANDS = frozenset({"FUNCTION", "FT.CREATE", "FT.DROPINDEX"})
+# команды, эффекты которых пишутся одной транзакцией MULTI/EXEC
+TRANSACTION_COMMANDS = frozenset({"FCALL"})
+# подкоманды FUNCTION, меняющие библиотеки
+FUNCTION_WRITES = frozenset({"LOAD", "DELETE", "FLUSH", "RESTORE"})
+_RELATIVE_EXPIRE = frozenset({"EX", "PX", "EXAT", "PXAT"})
+
+# число выполненных команд между сообщениями о прогрессе загрузки
+REPLAY_BATCH = 10_000
+
+
+class AofError(ValueError):
+    """Файл журнала или манифест поврежден."""
+
+
+def _pxat(storage: Any, key: str) -> Optional[str]:
+    when = storage.expire_time(key)
+    return None if when is None else str(int(when * 1000))
+
+
+def _set_effects(storage: Any, args: List[str], result: Any) -> List[List[str]]:
+    argv = ["SET", args[0], args[1]]
+    relative = False
+    i = 2
+    while i < len(args):
+        option = args[i].upper()
+        if option in _RELATIVE_EXPIRE:
+            relative = True
+            i += 2
+            continue
+        argv.append(args[i])
+        if option == "IFEQ":
+            argv.append(args[i + 1])
+            i += 1
+        i += 1
+    if relative:
+        when = _pxat(storage, args[0])
+        if when is not None:
+            argv += ["PXAT", when]
+    return [argv]
+
+
+def _expire_effects(storage: Any, args: List[str], result: Any) -> List[List[str]]:
+    when = _pxat(storage, args[0])
+    return [["PEXPIREAT", args[0], when] if when is not None else ["DEL", args[0]]]
+
+
+def _getex_effects(storage: Any, args: List[str], result: Any) -> List[List[str]]:
+    if len(args) > 1 and args[1].upper() in _RELATIVE_EXPIRE:
+        when = _pxat(storage, args[0])
+        return [["GETEX", args[0], "PXAT", when] if when is not None else ["DEL", args[0]]]
+    return [["GETEX", *args]]
+
+
+def _xadd_effects(storage: Any, args: List[str], result: Any) -> List[List[str]]:
+    # результат не ID записи: ошибка или NOMKSTREAM без потока, запись не добавлена
+    ms, sep, seq = result.partition("-") if isinstance(result, str) else ("", "", "")
+    if not (sep and ms.isdigit() and seq.isdigit()):
+        return []
+    # ID стоит после опций (разбор как в XADD) и заменяется фактическим
+    i = 1
+    while i < len(args):
+        option = args[i].upper()
+        if option == "NOMKSTREAM":
+            i += 1
+        elif option in ("MAXLEN", "MINID"):
+            i += 3 if args[i + 1] in ("=", "~") else 2
+            if i < len(args) and args[i].upper() == "LIMIT":
+                i += 2
+        else:
+            break
+    return [["XADD", *args[:i], result, *args[i + 1:]]]
+
+
+def _claim_effects(storage: Any, key: str, group_name: str, consumer: str,
+                   claimed: List[str], deleted: List[str]) -> List[List[str]]:
+    """
+    Переданные записи — XCLAIM каждой с фактическими временем доставки и
+    счетчиком (без проверки простоя), удаленные из stream — XACK.
+    """
+    group = storage.get_typed(key, Stream).groups[group_name]
+    effects = [["XGROUP", "CREATECONSUMER", key, group_name, consumer]]
+    for text in claimed:
+        entry = group.pel[parse_id(text)]
+        effects.append(["XCLAIM", key, group_name, consumer, "0", text, "TIME", str(entry.delivery_time),
+                        "RETRYCOUNT", str(entry.delivery_count), "FORCE", "JUSTID"])
+    if deleted:
+        effects.append(["XACK", key, group_name, *deleted])
+    return effects
+
+
+def _claimed_ids(entries: List[Any]) -> List[str]:
+    # JUSTID отвечает списком ID, иначе — парами [ID, поля]
+    return [entry if isinstance(entry, str) else entry[0] for entry in entries]
+
+
+def _xclaim_effects(storage: Any, args: List[str], result: Any) -> List[List[str]]:
+    if not isinstance(result, list):
+        return []
+    key, group_name = args[0], args[1]
+    claimed = _claimed_ids(result)
+    # записи, которых больше нет в stream, XCLAIM убирает из PEL
+    stream = storage.get_typed(key, Stream)
+    group = stream.groups[group_name]
+    deleted = []
+    for text in args[4:]:
+        try:
+            entry_id = parse_id(text)
+        except StreamIDError:
+            break
+        if entry_id not in group.pel and stream.get_entry(entry_id) is None:
+            deleted.append(format_id(entry_id))
+    effects = _claim_effects(storage, key, group_name, args[2], claimed, deleted)
+    if any(arg.upper() == "LASTID" for arg in args[4:]):
+        effects.append(["XGROUP", "SETID", key, group_name, format_id(group.last_id)])
+    return effects
+
+
+def _xautoclaim_effects(storage: Any, args: List[str], result: Any) -> List[List[str]]:
+    if not isinstance(result, list):
+        return []
+    return _claim_effects(storage, args[0], args[1], args[2], _claimed_ids(result[1]), result[2])
+
+
+def _ts_add_effects(storage: Any, args: List[str], result: Any) -> List[List[str]]:
+    if args[1] == "*":
+        return [["TS.ADD", args[0], str(result), *args[2:]]]
+    return [["TS.ADD", *args]]
+
+
+def _throttle_effects(storage: Any, args: List[str], result: Any) -> List[List[str]]:
+    found, tat = storage.get(args[0])
+    when = _pxat(storage, args[0])
+    if not found or when is None:
+        return [["DEL", args[0]]]
+    return [["SET", args[0], repr(tat), "PXAT", when]]
+
+
+def _function_effects(storage: Any, args: List[str], result: Any) -> List[List[str]]:
+    if args and args[0].upper() in FUNCTION_WRITES:
+        return [["FUNCTION", *args]]
+    return []
+
+
+def _fcall_effects(storage: Any, args: List[str], result: Any) -> List[List[str]]:
+    # команды функции уже записаны по одной при вложенных вызовах обработчика
+    return []
+
+
+# команды, записываемые в журнал не в исходном виде
+_EFFECTS: Dict[str, Callable[[Any, List[str], Any], List[List[str]]]] = {
+    "SET": _set_effects,
+    "EXPIRE": _expire_effects,
+    "GETEX": _getex_effects,
+    "XADD": _xadd_effects,
+    "XCLAIM": _xclaim_effects,
+    "XAUTOCLAIM": _xautoclaim_effects,
+    "TS.ADD": _ts_add_effects,
+    "CL.THROTTLE": _throttle_effects,
+    "FUNCTION": _function_effects,
+    "FCALL": _fcall_effects,
+}
+
+
+def command_effects(storage: Any, name: str, args: List[str], result: Any) -> List[List[str]]:
+    """
+    Команды для журнала, воспроизводящие эффект выполненной команды.
+
+    Args:
+        storage: Хранилище, в котором выполнена команда (для времени истечения)
+        name: Имя команды в верхнем регистре
+        args: Аргументы команды
+        result: Результат выполнения
+
+    Returns:
+        Список команд (имя и аргументы); пустой, если писать нечего
+    """
+    effects = _EFFECTS.get(name)
+    if effects is None:
+        return [[name, *args]]
+    return effects(storage, args, result)
+
+
+def encode_command(buffer: bytearray, argv: List[str]) -> None:
+    """Дописывает команду в буфер массивом RESP."""
+    buffer += b"*%d\r\n" % len(argv)
+    for arg in argv:
+        data = arg.encode('utf-8', errors='surrogatepass')
+        buffer += b"$%d\r\n" % len(data)
+        buffer += data
+        buffer += b"\r\n"
+
+
+class AppendOnlyFile:
+    """Открытый на дозапись файл команд с буфером и политикой fsync."""
+
+    def __init__(self, path: str, fsync: str = "everysec"):
+        self.path = path
+        self._fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        self.size = os.fstat(self._fd).st_size
+        self._buffer = bytearray()
+        self._lock = threading.Lock()
+        # база последней записанной команды (-1 — в файле еще не было SELECT)
+        self._db = -1
+        self.last_write_ok = True
+        # есть записанные, но не сброшенные на диск данные (для everysec)
+        self._unsynced = False
+        self._closed = threading.Event()
+        self._fsync_thread: Optional[threading.Thread] = None
+        self.fsync = "no"
+        self.set_fsync(fsync)
+
+    @property
+    def pending(self) -> bool:
+        """Есть ли команды, еще не записанные в файл."""
+        return bool(self._buffer)
+
+    @property
+    def buffer_length(self) -> int:
+        return len(self._buffer)
+
+    def set_fsync(self, policy: str) -> None:
+        """Меняет политику fsync; для everysec запускает фоновый поток."""
+        if policy not in FSYNC_POLICIES:
+            raise ValueError("appendfsync must be one of always, everysec, no")
+        self.fsync = policy
+        if policy == "everysec" and self._fsync_thread is None:
+            self._fsync_thread = threading.Thread(target=self._fsync_loop, name="aof-fsync", daemon=True)
+            self._fsync_thread.start()
+
+    def feed(self, db: int, commands: List[List[str]]) -> None:
+        """Добавляет команды базы db в буфер (с SELECT при смене базы)."""
+        with self._lock:
+            buffer = self._buffer
+            if db != self._db:
+                encode_command(buffer, ["SELECT", str(db)])
+                self._db = db
+            for argv in commands:
+                encode_command(buffer, argv)
+
+    def flush(self) -> bool:
+        """
+        Записывает накопленный буфер в файл одним вызовом write.
+
+        Returns:
+            False, если запись не удалась (незаписанные данные остаются в буфере)
+        """
+        with self._lock:
+            if not self._buffer:
+                return True
+            data, self._buffer = self._buffer, bytearray()
+        view = memoryview(data)
+        written = 0
+        try:
+            while written < len(data):
+                written += os.write(self._fd, view[written:])
+            if self.fsync == "always":
+                os.fsync(self._fd)
+            else:
+                self._unsynced = True
+        except OSError:
+            with self._lock:
+                self._buffer[:0] = data[written:]
+            self.last_write_ok = False
+            return False
+        finally:
+            self.size += written
+            view.release()
+        self.last_write_ok = True
+        return True
+
+    def _fsync_loop(self) -> None:
+        """Фоновый поток everysec: сбрасывает записанное на диск раз в секунду."""
+        while not self._closed.wait(1.0):
+            if self.fsync != "everysec":
+                continue
+            if self._unsynced:
+                self._unsynced = False
+                try:
+                    os.fsync(self._fd)
+                except OSError:
+                    self.last_write_ok = False
+
+    def close(self) -> None:
+        """Записывает буфер, сбрасывает файл на диск и закрывает его."""
+        self.flush()
+        self._closed.set()
+        if self._fsync_thread is not None:
+            self._fsync_thread.join()
+        try:
+            os.fsync(self._fd)
+        finally:
+            os.close(self._fd)
+
+
+class Manifest:
+    """Список файлов журнала: базовый снимок и файлы команд после него (имя, номер)."""
+
+    def __init__(self, base: Optional[Tuple[str, int]], incrs: List[Tuple[str, int]]):
+        self.base = base
+        self.incrs = incrs
+
+    @property
+    def seq(self) -> int:
+        """Наибольший номер файла в манифесте."""
+        return max([seq for _, seq in self.incrs] + ([self.base[1]] if self.base else [0]))
+
+    @classmethod
+    def read(cls, path: str) -> "Manifest":
+        """
+        Читает манифест.
+
+        Raises:
+            AofError: Если строка манифеста не разобрана
+        """
+        base, incrs = None, []
+        with open(path, encoding="utf-8") as file:
+            for line in file:
+                parts = line.split()
+                if not parts or parts[0].startswith("#"):
+                    continue
+                fields = dict(zip(parts[::2], parts[1::2]))
+                if len(parts) % 2 or "file" not in fields or fields.get("type") not in ("b", "i"):
+                    raise AofError(f"invalid manifest line: {line.strip()}")
+                entry = (fields["file"], int(fields.get("seq", 0)))
+                if fields["type"] == "b":
+                    base = entry
+                else:
+                    incrs.append(entry)
+        return cls(base, incrs)
+
+    def write(self, path: str) -> None:
+        """Атомарно заменяет манифест (временный файл, fsync, rename)."""
+        lines = []
+        if self.base is not None:
+            lines.append(f"file {self.base[0]} seq {self.base[1]} type b\n")
+        for name, seq in self.incrs:
+            lines.append(f"file {name} seq {seq} type i\n")
+        temp = path + ".tmp"
+        with open(temp, "w", encoding="utf-8") as file:
+            file.writelines(lines)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp, path)
+
+    def files(self) -> List[str]:
+        return ([self.base[0]] if self.base is not None else []) + [name for name, _ in self.incrs]
+
+
+def replay(data: Any, handlers: List[Any], progress: Optional[Callable[[int], None]] = None) -> Tuple[int, int]:
+    """
+    Выполняет команды журнала обработчиками баз.
+
+    Разбор идет прямо по буферу (обычно mmap файла); ответы команд не
+    форматируются. Незавершенная последняя команда (сбой посреди записи)
+    не выполняется; команды между MULTI и EXEC выполняются только после
+    EXEC, поэтому оборванная транзакция отбрасывается целиком.
+
+    Args:
+        data: Содержимое файла команд
+        handlers: Обработчики баз по номерам
+        progress: Вызывается с позицией в буфере каждые REPLAY_BATCH команд
+
+    Returns:
+        (число выполненных команд, длина целой части файла — до
+        незавершенной команды или транзакции)
+
+    Raises:
+        AofError: Если в файле не команда RESP
+    """
+    find = data.find
+    end = len(data)
+    pos = 0
+    db = 0
+    executed = 0
+    # команды открытой транзакции: (база, имя, аргументы); начало ее MULTI в файле
+    transaction: Optional[List[Tuple[int, str, List[str]]]] = None
+    multi_start = 0
+    while pos < end:
+        start = pos if transaction is None else multi_start
+        if data[pos] != 0x2A:  # '*'
+            raise AofError(f"invalid command at offset {pos}")
+        eol = find(b"\r\n", pos)
+        if eol < 0:
+            return executed, start
+        count = int(data[pos + 1:eol])
+        pos = eol + 2
+        argv = []
+        for _ in range(count):
+            eol = find(b"\r\n", pos)
+            if eol < 0:
+                return executed, start
+            if data[pos] != 0x24:  # '$'
+                raise AofError(f"invalid argument at offset {pos}")
+            size = int(data[pos + 1:eol])
+            pos = eol + 2 + size
+            if pos + 2 > end:
+                return executed, start
+            argv.append(str(data[eol + 2:pos], 'utf-8', 'surrogatepass'))
+            pos += 2
+        name = argv[0].upper()
+        if name == "SELECT":
+            db = int(argv[1])
+        elif name == "MULTI":
+            transaction, multi_start = [], start
+        elif name == "EXEC":
+            if transaction is None:
+                raise AofError(f"EXEC without MULTI at offset {start}")
+            for command_db, command, args in transaction:
+                handlers[command_db].handle(command, args)
+            executed += len(transaction)
+            transaction = None
+        elif transaction is not None:
+            transaction.append((db, name, argv[1:]))
+            continue
+        else:
+            handlers[db].handle(name, argv[1:])
+        executed += 1
+        if progress is not None and executed % REPLAY_BATCH == 0:
+            progress(pos)
+    if transaction is not None:
+        return executed, multi_start
+    return executed, pos
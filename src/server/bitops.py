@@ -0,0 +1,198 @@
+"""
+Векторизованные операции над битовыми картами.
+
+Подсчет бит и побитовые операции выполняются над большими срезами
+целиком (через int.from_bytes или NumPy, если он установлен), без
+поразрядных циклов на Python.
+"""
+from functools import reduce
+from typing import List, Optional, Sequence, Tuple, Union
+
+try:
+    import numpy as _np
+except ImportError:  # NumPy не обязателен
+    _np = None
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+# Размер среза для подсчета бит через int.from_bytes и поиска в BITPOS (байт)
+POPCOUNT_CHUNK = 1 << 20
+# Минимальный размер данных, начиная с которого используется NumPy (байт)
+NUMPY_THRESHOLD = 1 << 16
+
+BITOP_OPERATIONS = ("AND", "OR", "XOR", "NOT")
+
+if _np is not None:
+    _POPCOUNT_TABLE = _np.array([bin(i).count("1") for i in range(256)], dtype=_np.uint8)
+
+
+def normalize_range(start: int, end: int, length: int) -> Optional[Tuple[int, int]]:
+    """
+    Приводит индексы в стиле Redis (включительно, отрицательные от конца)
+    к диапазону [start, end] внутри length. Возвращает None для пустого диапазона.
+    """
+    if start < 0:
+        start = max(length + start, 0)
+    if end < 0:
+        end = max(length + end, 0)
+    end = min(end, length - 1)
+    if length == 0 or start > end:
+        return None
+    return start, end
+
+
+def count_bytes(data: Buffer) -> int:
+    """Возвращает количество установленных бит в data."""
+    view = memoryview(data)
+    size = len(view)
+    if _np is not None and size >= NUMPY_THRESHOLD:
+        array = _np.frombuffer(view, dtype=_np.uint8)
+        if hasattr(_np, "bitwise_count"):
+            return int(_np.bitwise_count(array).sum(dtype=_np.uint64))
+        return int(_POPCOUNT_TABLE[array].sum(dtype=_np.uint64))
+    total = 0
+    for offset in range(0, size, POPCOUNT_CHUNK):
+        total += int.from_bytes(view[offset:offset + POPCOUNT_CHUNK], "little").bit_count()
+    return total
+
+
+def bitcount(data: Buffer, start: Optional[int] = None, end: Optional[int] = None,
+             bit_unit: bool = False) -> int:
+    """
+    Подсчитывает установленные биты в диапазоне.
+
+    Args:
+        data: Буфер значения
+        start: Начало диапазона (None для всего значения)
+        end: Конец диапазона включительно
+        bit_unit: Диапазон задан в битах (BIT), иначе в байтах (BYTE)
+
+    Returns:
+        Количество установленных бит
+    """
+    if start is None:
+        return count_bytes(data)
+
+    length = len(data) * 8 if bit_unit else len(data)
+    bounds = normalize_range(start, end, length)
+    if bounds is None:
+        return 0
+    start, end = bounds
+    view = memoryview(data)
+    if not bit_unit:
+        return count_bytes(view[start:end + 1])
+
+    first_byte, last_byte = start >> 3, end >> 3
+    total = count_bytes(view[first_byte:last_byte + 1])
+    head_bits = start & 7
+    if head_bits:
+        total -= (view[first_byte] >> (8 - head_bits)).bit_count()
+    tail_bits = 7 - (end & 7)
+    if tail_bits:
+        total -= (view[last_byte] & ((1 << tail_bits) - 1)).bit_count()
+    return total
+
+
+def bitop(operation: str, buffers: Sequence[Buffer]) -> bytes:
+    """
+    Выполняет побитовую операцию над значениями.
+
+    Более короткие значения дополняются нулевыми байтами справа.
+
+    Args:
+        operation: AND, OR, XOR или NOT (NOT принимает ровно один буфер)
+        buffers: Исходные значения
+
+    Returns:
+        Результат длиной в самое длинное значение
+    """
+    operation = operation.upper()
+    if operation not in BITOP_OPERATIONS:
+        raise ValueError("syntax error")
+    if operation == "NOT" and len(buffers) != 1:
+        raise ValueError("BITOP NOT must be called with a single source key")
+
+    size = max((len(buf) for buf in buffers), default=0)
+    if size == 0:
+        return b""
+
+    if _np is not None and size >= NUMPY_THRESHOLD:
+        arrays = []
+        for buf in buffers:
+            array = _np.zeros(size, dtype=_np.uint8)
+            array[:len(buf)] = _np.frombuffer(memoryview(buf), dtype=_np.uint8)
+            arrays.append(array)
+        if operation == "NOT":
+            return _np.bitwise_not(arrays[0]).tobytes()
+        ufunc = {"AND": _np.bitwise_and, "OR": _np.bitwise_or, "XOR": _np.bitwise_xor}[operation]
+        return ufunc.reduce(arrays).tobytes()
+
+    values: List[int] = [
+        int.from_bytes(buf, "big") << (8 * (size - len(buf)))
+        for buf in buffers
+    ]
+    if operation == "NOT":
+        result = ~values[0] & ((1 << (8 * size)) - 1)
+    elif operation == "AND":
+        result = reduce(lambda a, b: a & b, values)
+    elif operation == "OR":
+        result = reduce(lambda a, b: a | b, values)
+    else:
+        result = reduce(lambda a, b: a ^ b, values)
+    return result.to_bytes(size, "big")
+
+
+def bitpos(data: Buffer, bit: int, start: Optional[int] = None, end: Optional[int] = None,
+           bit_unit: bool = False) -> int:
+    """
+    Возвращает позицию первого бита со значением bit.
+
+    Поиск ненулевого (или не 0xFF) байта выполняется через bytes.lstrip,
+    то есть в C, после чего позиция уточняется внутри найденного байта.
+
+    Args:
+        data: Буфер значения
+        bit: Искомое значение бита (0 или 1)
+        start: Начало диапазона (None для всего значения)
+        end: Конец диапазона включительно (None до конца значения)
+        bit_unit: Диапазон задан в битах (BIT), иначе в байтах (BYTE)
+
+    Returns:
+        Позиция бита или -1, если бит не найден
+    """
+    end_given = end is not None
+    length = len(data) * 8 if bit_unit else len(data)
+    if length == 0:
+        return -1 if bit else 0
+
+    bounds = normalize_range(start or 0, end if end_given else -1, length)
+    if bounds is None:
+        return -1
+    start, end = bounds
+    if bit_unit:
+        first_byte, last_byte = start >> 3, end >> 3
+    else:
+        first_byte, last_byte = start, end
+
+    view = memoryview(data)
+    head_mask = tail_mask = 0
+    if bit_unit:
+        # биты вне диапазона заполняются значением, которое не ищется
+        head_mask = (0xFF << (8 - (start & 7))) & 0xFF
+        tail_mask = (1 << (7 - (end & 7))) - 1
+
+    skip = b"\x00" if bit else b"\xff"
+    for offset in range(first_byte, last_byte + 1, POPCOUNT_CHUNK):
+        chunk = bytearray(view[offset:min(offset + POPCOUNT_CHUNK, last_byte + 1)])
+        if bit_unit and offset == first_byte:
+            chunk[0] = chunk[0] & ~head_mask & 0xFF if bit else chunk[0] | head_mask
+        if bit_unit and offset + len(chunk) == last_byte + 1:
+            chunk[-1] = chunk[-1] & ~tail_mask & 0xFF if bit else chunk[-1] | tail_mask
+        index = len(chunk) - len(chunk.lstrip(skip))
+        if index < len(chunk):
+            byte = chunk[index] if bit else ~chunk[index] & 0xFF
+            return (offset + index) * 8 + (8 - byte.bit_length())
+
+    if bit == 0 and not end_given:
+        return len(data) * 8
+    return -1
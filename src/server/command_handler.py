@@ -1,9 +1,10 @@
 """
 Обработчик команд: маршрутизация имен.
 """
-from typing import Dict, List, Tuple, Any
+from typing import Dict, List, Optional, Tuple, Any
 
-from .storage import Storage
+from .aof import SCHEMA_COMMANDS, TRANSACTION_COMMANDS
+from .storage import Storage, WrongTypeError
 from .commands.base_abstraction import Command, get_registered_commands
 # Импорт модулей команд для регистрации
 
@@ -11,11 +12,14 @@ from .commands.base_abstraction import Command, get_registered_commands
 class CommandFactory:
     """Фабрика для создания экземпляров команд с зависимостями."""
 
-    def __init__(self, storage: Storage):
+    def __init__(self, storage: Storage, handler: Optional["CommandHandler"] = None):
         self.storage = storage
+        self.handler = handler
 
     def create_command(self, command_cls: type[Command]) -> Command:
         """Создает экземпляр команды с необходимыми зависимостями."""
+        if command_cls.needs_handler:
+            return command_cls(self.storage, self.handler)
         return command_cls(self.storage)
 
 
@@ -25,7 +29,7 @@ class CommandHandler:
     def __init__(self, storage: Storage):
         self._storage = storage
         self._commands: Dict[str, Command] = {}
-        self._factory = CommandFactory(storage)
+        self._factory = CommandFactory(storage, self)
         self._register_defaults()
 
     def _register_defaults(self) -> None:
@@ -40,11 +44,39 @@ class CommandHandler:
         command = self._commands.get(name)
         if command is None:
             return False, f"ERR: unknown command '{name}'"
+        storage = self._storage
+        if storage.propagate is None:
+            return self._execute(command, args)
+
+        # команда записывающая, если изменила счетчик изменений не только
+        # удалением истекших ключей (их хранилище передает в журнал само)
+        dirty, expired = storage.dirty, storage.expired_keys
+        if name in TRANSACTION_COMMANDS:
+            with storage.persistence.transaction():
+                ok, result = self._execute(command, args)
+        else:
+            ok, result = self._execute(command, args)
+        if storage.dirty - dirty != storage.expired_keys - expired or (ok and name in SCHEMA_COMMANDS):
+            storage.propagate(storage, name, args, result)
+        return ok, result
+
+    @staticmethod
+    def _execute(command: Command, args: List[str]) -> Tuple[bool, Any]:
         try:
             return command.execute(args)
+        except WrongTypeError as exc:
+            return False, str(exc)
         except Exception as exc: 
             return False, f"ERR: {exc}"
 
+    def has_command(self, command_name: str) -> bool:
+        return command_name.upper() in self._commands
+
+    def noscript(self, command_name: str) -> bool:
+        """Команда недоступна из серверных функций."""
+        command = self._commands.get(command_name.upper())
+        return command is not None and command.noscript
+
     def register(self, name: str, command: Command) -> None:
         self._commands[name.upper()] = command
 
@@ -5,6 +5,33 @@ import shlex
 from typing import Any, List, Union
 
 
+class ErrorReply(str):
+    """Ошибка как элемент ответа-массива (например, результат команды внутри EXEC)."""
+
+
+class SimpleString(str):
+    """Статусный ответ (OK, QUEUED): в RESP3 — simple string, в RESP2 — bulk string."""
+
+
+class MapReply(list):
+    """Плоский список [ключ, значение, ...]: в RESP3 — map, в RESP2 — массив."""
+
+
+class SetReply(list):
+    """Неупорядоченный набор без повторов: в RESP3 — set, в RESP2 — массив."""
+
+
+class Push(list):
+    """Внеочередное сообщение (Pub/Sub, инвалидации): в RESP3 — push, в RESP2 — массив."""
+
+
+OK = SimpleString("OK")
+
+# байты двоичных значений, не являющиеся UTF-8, хранятся в тексте ответа
+# суррогатами и при кодировании возвращаются в исходном виде
+WIRE_ERRORS = "surrogateescape"
+
+
 class CommandParser:
     """Простой парсер команд и форматировщик ответов в стиле RESP."""
 
@@ -28,35 +55,76 @@ class CommandParser:
             return data.split()
 
     @staticmethod
-    def format_response(value: Any) -> str:
+    def format_response(value: Any, protocol: int = 2) -> str:
         """
         Форматирует значение в упрощённом RESP:
-        - None -> "$-1\r\n"
-        - int/bool -> ":<num>\r\n"
-        - str -> "$<len>\r\n<str>\r\n"
-        - list -> массив из элементов (рекурсивно)
+        - None -> "$-1\r\n" (RESP3: "_\r\n")
+        - bool -> ":1\r\n" / ":0\r\n" (RESP3: "#t\r\n" / "#f\r\n")
+        - int -> ":<num>\r\n"
+        - float -> bulk string (RESP3: ",<num>\r\n")
+        - ErrorReply -> "-<message>\r\n"
+        - SimpleString -> bulk string (RESP3: "+<str>\r\n")
+        - str -> "$<len>\r\n<str>\r\n", длина — в байтах UTF-8
+        - bytes/bytearray/memoryview -> bulk string с исходными байтами
+          (см. CommandParser.encode)
+        - list -> массив из элементов (рекурсивно); в RESP3 MapReply -> map,
+          SetReply -> set, Push -> push
         Остальные типы -> str(value) как bulk string
+
+        Args:
+            value: Значение ответа
+            protocol: Версия протокола соединения (2 или 3, см. HELLO)
         """
         if value is None:
-            return "$-1\r\n"
+            return "_\r\n" if protocol == 3 else "$-1\r\n"
 
         if isinstance(value, bool):
+            if protocol == 3:
+                return "#t\r\n" if value else "#f\r\n"
             return f":{1 if value else 0}\r\n"
 
         if isinstance(value, int):
             return f":{value}\r\n"
 
+        if isinstance(value, ErrorReply):
+            return CommandParser.format_error(value)
+
         if isinstance(value, str):
-            return f"${len(value)}\r\n{value}\r\n"
+            if protocol == 3 and isinstance(value, SimpleString):
+                return f"+{value}\r\n"
+            return f"${len(value.encode('utf-8', WIRE_ERRORS))}\r\n{value}\r\n"
+
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            data = bytes(value)
+            return f"${len(data)}\r\n{data.decode('utf-8', WIRE_ERRORS)}\r\n"
 
         if isinstance(value, list):
-            result = f"*{len(value)}\r\n"
-            for item in value:
-                result += CommandParser.format_response(item)
-            return result
+            if protocol != 3:
+                header = f"*{len(value)}\r\n"
+            elif isinstance(value, MapReply):
+                header = f"%{len(value) // 2}\r\n"
+            elif isinstance(value, SetReply):
+                header = f"~{len(value)}\r\n"
+            elif isinstance(value, Push):
+                header = f">{len(value)}\r\n"
+            else:
+                header = f"*{len(value)}\r\n"
+            return header + "".join(CommandParser.format_response(item, protocol) for item in value)
+
+        if protocol == 3 and isinstance(value, float):
+            if value != value:
+                return ",nan\r\n"
+            if value in (float("inf"), float("-inf")):
+                return ",inf\r\n" if value > 0 else ",-inf\r\n"
+            return f",{value!r}\r\n"
 
         text = str(value)
-        return f"${len(text)}\r\n{text}\r\n"
+        return f"${len(text.encode('utf-8', WIRE_ERRORS))}\r\n{text}\r\n"
+
+    @staticmethod
+    def encode(reply: str) -> bytes:
+        """Байты ответа для отправки клиенту (двоичные значения — без изменений)."""
+        return reply.encode('utf-8', WIRE_ERRORS)
 
     @staticmethod
     def format_error(message: str) -> str:
@@ -1 +1 @@
-from . import get, set, ttl
+from . import get, set, ttl, strings, bitmaps, hyperloglog, streams, stream_groups, geo, probabilistic, timeseries, json_document, hashes, search, rate_limit, server, functions, pubsub, persistence, replication
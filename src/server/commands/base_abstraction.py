@@ -3,12 +3,20 @@
 Позволяет серверу работать c командами полиморфно.
 """
 from abc import ABC, abstractmethod
-from typing import Any, List, Tuple, Dict, Type
+from dataclasses import dataclass
+from typing import Any, List, Tuple, Dict, Type, Optional
 
 
 class Command(ABC):
     """Абстрактная команда Redis-подобного севера."""
 
+    # команда получает обработчик команд вторым аргументом конструктора
+    # (нужно командам, которые сами выполняют другие команды)
+    needs_handler = False
+    # команда недоступна из серверных функций (redis.call): меняет состояние
+    # соединения или сервера либо сама вызывает функции
+    noscript = False
+
     @abstractmethod
     def execute(self, args: List[str]) -> Tuple[bool, Any]:
         """
@@ -35,6 +43,30 @@ class Command(ABC):
         return True
 
 
+@dataclass
+class BlockRequest:
+    """
+    Результат команды, которая должна дождаться появления данных.
+
+    Сервер паркует клиента в очередях ожидания по ключам keys и повторно
+    выполняет command с args, когда в один из ключей записываются данные,
+    либо отвечает null по истечении timeout.
+    """
+    keys: List[str]
+    timeout: Optional[float]  # секунды, None - ждать бесконечно
+    command: str
+    args: List[str]
+
+
+@dataclass
+class SelectDatabase:
+    """
+    Результат команды SELECT: сервер переключает соединение на базу index
+    и отвечает OK. Номер базы — состояние соединения, а не хранилища.
+    """
+    index: int
+
+
 _command_registry: Dict[str, Type[Command]] = {}
 
 
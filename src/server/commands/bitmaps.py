@@ -0,0 +1,228 @@
+"""
+Команды для работы с битовыми картами.
+"""
+from typing import List, Any, Tuple, Optional
+from .base_abstraction import Command, register_command
+from .. import bitops
+
+MAX_BIT_OFFSET = 2 ** 32 - 1
+
+
+def _parse_range_unit(args: List[str]) -> Tuple[Optional[str], bool]:
+    """Разбирает необязательный модификатор BYTE|BIT. Возвращает (ошибка, bit_unit)."""
+    if not args:
+        return None, False
+    unit = args[0].upper()
+    if len(args) > 1 or unit not in ("BYTE", "BIT"):
+        return "ERR: syntax error", False
+    return None, unit == "BIT"
+
+
+@register_command("SETBIT")
+class SetBitCommand(Command):
+    """Команда SETBIT для установки бита."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def execute(self, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет команду SETBIT.
+
+        Синтаксис: SETBIT key offset value
+
+        Args:
+            args: [key, offset, value]
+
+        Returns:
+            Tuple[bool, Any]: (успех, предыдущее значение бита)
+        """
+        if not self.validate_args(args, 3, 3):
+            return False, "ERR: wrong number of arguments for 'setbit' command"
+
+        try:
+            offset = int(args[1])
+        except ValueError:
+            return False, "ERR: bit offset is not an integer or out of range"
+        if offset < 0 or offset > MAX_BIT_OFFSET:
+            return False, "ERR: bit offset is not an integer or out of range"
+        if args[2] not in ("0", "1"):
+            return False, "ERR: bit is not an integer or out of range"
+
+        return True, self.storage.setbit(args[0], offset, int(args[2]))
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "SETBIT"
+
+
+@register_command("GETBIT")
+class GetBitCommand(Command):
+    """Команда GETBIT для чтения бита."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def execute(self, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет команду GETBIT.
+
+        Синтаксис: GETBIT key offset
+
+        Args:
+            args: [key, offset]
+
+        Returns:
+            Tuple[bool, Any]: (успех, значение бита)
+        """
+        if not self.validate_args(args, 2, 2):
+            return False, "ERR: wrong number of arguments for 'getbit' command"
+
+        try:
+            offset = int(args[1])
+        except ValueError:
+            return False, "ERR: bit offset is not an integer or out of range"
+        if offset < 0 or offset > MAX_BIT_OFFSET:
+            return False, "ERR: bit offset is not an integer or out of range"
+
+        return True, self.storage.getbit(args[0], offset)
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "GETBIT"
+
+
+@register_command("BITCOUNT")
+class BitCountCommand(Command):
+    """Команда BITCOUNT для подсчета установленных бит."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def execute(self, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет команду BITCOUNT.
+
+        Синтаксис: BITCOUNT key [start end [BYTE|BIT]]
+
+        Args:
+            args: [key, ...диапазон]
+
+        Returns:
+            Tuple[bool, Any]: (успех, количество установленных бит)
+        """
+        if not self.validate_args(args, 1, 4) or len(args) == 2:
+            return False, "ERR: wrong number of arguments for 'bitcount' command"
+
+        start = end = None
+        if len(args) >= 3:
+            try:
+                start = int(args[1])
+                end = int(args[2])
+            except ValueError:
+                return False, "ERR: value is not an integer or out of range"
+        error, bit_unit = _parse_range_unit(args[3:])
+        if error:
+            return False, error
+
+        buffer = self.storage.get_buffer(args[0])
+        if buffer is None:
+            return True, 0
+        return True, bitops.bitcount(buffer, start, end, bit_unit)
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "BITCOUNT"
+
+
+@register_command("BITPOS")
+class BitPosCommand(Command):
+    """Команда BITPOS для поиска первого бита с заданным значением."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def execute(self, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет команду BITPOS.
+
+        Синтаксис: BITPOS key bit [start [end [BYTE|BIT]]]
+
+        Args:
+            args: [key, bit, ...диапазон]
+
+        Returns:
+            Tuple[bool, Any]: (успех, позиция бита или -1)
+        """
+        if not self.validate_args(args, 2, 5):
+            return False, "ERR: wrong number of arguments for 'bitpos' command"
+
+        if args[1] not in ("0", "1"):
+            return False, "ERR: The bit argument must be 1 or 0."
+        bit = int(args[1])
+
+        start = end = None
+        try:
+            if len(args) >= 3:
+                start = int(args[2])
+            if len(args) >= 4:
+                end = int(args[3])
+        except ValueError:
+            return False, "ERR: value is not an integer or out of range"
+        error, bit_unit = _parse_range_unit(args[4:])
+        if error:
+            return False, error
+
+        buffer = self.storage.get_buffer(args[0])
+        if buffer is None:
+            return True, -1 if bit else 0
+        return True, bitops.bitpos(buffer, bit, start, end, bit_unit)
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "BITPOS"
+
+
+@register_command("BITOP")
+class BitOpCommand(Command):
+    """Команда BITOP для побитовых операций между ключами."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def execute(self, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет команду BITOP.
+
+        Синтаксис: BITOP AND|OR|XOR|NOT destkey key [key ...]
+
+        Args:
+            args: [operation, destkey, key1, ...]
+
+        Returns:
+            Tuple[bool, Any]: (успех, длина результата в байтах)
+        """
+        if not self.validate_args(args, 3):
+            return False, "ERR: wrong number of arguments for 'bitop' command"
+
+        operation = args[0].upper()
+        if operation not in bitops.BITOP_OPERATIONS:
+            return False, "ERR: syntax error"
+        if operation == "NOT" and len(args) != 3:
+            return False, "ERR: BITOP NOT must be called with a single source key."
+
+        destination = args[1]
+        buffers = []
+        for key in args[2:]:
+            buffer = self.storage.get_buffer(key)
+            buffers.append(buffer if buffer is not None else b"")
+        result = bitops.bitop(operation, buffers)
+        if result:
+            self.storage.set(destination, bytearray(result))
+        else:
+            self.storage.delete(destination)
+        return True, len(result)
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "BITOP"
@@ -0,0 +1,156 @@
+"""
+Команды серверных функций: FUNCTION и FCALL.
+"""
+from typing import List, Any, Tuple
+from .base_abstraction import BlockRequest, Command, register_command
+from ..command_parser import OK, ErrorReply
+from ..functions import FunctionError
+
+
+@register_command("FUNCTION")
+class FunctionCommand(Command):
+    """Команда FUNCTION для управления библиотеками функций."""
+
+    noscript = True
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def execute(self, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет команду FUNCTION.
+
+        Синтаксис:
+            FUNCTION LOAD [REPLACE] code
+            FUNCTION DELETE library
+            FUNCTION LIST [LIBRARYNAME pattern] [WITHCODE]
+            FUNCTION FLUSH
+            FUNCTION DUMP
+            FUNCTION RESTORE payload [FLUSH | APPEND | REPLACE]
+
+        Args:
+            args: [subcommand, ...]
+
+        Returns:
+            Tuple[bool, Any]: (успех, результат подкоманды)
+        """
+        if not self.validate_args(args, 1):
+            return False, "ERR: wrong number of arguments for 'function' command"
+
+        registry = self.storage.functions
+        subcommand = args[0].upper()
+        try:
+            if subcommand == "LOAD":
+                replace = len(args) == 3 and args[1].upper() == "REPLACE"
+                if len(args) != 2 and not replace:
+                    return False, "ERR: wrong number of arguments for 'function load' command"
+                return True, registry.load(args[-1], replace=replace)
+
+            if subcommand == "DELETE":
+                if len(args) != 2:
+                    return False, "ERR: wrong number of arguments for 'function delete' command"
+                if not registry.delete(args[1]):
+                    return False, "ERR: Library not found"
+                return True, OK
+
+            if subcommand == "LIST":
+                pattern, with_code = None, False
+                i = 1
+                while i < len(args):
+                    option = args[i].upper()
+                    if option == "WITHCODE":
+                        with_code = True
+                        i += 1
+                    elif option == "LIBRARYNAME" and i + 1 < len(args):
+                        pattern = args[i + 1]
+                        i += 2
+                    else:
+                        return False, "ERR: syntax error"
+                return True, registry.list(pattern, with_code)
+
+            if subcommand == "FLUSH":
+                registry.flush()
+                return True, OK
+
+            if subcommand == "DUMP":
+                return True, registry.dump()
+
+            if subcommand == "RESTORE":
+                if len(args) not in (2, 3):
+                    return False, "ERR: wrong number of arguments for 'function restore' command"
+                policy = args[2].upper() if len(args) == 3 else "APPEND"
+                if policy not in ("FLUSH", "APPEND", "REPLACE"):
+                    return False, "ERR: Wrong restore policy given"
+                registry.restore(args[1], policy)
+                return True, OK
+        except FunctionError as exc:
+            return False, f"ERR: {exc}"
+
+        return False, f"ERR: unknown subcommand '{args[0]}'"
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "FUNCTION"
+
+
+@register_command("FCALL")
+class FcallCommand(Command):
+    """Команда FCALL для вызова серверной функции."""
+
+    needs_handler = True
+    noscript = True
+
+    def __init__(self, storage, handler):
+        self.storage = storage
+        self.handler = handler
+
+    def execute(self, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет команду FCALL.
+
+        Синтаксис: FCALL function numkeys [key ...] [arg ...]
+
+        Функция выполняется целиком под блокировкой хранилища: команды других
+        клиентов не выполняются между ее шагами. Команды функции вызываются
+        через обработчик команд текущей базы напрямую.
+
+        Args:
+            args: [function, numkeys, keys..., args...]
+
+        Returns:
+            Tuple[bool, Any]: (успех, значение, возвращенное функцией)
+        """
+        if not self.validate_args(args, 2):
+            return False, "ERR: wrong number of arguments for 'fcall' command"
+
+        try:
+            numkeys = int(args[1])
+        except ValueError:
+            return False, "ERR: value is not an integer or out of range"
+        if numkeys < 0:
+            return False, "ERR: Number of keys can't be negative"
+        if numkeys > len(args) - 2:
+            return False, "ERR: Number of keys can't be greater than number of args"
+        keys, call_args = args[2:2 + numkeys], args[2 + numkeys:]
+
+        with self.storage.lock:
+            try:
+                result = self.storage.functions.call(args[0], self._run, keys, call_args)
+            except FunctionError as exc:
+                return False, f"ERR: {exc}"
+        if isinstance(result, ErrorReply):
+            return False, str(result)
+        return True, result
+
+    def _run(self, name: str, args: List[str]) -> Tuple[bool, Any]:
+        """Выполняет команду из функции; блокирующие команды не ждут."""
+        if self.handler.noscript(name):
+            return False, f"ERR: command '{name}' is not allowed from functions"
+        ok, result = self.handler.handle(name, args)
+        if ok and isinstance(result, BlockRequest):
+            return True, None
+        return ok, result
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "FCALL"
@@ -0,0 +1,345 @@
+"""
+Геопространственные команды поверх sorted set.
+"""
+import heapq
+from typing import List, Any, Tuple, Optional
+from .base_abstraction import Command, register_command
+from .. import geohash
+from ..sorted_set import SortedSet
+
+
+def parse_unit(text: str) -> float:
+    """Возвращает множитель единицы измерения в метры."""
+    factor = geohash.UNITS.get(text.upper())
+    if factor is None:
+        raise ValueError("unsupported unit provided. please use M, KM, FT, MI")
+    return factor
+
+
+def format_coordinate(value: float) -> str:
+    """Форматирует координату для ответа."""
+    return repr(value)
+
+
+def member_position(zset: Optional[SortedSet], member: str) -> Optional[Tuple[float, float]]:
+    """Возвращает (lon, lat) члена или None."""
+    if zset is None:
+        return None
+    score = zset.score(member)
+    if score is None:
+        return None
+    return geohash.decode(int(score))
+
+
+@register_command("GEOADD")
+class GeoAddCommand(Command):
+    """Команда GEOADD для добавления точек в геоиндекс."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def execute(self, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет команду GEOADD.
+
+        Синтаксис: GEOADD key [NX|XX] [CH] longitude latitude member [longitude latitude member ...]
+
+        Args:
+            args: [key, ...опции, lon1, lat1, member1, ...]
+
+        Returns:
+            Tuple[bool, Any]: (успех, количество добавленных (или измененных с CH) точек)
+        """
+        if not self.validate_args(args, 4):
+            return False, "ERR: wrong number of arguments for 'geoadd' command"
+
+        nx = xx = ch = False
+        i = 1
+        while i < len(args):
+            option = args[i].upper()
+            if option == "NX":
+                nx = True
+            elif option == "XX":
+                xx = True
+            elif option == "CH":
+                ch = True
+            else:
+                break
+            i += 1
+        if nx and xx:
+            return False, "ERR: XX and NX options at the same time are not compatible"
+        triples = args[i:]
+        if not triples or len(triples) % 3:
+            return False, "ERR: syntax error"
+
+        points = []
+        for j in range(0, len(triples), 3):
+            try:
+                lon, lat = float(triples[j]), float(triples[j + 1])
+            except ValueError:
+                return False, "ERR: value is not a valid float"
+            if not geohash.valid_coordinates(lon, lat):
+                return False, f"ERR: invalid longitude,latitude pair {lon:.6f},{lat:.6f}"
+            points.append((triples[j + 2], float(geohash.encode(lon, lat))))
+
+        key = args[0]
+        zset = self.storage.get_typed(key, SortedSet)
+        created = zset is None
+        if created:
+            if xx:
+                return True, 0
+            zset = SortedSet()
+            self.storage.set(key, zset)
+
+        changed = 0
+        updated = False
+        for member, score in points:
+            old = zset.score(member)
+            if (nx and old is not None) or (xx and old is None):
+                continue
+            if zset.add(member, score):
+                changed += 1
+            elif old != score:
+                updated = True
+                if ch:
+                    changed += 1
+        # новый ключ уже учтен в storage.set
+        if not created and (changed or updated):
+            self.storage.touch(key)
+        return True, changed
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "GEOADD"
+
+
+@register_command("GEOPOS")
+class GeoPosCommand(Command):
+    """Команда GEOPOS для получения координат точек."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def execute(self, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет команду GEOPOS.
+
+        Синтаксис: GEOPOS key [member ...]
+
+        Args:
+            args: [key, member1, ...]
+
+        Returns:
+            Tuple[bool, Any]: (успех, [[lon, lat] или None, ...])
+        """
+        if not self.validate_args(args, 1):
+            return False, "ERR: wrong number of arguments for 'geopos' command"
+
+        zset = self.storage.get_typed(args[0], SortedSet)
+        result = []
+        for member in args[1:]:
+            position = member_position(zset, member)
+            result.append(None if position is None else [format_coordinate(value) for value in position])
+        return True, result
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "GEOPOS"
+
+
+@register_command("GEODIST")
+class GeoDistCommand(Command):
+    """Команда GEODIST для вычисления расстояния между точками."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def execute(self, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет команду GEODIST.
+
+        Синтаксис: GEODIST key member1 member2 [M|KM|FT|MI]
+
+        Args:
+            args: [key, member1, member2, unit?]
+
+        Returns:
+            Tuple[bool, Any]: (успех, расстояние строкой или None)
+        """
+        if not self.validate_args(args, 3, 4):
+            return False, "ERR: wrong number of arguments for 'geodist' command"
+        try:
+            unit = parse_unit(args[3]) if len(args) == 4 else 1.0
+        except ValueError as exc:
+            return False, f"ERR: {exc}"
+
+        zset = self.storage.get_typed(args[0], SortedSet)
+        first = member_position(zset, args[1])
+        second = member_position(zset, args[2])
+        if first is None or second is None:
+            return True, None
+        return True, f"{geohash.distance(*first, *second) / unit:.4f}"
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "GEODIST"
+
+
+@register_command("GEOSEARCH")
+class GeoSearchCommand(Command):
+    """Команда GEOSEARCH для поиска точек в радиусе или прямоугольнике."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def execute(self, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет команду GEOSEARCH.
+
+        Синтаксис: GEOSEARCH key FROMMEMBER member | FROMLONLAT longitude latitude
+                   BYRADIUS radius M|KM|FT|MI | BYBOX width height M|KM|FT|MI
+                   [ASC|DESC] [COUNT count [ANY]] [WITHCOORD] [WITHDIST] [WITHHASH]
+
+        Область покрывается небольшим набором ячеек геохеша; сканируются
+        только диапазоны score этих ячеек, кандидаты фильтруются по
+        расстоянию.
+
+        Args:
+            args: [key, ...опции]
+
+        Returns:
+            Tuple[bool, Any]: (успех, список членов или [member, dist?, hash?, [lon, lat]?])
+        """
+        if not self.validate_args(args, 5):
+            return False, "ERR: wrong number of arguments for 'geosearch' command"
+
+        from_member = None
+        center = None
+        radius = None
+        box = None
+        unit = 1.0
+        order = None
+        count = None
+        any_match = False
+        with_coord = with_dist = with_hash = False
+        i = 1
+        try:
+            while i < len(args):
+                option = args[i].upper()
+                if option == "FROMMEMBER" and i + 1 < len(args):
+                    from_member = args[i + 1]
+                    i += 2
+                elif option == "FROMLONLAT" and i + 2 < len(args):
+                    center = (float(args[i + 1]), float(args[i + 2]))
+                    if not geohash.valid_coordinates(*center):
+                        return False, f"ERR: invalid longitude,latitude pair {center[0]:.6f},{center[1]:.6f}"
+                    i += 3
+                elif option == "BYRADIUS" and i + 2 < len(args):
+                    radius = float(args[i + 1])
+                    unit = parse_unit(args[i + 2])
+                    if radius < 0:
+                        return False, "ERR: radius cannot be negative"
+                    i += 3
+                elif option == "BYBOX" and i + 3 < len(args):
+                    box = (float(args[i + 1]), float(args[i + 2]))
+                    unit = parse_unit(args[i + 3])
+                    if box[0] < 0 or box[1] < 0:
+                        return False, "ERR: height or width cannot be negative"
+                    i += 4
+                elif option in ("ASC", "DESC"):
+                    order = option
+                    i += 1
+                elif option == "COUNT" and i + 1 < len(args):
+                    count = int(args[i + 1])
+                    if count <= 0:
+                        return False, "ERR: COUNT must be > 0"
+                    i += 2
+                    if i < len(args) and args[i].upper() == "ANY":
+                        any_match = True
+                        i += 1
+                elif option == "WITHCOORD":
+                    with_coord = True
+                    i += 1
+                elif option == "WITHDIST":
+                    with_dist = True
+                    i += 1
+                elif option == "WITHHASH":
+                    with_hash = True
+                    i += 1
+                else:
+                    return False, "ERR: syntax error"
+        except ValueError as exc:
+            message = str(exc)
+            if message.startswith("unsupported unit"):
+                return False, f"ERR: {message}"
+            return False, "ERR: value is not a valid float"
+
+        if (from_member is None) == (center is None):
+            return False, "ERR: exactly one of FROMMEMBER or FROMLONLAT can be specified"
+        if (radius is None) == (box is None):
+            return False, "ERR: exactly one of BYRADIUS and BYBOX arguments must be provided"
+
+        zset = self.storage.get_typed(args[0], SortedSet)
+        if from_member is not None:
+            center = member_position(zset, from_member)
+            if center is None:
+                if zset is None:
+                    return True, []
+                return False, "ERR: could not decode requested zset member"
+        if zset is None:
+            return True, []
+
+        if radius is not None:
+            radius_m = radius * unit
+            half_width = half_height = radius_m
+        else:
+            radius_m = None
+            width_m, height_m = box[0] * unit, box[1] * unit
+            half_width, half_height = width_m / 2, height_m / 2
+
+        center_lon, center_lat = center
+        matches = []
+        limit = count if any_match else None
+        for low, high in geohash.covering_ranges(center_lon, center_lat, half_width, half_height, radius_m):
+            for score, member in zset.irange_by_score(low, high):
+                lon, lat = geohash.decode(int(score))
+                if radius_m is not None:
+                    dist = geohash.distance(center_lon, center_lat, lon, lat)
+                    if dist > radius_m:
+                        continue
+                else:
+                    dist = geohash.in_box(lon, lat, center_lon, center_lat, width_m, height_m)
+                    if dist is None:
+                        continue
+                matches.append((dist, member, score, lon, lat))
+                if limit is not None and len(matches) >= limit:
+                    break
+            if limit is not None and len(matches) >= limit:
+                break
+
+        if count is not None and not any_match and order is None:
+            order = "ASC"
+        if order == "ASC":
+            matches = heapq.nsmallest(count, matches) if count is not None else sorted(matches)
+        elif order == "DESC":
+            matches = heapq.nlargest(count, matches) if count is not None else sorted(matches, reverse=True)
+        elif count is not None:
+            matches = matches[:count]
+
+        if not (with_coord or with_dist or with_hash):
+            return True, [match[1] for match in matches]
+        result = []
+        for dist, member, score, lon, lat in matches:
+            item: List[Any] = [member]
+            if with_dist:
+                item.append(f"{dist / unit:.4f}")
+            if with_hash:
+                item.append(int(score))
+            if with_coord:
+                item.append([format_coordinate(lon), format_coordinate(lat)])
+            result.append(item)
+        return True, result
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "GEOSEARCH"
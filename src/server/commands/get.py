@@ -1,5 +1,6 @@
 from typing import List, Any, Tuple
 from .base_abstraction import Command, register_command
+from .set import parse_expire_at
 
 
 @register_command("GET")
@@ -35,3 +36,139 @@ class GetCommand(Command):
     def get_name(self) -> str:
         """Возвращает имя команды."""
         return "GET"
+
+
+@register_command("MGET")
+class MGetCommand(Command):
+    """Команда MGET для получения значений нескольких ключей."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def execute(self, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет команду MGET.
+
+        Синтаксис: MGET key [key ...]
+
+        Все ключи читаются под одной блокировкой хранилища, ответ —
+        один массив.
+
+        Args:
+            args: [key1, key2, ...]
+
+        Returns:
+            Tuple[bool, Any]: (успех, список значений с None для отсутствующих ключей)
+        """
+        if not self.validate_args(args, 1):
+            return False, "ERR: wrong number of arguments for 'mget' command"
+
+        return True, self.storage.mget(args)
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "MGET"
+
+
+@register_command("GETEX")
+class GetExCommand(Command):
+    """Команда GETEX для чтения значения с одновременным изменением TTL."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def execute(self, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет команду GETEX.
+
+        Синтаксис: GETEX key [EX seconds|PX milliseconds|EXAT timestamp|PXAT timestamp-ms|PERSIST]
+
+        Чтение и изменение TTL выполняются одной операцией хранилища
+        (скользящее истечение сессий за один запрос).
+
+        Args:
+            args: [key, option?]
+
+        Returns:
+            Tuple[bool, Any]: (успех, значение или None)
+        """
+        if not self.validate_args(args, 1, 3):
+            return False, "ERR: wrong number of arguments for 'getex' command"
+
+        expire_at = None
+        persist = False
+        if len(args) > 1:
+            option = args[1].upper()
+            if option == "PERSIST" and len(args) == 2:
+                persist = True
+            elif option in ("EX", "PX", "EXAT", "PXAT") and len(args) == 3:
+                expire_at, error = parse_expire_at(option, args[2], "getex")
+                if error:
+                    return False, error
+            else:
+                return False, "ERR: syntax error"
+
+        return True, self.storage.getex(args[0], expire_at, persist)
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "GETEX"
+
+
+@register_command("GETDEL")
+class GetDelCommand(Command):
+    """Команда GETDEL для чтения и удаления значения."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def execute(self, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет команду GETDEL.
+
+        Синтаксис: GETDEL key
+
+        Args:
+            args: [key]
+
+        Returns:
+            Tuple[bool, Any]: (успех, удаленное значение или None)
+        """
+        if not self.validate_args(args, 1, 1):
+            return False, "ERR: wrong number of arguments for 'getdel' command"
+
+        return True, self.storage.getdel(args[0])
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "GETDEL"
+
+
+@register_command("GETSET")
+class GetSetCommand(Command):
+    """Команда GETSET для записи значения с возвратом прежнего."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def execute(self, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет команду GETSET (эквивалент SET key value GET; TTL сбрасывается).
+
+        Синтаксис: GETSET key value
+
+        Args:
+            args: [key, value]
+
+        Returns:
+            Tuple[bool, Any]: (успех, прежнее значение или None)
+        """
+        if not self.validate_args(args, 2, 2):
+            return False, "ERR: wrong number of arguments for 'getset' command"
+
+        _, old = self.storage.set_with_options(args[0], args[1], get=True)
+        return True, old
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "GETSET"
@@ -0,0 +1,184 @@
+"""
+Команды для работы с хэшами.
+"""
+from typing import List, Any, Tuple
+from .base_abstraction import Command, register_command
+from ..command_parser import MapReply
+
+
+@register_command("HSET")
+class HSetCommand(Command):
+    """Команда HSET для записи полей хэша."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def execute(self, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет команду HSET.
+
+        Синтаксис: HSET key field value [field value ...]
+
+        Args:
+            args: [key, field1, value1, ...]
+
+        Returns:
+            Tuple[bool, Any]: (успех, количество новых полей)
+        """
+        if not self.validate_args(args, 3) or len(args) % 2 == 0:
+            return False, "ERR: wrong number of arguments for 'hset' command"
+
+        mapping = dict(zip(args[1::2], args[2::2]))
+        return True, self.storage.hset(args[0], mapping)
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "HSET"
+
+
+@register_command("HGET")
+class HGetCommand(Command):
+    """Команда HGET для чтения поля хэша."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def execute(self, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет команду HGET.
+
+        Синтаксис: HGET key field
+
+        Args:
+            args: [key, field]
+
+        Returns:
+            Tuple[bool, Any]: (успех, значение поля или None)
+        """
+        if not self.validate_args(args, 2, 2):
+            return False, "ERR: wrong number of arguments for 'hget' command"
+
+        fields = self.storage.get_typed(args[0], dict)
+        return True, fields.get(args[1]) if fields is not None else None
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "HGET"
+
+
+@register_command("HMGET")
+class HMGetCommand(Command):
+    """Команда HMGET для чтения нескольких полей хэша."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def execute(self, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет команду HMGET.
+
+        Синтаксис: HMGET key field [field ...]
+
+        Args:
+            args: [key, field1, ...]
+
+        Returns:
+            Tuple[bool, Any]: (успех, список значений с None для отсутствующих полей)
+        """
+        if not self.validate_args(args, 2):
+            return False, "ERR: wrong number of arguments for 'hmget' command"
+
+        fields = self.storage.get_typed(args[0], dict) or {}
+        return True, [fields.get(field) for field in args[1:]]
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "HMGET"
+
+
+@register_command("HDEL")
+class HDelCommand(Command):
+    """Команда HDEL для удаления полей хэша."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def execute(self, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет команду HDEL.
+
+        Синтаксис: HDEL key field [field ...]
+
+        Args:
+            args: [key, field1, ...]
+
+        Returns:
+            Tuple[bool, Any]: (успех, количество удаленных полей)
+        """
+        if not self.validate_args(args, 2):
+            return False, "ERR: wrong number of arguments for 'hdel' command"
+
+        return True, self.storage.hdel(args[0], args[1:])
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "HDEL"
+
+
+@register_command("HGETALL")
+class HGetAllCommand(Command):
+    """Команда HGETALL для чтения всех полей хэша."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def execute(self, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет команду HGETALL.
+
+        Синтаксис: HGETALL key
+
+        Args:
+            args: [key]
+
+        Returns:
+            Tuple[bool, Any]: (успех, плоский список [field1, value1, ...])
+        """
+        if not self.validate_args(args, 1, 1):
+            return False, "ERR: wrong number of arguments for 'hgetall' command"
+
+        fields = self.storage.get_typed(args[0], dict) or {}
+        return True, MapReply([item for pair in fields.items() for item in pair])
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "HGETALL"
+
+
+@register_command("HLEN")
+class HLenCommand(Command):
+    """Команда HLEN для получения количества полей хэша."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def execute(self, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет команду HLEN.
+
+        Синтаксис: HLEN key
+
+        Args:
+            args: [key]
+
+        Returns:
+            Tuple[bool, Any]: (успех, количество полей)
+        """
+        if not self.validate_args(args, 1, 1):
+            return False, "ERR: wrong number of arguments for 'hlen' command"
+
+        return True, len(self.storage.get_typed(args[0], dict) or {})
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "HLEN"
@@ -0,0 +1,139 @@
+"""
+Команды HyperLogLog для приблизительного подсчета уникальных элементов.
+"""
+from typing import List, Any, Tuple
+from .base_abstraction import Command, register_command
+from ..command_parser import OK, WIRE_ERRORS
+from .. import hyperloglog as hll
+
+
+@register_command("PFADD")
+class PfAddCommand(Command):
+    """Команда PFADD для добавления элементов в HyperLogLog."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def execute(self, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет команду PFADD.
+
+        Синтаксис: PFADD key [element ...]
+
+        Args:
+            args: [key, element1, ...]
+
+        Returns:
+            Tuple[bool, Any]: (успех, 1 если оценка могла измениться, иначе 0)
+        """
+        if not self.validate_args(args, 1):
+            return False, "ERR: wrong number of arguments for 'pfadd' command"
+
+        key = args[0]
+        buffer = self.storage.get_buffer(key)
+        created = buffer is None
+        if created:
+            buffer = hll.new_sparse()
+            self.storage.set(key, buffer)
+        elif not hll.is_valid(buffer):
+            return False, hll.INVALID_HLL_ERROR
+
+        changed = hll.add(buffer, (element.encode('utf-8', WIRE_ERRORS) for element in args[1:]))
+        if changed and not created:
+            # новый ключ уже учтен set
+            self.storage.touch(key)
+        return True, 1 if created or changed else 0
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "PFADD"
+
+
+@register_command("PFCOUNT")
+class PfCountCommand(Command):
+    """Команда PFCOUNT для оценки количества уникальных элементов."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def execute(self, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет команду PFCOUNT.
+
+        Синтаксис: PFCOUNT key [key ...]
+
+        Для одного ключа результат кэшируется в заголовке значения до
+        следующего изменения; для нескольких ключей оценивается объединение.
+
+        Args:
+            args: [key1, ...]
+
+        Returns:
+            Tuple[bool, Any]: (успех, оценка кардинальности)
+        """
+        if not self.validate_args(args, 1):
+            return False, "ERR: wrong number of arguments for 'pfcount' command"
+
+        buffers = []
+        for key in args:
+            buffer = self.storage.get_buffer(key)
+            if buffer is None:
+                continue
+            if not hll.is_valid(buffer):
+                return False, hll.INVALID_HLL_ERROR
+            buffers.append(buffer)
+
+        if not buffers:
+            return True, 0
+        if len(args) == 1:
+            return True, hll.count(buffers[0])
+        return True, hll.estimate(hll.merge_registers(buffers))
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "PFCOUNT"
+
+
+@register_command("PFMERGE")
+class PfMergeCommand(Command):
+    """Команда PFMERGE для объединения нескольких HyperLogLog."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def execute(self, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет команду PFMERGE.
+
+        Синтаксис: PFMERGE destkey [sourcekey ...]
+
+        Args:
+            args: [destkey, sourcekey1, ...]
+
+        Returns:
+            Tuple[bool, Any]: (успех, "OK")
+        """
+        if not self.validate_args(args, 1):
+            return False, "ERR: wrong number of arguments for 'pfmerge' command"
+
+        destination = self.storage.get_buffer(args[0])
+        buffers = []
+        for key in args:
+            buffer = destination if key == args[0] else self.storage.get_buffer(key)
+            if buffer is None:
+                continue
+            if not hll.is_valid(buffer):
+                return False, hll.INVALID_HLL_ERROR
+            buffers.append(buffer)
+
+        merged = hll.from_registers(hll.merge_registers(buffers))
+        if destination is None:
+            self.storage.set(args[0], merged)
+        else:
+            destination[:] = merged
+            self.storage.touch(args[0])
+        return True, OK
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "PFMERGE"
@@ -0,0 +1,335 @@
+"""
+Команды для работы с JSON-документами.
+"""
+from typing import List, Any, Tuple, Optional
+from .base_abstraction import Command, register_command
+from ..command_parser import OK
+from ..json_document import JsonDocument, JsonPath, JsonPathError, parse_path, loads, json_type
+
+
+def path_missing_error(path: JsonPath) -> str:
+    """Текст ошибки для отсутствующего пути."""
+    return f"ERR: Path '{path.text}' does not exist"
+
+
+def _parse_path(text: str) -> Tuple[Optional[JsonPath], Optional[str]]:
+    try:
+        return parse_path(text), None
+    except JsonPathError as exc:
+        return None, f"ERR: {exc}"
+
+
+@register_command("JSON.SET")
+class JsonSetCommand(Command):
+    """Команда JSON.SET для записи документа или его части."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def execute(self, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет команду JSON.SET.
+
+        Синтаксис: JSON.SET key path value [NX|XX]
+
+        Новый документ создается только по корневому пути. Для вложенного
+        пути изменяются существующие значения или создается последний ключ
+        пути в существующих объектах; кэш сериализации сбрасывается только
+        на пути к измененному полю.
+
+        Args:
+            args: [key, path, value, NX|XX?]
+
+        Returns:
+            Tuple[bool, Any]: (успех, "OK" или None, если условие NX/XX не выполнено)
+        """
+        if not self.validate_args(args, 3, 4):
+            return False, "ERR: wrong number of arguments for 'json.set' command"
+
+        nx = xx = False
+        if len(args) == 4:
+            condition = args[3].upper()
+            if condition not in ("NX", "XX"):
+                return False, "ERR: syntax error"
+            nx, xx = condition == "NX", condition == "XX"
+
+        path, error = _parse_path(args[1])
+        if error:
+            return False, error
+        try:
+            value = loads(args[2])
+        except ValueError as exc:
+            return False, f"ERR: {exc}"
+
+        key = args[0]
+        document = self.storage.get_typed(key, JsonDocument)
+        if document is None:
+            if not path.is_root:
+                return False, "ERR: new objects must be created at the root"
+            if xx:
+                return True, None
+            self.storage.set(key, JsonDocument(value))
+            return True, OK
+        if path.is_root:
+            if nx:
+                return True, None
+            document.set_value(([], None), value)
+        elif not document.set_path(path, value, nx, xx):
+            return True, None
+        self.storage.touch(key)
+        return True, OK
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "JSON.SET"
+
+
+@register_command("JSON.GET")
+class JsonGetCommand(Command):
+    """Команда JSON.GET для чтения документа или его частей."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def execute(self, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет команду JSON.GET.
+
+        Синтаксис: JSON.GET key [path ...]
+
+        Для пути с `$` возвращается JSON-массив всех совпадений, для
+        устаревшего пути — одно значение. Для нескольких путей
+        возвращается объект {путь: результат}.
+
+        Args:
+            args: [key, path1, ...]
+
+        Returns:
+            Tuple[bool, Any]: (успех, JSON-строка или None)
+        """
+        if not self.validate_args(args, 1):
+            return False, "ERR: wrong number of arguments for 'json.get' command"
+
+        paths = []
+        for text in args[1:] or ["."]:
+            path, error = _parse_path(text)
+            if error:
+                return False, error
+            paths.append(path)
+
+        document = self.storage.get_typed(args[0], JsonDocument)
+        if document is None:
+            return True, None
+
+        results = []
+        for path in paths:
+            values = document.values(path)
+            if path.legacy:
+                if not values:
+                    return False, path_missing_error(path)
+                results.append(document.dumps(values[0]) if not path.is_root else document.dumps())
+            else:
+                parts = [document.dumps() if path.is_root else document.dumps(value) for value in values]
+                results.append("[" + ",".join(parts) + "]")
+        if len(paths) == 1:
+            return True, results[0]
+        return True, "{" + ",".join(
+            f"{document.dumps(path.text)}:{result}" for path, result in zip(paths, results)
+        ) + "}"
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "JSON.GET"
+
+
+@register_command("JSON.DEL")
+class JsonDelCommand(Command):
+    """Команда JSON.DEL для удаления документа или его частей."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def execute(self, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет команду JSON.DEL.
+
+        Синтаксис: JSON.DEL key [path]
+
+        Args:
+            args: [key, path?]
+
+        Returns:
+            Tuple[bool, Any]: (успех, количество удаленных значений)
+        """
+        if not self.validate_args(args, 1, 2):
+            return False, "ERR: wrong number of arguments for 'json.del' command"
+
+        path, error = _parse_path(args[1] if len(args) == 2 else "$")
+        if error:
+            return False, error
+        document = self.storage.get_typed(args[0], JsonDocument)
+        if document is None:
+            return True, 0
+        if path.is_root:
+            self.storage.delete(args[0])
+            return True, 1
+
+        matches = document.find(path)
+        # удаление с конца, чтобы индексы массивов оставались корректными
+        for match in sorted(matches, key=lambda item: item[1] if isinstance(item[1], int) else -1, reverse=True):
+            document.delete(match)
+        if matches:
+            self.storage.touch(args[0])
+        return True, len(matches)
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "JSON.DEL"
+
+
+@register_command("JSON.NUMINCRBY")
+class JsonNumIncrByCommand(Command):
+    """Команда JSON.NUMINCRBY для увеличения числовых значений."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def execute(self, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет команду JSON.NUMINCRBY.
+
+        Синтаксис: JSON.NUMINCRBY key path number
+
+        Args:
+            args: [key, path, number]
+
+        Returns:
+            Tuple[bool, Any]: (успех, новое значение или JSON-массив новых значений)
+        """
+        if not self.validate_args(args, 3, 3):
+            return False, "ERR: wrong number of arguments for 'json.numincrby' command"
+
+        path, error = _parse_path(args[1])
+        if error:
+            return False, error
+        try:
+            amount = loads(args[2])
+        except ValueError:
+            amount = None
+        if isinstance(amount, bool) or not isinstance(amount, (int, float)):
+            return False, "ERR: expected a number"
+
+        document = self.storage.get_typed(args[0], JsonDocument)
+        if document is None:
+            return False, "ERR: could not perform this operation on a key that doesn't exist"
+
+        matches = document.find(path)
+        if path.legacy:
+            if not matches:
+                return False, path_missing_error(path)
+            value = document.get(matches[0])
+            result = document.incr_number(matches[0], amount)
+            if result is None:
+                return False, f"ERR: wrong type of path value - expected a number but found {json_type(value)}"
+            self.storage.touch(args[0])
+            return True, document.dumps(result)
+        results = [document.incr_number(match, amount) for match in matches]
+        if any(value is not None for value in results):
+            self.storage.touch(args[0])
+        return True, "[" + ",".join(document.dumps(value) for value in results) + "]"
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "JSON.NUMINCRBY"
+
+
+@register_command("JSON.ARRAPPEND")
+class JsonArrAppendCommand(Command):
+    """Команда JSON.ARRAPPEND для добавления элементов в массив."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def execute(self, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет команду JSON.ARRAPPEND.
+
+        Синтаксис: JSON.ARRAPPEND key path value [value ...]
+
+        Args:
+            args: [key, path, value1, ...]
+
+        Returns:
+            Tuple[bool, Any]: (успех, новая длина или список длин для каждого совпадения)
+        """
+        if not self.validate_args(args, 3):
+            return False, "ERR: wrong number of arguments for 'json.arrappend' command"
+
+        path, error = _parse_path(args[1])
+        if error:
+            return False, error
+        try:
+            values = [loads(text) for text in args[2:]]
+        except ValueError as exc:
+            return False, f"ERR: {exc}"
+
+        document = self.storage.get_typed(args[0], JsonDocument)
+        if document is None:
+            return False, "ERR: could not perform this operation on a key that doesn't exist"
+
+        matches = document.find(path)
+        if path.legacy:
+            if not matches:
+                return False, path_missing_error(path)
+            value = document.get(matches[0])
+            length = document.array_append(matches[0], values)
+            if length is None:
+                return False, f"ERR: wrong type of path value - expected an array but found {json_type(value)}"
+            self.storage.touch(args[0])
+            return True, length
+        lengths = [document.array_append(match, values) for match in matches]
+        if any(length is not None for length in lengths):
+            self.storage.touch(args[0])
+        return True, lengths
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "JSON.ARRAPPEND"
+
+
+@register_command("JSON.TYPE")
+class JsonTypeCommand(Command):
+    """Команда JSON.TYPE для получения типа значения."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def execute(self, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет команду JSON.TYPE.
+
+        Синтаксис: JSON.TYPE key [path]
+
+        Args:
+            args: [key, path?]
+
+        Returns:
+            Tuple[bool, Any]: (успех, имя типа или список имен типов)
+        """
+        if not self.validate_args(args, 1, 2):
+            return False, "ERR: wrong number of arguments for 'json.type' command"
+
+        path, error = _parse_path(args[1] if len(args) == 2 else ".")
+        if error:
+            return False, error
+        document = self.storage.get_typed(args[0], JsonDocument)
+        if document is None:
+            return True, None
+        types = [json_type(value) for value in document.values(path)]
+        if path.legacy:
+            return True, types[0] if types else None
+        return True, types
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "JSON.TYPE"
@@ -0,0 +1,148 @@
+"""
+Команды сохранения данных на диск: SAVE, BGSAVE, LASTSAVE, BGREWRITEAOF.
+"""
+from typing import List, Any, Tuple
+from .base_abstraction import Command, register_command
+from ..command_parser import OK, SimpleString
+
+
+@register_command("SAVE")
+class SaveCommand(Command):
+    """Команда SAVE для синхронного сохранения снимка."""
+
+    noscript = True
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def execute(self, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет команду SAVE.
+
+        Синтаксис: SAVE
+
+        Снимок пишется под блокировками всех баз: остальные клиенты ждут
+        окончания записи. Для работающего сервера предпочтительнее BGSAVE.
+
+        Returns:
+            Tuple[bool, Any]: (успех, OK или сообщение об ошибке)
+        """
+        if not self.validate_args(args, 0, 0):
+            return False, "ERR: wrong number of arguments for 'save' command"
+
+        persistence = self.storage.persistence
+        if persistence.bgsave_in_progress:
+            return False, "ERR: Background save already in progress"
+        try:
+            persistence.save()
+        except OSError as exc:
+            return False, f"ERR: snapshot write failed: {exc.strerror or exc}"
+        return True, OK
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "SAVE"
+
+
+@register_command("BGSAVE")
+class BgSaveCommand(Command):
+    """Команда BGSAVE для сохранения снимка в дочернем процессе."""
+
+    noscript = True
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def execute(self, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет команду BGSAVE.
+
+        Синтаксис: BGSAVE
+
+        Returns:
+            Tuple[bool, Any]: (успех, "Background saving started" или сообщение об ошибке)
+        """
+        if not self.validate_args(args, 0, 0):
+            return False, "ERR: wrong number of arguments for 'bgsave' command"
+
+        if self.storage.persistence.aof_rewrite_in_progress:
+            return False, "ERR: Background append only file rewriting in progress"
+        try:
+            started = self.storage.persistence.bgsave()
+        except OSError as exc:
+            return False, f"ERR: can't fork: {exc.strerror or exc}"
+        if not started:
+            return False, "ERR: Background save already in progress"
+        return True, SimpleString("Background saving started")
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "BGSAVE"
+
+
+@register_command("LASTSAVE")
+class LastSaveCommand(Command):
+    """Команда LASTSAVE: время последнего успешного сохранения."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def execute(self, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет команду LASTSAVE.
+
+        Синтаксис: LASTSAVE
+
+        Returns:
+            Tuple[bool, Any]: (успех, Unix-время последнего сохранения)
+        """
+        if not self.validate_args(args, 0, 0):
+            return False, "ERR: wrong number of arguments for 'lastsave' command"
+        return True, self.storage.persistence.lastsave
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "LASTSAVE"
+
+
+@register_command("BGREWRITEAOF")
+class BgRewriteAofCommand(Command):
+    """Команда BGREWRITEAOF для перезаписи журнала команд в дочернем процессе."""
+
+    noscript = True
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def execute(self, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет команду BGREWRITEAOF.
+
+        Синтаксис: BGREWRITEAOF
+
+        Журнал заменяется снимком текущих данных и командами после него.
+        Если работает BGSAVE, перезапись начнется после его завершения.
+
+        Returns:
+            Tuple[bool, Any]: (успех, статус запуска или сообщение об ошибке)
+        """
+        if not self.validate_args(args, 0, 0):
+            return False, "ERR: wrong number of arguments for 'bgrewriteaof' command"
+
+        persistence = self.storage.persistence
+        if not persistence.appendonly:
+            return False, "ERR: Append only file is disabled, use CONFIG SET appendonly yes"
+        if persistence.aof_rewrite_in_progress:
+            return False, "ERR: Background append only file rewriting already in progress"
+        if persistence.child_active or persistence.aof is None:
+            persistence.aof_rewrite_scheduled = True
+            return True, SimpleString("Background append only file rewriting scheduled")
+        try:
+            persistence.bgrewriteaof()
+        except OSError as exc:
+            return False, f"ERR: can't rewrite the append only file: {exc.strerror or exc}"
+        return True, SimpleString("Background append only file rewriting started")
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "BGREWRITEAOF"
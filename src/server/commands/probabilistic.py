@@ -0,0 +1,518 @@
+"""
+Команды вероятностных структур: фильтр Блума (BF.*), Count-Min Sketch
+(CMS.*) и Top-K (TOPK.*).
+"""
+from typing import List, Any, Tuple
+from .base_abstraction import Command, register_command
+from ..command_parser import OK
+from ..probabilistic import (
+    ScalableBloomFilter, CountMinSketch, TopK, ProbabilisticError, hash_items,
+    TOPK_DEFAULT_WIDTH, TOPK_DEFAULT_DEPTH, TOPK_DEFAULT_DECAY,
+)
+
+
+@register_command("BF.RESERVE")
+class BfReserveCommand(Command):
+    """Команда BF.RESERVE для создания фильтра Блума с заданными параметрами."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def execute(self, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет команду BF.RESERVE.
+
+        Синтаксис: BF.RESERVE key error_rate capacity [EXPANSION expansion] [NONSCALING]
+
+        Args:
+            args: [key, error_rate, capacity, ...опции]
+
+        Returns:
+            Tuple[bool, Any]: (успех, "OK")
+        """
+        if not self.validate_args(args, 3, 6):
+            return False, "ERR: wrong number of arguments for 'bf.reserve' command"
+
+        expansion = 2
+        scaling = True
+        try:
+            error_rate = float(args[1])
+            capacity = int(args[2])
+            i = 3
+            while i < len(args):
+                option = args[i].upper()
+                if option == "NONSCALING":
+                    scaling = False
+                    i += 1
+                elif option == "EXPANSION" and i + 1 < len(args):
+                    expansion = int(args[i + 1])
+                    i += 2
+                else:
+                    return False, "ERR: syntax error"
+        except ValueError:
+            return False, "ERR: bad error rate or capacity"
+
+        if self.storage.get_typed(args[0], ScalableBloomFilter) is not None:
+            return False, "ERR: item exists"
+        try:
+            bloom = ScalableBloomFilter(error_rate, capacity, expansion, scaling)
+        except ProbabilisticError as exc:
+            return False, f"ERR: {exc}"
+        self.storage.set(args[0], bloom)
+        return True, OK
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "BF.RESERVE"
+
+
+class _BloomAddCommand(Command):
+    """Общая реализация BF.ADD и BF.MADD."""
+
+    multi = False
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def execute(self, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет команду BF.ADD/BF.MADD.
+
+        Синтаксис: BF.ADD key item
+                   BF.MADD key item [item ...]
+
+        Фильтр с параметрами по умолчанию создается при первом добавлении.
+        Все элементы хэшируются за один проход.
+
+        Args:
+            args: [key, item1, ...]
+
+        Returns:
+            Tuple[bool, Any]: (успех, 1/0 или список 1/0 для каждого элемента)
+        """
+        name = self.get_name().lower()
+        if not self.validate_args(args, 2, None if self.multi else 2):
+            return False, f"ERR: wrong number of arguments for '{name}' command"
+
+        bloom = self.storage.get_typed(args[0], ScalableBloomFilter)
+        created = bloom is None
+        if created:
+            bloom = ScalableBloomFilter()
+            self.storage.set(args[0], bloom)
+
+        result = []
+        try:
+            for pair in hash_items(args[1:]):
+                result.append(1 if bloom.add(pair) else 0)
+        except ProbabilisticError as exc:
+            if not self.multi:
+                return False, f"ERR: {exc}"
+            result.append(f"ERR: {exc}")
+        # новый фильтр уже учтен set
+        if not created and 1 in result:
+            self.storage.touch(args[0])
+        return True, result if self.multi else result[0]
+
+
+@register_command("BF.ADD")
+class BfAddCommand(_BloomAddCommand):
+    """Команда BF.ADD для добавления элемента в фильтр Блума."""
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "BF.ADD"
+
+
+@register_command("BF.MADD")
+class BfMAddCommand(_BloomAddCommand):
+    """Команда BF.MADD для добавления нескольких элементов в фильтр Блума."""
+
+    multi = True
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "BF.MADD"
+
+
+class _BloomExistsCommand(Command):
+    """Общая реализация BF.EXISTS и BF.MEXISTS."""
+
+    multi = False
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def execute(self, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет команду BF.EXISTS/BF.MEXISTS.
+
+        Синтаксис: BF.EXISTS key item
+                   BF.MEXISTS key item [item ...]
+
+        Args:
+            args: [key, item1, ...]
+
+        Returns:
+            Tuple[bool, Any]: (успех, 1/0 или список 1/0 для каждого элемента)
+        """
+        name = self.get_name().lower()
+        if not self.validate_args(args, 2, None if self.multi else 2):
+            return False, f"ERR: wrong number of arguments for '{name}' command"
+
+        bloom = self.storage.get_typed(args[0], ScalableBloomFilter)
+        if bloom is None:
+            result = [0] * (len(args) - 1)
+        else:
+            result = [1 if bloom.contains(pair) else 0 for pair in hash_items(args[1:])]
+        return True, result if self.multi else result[0]
+
+
+@register_command("BF.EXISTS")
+class BfExistsCommand(_BloomExistsCommand):
+    """Команда BF.EXISTS для проверки элемента в фильтре Блума."""
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "BF.EXISTS"
+
+
+@register_command("BF.MEXISTS")
+class BfMExistsCommand(_BloomExistsCommand):
+    """Команда BF.MEXISTS для проверки нескольких элементов в фильтре Блума."""
+
+    multi = True
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "BF.MEXISTS"
+
+
+class _CmsInitCommand(Command):
+    """Общая реализация CMS.INITBYDIM и CMS.INITBYPROB."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def create(self, first: str, second: str) -> CountMinSketch:
+        raise NotImplementedError
+
+    def execute(self, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет команду CMS.INITBYDIM/CMS.INITBYPROB.
+
+        Синтаксис: CMS.INITBYDIM key width depth
+                   CMS.INITBYPROB key error probability
+
+        Args:
+            args: [key, параметр1, параметр2]
+
+        Returns:
+            Tuple[bool, Any]: (успех, "OK")
+        """
+        if not self.validate_args(args, 3, 3):
+            return False, f"ERR: wrong number of arguments for '{self.get_name().lower()}' command"
+        if self.storage.get_typed(args[0], CountMinSketch) is not None:
+            return False, "ERR: CMS: key already exists"
+        try:
+            sketch = self.create(args[1], args[2])
+        except ProbabilisticError as exc:
+            return False, f"ERR: CMS: {exc}"
+        except ValueError:
+            return False, "ERR: CMS: invalid parameters"
+        self.storage.set(args[0], sketch)
+        return True, OK
+
+
+@register_command("CMS.INITBYDIM")
+class CmsInitByDimCommand(_CmsInitCommand):
+    """Команда CMS.INITBYDIM для создания Count-Min Sketch по размерам."""
+
+    def create(self, first: str, second: str) -> CountMinSketch:
+        return CountMinSketch(int(first), int(second))
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "CMS.INITBYDIM"
+
+
+@register_command("CMS.INITBYPROB")
+class CmsInitByProbCommand(_CmsInitCommand):
+    """Команда CMS.INITBYPROB для создания Count-Min Sketch по допустимой ошибке."""
+
+    def create(self, first: str, second: str) -> CountMinSketch:
+        return CountMinSketch.from_error(float(first), float(second))
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "CMS.INITBYPROB"
+
+
+@register_command("CMS.INCRBY")
+class CmsIncrByCommand(Command):
+    """Команда CMS.INCRBY для увеличения счетчиков элементов."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def execute(self, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет команду CMS.INCRBY.
+
+        Синтаксис: CMS.INCRBY key item increment [item increment ...]
+
+        Args:
+            args: [key, item1, increment1, ...]
+
+        Returns:
+            Tuple[bool, Any]: (успех, список новых оценок)
+        """
+        if not self.validate_args(args, 3) or len(args) % 2 == 0:
+            return False, "ERR: wrong number of arguments for 'cms.incrby' command"
+
+        items = args[1::2]
+        try:
+            increments = [int(value) for value in args[2::2]]
+        except ValueError:
+            return False, "ERR: CMS: Cannot parse number"
+        if any(value < 0 for value in increments):
+            return False, "ERR: CMS: Cannot parse number"
+
+        sketch = self.storage.get_typed(args[0], CountMinSketch)
+        if sketch is None:
+            return False, "ERR: CMS: key does not exist"
+        result = [sketch.increment(pair, amount) for pair, amount in zip(hash_items(items), increments)]
+        self.storage.touch(args[0])
+        return True, result
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "CMS.INCRBY"
+
+
+@register_command("CMS.QUERY")
+class CmsQueryCommand(Command):
+    """Команда CMS.QUERY для оценки количества элементов."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def execute(self, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет команду CMS.QUERY.
+
+        Синтаксис: CMS.QUERY key item [item ...]
+
+        Args:
+            args: [key, item1, ...]
+
+        Returns:
+            Tuple[bool, Any]: (успех, список оценок)
+        """
+        if not self.validate_args(args, 2):
+            return False, "ERR: wrong number of arguments for 'cms.query' command"
+
+        sketch = self.storage.get_typed(args[0], CountMinSketch)
+        if sketch is None:
+            return False, "ERR: CMS: key does not exist"
+        return True, [sketch.query(pair) for pair in hash_items(args[1:])]
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "CMS.QUERY"
+
+
+@register_command("TOPK.RESERVE")
+class TopkReserveCommand(Command):
+    """Команда TOPK.RESERVE для создания структуры Top-K."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def execute(self, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет команду TOPK.RESERVE.
+
+        Синтаксис: TOPK.RESERVE key topk [width depth decay]
+
+        Args:
+            args: [key, topk, ...]
+
+        Returns:
+            Tuple[bool, Any]: (успех, "OK")
+        """
+        if len(args) not in (2, 5):
+            return False, "ERR: wrong number of arguments for 'topk.reserve' command"
+
+        try:
+            k = int(args[1])
+            if len(args) == 5:
+                width, depth, decay = int(args[2]), int(args[3]), float(args[4])
+            else:
+                width, depth, decay = TOPK_DEFAULT_WIDTH, TOPK_DEFAULT_DEPTH, TOPK_DEFAULT_DECAY
+        except ValueError:
+            return False, "ERR: TopK: invalid parameters"
+
+        if self.storage.get_typed(args[0], TopK) is not None:
+            return False, "ERR: TopK: key already exists"
+        try:
+            topk = TopK(k, width, depth, decay)
+        except ProbabilisticError as exc:
+            return False, f"ERR: TopK: {exc}"
+        self.storage.set(args[0], topk)
+        return True, OK
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "TOPK.RESERVE"
+
+
+@register_command("TOPK.ADD")
+class TopkAddCommand(Command):
+    """Команда TOPK.ADD для учета элементов в Top-K."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def execute(self, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет команду TOPK.ADD.
+
+        Синтаксис: TOPK.ADD key item [item ...]
+
+        Args:
+            args: [key, item1, ...]
+
+        Returns:
+            Tuple[bool, Any]: (успех, для каждого элемента — вытесненный элемент или None)
+        """
+        if not self.validate_args(args, 2):
+            return False, "ERR: wrong number of arguments for 'topk.add' command"
+
+        topk = self.storage.get_typed(args[0], TopK)
+        if topk is None:
+            return False, "ERR: TopK: key does not exist"
+        items = args[1:]
+        result = [topk.add(item, pair) for item, pair in zip(items, hash_items(items))]
+        self.storage.touch(args[0])
+        return True, result
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "TOPK.ADD"
+
+
+@register_command("TOPK.INCRBY")
+class TopkIncrByCommand(Command):
+    """Команда TOPK.INCRBY для увеличения счетчиков элементов в Top-K."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def execute(self, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет команду TOPK.INCRBY.
+
+        Синтаксис: TOPK.INCRBY key item increment [item increment ...]
+
+        Args:
+            args: [key, item1, increment1, ...]
+
+        Returns:
+            Tuple[bool, Any]: (успех, для каждого элемента — вытесненный элемент или None)
+        """
+        if not self.validate_args(args, 3) or len(args) % 2 == 0:
+            return False, "ERR: wrong number of arguments for 'topk.incrby' command"
+
+        items = args[1::2]
+        try:
+            increments = [int(value) for value in args[2::2]]
+        except ValueError:
+            return False, "ERR: TopK: Cannot parse number"
+        if any(value < 1 or value > 100000 for value in increments):
+            return False, "ERR: TopK: increment must be an integer between 1 and 100000"
+
+        topk = self.storage.get_typed(args[0], TopK)
+        if topk is None:
+            return False, "ERR: TopK: key does not exist"
+        result = [
+            topk.add(item, pair, amount)
+            for item, pair, amount in zip(items, hash_items(items), increments)
+        ]
+        self.storage.touch(args[0])
+        return True, result
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "TOPK.INCRBY"
+
+
+@register_command("TOPK.QUERY")
+class TopkQueryCommand(Command):
+    """Команда TOPK.QUERY для проверки вхождения элементов в Top-K."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def execute(self, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет команду TOPK.QUERY.
+
+        Синтаксис: TOPK.QUERY key item [item ...]
+
+        Args:
+            args: [key, item1, ...]
+
+        Returns:
+            Tuple[bool, Any]: (успех, список 1/0)
+        """
+        if not self.validate_args(args, 2):
+            return False, "ERR: wrong number of arguments for 'topk.query' command"
+
+        topk = self.storage.get_typed(args[0], TopK)
+        if topk is None:
+            return False, "ERR: TopK: key does not exist"
+        return True, [1 if topk.query(item) else 0 for item in args[1:]]
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "TOPK.QUERY"
+
+
+@register_command("TOPK.LIST")
+class TopkListCommand(Command):
+    """Команда TOPK.LIST для получения элементов Top-K."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def execute(self, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет команду TOPK.LIST.
+
+        Синтаксис: TOPK.LIST key [WITHCOUNT]
+
+        Args:
+            args: [key, WITHCOUNT?]
+
+        Returns:
+            Tuple[bool, Any]: (успех, элементы по убыванию счетчика)
+        """
+        if not self.validate_args(args, 1, 2):
+            return False, "ERR: wrong number of arguments for 'topk.list' command"
+        with_count = len(args) == 2
+        if with_count and args[1].upper() != "WITHCOUNT":
+            return False, "ERR: syntax error"
+
+        topk = self.storage.get_typed(args[0], TopK)
+        if topk is None:
+            return False, "ERR: TopK: key does not exist"
+        result = []
+        for item, count in topk.items():
+            result.append(item)
+            if with_count:
+                result.append(count)
+        return True, result
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "TOPK.LIST"
@@ -0,0 +1,104 @@
+"""
+Команды публикации сообщений и сведений о подписках.
+
+SUBSCRIBE, PSUBSCRIBE и отписка меняют состояние соединения и
+выполняются TCP сервером; здесь — команды, не зависящие от соединения.
+"""
+from typing import List, Any, Tuple
+from .base_abstraction import Command, register_command
+from ..command_parser import MapReply, SimpleString
+
+PONG = SimpleString("PONG")
+
+
+@register_command("PUBLISH")
+class PublishCommand(Command):
+    """Команда PUBLISH для отправки сообщения в канал."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def execute(self, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет команду PUBLISH.
+
+        Синтаксис: PUBLISH channel message
+
+        Args:
+            args: [channel, message]
+
+        Returns:
+            Tuple[bool, Any]: (успех, число получивших сообщение подписчиков)
+        """
+        if not self.validate_args(args, 2, 2):
+            return False, "ERR: wrong number of arguments for 'publish' command"
+        return True, self.storage.pubsub.publish(args[0], args[1])
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "PUBLISH"
+
+
+@register_command("PUBSUB")
+class PubSubCommand(Command):
+    """Команда PUBSUB для получения сведений о каналах."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def execute(self, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет команду PUBSUB.
+
+        Синтаксис:
+            PUBSUB CHANNELS [pattern]
+            PUBSUB NUMSUB [channel ...]
+            PUBSUB NUMPAT
+
+        Args:
+            args: [subcommand, ...]
+
+        Returns:
+            Tuple[bool, Any]: (успех, результат подкоманды)
+        """
+        if not self.validate_args(args, 1):
+            return False, "ERR: wrong number of arguments for 'pubsub' command"
+
+        pubsub = self.storage.pubsub
+        subcommand = args[0].upper()
+        if subcommand == "CHANNELS" and len(args) <= 2:
+            return True, pubsub.channel_names(args[1] if len(args) == 2 else None)
+        if subcommand == "NUMSUB":
+            return True, MapReply([item for channel in args[1:] for item in (channel, pubsub.numsub(channel))])
+        if subcommand == "NUMPAT" and len(args) == 1:
+            return True, len(pubsub.patterns)
+        return False, f"ERR: unknown subcommand or wrong number of arguments for '{args[0]}'"
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "PUBSUB"
+
+
+@register_command("PING")
+class PingCommand(Command):
+    """Команда PING для проверки соединения."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def execute(self, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет команду PING.
+
+        Синтаксис: PING [message]
+
+        Returns:
+            Tuple[bool, Any]: (успех, "PONG" или message)
+        """
+        if not self.validate_args(args, 0, 1):
+            return False, "ERR: wrong number of arguments for 'ping' command"
+        return True, args[0] if args else PONG
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "PING"
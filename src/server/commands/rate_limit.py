@@ -0,0 +1,67 @@
+"""
+Команда ограничения частоты запросов (CL.THROTTLE).
+"""
+import math
+import time
+from typing import List, Any, Tuple
+from .base_abstraction import Command, register_command
+from ..rate_limit import throttle
+from ..storage import WrongTypeError
+
+
+@register_command("CL.THROTTLE")
+class ClThrottleCommand(Command):
+    """Команда CL.THROTTLE: проверка и учет запроса по алгоритму GCRA."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def execute(self, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет команду CL.THROTTLE.
+
+        Синтаксис: CL.THROTTLE key max_burst count period [quantity]
+
+        Разрешает count запросов за period секунд со всплеском до
+        max_burst + 1 запросов подряд. Ключ хранит одно число (TAT) и
+        истекает сам, когда лимит полностью восстановлен.
+
+        Args:
+            args: [key, max_burst, count, period, quantity?]
+
+        Returns:
+            Tuple[bool, Any]: (успех, [limited, limit, remaining, retry_after, reset_after]),
+            где limited — 0 или 1, а времена в секундах (retry_after = -1, если запрос допущен)
+        """
+        if not self.validate_args(args, 4, 5):
+            return False, "ERR: wrong number of arguments for 'cl.throttle' command"
+
+        try:
+            max_burst, count, period = int(args[1]), int(args[2]), int(args[3])
+            quantity = int(args[4]) if len(args) == 5 else 1
+        except ValueError:
+            return False, "ERR: value is not an integer or out of range"
+        if max_burst < 0 or count <= 0 or period <= 0 or quantity < 0:
+            return False, "ERR: invalid rate limit parameters"
+
+        key = args[0]
+        now = time.time()
+        tat = self.storage.get_typed(key, (float, str))
+        if isinstance(tat, str):
+            # TAT, восстановленный из журнала или потока репликации командой SET
+            try:
+                tat = float(tat)
+            except ValueError:
+                raise WrongTypeError()
+            if not math.isfinite(tat):
+                raise WrongTypeError()
+        result = throttle(tat, now, max_burst, count, period, quantity)
+        if not result.limited and result.reset_after > 0:
+            self.storage.set(key, result.tat, ttl=result.reset_after)
+
+        retry_after = math.ceil(result.retry_after) if result.retry_after >= 0 else -1
+        return True, [int(result.limited), result.limit, result.remaining, retry_after, math.ceil(result.reset_after)]
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "CL.THROTTLE"
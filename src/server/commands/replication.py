@@ -0,0 +1,91 @@
+"""
+Команды репликации: REPLICAOF (SLAVEOF), ROLE.
+
+PSYNC и REPLCONF выполняет сервер: они превращают соединение в связь с
+репликой.
+"""
+from typing import List, Any, Tuple
+from .base_abstraction import Command, register_command
+from ..command_parser import OK
+
+
+@register_command("SLAVEOF")
+@register_command("REPLICAOF")
+class ReplicaOfCommand(Command):
+    """Команда REPLICAOF для смены ведущего сервера."""
+
+    noscript = True
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def execute(self, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет команду REPLICAOF.
+
+        Синтаксис: REPLICAOF host port | REPLICAOF NO ONE
+
+        С адресом сервер становится репликой: подключается к ведущему в
+        фоне, получает его данные и дальше выполняет его поток команд.
+        NO ONE делает сервер ведущим, данные сохраняются.
+
+        Returns:
+            Tuple[bool, Any]: (успех, OK или сообщение об ошибке)
+        """
+        if not self.validate_args(args, 2, 2):
+            return False, "ERR: wrong number of arguments for 'replicaof' command"
+
+        replication = self.storage.replication
+        if args[0].upper() == "NO" and args[1].upper() == "ONE":
+            replication.replicaof(None)
+            return True, OK
+        try:
+            port = int(args[1])
+        except ValueError:
+            return False, "ERR: Invalid master port"
+        if not 0 < port < 65536:
+            return False, "ERR: Invalid master port"
+        replication.replicaof(args[0], port)
+        return True, OK
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "REPLICAOF"
+
+
+@register_command("ROLE")
+class RoleCommand(Command):
+    """Команда ROLE: роль сервера в репликации."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def execute(self, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет команду ROLE.
+
+        Синтаксис: ROLE
+
+        Returns:
+            Tuple[bool, Any]: (успех, ["master", смещение, [[адрес, порт, смещение], ...]]
+            или ["slave", адрес ведущего, порт, состояние связи, смещение])
+        """
+        if not self.validate_args(args, 0, 0):
+            return False, "ERR: wrong number of arguments for 'role' command"
+
+        replication = self.storage.replication
+        if replication.master_host is None:
+            replicas = [[link.address, str(link.port), str(link.ack_offset)]
+                        for link in replication.replicas if link.state == "online"]
+            return True, ["master", replication.offset, replicas]
+        if replication.link_up:
+            state = "connected"
+        elif replication.sync_in_progress:
+            state = "sync"
+        else:
+            state = "connect"
+        return True, ["slave", replication.master_host, replication.master_port, state, replication.offset]
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "ROLE"
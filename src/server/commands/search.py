@@ -0,0 +1,207 @@
+"""
+Команды вторичных индексов по хэшам (подмножество FT.*).
+"""
+from typing import List, Any, Tuple
+from .base_abstraction import Command, register_command
+from ..command_parser import OK, MapReply
+from ..search_index import SearchIndex, SearchError, parse_schema
+
+
+def _parse_count(text: str) -> int:
+    value = int(text)
+    if value < 0:
+        raise ValueError
+    return value
+
+
+@register_command("FT.CREATE")
+class FtCreateCommand(Command):
+    """Команда FT.CREATE для создания индекса по хэшам."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def execute(self, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет команду FT.CREATE.
+
+        Синтаксис: FT.CREATE index [ON HASH] [PREFIX count prefix ...] SCHEMA field type [SEPARATOR c] ...
+
+        Типы полей: NUMERIC, TAG, TEXT. Существующие хэши с подходящими
+        префиксами индексируются сразу, дальнейшие изменения попадают
+        в индекс при каждой записи.
+
+        Args:
+            args: [index, options..., SCHEMA, field, type, ...]
+
+        Returns:
+            Tuple[bool, Any]: (успех, "OK")
+        """
+        if not self.validate_args(args, 4):
+            return False, "ERR: wrong number of arguments for 'ft.create' command"
+
+        name = args[0]
+        if name in self.storage.indexes:
+            return False, "ERR: Index already exists"
+
+        prefixes: List[str] = []
+        i = 1
+        while i < len(args) and args[i].upper() != "SCHEMA":
+            option = args[i].upper()
+            if option == "ON" and i + 1 < len(args):
+                if args[i + 1].upper() != "HASH":
+                    return False, "ERR: only ON HASH indexes are supported"
+                i += 2
+            elif option == "PREFIX" and i + 1 < len(args):
+                try:
+                    count = _parse_count(args[i + 1])
+                except ValueError:
+                    return False, "ERR: bad PREFIX count"
+                prefixes = args[i + 2:i + 2 + count]
+                if len(prefixes) != count:
+                    return False, "ERR: syntax error"
+                i += 2 + count
+            else:
+                return False, "ERR: syntax error"
+        if i == len(args):
+            return False, "ERR: SCHEMA is required"
+
+        try:
+            fields = parse_schema(args[i + 1:])
+        except SearchError as exc:
+            return False, f"ERR: {exc}"
+        self.storage.add_index(SearchIndex(name, prefixes, fields))
+        return True, OK
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "FT.CREATE"
+
+
+@register_command("FT.SEARCH")
+class FtSearchCommand(Command):
+    """Команда FT.SEARCH для поиска по индексу."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def execute(self, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет команду FT.SEARCH.
+
+        Синтаксис: FT.SEARCH index query [NOCONTENT] [LIMIT offset num]
+
+        Запрос — условия через пробел, соединенные логическим И:
+        `@field:[min max]` (числовой диапазон, `(` — исключающая граница,
+        `-inf`/`+inf`), `@field:{tag1 | tag2}`, `@field:word`,
+        `@field:(word1 word2)`, слово без поля (по всем TEXT-полям), `*`.
+
+        Args:
+            args: [index, query, options...]
+
+        Returns:
+            Tuple[bool, Any]: (успех, [total, key1, [field, value, ...], ...])
+        """
+        if not self.validate_args(args, 2):
+            return False, "ERR: wrong number of arguments for 'ft.search' command"
+
+        index = self.storage.indexes.get(args[0])
+        if index is None:
+            return False, f"ERR: {args[0]}: no such index"
+
+        nocontent = False
+        offset, count = 0, 10
+        i = 2
+        while i < len(args):
+            option = args[i].upper()
+            if option == "NOCONTENT":
+                nocontent = True
+                i += 1
+            elif option == "LIMIT" and i + 2 < len(args):
+                try:
+                    offset, count = _parse_count(args[i + 1]), _parse_count(args[i + 2])
+                except ValueError:
+                    return False, "ERR: bad LIMIT arguments"
+                i += 3
+            else:
+                return False, "ERR: syntax error"
+
+        try:
+            total, keys = index.search(args[1], offset, count)
+        except SearchError as exc:
+            return False, f"ERR: {exc}"
+
+        result: List[Any] = [total]
+        for key in keys:
+            result.append(key)
+            if not nocontent:
+                fields = self.storage.get_typed(key, dict) or {}
+                result.append([item for pair in fields.items() for item in pair])
+        return True, result
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "FT.SEARCH"
+
+
+@register_command("FT.DROPINDEX")
+class FtDropIndexCommand(Command):
+    """Команда FT.DROPINDEX для удаления индекса (сами хэши не удаляются)."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def execute(self, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет команду FT.DROPINDEX.
+
+        Синтаксис: FT.DROPINDEX index
+
+        Args:
+            args: [index]
+
+        Returns:
+            Tuple[bool, Any]: (успех, "OK")
+        """
+        if not self.validate_args(args, 1, 1):
+            return False, "ERR: wrong number of arguments for 'ft.dropindex' command"
+
+        if self.storage.indexes.pop(args[0], None) is None:
+            return False, "ERR: Unknown Index name"
+        return True, OK
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "FT.DROPINDEX"
+
+
+@register_command("FT.INFO")
+class FtInfoCommand(Command):
+    """Команда FT.INFO для получения сведений об индексе."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def execute(self, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет команду FT.INFO.
+
+        Синтаксис: FT.INFO index
+
+        Args:
+            args: [index]
+
+        Returns:
+            Tuple[bool, Any]: (успех, плоский список сведений об индексе)
+        """
+        if not self.validate_args(args, 1, 1):
+            return False, "ERR: wrong number of arguments for 'ft.info' command"
+
+        index = self.storage.indexes.get(args[0])
+        if index is None:
+            return False, "ERR: Unknown Index name"
+        return True, MapReply(index.info())
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "FT.INFO"
@@ -0,0 +1,621 @@
+"""
+Команды управления логическими базами данных и сведения о сервере.
+"""
+import fnmatch
+import os
+import time
+from typing import List, Any, Tuple, Optional
+from .base_abstraction import Command, SelectDatabase, register_command
+from ..command_parser import OK, MapReply
+from .. import notifications
+from ..aof import FSYNC_POLICIES
+from ..persistence import format_save_params, parse_save_params
+
+
+def database_list(storage) -> List[Any]:
+    """Хранилища всех баз сервера (для отдельного хранилища — только оно само)."""
+    return storage.databases.storages if storage.databases is not None else [storage]
+
+
+def parse_db_index(storage, text: str) -> Tuple[Optional[int], Optional[str]]:
+    """Разбирает номер базы и проверяет, что такая база существует."""
+    try:
+        index = int(text)
+    except ValueError:
+        return None, "ERR: value is not an integer or out of range"
+    if not 0 <= index < len(database_list(storage)):
+        return None, "ERR: DB index is out of range"
+    return index, None
+
+
+@register_command("SELECT")
+class SelectCommand(Command):
+    """Команда SELECT для выбора базы данных соединения."""
+
+    noscript = True
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def execute(self, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет команду SELECT.
+
+        Синтаксис: SELECT index
+
+        Args:
+            args: [index]
+
+        Returns:
+            Tuple[bool, Any]: (успех, SelectDatabase для сервера)
+        """
+        if not self.validate_args(args, 1, 1):
+            return False, "ERR: wrong number of arguments for 'select' command"
+
+        index, error = parse_db_index(self.storage, args[0])
+        if error:
+            return False, error
+        return True, SelectDatabase(index)
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "SELECT"
+
+
+@register_command("SWAPDB")
+class SwapDbCommand(Command):
+    """Команда SWAPDB для атомарного обмена двух баз данных."""
+
+    noscript = True
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def execute(self, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет команду SWAPDB.
+
+        Синтаксис: SWAPDB index1 index2
+
+        Обмен выполняется за O(1) независимо от числа ключей: клиенты,
+        выбравшие одну из баз, сразу видят данные другой.
+
+        Args:
+            args: [index1, index2]
+
+        Returns:
+            Tuple[bool, Any]: (успех, "OK")
+        """
+        if not self.validate_args(args, 2, 2):
+            return False, "ERR: wrong number of arguments for 'swapdb' command"
+
+        first, error = parse_db_index(self.storage, args[0])
+        if error:
+            return False, error
+        second, error = parse_db_index(self.storage, args[1])
+        if error:
+            return False, error
+        if self.storage.databases is not None and first != second:
+            self.storage.databases.swap(first, second)
+        return True, OK
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "SWAPDB"
+
+
+@register_command("MOVE")
+class MoveCommand(Command):
+    """Команда MOVE для переноса ключа в другую базу данных."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def execute(self, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет команду MOVE.
+
+        Синтаксис: MOVE key db
+
+        Args:
+            args: [key, db]
+
+        Returns:
+            Tuple[bool, Any]: (успех, 1 если ключ перенесен, 0 если его нет или он есть в db)
+        """
+        if not self.validate_args(args, 2, 2):
+            return False, "ERR: wrong number of arguments for 'move' command"
+
+        index, error = parse_db_index(self.storage, args[1])
+        if error:
+            return False, error
+        target = database_list(self.storage)[index]
+        if target is self.storage:
+            return False, "ERR: source and destination objects are the same"
+        return True, int(self.storage.move(args[0], target))
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "MOVE"
+
+
+@register_command("DBSIZE")
+class DbSizeCommand(Command):
+    """Команда DBSIZE для получения числа ключей текущей базы."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def execute(self, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет команду DBSIZE.
+
+        Синтаксис: DBSIZE
+
+        Returns:
+            Tuple[bool, Any]: (успех, число ключей)
+        """
+        if not self.validate_args(args, 0, 0):
+            return False, "ERR: wrong number of arguments for 'dbsize' command"
+        return True, self.storage.size()
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "DBSIZE"
+
+
+@register_command("FLUSHDB")
+class FlushDbCommand(Command):
+    """Команда FLUSHDB для очистки текущей базы."""
+
+    noscript = True
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def execute(self, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет команду FLUSHDB.
+
+        Синтаксис: FLUSHDB
+
+        Returns:
+            Tuple[bool, Any]: (успех, "OK")
+        """
+        if not self.validate_args(args, 0, 0):
+            return False, "ERR: wrong number of arguments for 'flushdb' command"
+        self.storage.clear()
+        return True, OK
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "FLUSHDB"
+
+
+@register_command("FLUSHALL")
+class FlushAllCommand(Command):
+    """Команда FLUSHALL для очистки всех баз."""
+
+    noscript = True
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def execute(self, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет команду FLUSHALL.
+
+        Синтаксис: FLUSHALL
+
+        Returns:
+            Tuple[bool, Any]: (успех, "OK")
+        """
+        if not self.validate_args(args, 0, 0):
+            return False, "ERR: wrong number of arguments for 'flushall' command"
+        for storage in database_list(self.storage):
+            storage.clear()
+        return True, OK
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "FLUSHALL"
+
+
+def _persistence_section(storage) -> List[str]:
+    persistence = storage.persistence
+    in_progress = persistence.bgsave_in_progress
+    current = int(time.time() - persistence._child_started) if in_progress else -1
+    lines = ["# Persistence", f"loading:{int(persistence.loading)}"]
+    if persistence.loading:
+        total = persistence.loading_total_bytes
+        lines += [
+            f"loading_start_time:{int(persistence.loading_start_time)}",
+            f"loading_total_bytes:{total}",
+            f"loading_loaded_bytes:{persistence.loading_loaded_bytes}",
+            f"loading_loaded_perc:{persistence.loading_loaded_bytes * 100 / total if total else 0:.2f}",
+            f"loading_loaded_keys:{persistence.loading_loaded_keys}",
+            f"loading_eta_seconds:{persistence.loading_eta()}",
+        ]
+    return lines + [
+        f"rdb_changes_since_last_save:{persistence.changes_since_save}",
+        f"rdb_bgsave_in_progress:{int(in_progress)}",
+        f"rdb_last_save_time:{persistence.lastsave}",
+        f"rdb_last_bgsave_status:{'ok' if persistence.last_bgsave_ok else 'err'}",
+        f"rdb_last_bgsave_time_sec:{persistence.last_bgsave_seconds}",
+        f"rdb_current_bgsave_time_sec:{current}",
+        f"rdb_saves:{persistence.saves}",
+    ] + _aof_lines(persistence)
+
+
+def _aof_lines(persistence) -> List[str]:
+    aof = persistence.aof
+    in_progress = persistence.aof_rewrite_in_progress
+    current = int(time.time() - persistence._rewrite_started) if in_progress else -1
+    lines = [
+        f"aof_enabled:{int(persistence.appendonly)}",
+        f"aof_rewrite_in_progress:{int(in_progress)}",
+        f"aof_rewrite_scheduled:{int(persistence.aof_rewrite_scheduled)}",
+        f"aof_last_rewrite_time_sec:{persistence.aof_last_rewrite_seconds}",
+        f"aof_current_rewrite_time_sec:{current}",
+        f"aof_last_bgrewrite_status:{'ok' if persistence.aof_last_bgrewrite_ok else 'err'}",
+        f"aof_rewrites:{persistence.aof_rewrites}",
+        f"aof_last_write_status:{'ok' if aof is None or aof.last_write_ok else 'err'}",
+    ]
+    if aof is None:
+        return lines
+    return lines + [
+        f"aof_current_size:{persistence.aof_current_size}",
+        f"aof_base_size:{persistence.aof_base_size}",
+        f"aof_buffer_length:{aof.buffer_length}",
+    ]
+
+
+def _stats_section(storage) -> List[str]:
+    expired = sum(db.expired_keys for db in database_list(storage))
+    pubsub = storage.pubsub
+    return [
+        "# Stats",
+        f"expired_keys:{expired}",
+        f"pubsub_channels:{len(pubsub.channels)}",
+        f"pubsub_patterns:{len(pubsub.patterns)}",
+        f"client_output_buffer_limit_disconnections:{pubsub.dropped_subscribers}",
+        f"sync_full:{storage.replication.sync_full}",
+        f"sync_partial_ok:{storage.replication.sync_partial_ok}",
+        f"sync_partial_err:{storage.replication.sync_partial_err}",
+    ]
+
+
+def _replication_section(storage) -> List[str]:
+    replication = storage.replication
+    lines = ["# Replication", f"role:{replication.role}"]
+    if replication.master_host is not None:
+        last_io = int(time.time() - replication.master_last_io) if replication.link_up else -1
+        lines += [
+            f"master_host:{replication.master_host}",
+            f"master_port:{replication.master_port}",
+            f"master_link_status:{'up' if replication.link_up else 'down'}",
+            f"master_last_io_seconds_ago:{last_io}",
+            f"master_sync_in_progress:{int(replication.sync_in_progress)}",
+            f"slave_repl_offset:{replication.offset}",
+            f"slave_read_only:{int(replication.read_only)}",
+        ]
+    online = [link for link in replication.replicas if link.state == "online"]
+    lines.append(f"connected_slaves:{len(online)}")
+    for i, link in enumerate(replication.replicas):
+        lines.append(f"slave{i}:ip={link.address},port={link.port},state={link.state},"
+                     f"offset={link.ack_offset},lag={link.lag}")
+    backlog = replication.backlog
+    return lines + [
+        f"master_replid:{replication.replid}",
+        f"master_replid2:{replication.replid2}",
+        f"master_repl_offset:{replication.offset}",
+        f"second_repl_offset:{replication.second_replid_offset}",
+        f"repl_backlog_active:{int(backlog is not None)}",
+        f"repl_backlog_size:{replication.backlog_size}",
+        f"repl_backlog_first_byte_offset:{backlog.first_offset if backlog is not None else 0}",
+        f"repl_backlog_histlen:{backlog.histlen if backlog is not None else 0}",
+    ]
+
+
+def _keyspace_section(storage) -> List[str]:
+    lines = ["# Keyspace"]
+    for index, db in enumerate(database_list(storage)):
+        stats = db.stats()
+        if stats["keys"] or stats["expired_keys"]:
+            lines.append(
+                f"db{index}:keys={stats['keys']},expires={stats['expires']},"
+                f"avg_ttl={stats['avg_ttl']},expired_keys={stats['expired_keys']}"
+            )
+    return lines
+
+
+# секции INFO в порядке вывода: имя -> функция(storage) -> строки секции
+INFO_SECTIONS = {
+    "persistence": _persistence_section,
+    "stats": _stats_section,
+    "replication": _replication_section,
+    "keyspace": _keyspace_section,
+}
+
+
+@register_command("INFO")
+class InfoCommand(Command):
+    """Команда INFO для получения сведений о сервере."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def execute(self, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет команду INFO.
+
+        Синтаксис: INFO [section ...]
+
+        Секции: persistence (состояние сохранения снимков), stats (общее число истекших ключей, число каналов и шаблонов
+        Pub/Sub, число подписчиков, отключенных по лимиту буфера) и keyspace (для каждой
+        непустой базы — число ключей, ключей с TTL, средний TTL в мс и
+        число истекших ключей).
+
+        Args:
+            args: [section1, ...] (без аргументов — все секции)
+
+        Returns:
+            Tuple[bool, Any]: (успех, текст в формате "поле:значение" по строкам)
+        """
+        names = [name.lower() for name in args]
+        if not names or "all" in names or "everything" in names:
+            names = list(INFO_SECTIONS)
+        lines: List[str] = []
+        for name in names:
+            section = INFO_SECTIONS.get(name)
+            if section is not None:
+                if lines:
+                    lines.append("")
+                lines.extend(section(self.storage))
+        return True, "\r\n".join(lines) + "\r\n" if lines else ""
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "INFO"
+
+
+def _get_notify_events(storage) -> str:
+    return notifications.format_flags(storage.notify_flags)
+
+
+def _set_notify_events(storage, value: str) -> Optional[str]:
+    try:
+        flags = notifications.parse_flags(value)
+    except ValueError as exc:
+        return str(exc)
+    for db in database_list(storage):
+        db.notify_flags = flags
+    return None
+
+
+def _get_tracking_max_keys(storage) -> str:
+    return str(storage.tracking.max_keys)
+
+
+def _set_tracking_max_keys(storage, value: str) -> Optional[str]:
+    try:
+        max_keys = int(value)
+    except ValueError:
+        return "argument must be an integer"
+    if max_keys < 0:
+        return "argument must be positive"
+    storage.tracking.max_keys = max_keys
+    return None
+
+
+def _get_save(storage) -> str:
+    return format_save_params(storage.persistence.save_params)
+
+
+def _set_save(storage, value: str) -> Optional[str]:
+    try:
+        storage.persistence.save_params = parse_save_params(value)
+    except ValueError as exc:
+        return str(exc)
+    return None
+
+
+def _get_dir(storage) -> str:
+    return os.path.abspath(storage.persistence.dir)
+
+
+def _set_dir(storage, value: str) -> Optional[str]:
+    if not os.path.isdir(value):
+        return "No such directory"
+    storage.persistence.dir = value
+    return None
+
+
+def _get_dbfilename(storage) -> str:
+    return storage.persistence.dbfilename
+
+
+def _set_dbfilename(storage, value: str) -> Optional[str]:
+    if not value or os.path.basename(value) != value:
+        return "dbfilename can't be a path, just a filename"
+    storage.persistence.dbfilename = value
+    return None
+
+
+def _get_appendonly(storage) -> str:
+    return "yes" if storage.persistence.appendonly else "no"
+
+
+def _set_appendonly(storage, value: str) -> Optional[str]:
+    value = value.lower()
+    if value not in ("yes", "no"):
+        return "argument must be 'yes' or 'no'"
+    persistence = storage.persistence
+    persistence.appendonly = value == "yes"
+    try:
+        if persistence.appendonly:
+            # базовый снимок пишет дочерний процесс, сервер продолжает отвечать
+            persistence.enable_aof(background=True)
+        else:
+            persistence.disable_aof()
+    except OSError as exc:
+        persistence.appendonly = False
+        return f"can't open the append-only file: {exc.strerror or exc}"
+    return None
+
+
+def _get_appendfsync(storage) -> str:
+    return storage.persistence.appendfsync
+
+
+def _set_appendfsync(storage, value: str) -> Optional[str]:
+    value = value.lower()
+    if value not in FSYNC_POLICIES:
+        return "argument must be one of always, everysec, no"
+    persistence = storage.persistence
+    persistence.appendfsync = value
+    if persistence.aof is not None:
+        persistence.aof.set_fsync(value)
+    return None
+
+
+def _get_appendfilename(storage) -> str:
+    return storage.persistence.appendfilename
+
+
+def _get_appenddirname(storage) -> str:
+    return storage.persistence.appenddirname
+
+
+def _get_auto_aof_rewrite_percentage(storage) -> str:
+    return str(storage.persistence.auto_aof_rewrite_percentage)
+
+
+def _set_auto_aof_rewrite_percentage(storage, value: str) -> Optional[str]:
+    try:
+        percentage = int(value)
+    except ValueError:
+        return "argument must be an integer"
+    if percentage < 0:
+        return "argument must be positive"
+    storage.persistence.auto_aof_rewrite_percentage = percentage
+    return None
+
+
+def _get_auto_aof_rewrite_min_size(storage) -> str:
+    return str(storage.persistence.auto_aof_rewrite_min_size)
+
+
+def _set_auto_aof_rewrite_min_size(storage, value: str) -> Optional[str]:
+    try:
+        min_size = int(value)
+    except ValueError:
+        return "argument must be an integer"
+    if min_size < 0:
+        return "argument must be positive"
+    storage.persistence.auto_aof_rewrite_min_size = min_size
+    return None
+
+
+def _get_repl_backlog_size(storage) -> str:
+    return str(storage.replication.backlog_size)
+
+
+def _set_repl_backlog_size(storage, value: str) -> Optional[str]:
+    try:
+        size = int(value)
+    except ValueError:
+        return "argument must be an integer"
+    if size < 16 * 1024:
+        return "argument must be at least 16384"
+    storage.replication.set_backlog_size(size)
+    return None
+
+
+def _get_replica_read_only(storage) -> str:
+    return "yes" if storage.replication.read_only else "no"
+
+
+def _set_replica_read_only(storage, value: str) -> Optional[str]:
+    value = value.lower()
+    if value not in ("yes", "no"):
+        return "argument must be 'yes' or 'no'"
+    storage.replication.read_only = value == "yes"
+    return None
+
+
+def _immutable(storage, value: str) -> Optional[str]:
+    return "can't set immutable config"
+
+
+# параметры CONFIG: имя -> (функция чтения(storage), функция записи(storage, значение) -> ошибка)
+CONFIG_PARAMETERS = {
+    "notify-keyspace-events": (_get_notify_events, _set_notify_events),
+    "tracking-table-max-keys": (_get_tracking_max_keys, _set_tracking_max_keys),
+    "save": (_get_save, _set_save),
+    "dir": (_get_dir, _set_dir),
+    "dbfilename": (_get_dbfilename, _set_dbfilename),
+    "appendonly": (_get_appendonly, _set_appendonly),
+    "appendfsync": (_get_appendfsync, _set_appendfsync),
+    "appendfilename": (_get_appendfilename, _immutable),
+    "appenddirname": (_get_appenddirname, _immutable),
+    "auto-aof-rewrite-percentage": (_get_auto_aof_rewrite_percentage, _set_auto_aof_rewrite_percentage),
+    "auto-aof-rewrite-min-size": (_get_auto_aof_rewrite_min_size, _set_auto_aof_rewrite_min_size),
+    "repl-backlog-size": (_get_repl_backlog_size, _set_repl_backlog_size),
+    "replica-read-only": (_get_replica_read_only, _set_replica_read_only),
+}
+
+
+@register_command("CONFIG")
+class ConfigCommand(Command):
+    """Команда CONFIG для чтения и изменения параметров сервера."""
+
+    noscript = True
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def execute(self, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет команду CONFIG.
+
+        Синтаксис:
+            CONFIG GET pattern [pattern ...]
+            CONFIG SET parameter value [parameter value ...]
+
+        Args:
+            args: [GET|SET, ...]
+
+        Returns:
+            Tuple[bool, Any]: (успех, [параметр, значение, ...] для GET или "OK" для SET)
+        """
+        if not self.validate_args(args, 2):
+            return False, "ERR: wrong number of arguments for 'config' command"
+
+        subcommand = args[0].upper()
+        if subcommand == "GET":
+            result = MapReply()
+            for name, (getter, _) in CONFIG_PARAMETERS.items():
+                if any(fnmatch.fnmatchcase(name, pattern.lower()) for pattern in args[1:]):
+                    result += [name, getter(self.storage)]
+            return True, result
+
+        if subcommand == "SET":
+            pairs = args[1:]
+            if len(pairs) % 2:
+                return False, "ERR: wrong number of arguments for 'config set' command"
+            names = [name.lower() for name in pairs[::2]]
+            for name in names:
+                if name not in CONFIG_PARAMETERS:
+                    return False, f"ERR: Unknown option or number of arguments for CONFIG SET - '{name}'"
+            for name, value in zip(names, pairs[1::2]):
+                error = CONFIG_PARAMETERS[name][1](self.storage, value)
+                if error:
+                    return False, f"ERR: Invalid argument '{value}' for CONFIG SET '{name}' - {error}"
+            return True, OK
+
+        return False, f"ERR: unknown subcommand '{args[0]}'"
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "CONFIG"
@@ -1,5 +1,28 @@
-from typing import List, Any, Tuple
+import time
+from typing import List, Any, Tuple, Optional
 from .base_abstraction import Command, register_command
+from ..command_parser import OK
+
+
+# множитель к секундам для опций TTL; опции *AT задают абсолютное время
+_EXPIRE_UNITS = {"EX": 1.0, "PX": 0.001, "EXAT": 1.0, "PXAT": 0.001}
+
+
+def parse_expire_at(option: str, text: str, command: str) -> Tuple[Optional[float], Optional[str]]:
+    """
+    Переводит опцию EX/PX/EXAT/PXAT в абсолютное время истечения.
+
+    Returns:
+        (время истечения по time.time(), None) или (None, сообщение об ошибке)
+    """
+    try:
+        amount = float(text)
+    except ValueError:
+        return None, "ERR: value is not an integer or out of range"
+    if not 0 < amount < float("inf"):
+        return None, f"ERR: invalid expire time in '{command}' command"
+    seconds = amount * _EXPIRE_UNITS[option]
+    return (seconds if option.endswith("AT") else time.time() + seconds), None
 
 
 @register_command("SET")
@@ -13,51 +36,173 @@ class SetCommand(Command):
         """
         Выполняет команду SET.
         
-        Синтаксис: SET key value [EX seconds] [PX milliseconds]
+        Синтаксис: SET key value [NX|XX|IFEQ value] [GET] [EX seconds|PX milliseconds|EXAT timestamp|PXAT timestamp-ms|KEEPTTL]
+
+        Проверка условия, чтение прежнего значения и запись выполняются
+        одной операцией хранилища. IFEQ записывает значение, только если
+        текущее равно указанному (продление блокировки своим токеном).
         
         Args:
             args: [key, value, ...options]
             
         Returns:
-            Tuple[bool, Any]: (успех, результат)
+            Tuple[bool, Any]: (успех, "OK" или None, если условие не выполнено; с GET — прежнее значение)
         """
         if not self.validate_args(args, 2):
             return False, "ERR: wrong number of arguments for 'set' command"
         
         key = args[0]
         value = args[1]
-        
 
         ttl = None
+        expire_at = None
+        condition = None
+        if_equal = None
+        get = keep_ttl = False
         i = 2
         while i < len(args):
-            if args[i].upper() == "EX" and i + 1 < len(args):
-                # EX - время в секундах
+            option = args[i].upper()
+            if option in ("EX", "PX") and i + 1 < len(args) and expire_at is None and not keep_ttl:
+                # EX - время в секундах, PX - в миллисекундах
                 try:
-                    ttl = float(args[i + 1])
+                    ttl = float(args[i + 1]) * _EXPIRE_UNITS[option]
                     if ttl <= 0:
                         return False, "ERR: invalid expire time in 'set' command"
                 except ValueError:
                     return False, "ERR: value is not an integer or out of range"
+                expire_at = time.time() + ttl
                 i += 2
-            elif args[i].upper() == "PX" and i + 1 < len(args):
-                # PX - время в миллисекундах
-                try:
-                    ttl = float(args[i + 1]) / 1000.0  # Конвертируем в секунды
-                    if ttl <= 0:
-                        return False, "ERR: invalid expire time in 'set' command"
-                except ValueError:
-                    return False, "ERR: value is not an integer or out of range"
+            elif option in ("EXAT", "PXAT") and i + 1 < len(args) and expire_at is None and not keep_ttl:
+                expire_at, error = parse_expire_at(option, args[i + 1], "set")
+                if error:
+                    return False, error
                 i += 2
+            elif option == "KEEPTTL" and expire_at is None:
+                keep_ttl = True
+                i += 1
+            elif option in ("NX", "XX") and condition is None:
+                condition = option
+                i += 1
+            elif option == "IFEQ" and i + 1 < len(args) and condition is None:
+                condition = option
+                if_equal = args[i + 1]
+                i += 2
+            elif option == "GET":
+                get = True
+                i += 1
+            elif option in ("EX", "PX", "EXAT", "PXAT", "KEEPTTL", "NX", "XX", "IFEQ"):
+                return False, "ERR: syntax error"
             else:
                 return False, f"ERR: syntax error in 'set' command: unknown option '{args[i]}'"
 
-        success = self.storage.set(key, value, ttl)
-        if success:
-            return True, "OK"
-        else:
-            return False, "ERR: failed to set value"
+        if condition is None and not get and not keep_ttl and (expire_at is None or ttl is not None):
+            success = self.storage.set(key, value, ttl)
+            if success:
+                return True, OK
+            else:
+                return False, "ERR: failed to set value"
+
+        written, old = self.storage.set_with_options(
+            key, value, expire_at,
+            nx=condition == "NX", xx=condition == "XX", if_equal=if_equal, keep_ttl=keep_ttl, get=get,
+        )
+        if get:
+            return True, old
+        return True, OK if written else None
     
     def get_name(self) -> str:
         """Возвращает имя команды."""
         return "SET"
+
+
+@register_command("SETNX")
+class SetNxCommand(Command):
+    """Команда SETNX для установки значения, только если ключа нет."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def execute(self, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет команду SETNX.
+
+        Синтаксис: SETNX key value
+
+        Args:
+            args: [key, value]
+
+        Returns:
+            Tuple[bool, Any]: (успех, 1 если значение записано, иначе 0)
+        """
+        if not self.validate_args(args, 2, 2):
+            return False, "ERR: wrong number of arguments for 'setnx' command"
+
+        written, _ = self.storage.set_with_options(args[0], args[1], nx=True)
+        return True, int(written)
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "SETNX"
+
+
+@register_command("MSET")
+class MSetCommand(Command):
+    """Команда MSET для установки нескольких значений."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def execute(self, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет команду MSET.
+
+        Синтаксис: MSET key value [key value ...]
+
+        Все значения записываются под одной блокировкой хранилища.
+
+        Args:
+            args: [key1, value1, ...]
+
+        Returns:
+            Tuple[bool, Any]: (успех, "OK")
+        """
+        if not self.validate_args(args, 2) or len(args) % 2:
+            return False, "ERR: wrong number of arguments for 'mset' command"
+
+        self.storage.mset(dict(zip(args[::2], args[1::2])))
+        return True, OK
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "MSET"
+
+
+@register_command("MSETNX")
+class MSetNxCommand(Command):
+    """Команда MSETNX для установки значений, только если ни один ключ не существует."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def execute(self, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет команду MSETNX.
+
+        Синтаксис: MSETNX key value [key value ...]
+
+        Проверка и запись выполняются под одной блокировкой.
+
+        Args:
+            args: [key1, value1, ...]
+
+        Returns:
+            Tuple[bool, Any]: (успех, 1 если значения записаны, иначе 0)
+        """
+        if not self.validate_args(args, 2) or len(args) % 2:
+            return False, "ERR: wrong number of arguments for 'msetnx' command"
+
+        return True, int(self.storage.mset(dict(zip(args[::2], args[1::2])), only_new=True))
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "MSETNX"
@@ -0,0 +1,628 @@
+"""
+Команды групп потребителей stream.
+"""
+from typing import List, Any, Tuple, Optional
+from .base_abstraction import Command, BlockRequest, register_command
+from ..command_parser import OK
+from .streams import format_entries
+from ..consumer_groups import ConsumerGroup, now_ms
+from ..stream import (
+    Stream, StreamIDError, StreamID,
+    MIN_ID, MAX_ID, format_id, parse_id, parse_range_id, increment_id, decrement_id,
+)
+
+
+def nogroup_error(key: str, group: str) -> str:
+    """Текст ошибки для отсутствующего ключа или группы."""
+    return f"NOGROUP No such key '{key}' or consumer group '{group}'"
+
+
+def _parse_group_id(stream: Stream, text: str) -> StreamID:
+    """Разбирает ID группы: "$" означает последний ID stream."""
+    if text == "$":
+        return stream.last_id
+    return parse_id(text)
+
+
+@register_command("XGROUP")
+class XGroupCommand(Command):
+    """Команда XGROUP для управления группами потребителей."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def execute(self, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет команду XGROUP.
+
+        Синтаксис: XGROUP CREATE key group id|$ [MKSTREAM] [ENTRIESREAD n]
+                   XGROUP SETID key group id|$ [ENTRIESREAD n]
+                   XGROUP DESTROY key group
+                   XGROUP CREATECONSUMER key group consumer
+                   XGROUP DELCONSUMER key group consumer
+
+        Args:
+            args: [подкоманда, key, group, ...]
+
+        Returns:
+            Tuple[bool, Any]: (успех, результат подкоманды)
+        """
+        if not self.validate_args(args, 3):
+            return False, "ERR: wrong number of arguments for 'xgroup' command"
+
+        subcommand = args[0].upper()
+        key, group_name = args[1], args[2]
+        stream = self.storage.get_typed(key, Stream)
+
+        if subcommand == "CREATE":
+            if len(args) < 4:
+                return False, "ERR: wrong number of arguments for 'xgroup|create' command"
+            mkstream = False
+            entries_read = None
+            i = 4
+            while i < len(args):
+                option = args[i].upper()
+                if option == "MKSTREAM":
+                    mkstream = True
+                    i += 1
+                elif option == "ENTRIESREAD" and i + 1 < len(args):
+                    try:
+                        entries_read = int(args[i + 1])
+                    except ValueError:
+                        return False, "ERR: value is not an integer or out of range"
+                    i += 2
+                else:
+                    return False, "ERR: syntax error"
+            created = stream is None
+            if created:
+                if not mkstream:
+                    return False, ("ERR: The XGROUP subcommand requires the key to exist. "
+                                   "Note that for CREATE you may want to use the MKSTREAM option "
+                                   "to create an empty stream automatically.")
+                stream = Stream()
+            elif group_name in stream.groups:
+                return False, "BUSYGROUP Consumer Group name already exists"
+            try:
+                last_id = _parse_group_id(stream, args[3])
+            except StreamIDError as exc:
+                return False, f"ERR: {exc}"
+            stream.groups[group_name] = ConsumerGroup(group_name, last_id, entries_read)
+            if created:
+                self.storage.set(key, stream)
+            else:
+                self.storage.touch(key)
+            return True, OK
+
+        if stream is None:
+            return False, nogroup_error(key, group_name)
+        group = stream.groups.get(group_name)
+
+        if subcommand == "DESTROY":
+            if not self.validate_args(args, 3, 3):
+                return False, "ERR: wrong number of arguments for 'xgroup|destroy' command"
+            if stream.groups.pop(group_name, None) is None:
+                return True, 0
+            self.storage.touch(key)
+            return True, 1
+
+        if group is None:
+            return False, nogroup_error(key, group_name)
+
+        if subcommand == "SETID":
+            if len(args) not in (4, 6):
+                return False, "ERR: wrong number of arguments for 'xgroup|setid' command"
+            try:
+                last_id = _parse_group_id(stream, args[3])
+                entries_read = group.entries_read
+                if len(args) == 6:
+                    if args[4].upper() != "ENTRIESREAD":
+                        return False, "ERR: syntax error"
+                    entries_read = int(args[5])
+            except StreamIDError as exc:
+                return False, f"ERR: {exc}"
+            except ValueError:
+                return False, "ERR: value is not an integer or out of range"
+            group.last_id, group.entries_read = last_id, entries_read
+            self.storage.touch(key)
+            return True, OK
+
+        if subcommand == "CREATECONSUMER":
+            if not self.validate_args(args, 4, 4):
+                return False, "ERR: wrong number of arguments for 'xgroup|createconsumer' command"
+            if args[3] in group.consumers:
+                return True, 0
+            group.get_consumer(args[3])
+            self.storage.touch(key)
+            return True, 1
+
+        if subcommand == "DELCONSUMER":
+            if not self.validate_args(args, 4, 4):
+                return False, "ERR: wrong number of arguments for 'xgroup|delconsumer' command"
+            if args[3] not in group.consumers:
+                return True, 0
+            pending = group.delete_consumer(args[3])
+            self.storage.touch(key)
+            return True, pending
+
+        return False, f"ERR: unknown subcommand '{args[0]}'"
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "XGROUP"
+
+
+@register_command("XREADGROUP")
+class XReadGroupCommand(Command):
+    """Команда XREADGROUP для чтения записей от имени потребителя группы."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def execute(self, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет команду XREADGROUP.
+
+        Синтаксис: XREADGROUP GROUP group consumer [COUNT count] [BLOCK milliseconds]
+                   [NOACK] STREAMS key [key ...] id [id ...]
+
+        ID ">" доставляет новые записи после last-delivered ID группы и
+        добавляет их в PEL; любой другой ID возвращает историю ожидающих
+        записей потребителя.
+
+        Args:
+            args: [GROUP, group, consumer, ...опции, STREAMS, key1, ..., id1, ...]
+
+        Returns:
+            Tuple[bool, Any]: (успех, [[key, записи], ...] или None)
+        """
+        if len(args) < 6 or args[0].upper() != "GROUP":
+            return False, "ERR: wrong number of arguments for 'xreadgroup' command"
+
+        group_name, consumer_name = args[1], args[2]
+        count = None
+        block = None
+        noack = False
+        i = 3
+        try:
+            while i < len(args) and args[i].upper() != "STREAMS":
+                option = args[i].upper()
+                if option == "NOACK":
+                    noack = True
+                    i += 1
+                    continue
+                if option == "COUNT" and i + 1 < len(args):
+                    count = max(int(args[i + 1]), 0) or None
+                elif option == "BLOCK" and i + 1 < len(args):
+                    block = int(args[i + 1])
+                    if block < 0:
+                        return False, "ERR: timeout is negative"
+                else:
+                    return False, "ERR: syntax error"
+                i += 2
+        except ValueError:
+            return False, "ERR: value is not an integer or out of range"
+
+        rest = args[i + 1:]
+        if i >= len(args) or not rest or len(rest) % 2:
+            return False, ("ERR: Unbalanced 'xreadgroup' list of streams: for each stream key "
+                           "an ID or '>' must be specified.")
+        half = len(rest) // 2
+        keys, id_args = rest[:half], rest[half:]
+
+        targets = []
+        try:
+            for key, id_arg in zip(keys, id_args):
+                stream = self.storage.get_typed(key, Stream)
+                self.storage.touch(key)
+                group = stream.groups.get(group_name) if stream is not None else None
+                if group is None:
+                    return False, nogroup_error(key, group_name)
+                start = None if id_arg == ">" else parse_id(id_arg)
+                targets.append((key, stream, group, start))
+        except StreamIDError as exc:
+            return False, f"ERR: {exc}"
+
+        now = now_ms()
+        result = []
+        only_new = True
+        for key, stream, group, start in targets:
+            consumer = group.get_consumer(consumer_name)
+            consumer.seen_time = now
+            if start is None:
+                entries = self._deliver_new(stream, group, consumer, count, noack, now)
+                if entries:
+                    result.append([key, format_entries(entries)])
+            else:
+                only_new = False
+                result.append([key, self._read_history(stream, group, consumer, start, count, now)])
+
+        if result:
+            return True, result
+        if block is None or not only_new:
+            return True, None
+        return True, BlockRequest(
+            keys=keys,
+            timeout=block / 1000.0 if block else None,
+            command="XREADGROUP",
+            args=list(args),
+        )
+
+    @staticmethod
+    def _deliver_new(stream: Stream, group: ConsumerGroup, consumer, count: Optional[int],
+                     noack: bool, now: int) -> List[Any]:
+        """Доставляет записи после last-delivered ID группы."""
+        if stream.last_id <= group.last_id:
+            return []
+        entries = stream.range(increment_id(group.last_id), MAX_ID, count)
+        if not entries:
+            return []
+        group.last_id = entries[-1][0]
+        if group.entries_read is not None:
+            group.entries_read += len(entries)
+        consumer.active_time = now
+        if not noack:
+            for entry_id, _ in entries:
+                group.deliver(entry_id, consumer, now)
+        return entries
+
+    @staticmethod
+    def _read_history(stream: Stream, group: ConsumerGroup, consumer, start: StreamID,
+                      count: Optional[int], now: int) -> List[Any]:
+        """Возвращает ожидающие записи потребителя с ID > start."""
+        result = []
+        first = increment_id(start) if start != MIN_ID else MIN_ID
+        if first is None:
+            return result
+        for entry_id in list(group.iter_consumer_pending(consumer, first)):
+            if count is not None and len(result) >= count:
+                break
+            values = stream.get_entry(entry_id)
+            group.deliver(entry_id, consumer, now)
+            result.append([format_id(entry_id), list(values) if values is not None else None])
+        return result
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "XREADGROUP"
+
+
+@register_command("XACK")
+class XAckCommand(Command):
+    """Команда XACK для подтверждения обработки записей."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def execute(self, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет команду XACK.
+
+        Синтаксис: XACK key group id [id ...]
+
+        Args:
+            args: [key, group, id1, ...]
+
+        Returns:
+            Tuple[bool, Any]: (успех, количество подтвержденных записей)
+        """
+        if not self.validate_args(args, 3):
+            return False, "ERR: wrong number of arguments for 'xack' command"
+
+        try:
+            ids = [parse_id(text) for text in args[2:]]
+        except StreamIDError as exc:
+            return False, f"ERR: {exc}"
+
+        stream = self.storage.get_typed(args[0], Stream)
+        self.storage.touch(args[0])
+        group = stream.groups.get(args[1]) if stream is not None else None
+        if group is None:
+            return True, 0
+        return True, sum(1 for entry_id in ids if group.ack(entry_id))
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "XACK"
+
+
+@register_command("XPENDING")
+class XPendingCommand(Command):
+    """Команда XPENDING для просмотра ожидающих подтверждения записей."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def execute(self, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет команду XPENDING.
+
+        Синтаксис: XPENDING key group
+                   XPENDING key group [IDLE min-idle-time] start end count [consumer]
+
+        Args:
+            args: [key, group, ...]
+
+        Returns:
+            Tuple[bool, Any]: (успех, сводка или список записей)
+        """
+        if not self.validate_args(args, 2):
+            return False, "ERR: wrong number of arguments for 'xpending' command"
+
+        stream = self.storage.get_typed(args[0], Stream)
+        group = stream.groups.get(args[1]) if stream is not None else None
+        if group is None:
+            return False, nogroup_error(args[0], args[1])
+
+        if len(args) == 2:
+            return True, self._summary(group)
+
+        rest = args[2:]
+        min_idle = None
+        try:
+            if rest[0].upper() == "IDLE":
+                min_idle = int(rest[1])
+                rest = rest[2:]
+            if len(rest) not in (3, 4):
+                return False, "ERR: syntax error"
+            start, start_exclusive = parse_range_id(rest[0], is_end=False)
+            end, end_exclusive = parse_range_id(rest[1], is_end=True)
+            count = int(rest[2])
+        except StreamIDError as exc:
+            return False, f"ERR: {exc}"
+        except (ValueError, IndexError):
+            return False, "ERR: value is not an integer or out of range"
+
+        if start_exclusive:
+            start = increment_id(start)
+        if end_exclusive:
+            end = decrement_id(end)
+        consumer = None
+        if len(rest) == 4:
+            consumer = group.get_consumer(rest[3], create=False)
+            if consumer is None:
+                return True, []
+        if start is None or end is None or count <= 0:
+            return True, []
+
+        now = now_ms()
+        if min_idle is not None:
+            # выборка по индексу времени доставки: недавние записи не просматриваются
+            candidates = sorted(
+                (entry for entry in group.iter_idle(min_idle, now)
+                 if start <= entry.entry_id <= end and (consumer is None or entry.consumer is consumer)),
+                key=lambda entry: entry.entry_id,
+            )
+        elif consumer is not None:
+            candidates = (group.pel[entry_id] for entry_id in group.iter_consumer_pending(consumer, start))
+        else:
+            candidates = group.iter_pending(start)
+
+        result = []
+        for entry in candidates:
+            if entry.entry_id > end or len(result) >= count:
+                break
+            result.append([
+                format_id(entry.entry_id),
+                entry.consumer.name,
+                max(now - entry.delivery_time, 0),
+                entry.delivery_count,
+            ])
+        return True, result
+
+    @staticmethod
+    def _summary(group: ConsumerGroup) -> List[Any]:
+        if not group.pel:
+            return [0, None, None, None]
+        first, last = group.first_and_last_pending()
+        consumers = [
+            [consumer.name, str(consumer.pending)]
+            for consumer in group.consumers.values() if consumer.pending
+        ]
+        return [len(group.pel), format_id(first), format_id(last), consumers]
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "XPENDING"
+
+
+@register_command("XCLAIM")
+class XClaimCommand(Command):
+    """Команда XCLAIM для передачи ожидающих записей другому потребителю."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def execute(self, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет команду XCLAIM.
+
+        Синтаксис: XCLAIM key group consumer min-idle-time id [id ...] [IDLE ms]
+                   [TIME unix-time-milliseconds] [RETRYCOUNT count] [FORCE] [JUSTID]
+                   [LASTID lastid]
+
+        Args:
+            args: [key, group, consumer, min-idle-time, id1, ..., опции]
+
+        Returns:
+            Tuple[bool, Any]: (успех, переданные записи или их ID)
+        """
+        if not self.validate_args(args, 5):
+            return False, "ERR: wrong number of arguments for 'xclaim' command"
+
+        key, group_name, consumer_name = args[0], args[1], args[2]
+        try:
+            min_idle = int(args[3])
+        except ValueError:
+            return False, "ERR: Invalid min-idle-time argument for XCLAIM"
+
+        ids: List[StreamID] = []
+        i = 4
+        while i < len(args):
+            try:
+                ids.append(parse_id(args[i]))
+                i += 1
+            except StreamIDError:
+                break
+        now = now_ms()
+        delivery_time = now
+        retry_count = None
+        force = justid = False
+        last_id = None
+        try:
+            while i < len(args):
+                option = args[i].upper()
+                if option == "FORCE":
+                    force = True
+                    i += 1
+                elif option == "JUSTID":
+                    justid = True
+                    i += 1
+                elif option == "IDLE" and i + 1 < len(args):
+                    delivery_time = now - int(args[i + 1])
+                    i += 2
+                elif option == "TIME" and i + 1 < len(args):
+                    delivery_time = int(args[i + 1])
+                    i += 2
+                elif option == "RETRYCOUNT" and i + 1 < len(args):
+                    retry_count = int(args[i + 1])
+                    i += 2
+                elif option == "LASTID" and i + 1 < len(args):
+                    last_id = parse_id(args[i + 1])
+                    i += 2
+                else:
+                    return False, f"ERR: Unrecognized XCLAIM option '{args[i]}'"
+        except StreamIDError as exc:
+            return False, f"ERR: {exc}"
+        except ValueError:
+            return False, "ERR: value is not an integer or out of range"
+
+        stream = self.storage.get_typed(key, Stream)
+        group = stream.groups.get(group_name) if stream is not None else None
+        if group is None:
+            return False, nogroup_error(key, group_name)
+        changed = consumer_name not in group.consumers
+        if last_id is not None and last_id > group.last_id:
+            group.last_id = last_id
+            changed = True
+
+        consumer = group.get_consumer(consumer_name)
+        consumer.seen_time = now
+        result = []
+        for entry_id in ids:
+            values = stream.get_entry(entry_id)
+            entry = group.pel.get(entry_id)
+            if entry is None:
+                if not force or values is None:
+                    continue
+                group.deliver(entry_id, consumer, delivery_time)
+                entry = group.pel[entry_id]
+                entry.delivery_count = 0 if justid else 1
+                if retry_count is not None:
+                    entry.delivery_count = retry_count
+            else:
+                if values is None:
+                    # запись удалена из stream: убираем ее и из PEL
+                    group.ack(entry_id)
+                    changed = True
+                    continue
+                if min_idle and now - entry.delivery_time < min_idle:
+                    continue
+                group.claim(entry, consumer, delivery_time, retry_count, increment=not justid)
+            consumer.active_time = now
+            result.append(format_id(entry_id) if justid else [format_id(entry_id), list(values)])
+        if changed or result:
+            self.storage.touch(key)
+        return True, result
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "XCLAIM"
+
+
+@register_command("XAUTOCLAIM")
+class XAutoClaimCommand(Command):
+    """Команда XAUTOCLAIM для автоматической передачи простаивающих записей."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def execute(self, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет команду XAUTOCLAIM.
+
+        Синтаксис: XAUTOCLAIM key group consumer min-idle-time start [COUNT count] [JUSTID]
+
+        Записи просматриваются по возрастанию ID начиная со start; за
+        один вызов проверяется не более count * 10 записей.
+
+        Args:
+            args: [key, group, consumer, min-idle-time, start, ...]
+
+        Returns:
+            Tuple[bool, Any]: (успех, [следующий курсор, записи, удаленные ID])
+        """
+        if not self.validate_args(args, 5, 8):
+            return False, "ERR: wrong number of arguments for 'xautoclaim' command"
+
+        key, group_name, consumer_name = args[0], args[1], args[2]
+        count = 100
+        justid = False
+        try:
+            min_idle = int(args[3])
+            start, exclusive = parse_range_id(args[4], is_end=False)
+            i = 5
+            while i < len(args):
+                option = args[i].upper()
+                if option == "JUSTID":
+                    justid = True
+                    i += 1
+                elif option == "COUNT" and i + 1 < len(args):
+                    count = int(args[i + 1])
+                    if count < 1:
+                        return False, "ERR: COUNT must be > 0"
+                    i += 2
+                else:
+                    return False, "ERR: syntax error"
+        except StreamIDError as exc:
+            return False, f"ERR: {exc}"
+        except ValueError:
+            return False, "ERR: value is not an integer or out of range"
+        if exclusive:
+            start = increment_id(start) or MAX_ID
+
+        stream = self.storage.get_typed(key, Stream)
+        group = stream.groups.get(group_name) if stream is not None else None
+        if group is None:
+            return False, nogroup_error(key, group_name)
+
+        now = now_ms()
+        created = consumer_name not in group.consumers
+        consumer = group.get_consumer(consumer_name)
+        consumer.seen_time = now
+        attempts = count * 10
+        claimed = []
+        deleted = []
+        next_cursor = MIN_ID
+        for entry in list(group.iter_pending(start)):
+            if attempts <= 0 or len(claimed) >= count:
+                next_cursor = entry.entry_id
+                break
+            attempts -= 1
+            if now - entry.delivery_time < min_idle:
+                continue
+            values = stream.get_entry(entry.entry_id)
+            if values is None:
+                group.ack(entry.entry_id)
+                deleted.append(format_id(entry.entry_id))
+                continue
+            group.claim(entry, consumer, now, increment=not justid)
+            consumer.active_time = now
+            claimed.append(format_id(entry.entry_id) if justid
+                           else [format_id(entry.entry_id), list(values)])
+        if created or claimed or deleted:
+            self.storage.touch(key)
+        return True, [format_id(next_cursor), claimed, deleted]
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "XAUTOCLAIM"
@@ -0,0 +1,384 @@
+"""
+Команды для работы со stream.
+"""
+from typing import List, Any, Tuple, Optional
+from .base_abstraction import Command, BlockRequest, register_command
+from ..stream import (
+    Stream, StreamIDError, StreamID, StreamEntry,
+    MAX_ID, format_id, parse_id, parse_range_id, increment_id, decrement_id,
+)
+
+
+class TrimSpec:
+    """Параметры обрезки: MAXLEN|MINID [=|~] threshold [LIMIT count]."""
+
+    __slots__ = ("strategy", "approximate", "threshold", "limit")
+
+    def __init__(self, strategy: str, approximate: bool, threshold: Any, limit: Optional[int]):
+        self.strategy = strategy
+        self.approximate = approximate
+        self.threshold = threshold
+        self.limit = limit
+
+    def apply(self, stream: Stream) -> int:
+        """Обрезает stream, возвращает количество удаленных записей."""
+        if self.strategy == "MAXLEN":
+            return stream.trim_maxlen(self.threshold, self.approximate, self.limit)
+        return stream.trim_minid(self.threshold, self.approximate, self.limit)
+
+
+def parse_trim(args: List[str], i: int) -> Tuple[TrimSpec, int]:
+    """
+    Разбирает параметры обрезки начиная с args[i] (MAXLEN или MINID).
+
+    Returns:
+        (параметры, индекс следующего аргумента)
+    """
+    strategy = args[i].upper()
+    i += 1
+    approximate = False
+    if i < len(args) and args[i] in ("=", "~"):
+        approximate = args[i] == "~"
+        i += 1
+    if i >= len(args):
+        raise ValueError("syntax error")
+    if strategy == "MAXLEN":
+        try:
+            threshold = int(args[i])
+        except ValueError:
+            raise ValueError("value is not an integer or out of range")
+        if threshold < 0:
+            raise ValueError("The MAXLEN argument must be >= 0.")
+    else:
+        threshold = parse_id(args[i])
+    i += 1
+    limit = None
+    if i < len(args) and args[i].upper() == "LIMIT":
+        if not approximate:
+            raise ValueError("syntax error, LIMIT cannot be used without the special ~ option")
+        try:
+            limit = int(args[i + 1])
+        except (IndexError, ValueError):
+            raise ValueError("value is not an integer or out of range")
+        if limit < 0:
+            raise ValueError("The LIMIT argument must be >= 0.")
+        limit = limit or None
+        i += 2
+    return TrimSpec(strategy, approximate, threshold, limit), i
+
+
+def format_entries(entries: List[StreamEntry]) -> List[Any]:
+    """Форматирует записи в ответ вида [[id, [field, value, ...]], ...]."""
+    return [[format_id(entry_id), list(values)] for entry_id, values in entries]
+
+
+@register_command("XADD")
+class XAddCommand(Command):
+    """Команда XADD для добавления записи в stream."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def execute(self, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет команду XADD.
+
+        Синтаксис: XADD key [NOMKSTREAM] [MAXLEN|MINID [=|~] threshold [LIMIT count]]
+                   *|id field value [field value ...]
+
+        Args:
+            args: [key, ...опции, id, field1, value1, ...]
+
+        Returns:
+            Tuple[bool, Any]: (успех, ID добавленной записи)
+        """
+        if not self.validate_args(args, 4):
+            return False, "ERR: wrong number of arguments for 'xadd' command"
+
+        key = args[0]
+        create = True
+        trim = None
+        i = 1
+        try:
+            while i < len(args):
+                option = args[i].upper()
+                if option == "NOMKSTREAM":
+                    create = False
+                    i += 1
+                elif option in ("MAXLEN", "MINID"):
+                    trim, i = parse_trim(args, i)
+                else:
+                    break
+        except (ValueError, StreamIDError) as exc:
+            return False, f"ERR: {exc}"
+
+        if i >= len(args):
+            return False, "ERR: syntax error"
+        id_arg = args[i]
+        fields = args[i + 1:]
+        if not fields or len(fields) % 2:
+            return False, "ERR: wrong number of arguments for 'xadd' command"
+
+        stream = self.storage.get_typed(key, Stream)
+        created = stream is None
+        if created:
+            if not create:
+                return True, None
+            stream = Stream()
+        try:
+            if id_arg == "*":
+                entry_id = stream.next_id()
+            elif id_arg.endswith("-*"):
+                entry_id = stream.next_id(parse_id(id_arg[:-2])[0])
+            else:
+                entry_id = parse_id(id_arg)
+            stream.append(entry_id, tuple(fields))
+        except StreamIDError as exc:
+            return False, f"ERR: {exc}"
+
+        if created:
+            self.storage.set(key, stream)
+        else:
+            self.storage.touch(key)
+        if trim is not None:
+            trim.apply(stream)
+        self.storage.signal_ready(key)
+        return True, format_id(entry_id)
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "XADD"
+
+
+@register_command("XLEN")
+class XLenCommand(Command):
+    """Команда XLEN для получения количества записей в stream."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def execute(self, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет команду XLEN.
+
+        Синтаксис: XLEN key
+
+        Args:
+            args: [key]
+
+        Returns:
+            Tuple[bool, Any]: (успех, количество записей)
+        """
+        if not self.validate_args(args, 1, 1):
+            return False, "ERR: wrong number of arguments for 'xlen' command"
+
+        stream = self.storage.get_typed(args[0], Stream)
+        return True, len(stream) if stream is not None else 0
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "XLEN"
+
+
+class _RangeCommand(Command):
+    """Общая реализация XRANGE и XREVRANGE."""
+
+    reverse = False
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def execute(self, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет команду XRANGE/XREVRANGE.
+
+        Синтаксис: XRANGE key start end [COUNT count]
+                   XREVRANGE key end start [COUNT count]
+
+        Args:
+            args: [key, start, end, ...]
+
+        Returns:
+            Tuple[bool, Any]: (успех, список записей)
+        """
+        name = self.get_name().lower()
+        if len(args) not in (3, 5):
+            return False, f"ERR: wrong number of arguments for '{name}' command"
+
+        first, second = (args[2], args[1]) if self.reverse else (args[1], args[2])
+        try:
+            start, start_exclusive = parse_range_id(first, is_end=False)
+            end, end_exclusive = parse_range_id(second, is_end=True)
+        except StreamIDError as exc:
+            return False, f"ERR: {exc}"
+
+        count = None
+        if len(args) == 5:
+            if args[3].upper() != "COUNT":
+                return False, "ERR: syntax error"
+            try:
+                count = int(args[4])
+            except ValueError:
+                return False, "ERR: value is not an integer or out of range"
+            count = max(count, 0)
+
+        if start_exclusive:
+            start = increment_id(start)
+        if end_exclusive:
+            end = decrement_id(end)
+        stream = self.storage.get_typed(args[0], Stream)
+        if stream is None or start is None or end is None:
+            return True, []
+        return True, format_entries(stream.range(start, end, count, reverse=self.reverse))
+
+
+@register_command("XRANGE")
+class XRangeCommand(_RangeCommand):
+    """Команда XRANGE для чтения диапазона записей."""
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "XRANGE"
+
+
+@register_command("XREVRANGE")
+class XRevRangeCommand(_RangeCommand):
+    """Команда XREVRANGE для чтения диапазона записей в обратном порядке."""
+
+    reverse = True
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "XREVRANGE"
+
+
+@register_command("XTRIM")
+class XTrimCommand(Command):
+    """Команда XTRIM для обрезки stream."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def execute(self, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет команду XTRIM.
+
+        Синтаксис: XTRIM key MAXLEN|MINID [=|~] threshold [LIMIT count]
+
+        Args:
+            args: [key, strategy, ...]
+
+        Returns:
+            Tuple[bool, Any]: (успех, количество удаленных записей)
+        """
+        if not self.validate_args(args, 3):
+            return False, "ERR: wrong number of arguments for 'xtrim' command"
+        if args[1].upper() not in ("MAXLEN", "MINID"):
+            return False, "ERR: syntax error"
+
+        try:
+            trim, i = parse_trim(args, 1)
+        except (ValueError, StreamIDError) as exc:
+            return False, f"ERR: {exc}"
+        if i != len(args):
+            return False, "ERR: syntax error"
+
+        stream = self.storage.get_typed(args[0], Stream)
+        if stream is None:
+            return True, 0
+        removed = trim.apply(stream)
+        if removed:
+            self.storage.touch(args[0])
+        return True, removed
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "XTRIM"
+
+
+@register_command("XREAD")
+class XReadCommand(Command):
+    """Команда XREAD для чтения новых записей из одного или нескольких stream."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def execute(self, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет команду XREAD.
+
+        Синтаксис: XREAD [COUNT count] [BLOCK milliseconds] STREAMS key [key ...] id [id ...]
+
+        Если данных нет и указан BLOCK, возвращает BlockRequest: сервер
+        повторит чтение, когда в один из ключей будет добавлена запись.
+        ID "$" заменяется на последний ID stream в момент вызова.
+
+        Args:
+            args: [...опции, STREAMS, key1, ..., id1, ...]
+
+        Returns:
+            Tuple[bool, Any]: (успех, [[key, записи], ...] или None)
+        """
+        count = None
+        block = None
+        i = 0
+        try:
+            while i < len(args) and args[i].upper() != "STREAMS":
+                option = args[i].upper()
+                if option == "COUNT" and i + 1 < len(args):
+                    count = max(int(args[i + 1]), 0) or None
+                elif option == "BLOCK" and i + 1 < len(args):
+                    block = int(args[i + 1])
+                    if block < 0:
+                        return False, "ERR: timeout is negative"
+                else:
+                    return False, "ERR: syntax error"
+                i += 2
+        except ValueError:
+            return False, "ERR: value is not an integer or out of range"
+
+        rest = args[i + 1:]
+        if i >= len(args) or not rest or len(rest) % 2:
+            return False, ("ERR: Unbalanced 'xread' list of streams: for each stream key "
+                           "an ID or '$' must be specified.")
+        half = len(rest) // 2
+        keys, id_args = rest[:half], rest[half:]
+
+        streams = [self.storage.get_typed(key, Stream) for key in keys]
+        start_ids: List[StreamID] = []
+        try:
+            for stream, id_arg in zip(streams, id_args):
+                if id_arg == "$":
+                    start_ids.append(stream.last_id if stream is not None else (0, 0))
+                else:
+                    start_ids.append(parse_id(id_arg))
+        except StreamIDError as exc:
+            return False, f"ERR: {exc}"
+
+        result = []
+        for key, stream, last_seen in zip(keys, streams, start_ids):
+            if stream is None or stream.last_id <= last_seen:
+                continue
+            start = increment_id(last_seen)
+            entries = stream.range(start, MAX_ID, count)
+            if entries:
+                result.append([key, format_entries(entries)])
+        if result:
+            return True, result
+
+        if block is None:
+            return True, None
+        retry_args = ["BLOCK", str(block)]
+        if count is not None:
+            retry_args += ["COUNT", str(count)]
+        retry_args += ["STREAMS"] + keys + [format_id(start_id) for start_id in start_ids]
+        return True, BlockRequest(
+            keys=keys,
+            timeout=block / 1000.0 if block else None,
+            command="XREAD",
+            args=retry_args,
+        )
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "XREAD"
@@ -0,0 +1,134 @@
+"""
+Команды для изменяемых строковых значений.
+"""
+from typing import List, Any, Tuple
+from .base_abstraction import Command, register_command
+
+
+@register_command("APPEND")
+class AppendCommand(Command):
+    """Команда APPEND для дописывания данных к значению ключа."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def execute(self, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет команду APPEND.
+
+        Синтаксис: APPEND key value
+
+        Args:
+            args: [key, value]
+
+        Returns:
+            Tuple[bool, Any]: (успех, длина значения после дописывания)
+        """
+        if not self.validate_args(args, 2, 2):
+            return False, "ERR: wrong number of arguments for 'append' command"
+
+        return True, self.storage.append(args[0], args[1])
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "APPEND"
+
+
+@register_command("SETRANGE")
+class SetRangeCommand(Command):
+    """Команда SETRANGE для перезаписи части значения."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def execute(self, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет команду SETRANGE.
+
+        Синтаксис: SETRANGE key offset value
+
+        Args:
+            args: [key, offset, value]
+
+        Returns:
+            Tuple[bool, Any]: (успех, длина значения после записи)
+        """
+        if not self.validate_args(args, 3, 3):
+            return False, "ERR: wrong number of arguments for 'setrange' command"
+
+        try:
+            offset = int(args[1])
+        except ValueError:
+            return False, "ERR: value is not an integer or out of range"
+        if offset < 0:
+            return False, "ERR: offset is out of range"
+
+        return True, self.storage.setrange(args[0], offset, args[2])
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "SETRANGE"
+
+
+@register_command("GETRANGE")
+class GetRangeCommand(Command):
+    """Команда GETRANGE для получения подстроки значения."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def execute(self, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет команду GETRANGE.
+
+        Синтаксис: GETRANGE key start end
+
+        Args:
+            args: [key, start, end]
+
+        Returns:
+            Tuple[bool, Any]: (успех, подстрока)
+        """
+        if not self.validate_args(args, 3, 3):
+            return False, "ERR: wrong number of arguments for 'getrange' command"
+
+        try:
+            start = int(args[1])
+            end = int(args[2])
+        except ValueError:
+            return False, "ERR: value is not an integer or out of range"
+
+        return True, self.storage.getrange(args[0], start, end)
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "GETRANGE"
+
+
+@register_command("STRLEN")
+class StrlenCommand(Command):
+    """Команда STRLEN для получения длины значения в байтах."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def execute(self, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет команду STRLEN.
+
+        Синтаксис: STRLEN key
+
+        Args:
+            args: [key]
+
+        Returns:
+            Tuple[bool, Any]: (успех, длина значения)
+        """
+        if not self.validate_args(args, 1, 1):
+            return False, "ERR: wrong number of arguments for 'strlen' command"
+
+        return True, self.storage.strlen(args[0])
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "STRLEN"
@@ -0,0 +1,393 @@
+"""
+Команды для работы с time series.
+"""
+import time
+from typing import List, Any, Tuple, Dict
+from .base_abstraction import Command, register_command
+from ..command_parser import OK, MapReply
+from ..timeseries import (
+    TimeSeries, TimeSeriesError, Sample, aggregate, format_value,
+    DUPLICATE_POLICIES, AGGREGATIONS, DEFAULT_CHUNK_SIZE, TIMESTAMP_MIN, TIMESTAMP_MAX,
+)
+
+
+def parse_series_options(args: List[str], i: int, allow_on_duplicate: bool = False) -> Dict[str, Any]:
+    """
+    Разбирает параметры ряда начиная с args[i]:
+    RETENTION, ENCODING, CHUNK_SIZE, DUPLICATE_POLICY, ON_DUPLICATE, LABELS.
+
+    Raises:
+        ValueError: Текст ошибки для клиента
+    """
+    options: Dict[str, Any] = {}
+    while i < len(args):
+        option = args[i].upper()
+        if option == "LABELS":
+            pairs = args[i + 1:]
+            if not pairs or len(pairs) % 2:
+                raise ValueError("TSDB: wrong number of labels")
+            options["labels"] = dict(zip(pairs[::2], pairs[1::2]))
+            break
+        if i + 1 >= len(args):
+            raise ValueError("syntax error")
+        value = args[i + 1]
+        if option == "RETENTION":
+            try:
+                options["retention"] = int(value)
+            except ValueError:
+                raise ValueError("TSDB: Couldn't parse RETENTION")
+            if options["retention"] < 0:
+                raise ValueError("TSDB: Couldn't parse RETENTION")
+        elif option == "ENCODING":
+            if value.upper() not in ("COMPRESSED", "UNCOMPRESSED"):
+                raise ValueError("TSDB: unknown ENCODING parameter")
+            options["compressed"] = value.upper() == "COMPRESSED"
+        elif option == "CHUNK_SIZE":
+            try:
+                options["chunk_size"] = int(value)
+            except ValueError:
+                raise ValueError("TSDB: Couldn't parse CHUNK_SIZE")
+            if options["chunk_size"] < 48 or options["chunk_size"] > 1048576:
+                raise ValueError("TSDB: CHUNK_SIZE value must be between 48 and 1048576")
+        elif option in ("DUPLICATE_POLICY", "ON_DUPLICATE"):
+            if option == "ON_DUPLICATE" and not allow_on_duplicate:
+                raise ValueError("syntax error")
+            if value.upper() not in DUPLICATE_POLICIES:
+                raise ValueError("TSDB: Unknown DUPLICATE_POLICY")
+            options[option.lower()] = value.upper()
+        else:
+            raise ValueError("syntax error")
+        i += 2
+    return options
+
+
+def create_series(options: Dict[str, Any]) -> TimeSeries:
+    """Создает ряд по разобранным параметрам."""
+    return TimeSeries(
+        retention=options.get("retention", 0),
+        chunk_size=options.get("chunk_size", DEFAULT_CHUNK_SIZE),
+        compressed=options.get("compressed", False),
+        duplicate_policy=options.get("duplicate_policy", "BLOCK"),
+        labels=options.get("labels"),
+    )
+
+
+def format_samples(samples: List[Sample]) -> List[Any]:
+    """Форматирует отсчеты в ответ вида [[timestamp, value], ...]."""
+    return [[timestamp, format_value(value)] for timestamp, value in samples]
+
+
+@register_command("TS.CREATE")
+class TsCreateCommand(Command):
+    """Команда TS.CREATE для создания временного ряда."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def execute(self, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет команду TS.CREATE.
+
+        Синтаксис: TS.CREATE key [RETENTION ms] [ENCODING COMPRESSED|UNCOMPRESSED]
+                   [CHUNK_SIZE bytes] [DUPLICATE_POLICY policy] [LABELS label value ...]
+
+        Args:
+            args: [key, ...опции]
+
+        Returns:
+            Tuple[bool, Any]: (успех, "OK")
+        """
+        if not self.validate_args(args, 1):
+            return False, "ERR: wrong number of arguments for 'ts.create' command"
+        try:
+            options = parse_series_options(args, 1)
+        except ValueError as exc:
+            return False, f"ERR: {exc}"
+        if self.storage.get_typed(args[0], TimeSeries) is not None:
+            return False, "ERR: TSDB: key already exists"
+        self.storage.set(args[0], create_series(options))
+        return True, OK
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "TS.CREATE"
+
+
+@register_command("TS.ADD")
+class TsAddCommand(Command):
+    """Команда TS.ADD для добавления отсчета во временной ряд."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def execute(self, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет команду TS.ADD.
+
+        Синтаксис: TS.ADD key timestamp|* value [RETENTION ms] [ENCODING ...]
+                   [CHUNK_SIZE bytes] [ON_DUPLICATE policy] [LABELS label value ...]
+
+        Параметры создания применяются, только если ряд еще не существует.
+
+        Args:
+            args: [key, timestamp, value, ...опции]
+
+        Returns:
+            Tuple[bool, Any]: (успех, метка времени отсчета)
+        """
+        if not self.validate_args(args, 3):
+            return False, "ERR: wrong number of arguments for 'ts.add' command"
+
+        try:
+            timestamp = int(time.time() * 1000) if args[1] == "*" else int(args[1])
+        except ValueError:
+            return False, "ERR: TSDB: invalid timestamp"
+        if timestamp < TIMESTAMP_MIN:
+            return False, "ERR: TSDB: invalid timestamp, must be a nonnegative integer"
+        try:
+            value = float(args[2])
+        except ValueError:
+            return False, "ERR: TSDB: invalid value"
+        try:
+            options = parse_series_options(args, 3, allow_on_duplicate=True)
+        except ValueError as exc:
+            return False, f"ERR: {exc}"
+
+        series = self.storage.get_typed(args[0], TimeSeries)
+        created = series is None
+        if created:
+            series = create_series(options)
+            self.storage.set(args[0], series)
+        try:
+            result = series.add(timestamp, value, options.get("on_duplicate"))
+        except TimeSeriesError as exc:
+            return False, f"ERR: {exc}"
+        # новый ряд уже учтен в storage.set
+        if not created:
+            self.storage.touch(args[0])
+        return True, result
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "TS.ADD"
+
+
+@register_command("TS.GET")
+class TsGetCommand(Command):
+    """Команда TS.GET для получения последнего отсчета."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def execute(self, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет команду TS.GET.
+
+        Синтаксис: TS.GET key
+
+        Args:
+            args: [key]
+
+        Returns:
+            Tuple[bool, Any]: (успех, [timestamp, value] или пустой список)
+        """
+        if not self.validate_args(args, 1, 1):
+            return False, "ERR: wrong number of arguments for 'ts.get' command"
+
+        series = self.storage.get_typed(args[0], TimeSeries)
+        if series is None:
+            return False, "ERR: TSDB: the key does not exist"
+        sample = series.last_sample()
+        if sample is None:
+            return True, []
+        return True, [sample[0], format_value(sample[1])]
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "TS.GET"
+
+
+class _TsRangeCommand(Command):
+    """Общая реализация TS.RANGE и TS.REVRANGE."""
+
+    reverse = False
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    @staticmethod
+    def _parse_timestamp(text: str, default: int) -> int:
+        if text in ("-", "+"):
+            return default
+        value = int(text)
+        if value < TIMESTAMP_MIN:
+            raise ValueError
+        return value
+
+    def execute(self, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет команду TS.RANGE/TS.REVRANGE.
+
+        Синтаксис: TS.RANGE key fromTimestamp toTimestamp [COUNT count]
+                   [AGGREGATION avg|sum|min|max|count|first|last|range bucketDuration]
+
+        С AGGREGATION сервер возвращает только значения корзин, а не сырые
+        отсчеты; корзины выравниваются по нулевой метке времени.
+
+        Args:
+            args: [key, from, to, ...опции]
+
+        Returns:
+            Tuple[bool, Any]: (успех, [[timestamp, value], ...])
+        """
+        name = self.get_name().lower()
+        if not self.validate_args(args, 3):
+            return False, f"ERR: wrong number of arguments for '{name}' command"
+
+        try:
+            start = self._parse_timestamp(args[1], TIMESTAMP_MIN)
+            end = self._parse_timestamp(args[2], TIMESTAMP_MAX)
+        except ValueError:
+            return False, "ERR: TSDB: invalid fromTimestamp or toTimestamp"
+
+        count = None
+        aggregation = None
+        bucket = 0
+        i = 3
+        while i < len(args):
+            option = args[i].upper()
+            if option == "COUNT" and i + 1 < len(args):
+                try:
+                    count = int(args[i + 1])
+                except ValueError:
+                    return False, "ERR: TSDB: Couldn't parse COUNT"
+                if count <= 0:
+                    return False, "ERR: TSDB: Invalid COUNT value"
+                i += 2
+            elif option == "AGGREGATION" and i + 2 < len(args):
+                aggregation = args[i + 1].upper()
+                if aggregation not in AGGREGATIONS:
+                    return False, "ERR: TSDB: Unknown aggregation type"
+                try:
+                    bucket = int(args[i + 2])
+                except ValueError:
+                    return False, "ERR: TSDB: bucketDuration must be greater than zero"
+                if bucket <= 0:
+                    return False, "ERR: TSDB: bucketDuration must be greater than zero"
+                i += 3
+            else:
+                return False, "ERR: TSDB: wrong arguments"
+
+        series = self.storage.get_typed(args[0], TimeSeries)
+        if series is None:
+            return False, "ERR: TSDB: the key does not exist"
+
+        if aggregation is None:
+            samples = series.range(start, end, None if self.reverse else count)
+        else:
+            samples = aggregate(series, start, end, aggregation, bucket, None if self.reverse else count)
+        if self.reverse:
+            samples = samples[::-1][:count]
+        return True, format_samples(samples)
+
+
+@register_command("TS.RANGE")
+class TsRangeCommand(_TsRangeCommand):
+    """Команда TS.RANGE для чтения диапазона отсчетов."""
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "TS.RANGE"
+
+
+@register_command("TS.REVRANGE")
+class TsRevRangeCommand(_TsRangeCommand):
+    """Команда TS.REVRANGE для чтения диапазона отсчетов в обратном порядке."""
+
+    reverse = True
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "TS.REVRANGE"
+
+
+@register_command("TS.DEL")
+class TsDelCommand(Command):
+    """Команда TS.DEL для удаления отсчетов диапазона."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def execute(self, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет команду TS.DEL.
+
+        Синтаксис: TS.DEL key fromTimestamp toTimestamp
+
+        Args:
+            args: [key, from, to]
+
+        Returns:
+            Tuple[bool, Any]: (успех, количество удаленных отсчетов)
+        """
+        if not self.validate_args(args, 3, 3):
+            return False, "ERR: wrong number of arguments for 'ts.del' command"
+        try:
+            start, end = int(args[1]), int(args[2])
+        except ValueError:
+            return False, "ERR: TSDB: invalid fromTimestamp or toTimestamp"
+
+        series = self.storage.get_typed(args[0], TimeSeries)
+        if series is None:
+            return False, "ERR: TSDB: the key does not exist"
+        deleted = series.delete_range(start, end)
+        if deleted:
+            self.storage.touch(args[0])
+        return True, deleted
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "TS.DEL"
+
+
+@register_command("TS.INFO")
+class TsInfoCommand(Command):
+    """Команда TS.INFO для получения сведений о временном ряде."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def execute(self, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет команду TS.INFO.
+
+        Синтаксис: TS.INFO key
+
+        Args:
+            args: [key]
+
+        Returns:
+            Tuple[bool, Any]: (успех, плоский список имя, значение, ...)
+        """
+        if not self.validate_args(args, 1, 1):
+            return False, "ERR: wrong number of arguments for 'ts.info' command"
+
+        series = self.storage.get_typed(args[0], TimeSeries)
+        if series is None:
+            return False, "ERR: TSDB: the key does not exist"
+        return True, MapReply([
+            "totalSamples", len(series),
+            "memoryUsage", series.memory_usage(),
+            "firstTimestamp", series.first_timestamp() or 0,
+            "lastTimestamp", series.last_timestamp or 0,
+            "retentionTime", series.retention,
+            "chunkCount", len(series.chunks),
+            "chunkSize", series.chunk_size,
+            "chunkType", "compressed" if series.compressed else "uncompressed",
+            "duplicatePolicy", series.duplicate_policy.lower(),
+            "labels", [[label, value] for label, value in series.labels.items()],
+        ])
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "TS.INFO"
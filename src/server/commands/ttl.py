@@ -76,6 +76,43 @@ class ExpireCommand(Command):
         return "EXPIRE"
 
 
+@register_command("PEXPIREAT")
+class PExpireAtCommand(Command):
+    """Команда PEXPIREAT для установки абсолютного времени истечения ключа."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def execute(self, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет команду PEXPIREAT.
+
+        Синтаксис: PEXPIREAT key unix-time-milliseconds
+
+        Время в прошлом удаляет ключ. В журнал AOF в этой форме
+        записываются команды с относительным TTL.
+
+        Args:
+            args: [key, unix-time-milliseconds]
+
+        Returns:
+            Tuple[bool, Any]: (успех, 1 если время установлено, 0 если ключа нет)
+        """
+        if not self.validate_args(args, 2, 2):
+            return False, "ERR: wrong number of arguments for 'pexpireat' command"
+
+        try:
+            when = int(args[1])
+        except ValueError:
+            return False, "ERR: value is not an integer or out of range"
+
+        return True, 1 if self.storage.expire_at(args[0], when / 1000) else 0
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "PEXPIREAT"
+
+
 @register_command("EXISTS")
 class ExistsCommand(Command):
     """Команда EXISTS для проверки существования ключа."""
@@ -144,6 +181,38 @@ class DelCommand(Command):
         return "DEL"
 
 
+@register_command("DELIFEQ")
+class DelIfEqCommand(Command):
+    """Команда DELIFEQ для удаления ключа, только если его значение равно заданному."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def execute(self, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет команду DELIFEQ.
+
+        Синтаксис: DELIFEQ key value
+
+        Сравнение и удаление выполняются одной операцией хранилища:
+        освобождение блокировки только владельцем токена.
+
+        Args:
+            args: [key, value]
+
+        Returns:
+            Tuple[bool, Any]: (успех, 1 если ключ удален, иначе 0)
+        """
+        if not self.validate_args(args, 2, 2):
+            return False, "ERR: wrong number of arguments for 'delifeq' command"
+
+        return True, int(self.storage.delete_if_equal(args[0], args[1]))
+
+    def get_name(self) -> str:
+        """Возвращает имя команды."""
+        return "DELIFEQ"
+
+
 @register_command("KEYS")
 class KeysCommand(Command):
     """Команда KEYS для получения списка ключей."""
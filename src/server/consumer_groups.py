@@ -0,0 +1,233 @@
+"""
+Группы потребителей stream и списки ожидающих подтверждения записей (PEL).
+
+Каждая ожидающая запись хранится в словаре по ID, а для запросов по
+диапазонам поддерживаются отсортированные индексы с ленивым удалением:
+- по ID для группы (XPENDING, XAUTOCLAIM);
+- по ID для каждого потребителя (XPENDING ... consumer, чтение истории);
+- по времени доставки (выборка записей, простаивающих дольше порога).
+
+Новые записи доставляются с возрастающими ID и временем, поэтому
+добавление в индексы — это append; подтверждение (XACK) удаляет запись
+из словаря за O(1), а устаревшие ключи индексов вычищаются пакетно.
+"""
+import time
+from bisect import bisect_left, bisect_right, insort
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from .stream import StreamID
+
+# Минимальное количество устаревших ключей, после которого индекс уплотняется
+COMPACT_MIN_STALE = 64
+
+
+def now_ms() -> int:
+    """Текущее время в миллисекундах."""
+    return int(time.time() * 1000)
+
+
+class LazySortedIndex:
+    """Отсортированный список ключей с ленивым удалением."""
+
+    __slots__ = ("keys", "stale")
+
+    def __init__(self):
+        self.keys: List[Any] = []
+        self.stale = 0
+
+    def add(self, key: Any) -> None:
+        """Добавляет ключ (append, если ключ больше всех имеющихся)."""
+        if not self.keys or key > self.keys[-1]:
+            self.keys.append(key)
+        else:
+            insort(self.keys, key)
+
+    def mark_stale(self, is_live: Callable[[Any], bool]) -> None:
+        """Учитывает устаревший ключ и при необходимости уплотняет индекс."""
+        self.stale += 1
+        if self.stale > COMPACT_MIN_STALE and self.stale * 2 > len(self.keys):
+            previous = None
+            compacted = []
+            for key in self.keys:
+                if key != previous and is_live(key):
+                    compacted.append(key)
+                previous = key
+            self.keys = compacted
+            self.stale = 0
+
+    def iter_from(self, start: Any, is_live: Callable[[Any], bool]) -> Iterator[Any]:
+        """Итерирует живые ключи >= start по возрастанию."""
+        keys = self.keys
+        previous = None
+        for index in range(bisect_left(keys, start), len(keys)):
+            key = keys[index]
+            if key != previous and is_live(key):
+                yield key
+            previous = key
+
+    def iter_until(self, end: Any, is_live: Callable[[Any], bool]) -> Iterator[Any]:
+        """Итерирует живые ключи <= end по возрастанию."""
+        keys = self.keys
+        previous = None
+        for index in range(bisect_right(keys, end)):
+            key = keys[index]
+            if key != previous and is_live(key):
+                yield key
+            previous = key
+
+
+class PendingEntry:
+    """Запись, доставленная потребителю и еще не подтвержденная."""
+
+    __slots__ = ("entry_id", "consumer", "delivery_time", "delivery_count")
+
+    def __init__(self, entry_id: StreamID, consumer: "Consumer", delivery_time: int, delivery_count: int = 1):
+        self.entry_id = entry_id
+        self.consumer = consumer
+        self.delivery_time = delivery_time
+        self.delivery_count = delivery_count
+
+
+class Consumer:
+    """Потребитель группы."""
+
+    __slots__ = ("name", "seen_time", "active_time", "pending", "index")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.seen_time = now_ms()
+        self.active_time = -1
+        self.pending = 0
+        self.index = LazySortedIndex()
+
+
+class ConsumerGroup:
+    """Группа потребителей stream."""
+
+    def __init__(self, name: str, last_id: StreamID, entries_read: Optional[int] = None):
+        self.name = name
+        self.last_id = last_id
+        self.entries_read = entries_read
+        self.consumers: Dict[str, Consumer] = {}
+        self.pel: Dict[StreamID, PendingEntry] = {}
+        self._id_index = LazySortedIndex()
+        self._time_index = LazySortedIndex()
+
+    def __len__(self) -> int:
+        return len(self.pel)
+
+    def _is_pending(self, entry_id: StreamID) -> bool:
+        return entry_id in self.pel
+
+    def _is_current_delivery(self, key: Tuple[int, StreamID]) -> bool:
+        entry = self.pel.get(key[1])
+        return entry is not None and entry.delivery_time == key[0]
+
+    def get_consumer(self, name: str, create: bool = True) -> Optional[Consumer]:
+        """Возвращает потребителя, создавая его при необходимости."""
+        consumer = self.consumers.get(name)
+        if consumer is None and create:
+            consumer = Consumer(name)
+            self.consumers[name] = consumer
+        return consumer
+
+    def delete_consumer(self, name: str) -> int:
+        """Удаляет потребителя вместе с его ожидающими записями."""
+        consumer = self.consumers.pop(name, None)
+        if consumer is None:
+            return 0
+        pending = consumer.pending
+        for entry_id in list(self.iter_consumer_pending(consumer, (0, 0))):
+            self.ack(entry_id)
+        return pending
+
+    def deliver(self, entry_id: StreamID, consumer: Consumer, delivery_time: Optional[int] = None) -> None:
+        """Регистрирует доставку записи потребителю."""
+        delivery_time = now_ms() if delivery_time is None else delivery_time
+        entry = self.pel.get(entry_id)
+        if entry is None:
+            entry = PendingEntry(entry_id, consumer, delivery_time)
+            self.pel[entry_id] = entry
+            self._id_index.add(entry_id)
+        else:
+            entry.delivery_count += 1
+            self._reassign(entry, consumer)
+            self._set_delivery_time(entry, delivery_time)
+            return
+        consumer.pending += 1
+        consumer.index.add(entry_id)
+        self._time_index.add((delivery_time, entry_id))
+
+    def _reassign(self, entry: PendingEntry, consumer: Consumer) -> None:
+        previous = entry.consumer
+        if previous is consumer:
+            return
+        entry.consumer = consumer
+        previous.pending -= 1
+        previous.index.mark_stale(lambda key: self._owned_by(key, previous))
+        consumer.pending += 1
+        consumer.index.add(entry.entry_id)
+
+    def _set_delivery_time(self, entry: PendingEntry, delivery_time: int) -> None:
+        if entry.delivery_time == delivery_time:
+            return
+        entry.delivery_time = delivery_time
+        self._time_index.add((delivery_time, entry.entry_id))
+        self._time_index.mark_stale(self._is_current_delivery)
+
+    def _owned_by(self, entry_id: StreamID, consumer: Consumer) -> bool:
+        entry = self.pel.get(entry_id)
+        return entry is not None and entry.consumer is consumer
+
+    def claim(self, entry: PendingEntry, consumer: Consumer, delivery_time: int,
+              delivery_count: Optional[int] = None, increment: bool = True) -> None:
+        """Передает ожидающую запись другому потребителю."""
+        self._reassign(entry, consumer)
+        self._set_delivery_time(entry, delivery_time)
+        if delivery_count is not None:
+            entry.delivery_count = delivery_count
+        elif increment:
+            entry.delivery_count += 1
+
+    def ack(self, entry_id: StreamID) -> bool:
+        """Подтверждает запись. Возвращает True, если она ожидала подтверждения."""
+        entry = self.pel.pop(entry_id, None)
+        if entry is None:
+            return False
+        consumer = entry.consumer
+        consumer.pending -= 1
+        consumer.index.mark_stale(lambda key: self._owned_by(key, consumer))
+        self._id_index.mark_stale(self._is_pending)
+        self._time_index.mark_stale(self._is_current_delivery)
+        return True
+
+    def iter_pending(self, start: StreamID) -> Iterator[PendingEntry]:
+        """Ожидающие записи группы с ID >= start по возрастанию ID."""
+        for entry_id in self._id_index.iter_from(start, self._is_pending):
+            yield self.pel[entry_id]
+
+    def iter_consumer_pending(self, consumer: Consumer, start: StreamID) -> Iterator[StreamID]:
+        """ID ожидающих записей потребителя, начиная со start."""
+        return consumer.index.iter_from(start, lambda key: self._owned_by(key, consumer))
+
+    def iter_idle(self, min_idle: int, now: Optional[int] = None) -> Iterator[PendingEntry]:
+        """
+        Записи, простаивающие не меньше min_idle мс, от самых старых.
+
+        Индекс по времени доставки позволяет не просматривать недавно
+        доставленные записи.
+        """
+        now = now_ms() if now is None else now
+        cutoff = (now - min_idle, (2 ** 64, 0))
+        for _, entry_id in self._time_index.iter_until(cutoff, self._is_current_delivery):
+            yield self.pel[entry_id]
+
+    def first_and_last_pending(self) -> Tuple[Optional[StreamID], Optional[StreamID]]:
+        """Минимальный и максимальный ID среди ожидающих записей."""
+        first = next(self.iter_pending((0, 0)), None)
+        if first is None:
+            return None, None
+        for entry_id in reversed(self._id_index.keys):
+            if entry_id in self.pel:
+                return first.entry_id, entry_id
+        return first.entry_id, first.entry_id
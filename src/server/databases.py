@@ -0,0 +1,55 @@
+"""
+Логические базы данных сервера.
+
+Каждая база — отдельное хранилище со своим обработчиком команд.
+Соединение хранит только номер выбранной базы, поэтому SWAPDB — это
+обмен двух ссылок в списке: клиенты, выбравшие базу по номеру, сразу
+видят другой набор данных, а сами данные не копируются и не удаляются.
+"""
+from typing import List
+
+from .command_handler import CommandHandler
+from .functions import FunctionRegistry
+from .persistence import Persistence
+from .pubsub import PubSub
+from .replication import Replication
+from .tracking import TrackingTable
+from .storage import Storage
+
+
+class Databases:
+    """Набор пронумерованных хранилищ с обработчиками команд."""
+
+    def __init__(self, count: int = 16):
+        if count < 1:
+            raise ValueError("at least one database is required")
+        self.storages: List[Storage] = []
+        self.handlers: List[CommandHandler] = []
+        # серверные функции не принадлежат отдельной базе
+        self.functions = FunctionRegistry()
+        self.pubsub = PubSub()
+        self.tracking = TrackingTable(self.storages)
+        self.persistence = Persistence(self.storages)
+        self.replication = Replication(self.storages, self.persistence)
+        self.persistence.replication = self.replication
+        for _ in range(count):
+            storage = Storage(self)
+            self.storages.append(storage)
+            self.handlers.append(CommandHandler(storage))
+        self.persistence.handlers = self.handlers
+        self.replication.handlers = self.handlers
+
+    def __len__(self) -> int:
+        return len(self.storages)
+
+    def __getitem__(self, index: int) -> Storage:
+        return self.storages[index]
+
+    def swap(self, first: int, second: int) -> None:
+        """Меняет местами базы first и second за O(1)."""
+        storages, handlers = self.storages, self.handlers
+        storages[first], storages[second] = storages[second], storages[first]
+        handlers[first], handlers[second] = handlers[second], handlers[first]
+        # содержимое баз под номерами first и second изменилось для всех ключей
+        storages[first].touch_all()
+        storages[second].touch_all()
@@ -0,0 +1,471 @@
+"""
+Серверные функции (FUNCTION LOAD / FCALL).
+
+Библиотека — исходный код на подмножестве Python с заголовком
+`#!python name=<библиотека>`. При загрузке код выполняется один раз и
+регистрирует функции вызовом `redis.register_function(name, callback)`;
+при FCALL функция получает списки keys и args и вызывает команды
+сервера через `redis.call(...)` / `redis.pcall(...)` напрямую через
+обработчик команд, без разбора и кодирования RESP между шагами.
+
+Ограничения окружения:
+- перед компиляцией код проверяется по AST: запрещены import, global,
+  классы, генераторы, async, with, `except:` без типа, обращения
+  к именам и атрибутам, начинающимся с подчеркивания, и `mro`;
+- доступны только встроенные функции из SAFE_BUILTINS, range — не длиннее
+  лимита шагов;
+- в начало каждой функции, тела цикла и условия генератора списка
+  вставляется вызов счетчика шагов: при превышении лимита шагов или
+  времени выполнение прерывается исключением ScriptKilled. Прерывание
+  окончательное: если код функции перехватил исключение, оно возникает
+  снова на следующем шаге и при вызове redis.call, а результат функции
+  отбрасывается.
+
+Лимиты проверяются только на шагах. Одна операция встроенного типа
+(арифметика с очень большими числами, повторение длинной строки или
+списка, встроенная функция над длинной последовательностью) выполняется
+до конца, и время вызова может превысить лимит на ее длительность.
+"""
+import ast
+import builtins
+import fnmatch
+import json
+import re
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .command_parser import ErrorReply, MapReply, SetReply
+
+_HEADER_RE = re.compile(r"#!(?P<engine>\w+)(?P<params>[^\n]*)")
+_NAME_RE = re.compile(r"^[A-Za-z0-9_]+$")
+_STEP = "__step__"
+
+SAFE_BUILTINS: Dict[str, Any] = {
+    name: getattr(builtins, name)
+    for name in (
+        "abs", "all", "any", "bool", "dict", "divmod", "enumerate", "filter", "float",
+        "int", "isinstance", "len", "list", "map", "max", "min", "range", "reversed",
+        "round", "set", "sorted", "str", "sum", "tuple", "zip",
+        "Exception", "ValueError", "TypeError", "KeyError", "IndexError", "ZeroDivisionError",
+    )
+}
+
+_FORBIDDEN_NODES = (
+    ast.Import, ast.ImportFrom, ast.Global, ast.Nonlocal, ast.ClassDef,
+    ast.AsyncFunctionDef, ast.Await, ast.AsyncFor, ast.AsyncWith, ast.With,
+    ast.Yield, ast.YieldFrom, ast.GeneratorExp,
+)
+# атрибуты строк, позволяющие добраться до внутренних атрибутов через шаблон,
+# и mro, открывающий иерархию классов (Exception.mro() ведет к BaseException)
+_FORBIDDEN_ATTRIBUTES = {"format", "format_map", "mro"}
+
+# выполнение команды из функции: (имя, аргументы) -> (успех, результат)
+CommandRunner = Callable[[str, List[str]], Tuple[bool, Any]]
+
+
+class FunctionError(ValueError):
+    """Ошибка загрузки библиотеки или выполнения функции."""
+
+
+class ScriptKilled(BaseException):
+    """Функция превысила лимит шагов или времени (не перехватывается кодом функции)."""
+
+
+class _Checker(ast.NodeVisitor):
+    """Проверяет, что код использует только разрешенное подмножество языка."""
+
+    def generic_visit(self, node: ast.AST) -> None:
+        if isinstance(node, _FORBIDDEN_NODES):
+            raise FunctionError(f"'{type(node).__name__}' is not allowed in functions (line {node.lineno})")
+        super().generic_visit(node)
+
+    def visit_Name(self, node: ast.Name) -> None:
+        if node.id.startswith("_"):
+            raise FunctionError(f"name '{node.id}' is not allowed (line {node.lineno})")
+
+    def visit_Attribute(self, node: ast.Attribute) -> None:
+        if node.attr.startswith("_") or node.attr in _FORBIDDEN_ATTRIBUTES:
+            raise FunctionError(f"attribute '{node.attr}' is not allowed (line {node.lineno})")
+        self.generic_visit(node)
+
+    def visit_ExceptHandler(self, node: ast.ExceptHandler) -> None:
+        if node.type is None:
+            raise FunctionError(f"bare 'except:' is not allowed (line {node.lineno})")
+        if node.name is not None and node.name.startswith("_"):
+            raise FunctionError(f"name '{node.name}' is not allowed (line {node.lineno})")
+        self.generic_visit(node)
+
+    def visit_arg(self, node: ast.arg) -> None:
+        if node.arg.startswith("_"):
+            raise FunctionError(f"name '{node.arg}' is not allowed (line {node.lineno})")
+        self.generic_visit(node)
+
+    def visit_FunctionDef(self, node: ast.FunctionDef) -> None:
+        if node.name.startswith("_"):
+            raise FunctionError(f"name '{node.name}' is not allowed (line {node.lineno})")
+        self.generic_visit(node)
+
+
+def _step_call() -> ast.Call:
+    return ast.Call(func=ast.Name(id=_STEP, ctx=ast.Load()), args=[], keywords=[])
+
+
+class _Instrumenter(ast.NodeTransformer):
+    """Вставляет вызов счетчика шагов в функции, циклы и генераторы списков."""
+
+    def _prepend(self, node: Any) -> Any:
+        self.generic_visit(node)
+        node.body.insert(0, ast.Expr(_step_call()))
+        return node
+
+    visit_FunctionDef = visit_For = visit_While = _prepend
+
+    def visit_Lambda(self, node: ast.Lambda) -> Any:
+        self.generic_visit(node)
+        node.body = ast.BoolOp(op=ast.And(), values=[_step_call(), node.body])
+        return node
+
+    def visit_comprehension(self, node: ast.comprehension) -> Any:
+        self.generic_visit(node)
+        node.ifs.insert(0, _step_call())
+        return node
+
+
+class _Budget:
+    """Счетчик шагов и времени текущего вызова."""
+
+    def __init__(self, max_steps: int, time_limit: float):
+        self.max_steps = max_steps
+        self.time_limit = time_limit
+        self.steps = 0
+        self.deadline = 0.0
+        # причина прерывания вызова (None — вызов не прерван)
+        self.killed: Optional[str] = None
+
+    def reset(self) -> None:
+        self.steps = 0
+        self.deadline = time.monotonic() + self.time_limit
+        self.killed = None
+
+    def kill(self, reason: str) -> None:
+        self.killed = reason
+        raise ScriptKilled(reason)
+
+    def check(self) -> None:
+        """Повторяет прерывание, если код функции перехватил его и продолжил работу."""
+        if self.killed is not None:
+            raise ScriptKilled(self.killed)
+
+    def step(self) -> bool:
+        self.check()
+        self.steps += 1
+        if self.steps > self.max_steps:
+            self.kill(f"function exceeded the limit of {self.max_steps} steps")
+        # время проверяется не на каждом шаге: вызов часов дороже самого шага
+        if not self.steps & 0xFF and time.monotonic() > self.deadline:
+            self.kill(f"function exceeded the time limit of {self.time_limit} s")
+        return True
+
+    def range(self, *args: int) -> range:
+        """
+        range для кода функции: встроенные функции обходят его без шагов,
+        поэтому длина ограничена лимитом шагов.
+        """
+        result = range(*args)
+        try:
+            length = len(result)
+        except OverflowError:
+            length = self.max_steps + 1
+        if length > self.max_steps:
+            raise ValueError(f"range of more than {self.max_steps} elements is not allowed")
+        return result
+
+
+def _to_script(value: Any) -> Any:
+    """Результат команды в значение для кода функции (без ссылок на внутренние объекты)."""
+    if value is None or isinstance(value, (bool, int, str, float)):
+        return value
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return bytes(value).decode('utf-8', errors='replace')
+    if isinstance(value, (list, tuple)):
+        return [_to_script(item) for item in value]
+    return str(value)
+
+
+def _to_reply(value: Any) -> Any:
+    """Значение, возвращенное функцией, в ответ сервера."""
+    if value is None or isinstance(value, (bool, int, str)):
+        return value
+    if isinstance(value, float):
+        # как в Redis, дробные числа отбрасывают дробную часть
+        return int(value)
+    if isinstance(value, (list, tuple)):
+        return [_to_reply(item) for item in value]
+    if isinstance(value, dict):
+        return MapReply([_to_reply(item) for pair in value.items() for item in pair])
+    if isinstance(value, (set, frozenset)):
+        return SetReply([_to_reply(item) for item in value])
+    return str(value)
+
+
+class _RedisApi:
+    """Объект `redis`, доступный коду библиотеки."""
+
+    def __init__(self, library: "FunctionLibrary"):
+        self._library = library
+        self._runner: Optional[CommandRunner] = None
+
+    def register_function(self, name: str, callback: Callable) -> None:
+        library = self._library
+        if library.loaded:
+            raise FunctionError("register_function can only be called while loading the library")
+        if not isinstance(name, str) or not _NAME_RE.match(name):
+            raise FunctionError("function names can only contain letters, numbers, or underscores")
+        if not callable(callback):
+            raise FunctionError("callback must be a function")
+        if name in library.functions:
+            raise FunctionError(f"function '{name}' is already registered in the library")
+        library.functions[name] = callback
+
+    def call(self, command: str, *args: Any) -> Any:
+        ok, result = self._run(command, args)
+        if not ok:
+            raise FunctionError(result)
+        return result
+
+    def pcall(self, command: str, *args: Any) -> Any:
+        ok, result = self._run(command, args)
+        return result if ok else ErrorReply(result)
+
+    @staticmethod
+    def error_reply(message: str) -> ErrorReply:
+        return ErrorReply(message)
+
+    def _run(self, command: Any, args: Tuple[Any, ...]) -> Tuple[bool, Any]:
+        runner = self._runner
+        if runner is None:
+            raise FunctionError("redis.call is not allowed while loading the library")
+        self._library.budget.check()
+        ok, result = runner(str(command).upper(), [str(arg) for arg in args])
+        if not ok:
+            return False, result
+        return True, _to_script(result)
+
+
+class FunctionLibrary:
+    """Загруженная библиотека функций."""
+
+    def __init__(self, name: str, code: str, max_steps: int, time_limit: float):
+        self.name = name
+        self.code = code
+        self.functions: Dict[str, Callable] = {}
+        self.loaded = False
+        self.budget = _Budget(max_steps, time_limit)
+        self.api = _RedisApi(self)
+
+    def call(self, name: str, runner: CommandRunner, keys: List[str], args: List[str]) -> Any:
+        """
+        Вызывает функцию библиотеки; команды выполняются через runner.
+
+        Raises:
+            FunctionError: Ошибка в коде функции, в вызванной команде или превышен лимит
+        """
+        callback = self.functions[name]
+        self.api._runner = runner
+        budget = self.budget
+        budget.reset()
+        try:
+            result = callback(list(keys), list(args))
+            budget.check()
+            return _to_reply(result)
+        except ScriptKilled as exc:
+            raise FunctionError(f"Function killed: {exc}")
+        except FunctionError:
+            raise
+        except RecursionError:
+            raise FunctionError(f"Error running function '{name}': maximum recursion depth exceeded")
+        except Exception as exc:
+            if budget.killed is not None:
+                # прерывание перехвачено и заменено другим исключением
+                raise FunctionError(f"Function killed: {budget.killed}")
+            raise FunctionError(f"Error running function '{name}': {type(exc).__name__}: {exc}")
+        finally:
+            self.api._runner = None
+
+
+def parse_header(code: str) -> str:
+    """
+    Разбирает заголовок `#!python name=<библиотека>` и возвращает имя библиотеки.
+
+    Raises:
+        FunctionError: Если заголовок отсутствует или некорректен
+    """
+    match = _HEADER_RE.match(code)
+    if match is None:
+        raise FunctionError("Missing library metadata")
+    if match.group("engine") != "python":
+        raise FunctionError(f"Engine '{match.group('engine')}' not found")
+    name = None
+    for param in match.group("params").split():
+        key, _, value = param.partition("=")
+        if key != "name" or not value:
+            raise FunctionError(f"Invalid metadata value given: {param}")
+        name = value
+    if name is None:
+        raise FunctionError("Library name was not given")
+    if not _NAME_RE.match(name):
+        raise FunctionError("Library names can only contain letters, numbers, or underscores")
+    return name
+
+
+def compile_library(code: str, max_steps: int, time_limit: float) -> FunctionLibrary:
+    """
+    Проверяет, компилирует и выполняет код библиотеки.
+
+    Raises:
+        FunctionError: Ошибка в заголовке или коде, библиотека не зарегистрировала функций
+    """
+    name = parse_header(code)
+    try:
+        tree = ast.parse(code, filename=f"@{name}")
+    except SyntaxError as exc:
+        raise FunctionError(f"Error compiling library: {exc.msg} (line {exc.lineno})")
+    _Checker().visit(tree)
+    tree = ast.fix_missing_locations(_Instrumenter().visit(tree))
+
+    library = FunctionLibrary(name, code, max_steps, time_limit)
+    namespace: Dict[str, Any] = {
+        "__builtins__": dict(SAFE_BUILTINS, range=library.budget.range),
+        "__name__": name,
+        _STEP: library.budget.step,
+        "redis": library.api,
+    }
+    budget = library.budget
+    budget.reset()
+    try:
+        exec(compile(tree, f"@{name}", "exec"), namespace)
+        budget.check()
+    except ScriptKilled as exc:
+        raise FunctionError(f"Error loading library: {exc}")
+    except FunctionError:
+        raise
+    except Exception as exc:
+        if budget.killed is not None:
+            raise FunctionError(f"Error loading library: {budget.killed}")
+        raise FunctionError(f"Error loading library: {type(exc).__name__}: {exc}")
+    if not library.functions:
+        raise FunctionError("No functions registered")
+    library.loaded = True
+    return library
+
+
+class FunctionRegistry:
+    """Библиотеки функций сервера (общие для всех баз данных)."""
+
+    def __init__(self, max_steps: int = 1_000_000, time_limit: float = 5.0):
+        self.max_steps = max_steps
+        self.time_limit = time_limit
+        self.libraries: Dict[str, FunctionLibrary] = {}
+        # имя функции -> библиотека
+        self.functions: Dict[str, FunctionLibrary] = {}
+
+    def load(self, code: str, replace: bool = False) -> str:
+        """
+        Загружает библиотеку.
+
+        Returns:
+            Имя библиотеки
+
+        Raises:
+            FunctionError: Ошибка в коде или конфликт имен библиотек и функций
+        """
+        library = compile_library(code, self.max_steps, self.time_limit)
+        old = self.libraries.get(library.name)
+        if old is not None and not replace:
+            raise FunctionError(f"Library '{library.name}' already exists")
+        for name in library.functions:
+            owner = self.functions.get(name)
+            if owner is not None and owner is not old:
+                raise FunctionError(f"Function {name} already exists")
+        if old is not None:
+            self._unregister(old)
+        self.libraries[library.name] = library
+        for name in library.functions:
+            self.functions[name] = library
+        return library.name
+
+    def delete(self, name: str) -> bool:
+        """Удаляет библиотеку; False, если ее нет."""
+        library = self.libraries.pop(name, None)
+        if library is None:
+            return False
+        self._unregister(library)
+        return True
+
+    def _unregister(self, library: FunctionLibrary) -> None:
+        for name in library.functions:
+            self.functions.pop(name, None)
+
+    def flush(self) -> None:
+        """Удаляет все библиотеки."""
+        self.libraries.clear()
+        self.functions.clear()
+
+    def call(self, name: str, runner: CommandRunner, keys: List[str], args: List[str]) -> Any:
+        """
+        Вызывает функцию по имени.
+
+        Raises:
+            FunctionError: Функция не найдена или завершилась с ошибкой
+        """
+        library = self.functions.get(name)
+        if library is None:
+            raise FunctionError("Function not found")
+        return library.call(name, runner, keys, args)
+
+    def dump(self) -> str:
+        """Сериализует все библиотеки (исходные коды) для сохранения вместе с данными."""
+        return json.dumps([library.code for library in self.libraries.values()], ensure_ascii=False)
+
+    def restore(self, payload: str, policy: str = "APPEND") -> None:
+        """
+        Восстанавливает библиотеки из результата dump().
+
+        Args:
+            payload: Сериализованные библиотеки
+            policy: APPEND (ошибка при конфликте), REPLACE (заменить существующие)
+                или FLUSH (удалить все существующие перед восстановлением)
+
+        Raises:
+            FunctionError: Некорректные данные или конфликт имен; реестр при этом не меняется
+        """
+        try:
+            codes = json.loads(payload)
+        except ValueError:
+            raise FunctionError("payload is not valid")
+        if not isinstance(codes, list) or not all(isinstance(code, str) for code in codes):
+            raise FunctionError("payload is not valid")
+        staged = FunctionRegistry(self.max_steps, self.time_limit)
+        if policy != "FLUSH":
+            staged.libraries = dict(self.libraries)
+            staged.functions = dict(self.functions)
+        for code in codes:
+            staged.load(code, replace=policy == "REPLACE")
+        self.libraries = staged.libraries
+        self.functions = staged.functions
+
+    def list(self, pattern: Optional[str] = None, with_code: bool = False) -> List[Any]:
+        """Сведения о библиотеках для FUNCTION LIST."""
+        result = []
+        for library in self.libraries.values():
+            if pattern is not None and not fnmatch.fnmatchcase(library.name, pattern):
+                continue
+            entry = MapReply([
+                "library_name", library.name,
+                "engine", "PYTHON",
+                "functions", [MapReply(["name", name]) for name in library.functions],
+            ])
+            if with_code:
+                entry += ["library_code", library.code]
+            result.append(entry)
+        return result
@@ -0,0 +1,217 @@
+"""
+Геохеш для геопространственного индекса.
+
+Координаты кодируются в 52-битное число (по 26 бит на долготу и широту,
+биты чередуются), которое используется как score в sorted set. Ячейка
+геохеша с шагом step — это непрерывный диапазон score, поэтому поиск по
+радиусу или прямоугольнику сводится к нескольким сканированиям диапазонов
+с последующей фильтрацией кандидатов по расстоянию.
+
+Формат совместим с Redis: широта ограничена пределами проекции Меркатора,
+расстояние считается по формуле гаверсинусов.
+"""
+import math
+from typing import List, Optional, Tuple
+
+GEO_STEP_MAX = 26
+GEO_BITS = GEO_STEP_MAX * 2
+
+LON_MIN, LON_MAX = -180.0, 180.0
+LAT_MIN, LAT_MAX = -85.05112878, 85.05112878
+
+EARTH_RADIUS_M = 6372797.560856
+
+UNITS = {"M": 1.0, "KM": 1000.0, "MI": 1609.34, "FT": 0.3048}
+
+# Максимальное количество ячеек в покрытии области поиска
+MAX_COVER_CELLS = 16
+
+ScoreRange = Tuple[int, int]
+
+
+def _spread(value: int) -> int:
+    """Раздвигает 26 младших бит в четные позиции."""
+    value &= 0xFFFFFFFF
+    value = (value | (value << 16)) & 0x0000FFFF0000FFFF
+    value = (value | (value << 8)) & 0x00FF00FF00FF00FF
+    value = (value | (value << 4)) & 0x0F0F0F0F0F0F0F0F
+    value = (value | (value << 2)) & 0x3333333333333333
+    value = (value | (value << 1)) & 0x5555555555555555
+    return value
+
+
+def _squash(value: int) -> int:
+    """Обратная операция к _spread: собирает четные биты."""
+    value &= 0x5555555555555555
+    value = (value | (value >> 1)) & 0x3333333333333333
+    value = (value | (value >> 2)) & 0x0F0F0F0F0F0F0F0F
+    value = (value | (value >> 4)) & 0x00FF00FF00FF00FF
+    value = (value | (value >> 8)) & 0x0000FFFF0000FFFF
+    value = (value | (value >> 16)) & 0x00000000FFFFFFFF
+    return value
+
+
+def interleave(lat_bits: int, lon_bits: int) -> int:
+    """Чередует биты: широта в четных позициях, долгота в нечетных."""
+    return _spread(lat_bits) | (_spread(lon_bits) << 1)
+
+
+def deinterleave(hash_bits: int) -> Tuple[int, int]:
+    """Возвращает (lat_bits, lon_bits)."""
+    return _squash(hash_bits), _squash(hash_bits >> 1)
+
+
+def valid_coordinates(lon: float, lat: float) -> bool:
+    """Проверяет, что координаты можно закодировать."""
+    return LON_MIN <= lon <= LON_MAX and LAT_MIN <= lat <= LAT_MAX
+
+
+def _cell_index(value: float, low: float, high: float, step: int) -> int:
+    cells = 1 << step
+    index = int((value - low) / (high - low) * cells)
+    return min(max(index, 0), cells - 1)
+
+
+def encode(lon: float, lat: float) -> int:
+    """Кодирует координаты в 52-битный геохеш."""
+    lat_bits = _cell_index(lat, LAT_MIN, LAT_MAX, GEO_STEP_MAX)
+    lon_bits = _cell_index(lon, LON_MIN, LON_MAX, GEO_STEP_MAX)
+    return interleave(lat_bits, lon_bits)
+
+
+def decode(hash_bits: int) -> Tuple[float, float]:
+    """Возвращает (lon, lat) центра ячейки 52-битного геохеша."""
+    lat_bits, lon_bits = deinterleave(hash_bits)
+    cells = 1 << GEO_STEP_MAX
+    lat = LAT_MIN + (lat_bits + 0.5) * (LAT_MAX - LAT_MIN) / cells
+    lon = LON_MIN + (lon_bits + 0.5) * (LON_MAX - LON_MIN) / cells
+    return min(max(lon, LON_MIN), LON_MAX), min(max(lat, LAT_MIN), LAT_MAX)
+
+
+def distance(lon1: float, lat1: float, lon2: float, lat2: float) -> float:
+    """Расстояние в метрах по формуле гаверсинусов."""
+    lat1r = math.radians(lat1)
+    lat2r = math.radians(lat2)
+    u = math.sin((lat2r - lat1r) / 2)
+    v = math.sin(math.radians(lon2 - lon1) / 2)
+    a = u * u + math.cos(lat1r) * math.cos(lat2r) * v * v
+    return 2.0 * EARTH_RADIUS_M * math.asin(min(math.sqrt(a), 1.0))
+
+
+def lat_distance(lat1: float, lat2: float) -> float:
+    """Расстояние в метрах вдоль меридиана."""
+    return EARTH_RADIUS_M * abs(math.radians(lat2) - math.radians(lat1))
+
+
+def in_box(lon: float, lat: float, center_lon: float, center_lat: float,
+           width_m: float, height_m: float) -> Optional[float]:
+    """
+    Проверяет попадание точки в прямоугольник с центром center.
+
+    Returns:
+        Расстояние до центра в метрах или None, если точка вне прямоугольника
+    """
+    if lat_distance(lat, center_lat) > height_m / 2:
+        return None
+    if distance(lon, lat, center_lon, lat) > width_m / 2:
+        return None
+    return distance(lon, lat, center_lon, center_lat)
+
+
+def bounding_box(lon: float, lat: float, half_width_m: float,
+                 half_height_m: float) -> Tuple[float, float, float, float]:
+    """Ограничивающий прямоугольник (lon_min, lon_max, lat_min, lat_max) в градусах."""
+    lat_delta = math.degrees(half_height_m / EARTH_RADIUS_M)
+    # по долготе прямоугольник шире всего на краю, дальнем от экватора
+    edge_lat = min(abs(lat) + lat_delta, 89.999)
+    lon_delta = min(math.degrees(half_width_m / EARTH_RADIUS_M / math.cos(math.radians(edge_lat))), 360.0)
+    return lon - lon_delta, lon + lon_delta, lat - lat_delta, lat + lat_delta
+
+
+def _axis_cells(low: float, high: float, axis_min: float, axis_max: float,
+                step: int, wrap: bool) -> range:
+    """Индексы ячеек шага step, пересекающих отрезок [low, high] оси."""
+    cells = 1 << step
+    size = (axis_max - axis_min) / cells
+    first = math.floor((low - axis_min) / size)
+    last = math.floor((high - axis_min) / size)
+    if wrap:
+        return range(cells) if last - first + 1 >= cells else range(first, last + 1)
+    return range(max(first, 0), min(last, cells - 1) + 1)
+
+
+def _row_distance_bound(lat: float, cell_lat_min: float, cell_lat_max: float) -> float:
+    """Нижняя оценка расстояния до полосы широт: путь пересекает ближайшую параллель."""
+    if lat < cell_lat_min:
+        return lat_distance(lat, cell_lat_min)
+    if lat > cell_lat_max:
+        return lat_distance(lat, cell_lat_max)
+    return 0.0
+
+
+def _column_distance_bound(lon: float, lat: float, cell_lon_min: float, cell_lon_max: float) -> float:
+    """Нижняя оценка расстояния до полосы долгот: расстояние до большого круга ближайшего меридиана."""
+    offset = (lon - cell_lon_min) % 360.0
+    if offset <= cell_lon_max - cell_lon_min:
+        return 0.0
+    delta = min(offset - (cell_lon_max - cell_lon_min), 360.0 - offset)
+    if delta >= 90.0:
+        return 0.0
+    return EARTH_RADIUS_M * math.asin(math.sin(math.radians(delta)) * math.cos(math.radians(lat)))
+
+
+def covering_ranges(lon: float, lat: float, half_width_m: float, half_height_m: float,
+                    radius_m: Optional[float] = None) -> List[ScoreRange]:
+    """
+    Диапазоны score, покрывающие прямоугольник (или круг) вокруг точки.
+
+    Выбирается самый мелкий шаг, при котором ограничивающий прямоугольник
+    покрывается не более чем MAX_COVER_CELLS ячейками. Для поиска по
+    радиусу ячейки, целиком лежащие дальше radius_m, отбрасываются;
+    смежные диапазоны объединяются.
+
+    Returns:
+        Отсортированный список включающих диапазонов (min_score, max_score)
+    """
+    box_lon_min, box_lon_max, box_lat_min, box_lat_max = bounding_box(lon, lat, half_width_m, half_height_m)
+    # при размере ячейки не меньше трети отрезка на ось приходится не больше 4 ячеек
+    spans = (3 * (LON_MAX - LON_MIN) / max(box_lon_max - box_lon_min, 1e-12),
+             3 * (LAT_MAX - LAT_MIN) / max(box_lat_max - box_lat_min, 1e-12))
+    first_step = min(int(math.log2(min(spans))) + 1, GEO_STEP_MAX)
+    for step in range(max(first_step, 1), 0, -1):
+        lat_cells = _axis_cells(box_lat_min, box_lat_max, LAT_MIN, LAT_MAX, step, wrap=False)
+        lon_cells = _axis_cells(box_lon_min, box_lon_max, LON_MIN, LON_MAX, step, wrap=True)
+        if len(lat_cells) * len(lon_cells) <= MAX_COVER_CELLS:
+            break
+
+    cells = 1 << step
+    lat_size = (LAT_MAX - LAT_MIN) / cells
+    lon_size = (LON_MAX - LON_MIN) / cells
+    shift = GEO_BITS - 2 * step
+    # оценки расстояния и раздвинутые биты считаются один раз на строку и столбец
+    rows = [(_spread(lat_cell), _row_distance_bound(lat, LAT_MIN + lat_cell * lat_size,
+                                                     LAT_MIN + (lat_cell + 1) * lat_size))
+            for lat_cell in lat_cells]
+    columns = []
+    for lon_index in lon_cells:
+        lon_cell = lon_index % cells
+        cell_lon_min = LON_MIN + lon_cell * lon_size
+        columns.append((_spread(lon_cell) << 1,
+                        _column_distance_bound(lon, lat, cell_lon_min, cell_lon_min + lon_size)))
+
+    limit = float("inf") if radius_m is None else radius_m
+    hashes = [
+        lat_bits | lon_bits
+        for lat_bits, row_bound in rows if row_bound <= limit
+        for lon_bits, column_bound in columns if column_bound <= limit
+    ]
+
+    ranges: List[ScoreRange] = []
+    for cell_hash in sorted(hashes):
+        low = cell_hash << shift
+        high = ((cell_hash + 1) << shift) - 1
+        if ranges and ranges[-1][1] + 1 == low:
+            ranges[-1] = (ranges[-1][0], high)
+        else:
+            ranges.append((low, high))
+    return ranges
@@ -0,0 +1,372 @@
+"""
+HyperLogLog в бинарном формате Redis.
+
+Значение хранится как обычная строка (bytearray) с заголовком "HYLL":
+    magic[4] | encoding[1] | не используется[3] | кэш кардинальности[8] | регистры
+
+Поддерживаются оба представления Redis:
+- sparse: коды ZERO/XZERO/VAL, несколько сотен байт для малых множеств;
+- dense: 16384 шестибитных регистра, 12288 байт.
+
+Стандартная ошибка оценки 1.04 / sqrt(16384) = 0.81%.
+"""
+import math
+from typing import Dict, Iterable, Optional, Sequence, Tuple, Union
+
+from .storage import WrongTypeError
+
+HLL_P = 14
+HLL_Q = 64 - HLL_P
+HLL_REGISTERS = 1 << HLL_P
+HLL_P_MASK = HLL_REGISTERS - 1
+HLL_BITS = 6
+HLL_REGISTER_MAX = (1 << HLL_BITS) - 1
+HLL_HDR_SIZE = 16
+HLL_DENSE_SIZE = HLL_HDR_SIZE + (HLL_REGISTERS * HLL_BITS + 7) // 8
+HLL_DENSE = 0
+HLL_SPARSE = 1
+HLL_MAGIC = b"HYLL"
+HLL_ALPHA_INF = 0.721347520444481703680
+
+# Максимальный размер sparse-представления до перехода в dense (hll-sparse-max-bytes)
+HLL_SPARSE_MAX_BYTES = 3000
+HLL_SPARSE_VAL_MAX_VALUE = 32
+HLL_SPARSE_VAL_MAX_LEN = 4
+HLL_SPARSE_ZERO_MAX_LEN = 64
+HLL_SPARSE_XZERO_MAX_LEN = 16384
+
+_MURMUR_SEED = 0xadc83b19
+_MURMUR_M = 0xc6a4a7935bd1e995
+_MASK64 = (1 << 64) - 1
+
+INVALID_HLL_ERROR = "WRONGTYPE Key is not a valid HyperLogLog string value."
+
+Buffer = Union[bytes, bytearray]
+
+# Таблицы перекодировки для распаковки/упаковки 6-битных регистров:
+# каждые 3 байта dense-представления содержат 4 регистра.
+_AND_63 = bytes(b & 63 for b in range(256))
+_SHR_6 = bytes(b >> 6 for b in range(256))
+_AND_15_SHL_2 = bytes((b & 15) << 2 for b in range(256))
+_SHR_4 = bytes(b >> 4 for b in range(256))
+_AND_3_SHL_4 = bytes((b & 3) << 4 for b in range(256))
+_SHR_2 = bytes(b >> 2 for b in range(256))
+_AND_3_SHL_6 = bytes(((b & 3) << 6) & 0xFF for b in range(256))
+_SHR_2_AND_15 = bytes((b >> 2) & 15 for b in range(256))
+_AND_15_SHL_4 = bytes(((b & 15) << 4) & 0xFF for b in range(256))
+_SHR_4_AND_3 = bytes((b >> 4) & 3 for b in range(256))
+_SHL_2 = bytes((b << 2) & 0xFF for b in range(256))
+
+_LANE_HIGH = int.from_bytes(b"\x80" * HLL_REGISTERS, "big")
+_LANE_ALL = (1 << (8 * HLL_REGISTERS)) - 1
+
+
+def murmurhash64a(data: bytes, seed: int = _MURMUR_SEED) -> int:
+    """MurmurHash64A, как в реализации HyperLogLog Redis."""
+    length = len(data)
+    h = (seed ^ (length * _MURMUR_M)) & _MASK64
+    tail_start = length - (length & 7)
+    for offset in range(0, tail_start, 8):
+        k = int.from_bytes(data[offset:offset + 8], "little")
+        k = (k * _MURMUR_M) & _MASK64
+        k ^= k >> 47
+        k = (k * _MURMUR_M) & _MASK64
+        h ^= k
+        h = (h * _MURMUR_M) & _MASK64
+    if length & 7:
+        h ^= int.from_bytes(data[tail_start:], "little")
+        h = (h * _MURMUR_M) & _MASK64
+    h ^= h >> 47
+    h = (h * _MURMUR_M) & _MASK64
+    h ^= h >> 47
+    return h
+
+
+def pattern_len(element: bytes) -> Tuple[int, int]:
+    """Возвращает (индекс регистра, длина серии нулей + 1) для элемента."""
+    hash_value = murmurhash64a(element)
+    index = hash_value & HLL_P_MASK
+    hash_value = (hash_value >> HLL_P) | (1 << HLL_Q)
+    return index, (hash_value & -hash_value).bit_length()
+
+
+def new_sparse() -> bytearray:
+    """Создает пустой HyperLogLog в sparse-представлении."""
+    header = bytearray(HLL_MAGIC + bytes([HLL_SPARSE]) + bytes(11))
+    return header + _encode_sparse({})
+
+
+def is_valid(buffer: Buffer) -> bool:
+    """Проверяет, что значение является корректным HyperLogLog."""
+    if len(buffer) < HLL_HDR_SIZE or buffer[:4] != HLL_MAGIC:
+        return False
+    encoding = buffer[4]
+    if encoding == HLL_DENSE:
+        return len(buffer) == HLL_DENSE_SIZE
+    return encoding == HLL_SPARSE
+
+
+def _invalidate_cache(buffer: bytearray) -> None:
+    buffer[15] |= 0x80
+
+
+def _cached_cardinality(buffer: Buffer) -> Optional[int]:
+    if buffer[15] & 0x80:
+        return None
+    return int.from_bytes(buffer[8:16], "little")
+
+
+def _decode_sparse(buffer: Buffer) -> Dict[int, int]:
+    """Декодирует sparse-представление в словарь {индекс: значение}."""
+    result: Dict[int, int] = {}
+    index = 0
+    position = HLL_HDR_SIZE
+    size = len(buffer)
+    while position < size:
+        opcode = buffer[position]
+        if opcode & 0x80:
+            value = ((opcode >> 2) & 31) + 1
+            run = (opcode & 3) + 1
+            for offset in range(index, index + run):
+                result[offset] = value
+            index += run
+            position += 1
+        elif opcode & 0x40:
+            index += (((opcode & 0x3F) << 8) | buffer[position + 1]) + 1
+            position += 2
+        else:
+            index += (opcode & 0x3F) + 1
+            position += 1
+    if index != HLL_REGISTERS:
+        raise WrongTypeError(INVALID_HLL_ERROR)
+    return result
+
+
+def _encode_zero_run(out: bytearray, run: int) -> None:
+    while run > 0:
+        if run > HLL_SPARSE_ZERO_MAX_LEN:
+            chunk = min(run, HLL_SPARSE_XZERO_MAX_LEN)
+            out.append(0x40 | ((chunk - 1) >> 8))
+            out.append((chunk - 1) & 0xFF)
+        else:
+            chunk = run
+            out.append(chunk - 1)
+        run -= chunk
+
+
+def _encode_sparse(registers: Dict[int, int]) -> bytearray:
+    """Кодирует ненулевые регистры (значения <= 32) в sparse-представление."""
+    out = bytearray()
+    expected = 0
+    run_value = run_start = run_length = 0
+    for index in sorted(registers):
+        value = registers[index]
+        if run_length and (index != run_start + run_length or value != run_value
+                           or run_length == HLL_SPARSE_VAL_MAX_LEN):
+            out.append(0x80 | ((run_value - 1) << 2) | (run_length - 1))
+            expected = run_start + run_length
+            run_length = 0
+        if not run_length:
+            _encode_zero_run(out, index - expected)
+            run_value, run_start, run_length = value, index, 0
+        run_length += 1
+    if run_length:
+        out.append(0x80 | ((run_value - 1) << 2) | (run_length - 1))
+        expected = run_start + run_length
+    _encode_zero_run(out, HLL_REGISTERS - expected)
+    return out
+
+
+def _dense_get(buffer: Buffer, index: int) -> int:
+    position = index * HLL_BITS
+    byte = HLL_HDR_SIZE + (position >> 3)
+    shift = position & 7
+    value = buffer[byte] >> shift
+    if shift > 8 - HLL_BITS:
+        value |= buffer[byte + 1] << (8 - shift)
+    return value & HLL_REGISTER_MAX
+
+
+def _dense_set(buffer: bytearray, index: int, value: int) -> None:
+    position = index * HLL_BITS
+    byte = HLL_HDR_SIZE + (position >> 3)
+    shift = position & 7
+    buffer[byte] = (buffer[byte] & ~(HLL_REGISTER_MAX << shift) & 0xFF) | ((value << shift) & 0xFF)
+    if shift > 8 - HLL_BITS:
+        high = 8 - shift
+        buffer[byte + 1] = (buffer[byte + 1] & ~(HLL_REGISTER_MAX >> high) & 0xFF) | (value >> high)
+
+
+def _or_bytes(left: bytes, right: bytes) -> bytes:
+    """Побайтовое OR двух строк одинаковой длины через длинную арифметику."""
+    size = len(left)
+    return (int.from_bytes(left, "big") | int.from_bytes(right, "big")).to_bytes(size, "big")
+
+
+def dense_to_registers(buffer: Buffer) -> bytes:
+    """Распаковывает dense-регистры в строку по одному байту на регистр."""
+    data = bytes(buffer[HLL_HDR_SIZE:HLL_DENSE_SIZE])
+    b0, b1, b2 = data[0::3], data[1::3], data[2::3]
+    registers = bytearray(HLL_REGISTERS)
+    registers[0::4] = b0.translate(_AND_63)
+    registers[1::4] = _or_bytes(b0.translate(_SHR_6), b1.translate(_AND_15_SHL_2))
+    registers[2::4] = _or_bytes(b1.translate(_SHR_4), b2.translate(_AND_3_SHL_4))
+    registers[3::4] = b2.translate(_SHR_2)
+    return bytes(registers)
+
+
+def registers_to_dense(registers: bytes) -> bytearray:
+    """Упаковывает регистры (по байту на регистр) в dense-представление."""
+    r0, r1, r2, r3 = registers[0::4], registers[1::4], registers[2::4], registers[3::4]
+    data = bytearray(HLL_DENSE_SIZE - HLL_HDR_SIZE)
+    data[0::3] = _or_bytes(r0, r1.translate(_AND_3_SHL_6))
+    data[1::3] = _or_bytes(r1.translate(_SHR_2_AND_15), r2.translate(_AND_15_SHL_4))
+    data[2::3] = _or_bytes(r2.translate(_SHR_4_AND_3), r3.translate(_SHL_2))
+    header = bytearray(HLL_MAGIC + bytes([HLL_DENSE]) + bytes(11))
+    _invalidate_cache(header)
+    return header + data
+
+
+def to_registers(buffer: Buffer) -> bytes:
+    """Возвращает регистры HyperLogLog по одному байту на регистр."""
+    if buffer[4] == HLL_DENSE:
+        return dense_to_registers(buffer)
+    registers = bytearray(HLL_REGISTERS)
+    for index, value in _decode_sparse(buffer).items():
+        registers[index] = value
+    return bytes(registers)
+
+
+def registers_max(left: bytes, right: bytes) -> bytes:
+    """
+    Поэлементный максимум регистров без цикла по регистрам (SWAR).
+
+    В каждом байте левого операнда выставляется старший бит, после вычитания
+    правого операнда он остается только там, где left >= right. Из этих бит
+    строится маска выбора, заимствования между байтами невозможны, так как
+    значения регистров не превышают 63.
+    """
+    a = int.from_bytes(left, "big")
+    b = int.from_bytes(right, "big")
+    diff = (a | _LANE_HIGH) - b
+    select = ((diff & _LANE_HIGH) >> 7) * 0xFF
+    return ((a & select) | (b & ~select & _LANE_ALL)).to_bytes(HLL_REGISTERS, "big")
+
+
+def _tau(x: float) -> float:
+    if x == 0.0 or x == 1.0:
+        return 0.0
+    y = 1.0
+    z = 1 - x
+    while True:
+        x = math.sqrt(x)
+        z_prev = z
+        y *= 0.5
+        z -= (1 - x) ** 2 * y
+        if z_prev == z:
+            return z / 3
+
+
+def _sigma(x: float) -> float:
+    if x == 1.0:
+        return math.inf
+    y = 1.0
+    z = x
+    while True:
+        x *= x
+        z_prev = z
+        z += x * y
+        y += y
+        if z_prev == z:
+            return z
+
+
+def estimate(registers: bytes) -> int:
+    """Оценка кардинальности по регистрам (улучшенный оценщик Ertl, как в Redis)."""
+    histogram = [registers.count(value) for value in range(HLL_Q + 2)]
+    m = HLL_REGISTERS
+    z = m * _tau((m - histogram[HLL_Q + 1]) / m)
+    for j in range(HLL_Q, 0, -1):
+        z += histogram[j]
+        z *= 0.5
+    z += m * _sigma(histogram[0] / m)
+    return round(HLL_ALPHA_INF * m * m / z)
+
+
+def from_registers(registers: bytes) -> bytearray:
+    """Строит HyperLogLog по регистрам, выбирая sparse-представление, если оно возможно."""
+    if max(registers) <= HLL_SPARSE_VAL_MAX_VALUE:
+        nonzero = {index: value for index, value in enumerate(registers) if value}
+        encoded = _encode_sparse(nonzero)
+        if len(encoded) <= HLL_SPARSE_MAX_BYTES:
+            header = bytearray(HLL_MAGIC + bytes([HLL_SPARSE]) + bytes(11))
+            _invalidate_cache(header)
+            return header + encoded
+    return registers_to_dense(registers)
+
+
+def add(buffer: bytearray, elements: Iterable[bytes]) -> bool:
+    """
+    Добавляет элементы в HyperLogLog на месте.
+
+    Все элементы хешируются за один проход; sparse-представление
+    декодируется и кодируется один раз на вызов и при необходимости
+    переводится в dense.
+
+    Returns:
+        True если хотя бы один регистр изменился
+    """
+    updates: Dict[int, int] = {}
+    for element in elements:
+        index, rank = pattern_len(element)
+        if rank > updates.get(index, 0):
+            updates[index] = rank
+    if not updates:
+        return False
+
+    changed = False
+    if buffer[4] == HLL_SPARSE:
+        registers = _decode_sparse(buffer)
+        for index, rank in updates.items():
+            if rank > registers.get(index, 0):
+                registers[index] = rank
+                changed = True
+        if not changed:
+            return False
+        if max(registers.values()) <= HLL_SPARSE_VAL_MAX_VALUE:
+            encoded = _encode_sparse(registers)
+            if len(encoded) <= HLL_SPARSE_MAX_BYTES:
+                buffer[HLL_HDR_SIZE:] = encoded
+                _invalidate_cache(buffer)
+                return True
+        dense = bytearray(HLL_REGISTERS)
+        for index, value in registers.items():
+            dense[index] = value
+        buffer[:] = registers_to_dense(bytes(dense))
+        return True
+
+    for index, rank in updates.items():
+        if rank > _dense_get(buffer, index):
+            _dense_set(buffer, index, rank)
+            changed = True
+    if changed:
+        _invalidate_cache(buffer)
+    return changed
+
+
+def count(buffer: bytearray) -> int:
+    """Возвращает кардинальность, используя и обновляя кэш в заголовке."""
+    cached = _cached_cardinality(buffer)
+    if cached is not None:
+        return cached
+    cardinality = estimate(to_registers(buffer))
+    buffer[8:16] = cardinality.to_bytes(8, "little")
+    return cardinality
+
+
+def merge_registers(buffers: Sequence[Buffer]) -> bytes:
+    """Объединяет несколько HyperLogLog, возвращая максимум регистров."""
+    merged = bytes(HLL_REGISTERS)
+    for buffer in buffers:
+        merged = registers_max(merged, to_registers(buffer))
+    return merged
@@ -0,0 +1,310 @@
+"""
+Тип данных JSON: разобранное дерево документа с путями JSONPath.
+
+Документ хранится как дерево dict/list/скаляров. Сериализация кэшируется
+по узлам: для корня и для каждого контейнера, чей текст не короче
+CACHE_MIN_SIZE, запоминается готовая строка. Изменение поля сбрасывает
+кэш только у узлов на пути от корня к полю, поэтому повторная
+сериализация после изменения пересобирает лишь этот путь и склеивает
+закэшированные строки соседних поддеревьев.
+
+Поддерживаемое подмножество JSONPath: `$`, `.key`, `['key']`, `[index]`
+(в том числе отрицательный), `[*]` и `.*`. Пути без `$` (`.`, `a.b`,
+`.a[0]`) считаются устаревшим синтаксисом и указывают на одно значение.
+"""
+import json
+from functools import partial
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+Key = Union[str, int]
+# (цепочка контейнеров от корня до родителя, ключ в родителе)
+Match = Tuple[List[Any], Optional[Key]]
+
+# Минимальная длина текста контейнера, начиная с которой он кэшируется
+CACHE_MIN_SIZE = 256
+
+_WILDCARD = object()
+_ROOT = object()
+
+_encode = partial(json.dumps, ensure_ascii=False)
+
+
+class JsonPathError(ValueError):
+    """Некорректный путь JSONPath."""
+
+
+class JsonPath:
+    """Разобранный путь: список ключей/индексов/шаблонов и признак устаревшего синтаксиса."""
+
+    __slots__ = ("text", "tokens", "legacy")
+
+    def __init__(self, text: str, tokens: List[Any], legacy: bool):
+        self.text = text
+        self.tokens = tokens
+        self.legacy = legacy
+
+    @property
+    def is_root(self) -> bool:
+        return not self.tokens
+
+
+def parse_path(text: str) -> JsonPath:
+    """
+    Разбирает путь JSONPath.
+
+    Raises:
+        JsonPathError: Если путь синтаксически некорректен
+    """
+    legacy = not text.startswith("$")
+    if not legacy:
+        body = text[1:]
+    elif text in (".", ""):
+        body = ""
+    else:
+        body = text if text.startswith((".", "[")) else "." + text
+
+    tokens: List[Any] = []
+    position = 0
+    length = len(body)
+    while position < length:
+        char = body[position]
+        if char == ".":
+            position += 1
+            if position < length and body[position] == "*":
+                tokens.append(_WILDCARD)
+                position += 1
+                continue
+            end = position
+            while end < length and body[end] not in ".[":
+                end += 1
+            if end == position:
+                raise JsonPathError(f"Invalid JSONPath '{text}'")
+            tokens.append(body[position:end])
+            position = end
+        elif char == "[":
+            end = body.find("]", position)
+            if end < 0:
+                raise JsonPathError(f"Invalid JSONPath '{text}'")
+            inner = body[position + 1:end].strip()
+            if inner == "*":
+                tokens.append(_WILDCARD)
+            elif len(inner) >= 2 and inner[0] == inner[-1] and inner[0] in "'\"":
+                tokens.append(inner[1:-1])
+            else:
+                try:
+                    tokens.append(int(inner))
+                except ValueError:
+                    raise JsonPathError(f"Invalid JSONPath '{text}'")
+            position = end + 1
+        else:
+            raise JsonPathError(f"Invalid JSONPath '{text}'")
+    return JsonPath(text, tokens, legacy)
+
+
+def _children(node: Any, token: Any) -> List[Tuple[Key, Any]]:
+    """Дочерние узлы, соответствующие токену пути."""
+    if token is _WILDCARD:
+        if isinstance(node, dict):
+            return list(node.items())
+        if isinstance(node, list):
+            return list(enumerate(node))
+        return []
+    if isinstance(token, int):
+        if isinstance(node, list) and -len(node) <= token < len(node):
+            return [(token % len(node), node[token])]
+        return []
+    if isinstance(node, dict) and token in node:
+        return [(token, node[token])]
+    return []
+
+
+def _reject_constant(name: str) -> Any:
+    raise ValueError(f"invalid JSON value {name}")
+
+
+def loads(text: str) -> Any:
+    """
+    Разбирает JSON-значение (NaN и Infinity не допускаются).
+
+    Raises:
+        ValueError: Если текст не является корректным JSON
+    """
+    return json.loads(text, parse_constant=_reject_constant)
+
+
+def json_type(value: Any) -> str:
+    """Имя типа значения JSON."""
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "boolean"
+    if isinstance(value, int):
+        return "integer"
+    if isinstance(value, float):
+        return "number"
+    if isinstance(value, str):
+        return "string"
+    if isinstance(value, list):
+        return "array"
+    return "object"
+
+
+class JsonDocument:
+    """JSON-документ с кэшированной по узлам сериализацией."""
+
+    def __init__(self, root: Any):
+        self.root = root
+        # id(контейнер) -> (контейнер, текст); ссылка на контейнер не дает id переиспользоваться
+        self._cache: Dict[int, Tuple[Any, str]] = {}
+
+    # --- сериализация ---
+
+    def dumps(self, value: Any = _ROOT) -> str:
+        """Сериализует документ (или его узел) с использованием кэша."""
+        if value is _ROOT:
+            return self._dumps(self.root, is_root=True)
+        return self._dumps(value)
+
+    def _dumps(self, node: Any, is_root: bool = False) -> str:
+        if isinstance(node, dict):
+            cached = self._cache.get(id(node))
+            if cached is not None and cached[0] is node:
+                return cached[1]
+            parts = []
+            for key, value in node.items():
+                text = self._dumps(value) if isinstance(value, (dict, list)) else _encode(value)
+                parts.append(_encode(key) + ":" + text)
+            text = "{" + ",".join(parts) + "}"
+        elif isinstance(node, list):
+            cached = self._cache.get(id(node))
+            if cached is not None and cached[0] is node:
+                return cached[1]
+            text = "[" + ",".join(
+                self._dumps(value) if isinstance(value, (dict, list)) else _encode(value)
+                for value in node
+            ) + "]"
+        else:
+            return _encode(node)
+        if is_root or len(text) >= CACHE_MIN_SIZE:
+            self._cache[id(node)] = (node, text)
+        return text
+
+    def _invalidate(self, chain: List[Any]) -> None:
+        """Сбрасывает кэш узлов на пути от корня к измененному полю."""
+        cache = self._cache
+        for node in chain:
+            cache.pop(id(node), None)
+
+    def _forget(self, node: Any) -> None:
+        """Удаляет из кэша поддерево, отсоединенное от документа."""
+        if not self._cache or not isinstance(node, (dict, list)):
+            return
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            self._cache.pop(id(current), None)
+            values = current.values() if isinstance(current, dict) else current
+            stack.extend(value for value in values if isinstance(value, (dict, list)))
+
+    # --- поиск ---
+
+    def find(self, path: JsonPath) -> List[Match]:
+        """Все совпадения пути: (цепочка контейнеров до родителя, ключ)."""
+        if path.is_root:
+            return [([], None)]
+        matches: List[Tuple[List[Any], Any]] = [([], self.root)]
+        result: List[Match] = []
+        last = len(path.tokens) - 1
+        for depth, token in enumerate(path.tokens):
+            next_matches = []
+            for chain, node in matches:
+                for key, child in _children(node, token):
+                    if depth == last:
+                        result.append((chain + [node], key))
+                    else:
+                        next_matches.append((chain + [node], child))
+            matches = next_matches
+        return result
+
+    def get(self, match: Match) -> Any:
+        """Значение по совпадению."""
+        chain, key = match
+        return self.root if key is None else chain[-1][key]
+
+    def values(self, path: JsonPath) -> List[Any]:
+        """Значения всех совпадений пути."""
+        return [self.get(match) for match in self.find(path)]
+
+    # --- изменения ---
+
+    def set_value(self, match: Match, value: Any) -> None:
+        """Записывает значение по совпадению."""
+        chain, key = match
+        if key is None:
+            self.root = value
+            self._cache.clear()
+            return
+        parent = chain[-1]
+        if isinstance(parent, dict) and key not in parent:
+            parent[key] = value
+        else:
+            self._forget(parent[key])
+            parent[key] = value
+        self._invalidate(chain)
+
+    def set_path(self, path: JsonPath, value: Any, nx: bool = False, xx: bool = False) -> bool:
+        """
+        JSON.SET для пути: изменяет существующие значения или создает
+        последний ключ пути в существующих объектах.
+
+        Returns:
+            True, если что-то было записано
+        """
+        matches = self.find(path)
+        if matches:
+            if nx:
+                return False
+            for match in matches:
+                self.set_value(match, value)
+            return True
+        if xx:
+            return False
+        last = path.tokens[-1]
+        if not isinstance(last, str):
+            return False
+        parent_path = JsonPath(path.text, path.tokens[:-1], path.legacy)
+        created = False
+        for chain, key in self.find(parent_path):
+            parent = self.get((chain, key))
+            if isinstance(parent, dict):
+                self.set_value((chain + [parent], last), value)
+                created = True
+        return created
+
+    def delete(self, match: Match) -> None:
+        """Удаляет значение по совпадению (кроме корня)."""
+        chain, key = match
+        parent = chain[-1]
+        self._forget(parent[key])
+        del parent[key]
+        self._invalidate(chain)
+
+    def incr_number(self, match: Match, amount: Union[int, float]) -> Optional[Union[int, float]]:
+        """Увеличивает число; возвращает новое значение или None, если значение не число."""
+        value = self.get(match)
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            return None
+        result = value + amount
+        self.set_value(match, result)
+        return result
+
+    def array_append(self, match: Match, values: List[Any]) -> Optional[int]:
+        """Добавляет элементы в массив; возвращает новую длину или None, если это не массив."""
+        array = self.get(match)
+        if not isinstance(array, list):
+            return None
+        array.extend(values)
+        chain, key = match
+        self._invalidate(chain + [array] if key is not None else [array])
+        return len(array)
+
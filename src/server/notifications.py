@@ -0,0 +1,65 @@
+"""
+Уведомления о событиях пространства ключей (notify-keyspace-events).
+
+Событие публикуется в каналы `__keyspace@<db>__:<ключ>` (сообщение —
+имя события) и `__keyevent@<db>__:<событие>` (сообщение — ключ).
+Набор включенных классов событий хранится в хранилище целым числом:
+при нулевом значении методы записи проверяют только его.
+"""
+from typing import Any
+
+KEYSPACE = 1 << 0   # K: каналы __keyspace@<db>__
+KEYEVENT = 1 << 1   # E: каналы __keyevent@<db>__
+GENERIC = 1 << 2    # g: del, expire, persist, move_from, move_to
+STRING = 1 << 3     # $: set, append, setrange, setbit
+HASH = 1 << 4       # h: hset, hdel
+EXPIRED = 1 << 5    # x: expired
+EVICTED = 1 << 6    # e: evicted
+
+ALL_CLASSES = GENERIC | STRING | HASH | EXPIRED | EVICTED
+
+_FLAG_CHARS = (
+    ("K", KEYSPACE), ("E", KEYEVENT), ("g", GENERIC), ("$", STRING),
+    ("h", HASH), ("x", EXPIRED), ("e", EVICTED),
+)
+
+
+def parse_flags(text: str) -> int:
+    """
+    Разбирает строку классов событий (например, "Ex" или "KEA").
+
+    Returns:
+        Битовая маска; 0, если не выбран ни тип канала (K/E), ни класс событий
+
+    Raises:
+        ValueError: Если строка содержит неизвестный класс
+    """
+    flags = 0
+    chars = dict(_FLAG_CHARS)
+    for char in text:
+        if char == "A":
+            flags |= ALL_CLASSES
+        elif char in chars:
+            flags |= chars[char]
+        else:
+            raise ValueError(f"unknown keyspace event class '{char}'")
+    if not flags & (KEYSPACE | KEYEVENT) or not flags & ALL_CLASSES:
+        return 0
+    return flags
+
+
+def format_flags(flags: int) -> str:
+    """Строка классов событий для CONFIG GET."""
+    text = ""
+    if flags & ALL_CLASSES == ALL_CLASSES:
+        text = "A"
+        flags &= ~ALL_CLASSES
+    return "".join(char for char, flag in _FLAG_CHARS if flags & flag) + text
+
+
+def publish(pubsub: Any, flags: int, event: str, key: str, db: int) -> None:
+    """Публикует событие в каналы, выбранные флагами K и E."""
+    if flags & KEYSPACE:
+        pubsub.publish(f"__keyspace@{db}__:{key}", event)
+    if flags & KEYEVENT:
+        pubsub.publish(f"__keyevent@{db}__:{event}", key)
@@ -0,0 +1,648 @@
+"""
+Сохранение данных на диск: снимки SAVE / BGSAVE и автоматические сохранения.
+
+BGSAVE делает fork: дочерний процесс получает копию памяти родителя в
+момент вызова (страницы копируются ядром только при изменении, copy-on-write)
+и пишет снимок, а родитель продолжает обслуживать клиентов. Перед fork
+объекты переводятся в постоянное поколение сборщика мусора (gc.freeze),
+чтобы сборка в дочернем процессе не трогала их заголовки и не копировала
+страницы. Завершения дочернего процесса ждет фоновый поток.
+
+Интервалы автоматического сохранения задаются парами «секунды изменения»
+(CONFIG SET save "3600 1 300 100"): снимок делается, если с прошлого
+сохранения прошло не меньше секунд и накопилось не меньше изменений.
+
+При запуске снимок отображается в память (mmap) и декодируется потоково:
+файл не читается в память целиком, а ход загрузки виден в INFO persistence.
+
+Журнал команд AOF (appendonly yes) хранится в каталоге appendonlydir:
+базовый снимок и файлы команд после него, перечисленные в манифесте. При
+включенном журнале данные при запуске загружаются из него, а не из снимка.
+
+Перезапись журнала (BGREWRITEAOF) не останавливает запись: в момент
+запуска команды начинают писаться в новый файл, а дочерний процесс пишет
+новый базовый снимок из копии памяти. Пока он работает, манифест
+перечисляет прежние файлы и новый файл команд. После его завершения
+манифест заменяется на новый снимок и новый файл, а прежние файлы
+удаляются. Перезапись запускается автоматически, когда журнал вырос на
+auto-aof-rewrite-percentage процентов с последней перезаписи и стал
+больше auto-aof-rewrite-min-size байт.
+"""
+import contextlib
+import gc
+import logging
+import mmap
+import os
+import threading
+import time
+from typing import Any, Callable, Iterator, List, Optional, Tuple
+
+from . import aof, snapshot
+from .aof import AppendOnlyFile, Manifest
+
+logger = logging.getLogger(__name__)
+
+
+def parse_save_params(text: str) -> List[Tuple[int, int]]:
+    """
+    Разбирает параметр save: "секунды изменения [секунды изменения ...]".
+
+    Raises:
+        ValueError: Если значения не образуют пары неотрицательных чисел
+    """
+    parts = text.split()
+    if len(parts) % 2:
+        raise ValueError("save parameters must be pairs of seconds and changes")
+    params = [(int(parts[i]), int(parts[i + 1])) for i in range(0, len(parts), 2)]
+    if any(seconds < 0 or changes < 0 for seconds, changes in params):
+        raise ValueError("save parameters must be non-negative")
+    return params
+
+
+def format_save_params(params: List[Tuple[int, int]]) -> str:
+    return " ".join(f"{seconds} {changes}" for seconds, changes in params)
+
+
+class Persistence:
+    """Состояние сохранения снимков, общее для всех баз сервера."""
+
+    def __init__(self, storages: List[Any]):
+        self.storages = storages
+        self.dir = "."
+        self.dbfilename = "dump.rdb"
+        # пары (секунды, изменения) для автоматического BGSAVE; пусто — выключено
+        self.save_params: List[Tuple[int, int]] = []
+        # время последнего успешного сохранения (LASTSAVE), изначально — время запуска
+        self.lastsave = int(time.time())
+        self.last_bgsave_ok = True
+        self.last_bgsave_seconds = -1
+        self.saves = 0
+        # счетчик изменений на момент последнего успешного сохранения
+        self._saved_dirty = 0
+        self._child_pid: Optional[int] = None
+        self._child_started = 0.0
+        # время последней неудачной попытки (автосохранение повторяется не чаще раза в 5 с)
+        self._last_failure = 0.0
+        # состояние загрузки снимка (пока loading, сервер отвечает -LOADING)
+        self.loading = False
+        self.loading_start_time = 0.0
+        self.loading_total_bytes = 0
+        self.loading_loaded_bytes = 0
+        self.loading_loaded_keys = 0
+        # журнал команд: включен ли, политика fsync, имена каталога и файлов
+        self.appendonly = False
+        self.appendfsync = "everysec"
+        self.appenddirname = "appendonlydir"
+        self.appendfilename = "appendonly.aof"
+        # открытый файл команд (None, пока журнал выключен)
+        self.aof: Optional[AppendOnlyFile] = None
+        self._manifest: Optional[Manifest] = None
+        # обработчики баз для выполнения команд журнала при загрузке
+        self.handlers: List[Any] = []
+        # репликация (у набора баз — общая; получает те же команды, что и журнал)
+        self.replication: Optional[Any] = None
+        # эффекты команд открытой транзакции (EXEC, FCALL): [(база, команды)], None вне ее
+        self._transaction: Optional[List[Tuple[int, List[List[str]]]]] = None
+        # автоматическая перезапись: рост журнала в процентах и минимальный размер
+        self.auto_aof_rewrite_percentage = 100
+        self.auto_aof_rewrite_min_size = 64 * 1024 * 1024
+        # размер журнала после последней перезаписи (базовый снимок)
+        self.aof_base_size = 0
+        # размер файлов журнала, кроме текущего файла команд
+        self._aof_history_size = 0
+        self.aof_rewrite_scheduled = False
+        self.aof_last_bgrewrite_ok = True
+        self.aof_last_rewrite_seconds = -1
+        self.aof_rewrites = 0
+        self._rewrite_pid: Optional[int] = None
+        self._rewrite_started = 0.0
+        self._last_rewrite_failure = 0.0
+
+    @property
+    def path(self) -> str:
+        return os.path.join(self.dir, self.dbfilename)
+
+    @property
+    def dirty(self) -> int:
+        """Суммарный счетчик изменений всех баз."""
+        return sum(storage.dirty for storage in self.storages)
+
+    @property
+    def changes_since_save(self) -> int:
+        return self.dirty - self._saved_dirty
+
+    @property
+    def bgsave_in_progress(self) -> bool:
+        return self._child_pid is not None
+
+    @property
+    def aof_rewrite_in_progress(self) -> bool:
+        return self._rewrite_pid is not None
+
+    @property
+    def child_active(self) -> bool:
+        """Работает ли дочерний процесс (BGSAVE или перезапись журнала); одновременно — только один."""
+        return self._child_pid is not None or self._rewrite_pid is not None
+
+    @property
+    def aof_current_size(self) -> int:
+        """Суммарный размер файлов журнала."""
+        return self._aof_history_size + (self.aof.size if self.aof is not None else 0)
+
+    def _functions(self) -> Any:
+        return self.storages[0].functions if self.storages else None
+
+    def save(self) -> int:
+        """
+        Синхронно пишет снимок под блокировками всех баз (SAVE).
+
+        Returns:
+            Число записанных ключей
+
+        Raises:
+            OSError: Если файл не удалось записать
+        """
+        locks = [storage.lock for storage in self.storages]
+        for lock in locks:
+            lock.acquire()
+        try:
+            dirty = self.dirty
+            written = snapshot.write_snapshot(self.path, self.storages, self._functions())
+        finally:
+            for lock in reversed(locks):
+                lock.release()
+        self._saved(dirty, int(time.time()))
+        return written
+
+    def bgsave(self) -> bool:
+        """
+        Запускает сохранение снимка в дочернем процессе.
+
+        Без os.fork (Windows) снимок пишется синхронно.
+
+        Returns:
+            False, если уже работает дочерний процесс (BGSAVE или перезапись журнала)
+        """
+        if self.child_active:
+            return False
+        if not hasattr(os, "fork"):
+            try:
+                self.save()
+                self.last_bgsave_ok = True
+            except OSError:
+                self.last_bgsave_ok = False
+                self._last_failure = time.time()
+            return True
+
+        dirty = self.dirty
+        started = time.time()
+        path, functions = self.path, self._functions()
+        gc.freeze()
+        try:
+            pid = os.fork()
+        except OSError:
+            gc.unfreeze()
+            raise
+        if pid == 0:
+            code = 1
+            try:
+                gc.disable()
+                snapshot.write_snapshot(path, self.storages, functions)
+                code = 0
+            finally:
+                os._exit(code)
+        gc.unfreeze()
+        self._child_pid = pid
+        self._child_started = started
+        threading.Thread(target=self._wait_child, args=(pid, dirty, started), daemon=True).start()
+        return True
+
+    def _wait_child(self, pid: int, dirty: int, started: float) -> None:
+        """Фоновый поток: ждет завершения дочернего процесса и фиксирует результат."""
+        _, status = os.waitpid(pid, 0)
+        ok = os.waitstatus_to_exitcode(status) == 0
+        self.last_bgsave_ok = ok
+        self.last_bgsave_seconds = int(time.time() - started)
+        if ok:
+            self._saved(dirty, int(started))
+        else:
+            self._last_failure = time.time()
+        self._child_pid = None
+
+    def _saved(self, dirty: int, when: int) -> None:
+        self._saved_dirty = dirty
+        self.lastsave = when
+        self.saves += 1
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Ждет завершения фонового сохранения и перезаписи журнала (для тестов и остановки сервера)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.child_active:
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def cron(self, now: Optional[float] = None) -> None:
+        """Периодическая проверка отложенной перезаписи журнала, его роста и интервалов сохранения."""
+        if self.child_active or self.loading:
+            return
+        now = time.time() if now is None else now
+        if self.aof_rewrite_scheduled or self._aof_grown():
+            if self.aof_last_bgrewrite_ok or now - self._last_rewrite_failure >= 5:
+                self.bgrewriteaof()
+                return
+        if not self.save_params:
+            return
+        if not self.last_bgsave_ok and now - self._last_failure < 5:
+            return
+        changes = self.changes_since_save
+        elapsed = now - self.lastsave
+        for seconds, min_changes in self.save_params:
+            if changes >= min_changes and changes > 0 and elapsed >= seconds:
+                self.bgsave()
+                return
+
+    def _aof_grown(self) -> bool:
+        """Вырос ли журнал настолько, что его пора перезаписать."""
+        if self.aof is None or not self.auto_aof_rewrite_percentage:
+            return False
+        size = self.aof_current_size
+        if size < self.auto_aof_rewrite_min_size:
+            return False
+        base = self.aof_base_size or 1
+        return (size - base) * 100 // base >= self.auto_aof_rewrite_percentage
+
+    @property
+    def aof_dir(self) -> str:
+        return os.path.join(self.dir, self.appenddirname)
+
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.aof_dir, f"{self.appendfilename}.manifest")
+
+    def load(self) -> int:
+        """
+        Загружает данные при запуске: из журнала, если он включен и существует,
+        иначе из снимка. При включенном журнале он затем открывается на
+        дозапись, а если его не было — создается из загруженных данных.
+
+        Returns:
+            Число ключей после загрузки (0, если загружать нечего)
+
+        Raises:
+            SnapshotError, AofError: Если файл поврежден
+        """
+        manifest = None
+        if self.appendonly and os.path.exists(self.manifest_path):
+            manifest = Manifest.read(self.manifest_path)
+            loaded = self._load_aof(manifest)
+        else:
+            loaded = self._load_snapshot()
+        self._saved_dirty = self.dirty
+        if self.appendonly and self.aof is None:
+            self.enable_aof(manifest)
+        return loaded
+
+    @contextlib.contextmanager
+    def _loading(self, total_bytes: int) -> Iterator[None]:
+        """
+        Состояние загрузки для INFO persistence; сборщик мусора на это время выключен.
+
+        Флаг loading восстанавливается прежним: сервер держит его до конца
+        запуска, включая открытие журнала после загрузки.
+        """
+        was_loading = self.loading
+        self.loading = True
+        self.loading_start_time = time.time()
+        self.loading_total_bytes = total_bytes
+        self.loading_loaded_bytes = self.loading_loaded_keys = 0
+        # загружаемые объекты живут долго: сборки мусора во время загрузки
+        # только обходят растущую кучу и ничего не освобождают
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            yield
+        finally:
+            if gc_enabled:
+                gc.enable()
+            self.loading = was_loading
+
+    @staticmethod
+    def _mapped(path: str, decode: Callable[[Any], Any]) -> Any:
+        """
+        Вызывает decode для файла, отображенного в память.
+
+        Файл декодируется за один проход; страницы читаются ядром по мере
+        продвижения декодера.
+        """
+        with open(path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            if hasattr(mapped, "madvise"):
+                mapped.madvise(mmap.MADV_SEQUENTIAL)
+            return decode(mapped)
+
+    def _load_snapshot(self) -> int:
+        """Загружает снимок dir/dbfilename, если он существует и не пуст."""
+        if not os.path.exists(self.path):
+            return 0
+        size = os.path.getsize(self.path)
+        if not size:
+            return 0
+        with self._loading(size):
+            return self._mapped(self.path, lambda data: snapshot.load(
+                data, self.storages, self._functions(), self._loading_progress))
+
+    def _load_aof(self, manifest: Manifest) -> int:
+        """
+        Загружает журнал: базовый снимок пакетно, затем команды файлов журнала.
+
+        Незавершенная последняя команда последнего файла (сбой посреди
+        записи) отбрасывается, а файл усекается до последней целой команды.
+        """
+        paths = [os.path.join(self.aof_dir, name) for name in manifest.files()]
+        sizes = [os.path.getsize(path) for path in paths]
+        offset = 0
+        with self._loading(sum(sizes)):
+            if manifest.base is not None:
+                self._mapped(paths[0], lambda data: snapshot.load(
+                    data, self.storages, self._functions(), self._loading_progress))
+                offset = sizes[0]
+            incr_paths = paths[1:] if manifest.base is not None else paths
+            incr_sizes = sizes[len(paths) - len(incr_paths):]
+            for i, (path, size) in enumerate(zip(incr_paths, incr_sizes)):
+                if not size:
+                    continue
+                base_offset = offset
+                executed, valid = self._mapped(path, lambda data: aof.replay(
+                    data, self.handlers,
+                    lambda pos: self._loading_progress(base_offset + pos, self.loading_loaded_keys)))
+                if valid < size:
+                    if i != len(incr_paths) - 1:
+                        raise aof.AofError(f"AOF file {os.path.basename(path)} is truncated")
+                    logger.warning(f"AOF {os.path.basename(path)} ends with an incomplete command or transaction, "
+                                   f"truncating {size - valid} bytes")
+                    os.truncate(path, valid)
+                offset += size
+            self._loading_progress(offset, sum(storage.size() for storage in self.storages))
+        self._manifest = manifest
+        return self.loading_loaded_keys
+
+    def enable_aof(self, manifest: Optional[Manifest] = None, background: bool = False) -> None:
+        """
+        Включает журнал команд.
+
+        С манифестом загруженного журнала дописывается его последний файл
+        команд. Иначе журнал создается перезаписью: текущие данные пишутся
+        базовым снимком, а команды после него — в новый файл. С background
+        снимок пишет дочерний процесс; если уже работает BGSAVE, перезапись
+        откладывается до его завершения.
+        """
+        if self.aof is not None:
+            return
+        os.makedirs(self.aof_dir, exist_ok=True)
+        if manifest is not None and manifest.incrs:
+            path = os.path.join(self.aof_dir, manifest.incrs[-1][0])
+            self.aof = AppendOnlyFile(path, self.appendfsync)
+            self._manifest = manifest
+            self._aof_history_size = sum(os.path.getsize(os.path.join(self.aof_dir, name))
+                                         for name in manifest.files()[:-1])
+            self.aof_base_size = self.aof_current_size
+            self.refresh_propagate()
+            return
+        if not background:
+            self._rewrite(background=False)
+        elif self.child_active:
+            self.aof_rewrite_scheduled = True
+        else:
+            self._rewrite(background=True)
+
+    def disable_aof(self) -> None:
+        """Выключает журнал команд: дописывает буфер и закрывает файл."""
+        self.aof_rewrite_scheduled = False
+        if self.aof is None:
+            return
+        aof, self.aof = self.aof, None
+        self.refresh_propagate()
+        aof.close()
+
+    def bgrewriteaof(self) -> bool:
+        """
+        Запускает перезапись журнала в дочернем процессе (BGREWRITEAOF).
+
+        Без os.fork журнал перезаписывается синхронно.
+
+        Returns:
+            False, если уже работает дочерний процесс (BGSAVE или перезапись журнала)
+
+        Raises:
+            OSError: Если не удалось создать файл или процесс
+        """
+        if self.child_active:
+            return False
+        self._rewrite(background=True)
+        return True
+
+    def _rewrite(self, background: bool) -> None:
+        """
+        Начинает новый файл команд и пишет базовый снимок данных на этот момент.
+
+        Переключение файла и fork выполняются под блокировками всех баз,
+        поэтому каждая запись попадает либо в снимок, либо в новый файл.
+        Пока снимок не готов, манифест перечисляет прежние файлы и новый
+        файл команд: после сбоя журнал загружается целиком.
+        """
+        self.aof_rewrite_scheduled = False
+        os.makedirs(self.aof_dir, exist_ok=True)
+        background = background and hasattr(os, "fork")
+        started = time.time()
+        previous = self.aof
+        locks = [storage.lock for storage in self.storages]
+        for lock in locks:
+            lock.acquire()
+        try:
+            seq = (self._manifest.seq if self._manifest is not None else 0) + 1
+            base = f"{self.appendfilename}.{seq}.base.rdb"
+            incr = f"{self.appendfilename}.{seq}.incr.aof"
+            if previous is not None:
+                previous.flush()
+            self.aof = AppendOnlyFile(os.path.join(self.aof_dir, incr), self.appendfsync)
+            try:
+                if background:
+                    pid = self._fork_rewrite(os.path.join(self.aof_dir, base))
+                else:
+                    snapshot.write_snapshot(os.path.join(self.aof_dir, base), self.storages, self._functions())
+            except OSError:
+                self.aof.close()
+                os.unlink(self.aof.path)
+                self.aof = previous
+                self.aof_last_bgrewrite_ok = False
+                self._last_rewrite_failure = time.time()
+                raise
+            if previous is not None:
+                self._aof_history_size += previous.size
+            if self._manifest is not None and background:
+                self._manifest = Manifest(self._manifest.base, self._manifest.incrs + [(incr, seq)])
+                self._manifest.write(self.manifest_path)
+            self.refresh_propagate()
+        finally:
+            for lock in reversed(locks):
+                lock.release()
+        if previous is not None:
+            previous.close()
+            if self._manifest is None:
+                # файл команд без манифеста (прежняя попытка создать журнал
+                # не удалась) целиком покрыт новым снимком
+                with contextlib.suppress(OSError):
+                    os.unlink(previous.path)
+        if background:
+            self._rewrite_pid = pid
+            self._rewrite_started = started
+            threading.Thread(target=self._wait_rewrite, args=(pid, seq, base, incr, started), daemon=True).start()
+        else:
+            self._rewritten(seq, base, incr, started)
+
+    def _fork_rewrite(self, path: str) -> int:
+        """Создает дочерний процесс, пишущий базовый снимок журнала в path."""
+        functions = self._functions()
+        gc.freeze()
+        try:
+            pid = os.fork()
+        except OSError:
+            gc.unfreeze()
+            raise
+        if pid == 0:
+            code = 1
+            try:
+                gc.disable()
+                snapshot.write_snapshot(path, self.storages, functions)
+                code = 0
+            finally:
+                os._exit(code)
+        gc.unfreeze()
+        return pid
+
+    def _wait_rewrite(self, pid: int, seq: int, base: str, incr: str, started: float) -> None:
+        """Фоновый поток: ждет дочерний процесс перезаписи и заменяет манифест."""
+        _, status = os.waitpid(pid, 0)
+        try:
+            if os.waitstatus_to_exitcode(status) == 0:
+                self._rewritten(seq, base, incr, started)
+            else:
+                self.aof_last_bgrewrite_ok = False
+                self._last_rewrite_failure = time.time()
+                self.aof_last_rewrite_seconds = int(time.time() - started)
+                # без манифеста журнала еще нет: перезапись повторяется из cron
+                self.aof_rewrite_scheduled = self._manifest is None and self.aof is not None
+                logger.warning("Background AOF rewrite failed")
+        finally:
+            self._rewrite_pid = None
+
+    def _rewritten(self, seq: int, base: str, incr: str, started: float) -> None:
+        """Делает новый базовый снимок и файл команд журналом и удаляет прежние файлы."""
+        base_path = os.path.join(self.aof_dir, base)
+        locks = [storage.lock for storage in self.storages]
+        for lock in locks:
+            lock.acquire()
+        try:
+            # журнал выключили или переключили, пока писался снимок
+            if self.aof is None or os.path.basename(self.aof.path) != incr:
+                with contextlib.suppress(OSError):
+                    os.unlink(base_path)
+                return
+            previous, self._manifest = self._manifest, Manifest((base, seq), [(incr, seq)])
+            self._manifest.write(self.manifest_path)
+            self.aof_base_size = self._aof_history_size = os.path.getsize(base_path)
+        finally:
+            for lock in reversed(locks):
+                lock.release()
+        self.aof_last_bgrewrite_ok = True
+        self.aof_last_rewrite_seconds = int(time.time() - started)
+        self.aof_rewrites += 1
+        if previous is not None:
+            self._remove_aof_files(previous, keep=self._manifest)
+
+    def refresh_propagate(self) -> None:
+        """Включает передачу записывающих команд хранилищами, если их получает журнал или реплики."""
+        replication = self.replication
+        active = self.aof is not None or (replication is not None and replication.feeding)
+        propagate = self.propagate if active else None
+        for storage in self.storages:
+            storage.propagate = propagate
+
+    def _remove_aof_files(self, manifest: Manifest, keep: Manifest) -> None:
+        for name in set(manifest.files()) - set(keep.files()):
+            with contextlib.suppress(OSError):
+                os.unlink(os.path.join(self.aof_dir, name))
+
+    def propagate(self, storage: Any, name: str, args: List[str], result: Any) -> None:
+        """Передает эффект команды, выполненной в хранилище storage, в журнал и репликам."""
+        commands = aof.command_effects(storage, name, args, result)
+        if not commands:
+            return
+        db = self.storages.index(storage)
+        if self._transaction is not None:
+            self._transaction.append((db, commands))
+        else:
+            self._feed([(db, commands)])
+
+    @contextlib.contextmanager
+    def transaction(self) -> Iterator[None]:
+        """
+        Эффекты команд, выполненных внутри блока (EXEC, FCALL), передаются
+        в журнал и репликам вместе, в MULTI/EXEC, если их больше одного:
+        реплика применяет их атомарно, а при загрузке журнала незавершенная
+        транзакция отбрасывается. Вложенный блок (FCALL внутри EXEC) входит
+        во внешний.
+        """
+        if self._transaction is not None:
+            yield
+            return
+        self._transaction = []
+        try:
+            yield
+        finally:
+            batches, self._transaction = self._transaction, None
+            if sum(len(commands) for _, commands in batches) > 1:
+                batches = [(batches[0][0], [["MULTI"]]), *batches, (batches[-1][0], [["EXEC"]])]
+            self._feed(batches)
+
+    def _feed(self, batches: List[Tuple[int, List[List[str]]]]) -> None:
+        replication = self.replication
+        feeding = replication is not None and replication.feeding
+        for db, commands in batches:
+            if self.aof is not None:
+                self.aof.feed(db, commands)
+            if feeding:
+                replication.feed(db, commands)
+
+    def load_data(self, data: Any) -> int:
+        """
+        Заменяет данные всех баз снимком из буфера (полная синхронизация реплики).
+
+        Журнал после этого перезаписывается: прежние команды в нем относятся
+        к замененным данным. Выполняется в отдельном потоке, поэтому клиентам
+        отслеживания об очистке баз сообщает вызывающий в цикле событий.
+
+        Returns:
+            Число загруженных ключей
+        """
+        functions = self._functions()
+        if functions is not None:
+            functions.flush()
+        with self._loading(len(data)):
+            loaded = snapshot.load(data, self.storages, functions, self._loading_progress, invalidate=False)
+        if self.aof is not None:
+            self.aof_rewrite_scheduled = True
+        return loaded
+
+    def _loading_progress(self, loaded_bytes: int, loaded_keys: int) -> None:
+        self.loading_loaded_bytes = loaded_bytes
+        self.loading_loaded_keys = loaded_keys
+
+    def loading_eta(self) -> int:
+        """Оценка оставшегося времени загрузки в секундах по средней скорости."""
+        elapsed = time.time() - self.loading_start_time
+        if not self.loading_loaded_bytes or elapsed <= 0:
+            return 1
+        speed = self.loading_loaded_bytes / elapsed
+        return int((self.loading_total_bytes - self.loading_loaded_bytes) / speed)
@@ -0,0 +1,332 @@
+"""
+Вероятностные структуры: масштабируемый фильтр Блума, Count-Min Sketch
+и Top-K (HeavyKeeper).
+
+Все структуры хранят счетчики и биты в компактных bytearray/array без
+объектов Python на элемент. Каждый элемент хэшируется один раз (blake2b,
+128 бит), а k позиций получаются двойным хэшированием h1 + i * h2, поэтому
+пакетные команды хэшируют все элементы за один проход и переиспользуют
+хэши для всех слоев фильтра и всех строк sketch.
+"""
+import hashlib
+import heapq
+import math
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .command_parser import WIRE_ERRORS
+
+HashPair = Tuple[int, int]
+
+# Коэффициент ужесточения ошибки для каждого следующего слоя фильтра Блума
+BLOOM_TIGHTENING_RATIO = 0.5
+BLOOM_DEFAULT_ERROR_RATE = 0.01
+BLOOM_DEFAULT_CAPACITY = 100
+BLOOM_DEFAULT_EXPANSION = 2
+
+CMS_COUNTER_MAX = 0xFFFFFFFF
+
+TOPK_DEFAULT_WIDTH = 8
+TOPK_DEFAULT_DEPTH = 7
+TOPK_DEFAULT_DECAY = 0.9
+# Размер таблицы заранее вычисленных степеней decay
+TOPK_DECAY_LOOKUP = 256
+
+_MASK64 = (1 << 64) - 1
+
+
+class ProbabilisticError(ValueError):
+    """Ошибка параметров или состояния вероятностной структуры."""
+
+
+def hash_items(items: Iterable[str]) -> List[HashPair]:
+    """Хэширует элементы за один проход: пара 64-битных хэшей на элемент."""
+    blake2b = hashlib.blake2b
+    from_bytes = int.from_bytes
+    result = []
+    for item in items:
+        digest = blake2b(item.encode('utf-8', WIRE_ERRORS), digest_size=16).digest()
+        # h2 нечетный, чтобы шаг двойного хэширования не был нулевым
+        result.append((from_bytes(digest[:8], "little"), from_bytes(digest[8:], "little") | 1))
+    return result
+
+
+class BloomLayer:
+    """Один слой фильтра Блума фиксированной емкости."""
+
+    __slots__ = ("bits", "size", "hashes", "capacity", "count")
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.size = max(int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))), 8)
+        self.hashes = max(int(math.ceil(-math.log2(error_rate))), 1)
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def contains(self, pair: HashPair) -> bool:
+        """Проверяет, установлены ли все k бит элемента."""
+        h1, h2 = pair
+        bits, size = self.bits, self.size
+        for i in range(self.hashes):
+            position = ((h1 + i * h2) & _MASK64) % size
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+    def add(self, pair: HashPair) -> bool:
+        """Устанавливает биты элемента. Возвращает True, если хотя бы один бит изменился."""
+        h1, h2 = pair
+        bits, size = self.bits, self.size
+        changed = False
+        for i in range(self.hashes):
+            position = ((h1 + i * h2) & _MASK64) % size
+            mask = 1 << (position & 7)
+            if not bits[position >> 3] & mask:
+                bits[position >> 3] |= mask
+                changed = True
+        if changed:
+            self.count += 1
+        return changed
+
+
+class ScalableBloomFilter:
+    """
+    Масштабируемый фильтр Блума.
+
+    Когда текущий слой заполнен, добавляется новый слой в expansion раз
+    больше с ужесточенной вероятностью ошибки, так что суммарная
+    вероятность ложного срабатывания остается не больше error_rate.
+    """
+
+    def __init__(self, error_rate: float = BLOOM_DEFAULT_ERROR_RATE,
+                 capacity: int = BLOOM_DEFAULT_CAPACITY,
+                 expansion: int = BLOOM_DEFAULT_EXPANSION, scaling: bool = True):
+        if not 0 < error_rate < 1:
+            raise ProbabilisticError("(0 < error rate range < 1)")
+        if capacity < 1:
+            raise ProbabilisticError("(capacity should be larger than 0)")
+        if expansion < 1:
+            raise ProbabilisticError("expansion should be greater or equal to 1")
+        self.error_rate = error_rate
+        self.capacity = capacity
+        self.expansion = expansion
+        self.scaling = scaling
+        self.layers: List[BloomLayer] = [BloomLayer(capacity, error_rate * BLOOM_TIGHTENING_RATIO)]
+
+    def __len__(self) -> int:
+        return sum(layer.count for layer in self.layers)
+
+    def _grow(self) -> BloomLayer:
+        last = self.layers[-1]
+        error = self.error_rate * BLOOM_TIGHTENING_RATIO ** (len(self.layers) + 1)
+        layer = BloomLayer(last.capacity * self.expansion, error)
+        self.layers.append(layer)
+        return layer
+
+    def contains(self, pair: HashPair) -> bool:
+        """Проверяет, мог ли элемент быть добавлен."""
+        return any(layer.contains(pair) for layer in self.layers)
+
+    def add(self, pair: HashPair) -> bool:
+        """
+        Добавляет элемент.
+
+        Returns:
+            True, если элемента (вероятно) не было
+        """
+        if self.contains(pair):
+            return False
+        layer = self.layers[-1]
+        if layer.count >= layer.capacity:
+            if not self.scaling:
+                raise ProbabilisticError("non scaling filter is full")
+            layer = self._grow()
+        return layer.add(pair)
+
+    def memory_usage(self) -> int:
+        """Размер битовых массивов в байтах."""
+        return sum(len(layer.bits) for layer in self.layers)
+
+
+class CountMinSketch:
+    """Count-Min Sketch с 32-битными насыщающимися счетчиками."""
+
+    def __init__(self, width: int, depth: int):
+        if width < 1 or depth < 1:
+            raise ProbabilisticError("invalid width/depth parameters")
+        self.width = width
+        self.depth = depth
+        self.counters = array("I", bytes(4 * width * depth))
+        self.total = 0
+
+    @classmethod
+    def from_error(cls, error: float, probability: float) -> "CountMinSketch":
+        """Создает sketch по допустимой ошибке и вероятности превышения ошибки."""
+        if not 0 < error < 1 or not 0 < probability < 1:
+            raise ProbabilisticError("invalid prob value")
+        width = int(math.ceil(2 / error))
+        depth = int(math.ceil(math.log10(probability) / math.log10(0.5)))
+        return cls(width, depth)
+
+    def _cells(self, pair: HashPair) -> List[int]:
+        h1, h2 = pair
+        width = self.width
+        return [row * width + ((h1 + row * h2) & _MASK64) % width for row in range(self.depth)]
+
+    def increment(self, pair: HashPair, amount: int) -> int:
+        """Увеличивает счетчики элемента, возвращает новую оценку."""
+        counters = self.counters
+        estimate = CMS_COUNTER_MAX
+        for cell in self._cells(pair):
+            value = min(counters[cell] + amount, CMS_COUNTER_MAX)
+            counters[cell] = value
+            estimate = min(estimate, value)
+        self.total += amount
+        return estimate
+
+    def query(self, pair: HashPair) -> int:
+        """Оценка количества элемента (минимум по строкам)."""
+        counters = self.counters
+        return min(counters[cell] for cell in self._cells(pair))
+
+
+class TopK:
+    """
+    Top-K тяжелых элементов на основе HeavyKeeper.
+
+    Массив depth x width хранит отпечатки и счетчики; при коллизии
+    счетчик чужого элемента уменьшается с вероятностью decay ** count.
+    Кандидаты хранятся в min-куче из k элементов с ленивым удалением
+    устаревших записей. Решения о затухании принимает детерминированный
+    генератор (splitmix64 от номера розыгрыша): номер хранится в снимке,
+    поэтому загрузка журнала и реплики получают тот же top-k.
+    """
+
+    def __init__(self, k: int, width: int = TOPK_DEFAULT_WIDTH, depth: int = TOPK_DEFAULT_DEPTH,
+                 decay: float = TOPK_DEFAULT_DECAY):
+        if k < 1 or width < 1 or depth < 1:
+            raise ProbabilisticError("invalid topk parameters")
+        if not 0 < decay <= 1:
+            raise ProbabilisticError("decay should be in range (0, 1]")
+        self.k = k
+        self.width = width
+        self.depth = depth
+        self.decay = decay
+        self.fingerprints = array("I", bytes(4 * width * depth))
+        self.counts = array("I", bytes(4 * width * depth))
+        self._decay_table = [decay ** count for count in range(TOPK_DECAY_LOOKUP)]
+        self.top: Dict[str, int] = {}
+        self._heap: List[Tuple[int, str]] = []
+        # число случайных чисел, выданных генератору затухания
+        self.draws = 0
+
+    def _random(self) -> float:
+        """Следующее число генератора в [0, 1)."""
+        self.draws += 1
+        z = (self.draws * 0x9E3779B97F4A7C15) & _MASK64
+        z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+        z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & _MASK64
+        return ((z ^ (z >> 31)) >> 11) / (1 << 53)
+
+    def _decay_probability(self, count: int) -> float:
+        if count < TOPK_DECAY_LOOKUP:
+            return self._decay_table[count]
+        return self.decay ** count
+
+    def _bucket_add(self, pair: HashPair, amount: int) -> int:
+        """Обновляет массив HeavyKeeper, возвращает максимальный счетчик элемента."""
+        h1, h2 = pair
+        fingerprint = (h1 >> 32) or 1
+        width = self.width
+        fingerprints, counts = self.fingerprints, self.counts
+        max_count = 0
+        for row in range(self.depth):
+            cell = row * width + ((h1 + row * h2) & _MASK64) % width
+            count = counts[cell]
+            if count == 0:
+                fingerprints[cell] = fingerprint
+                count = amount
+            elif fingerprints[cell] == fingerprint:
+                count += amount
+            else:
+                remaining = amount
+                while remaining:
+                    if self._random() < self._decay_probability(count):
+                        count -= 1
+                        if count == 0:
+                            # счетчик обнулился: ячейка переходит к новому элементу
+                            fingerprints[cell] = fingerprint
+                            count = remaining
+                            break
+                    remaining -= 1
+                if fingerprints[cell] != fingerprint:
+                    counts[cell] = count
+                    continue
+            count = min(count, CMS_COUNTER_MAX)
+            counts[cell] = count
+            max_count = max(max_count, count)
+        return max_count
+
+    def _min_entry(self) -> Tuple[int, str]:
+        heap, top = self._heap, self.top
+        while top.get(heap[0][1]) != heap[0][0]:
+            heapq.heappop(heap)
+        return heap[0]
+
+    def _push(self, item: str, count: int) -> None:
+        self.top[item] = count
+        heapq.heappush(self._heap, (count, item))
+        if len(self._heap) > 2 * self.k + 64:
+            self._heap = [(value, key) for key, value in self.top.items()]
+            heapq.heapify(self._heap)
+
+    def add(self, item: str, pair: HashPair, amount: int = 1) -> Optional[str]:
+        """
+        Учитывает элемент.
+
+        Returns:
+            Элемент, вытесненный из top-k, или None
+        """
+        count = self._bucket_add(pair, amount)
+        if item in self.top:
+            if count > self.top[item]:
+                self._push(item, count)
+            return None
+        if len(self.top) < self.k:
+            if count:
+                self._push(item, count)
+            return None
+        min_count, min_item = self._min_entry()
+        if count <= min_count:
+            return None
+        heapq.heappop(self._heap)
+        del self.top[min_item]
+        self._push(item, count)
+        return min_item
+
+    def load_top(self, top: Dict[str, int]) -> None:
+        """Заменяет кандидатов top-k готовыми счетчиками (загрузка снимка)."""
+        self.top = top
+        self._heap = [(count, item) for item, count in top.items()]
+        heapq.heapify(self._heap)
+
+    def items(self) -> List[Tuple[str, int]]:
+        """Элементы top-k по убыванию счетчика."""
+        return sorted(self.top.items(), key=lambda pair: (-pair[1], pair[0]))
+
+    def query(self, item: str) -> bool:
+        """Проверяет, входит ли элемент в top-k."""
+        return item in self.top
+
+    def estimate(self, pair: HashPair) -> int:
+        """Оценка счетчика элемента по массиву HeavyKeeper."""
+        h1, h2 = pair
+        fingerprint = (h1 >> 32) or 1
+        width = self.width
+        best = 0
+        for row in range(self.depth):
+            cell = row * width + ((h1 + row * h2) & _MASK64) % width
+            if self.fingerprints[cell] == fingerprint:
+                best = max(best, self.counts[cell])
+        return best
+
@@ -0,0 +1,191 @@
+"""
+Публикация сообщений подписчикам (PUBLISH / SUBSCRIBE / PSUBSCRIBE).
+
+Индекс каналов — словарь канал -> множество подписчиков, индекс шаблонов —
+словарь шаблон -> (скомпилированное регулярное выражение, подписчики).
+Сообщение кодируется в RESP один раз на канал (и один раз на каждый
+совпавший шаблон) для каждой версии протокола среди получателей, и одни
+и те же байты пишутся в транспорт каждого подписчика без ожидания
+отправки. Соединениям RESP3 сообщения приходят push-кадрами.
+
+Медленные подписчики ограничиваются размером буфера отправки: при
+превышении жесткого лимита или мягкого лимита дольше заданного времени
+соединение закрывается, а подписчик удаляется из индексов.
+"""
+import fnmatch
+import re
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from .command_parser import CommandParser, Push
+
+
+class Subscriber:
+    """Подписки одного соединения и запись в его транспорт с контролем буфера."""
+
+    def __init__(self, transport: Any, hard_limit: int, soft_limit: int, soft_seconds: float,
+                 protocol: int = 2):
+        self.transport = transport
+        # версия протокола соединения (HELLO): определяет кодирование кадров
+        self.protocol = protocol
+        self.channels: Set[str] = set()
+        self.patterns: Set[str] = set()
+        self.hard_limit = hard_limit
+        self.soft_limit = soft_limit
+        self.soft_seconds = soft_seconds
+        # момент, с которого буфер непрерывно превышает мягкий лимит
+        self._soft_since: Optional[float] = None
+        self.closed = False
+
+    @property
+    def count(self) -> int:
+        """Общее число подписок соединения."""
+        return len(self.channels) + len(self.patterns)
+
+    def deliver(self, frame: bytes) -> bool:
+        """
+        Пишет готовый кадр в транспорт.
+
+        Returns:
+            False, если подписчик отключен из-за переполнения буфера отправки
+        """
+        if self.closed:
+            return False
+        transport = self.transport
+        transport.write(frame)
+        size = transport.get_write_buffer_size()
+        if size <= self.soft_limit:
+            self._soft_since = None
+            return True
+        if size > self.hard_limit:
+            return self._drop()
+        now = time.monotonic()
+        if self._soft_since is None:
+            self._soft_since = now
+        elif now - self._soft_since > self.soft_seconds:
+            return self._drop()
+        return True
+
+    def _drop(self) -> bool:
+        self.closed = True
+        # abort отбрасывает неотправленный буфер и закрывает соединение сразу
+        self.transport.abort()
+        return False
+
+
+def deliver(subscribers: Iterable[Subscriber], message: Push, dropped: Optional[List[Subscriber]] = None) -> int:
+    """
+    Пишет сообщение подписчикам, кодируя его один раз на версию протокола.
+
+    Returns:
+        Число подписчиков, которым сообщение записано; отключенные
+        подписчики добавляются в dropped
+    """
+    frames: Dict[int, bytes] = {}
+    frame, protocol = b"", 0
+    delivered = 0
+    for subscriber in subscribers:
+        if subscriber.protocol != protocol:
+            protocol = subscriber.protocol
+            frame = frames.get(protocol)
+            if frame is None:
+                frame = frames[protocol] = CommandParser.encode(CommandParser.format_response(message, protocol))
+        if subscriber.deliver(frame):
+            delivered += 1
+        elif dropped is not None:
+            dropped.append(subscriber)
+    return delivered
+
+
+class PubSub:
+    """Индексы каналов и шаблонов сервера."""
+
+    # лимиты буфера отправки подписчика (как client-output-buffer-limit pubsub в Redis)
+    HARD_LIMIT = 32 * 1024 * 1024
+    SOFT_LIMIT = 8 * 1024 * 1024
+    SOFT_SECONDS = 60.0
+
+    def __init__(self):
+        self.channels: Dict[str, Set[Subscriber]] = {}
+        # шаблон -> (функция сопоставления, подписчики)
+        self.patterns: Dict[str, Tuple[Callable[[str], Any], Set[Subscriber]]] = {}
+        # число подписчиков, отключенных из-за переполнения буфера
+        self.dropped_subscribers = 0
+
+    def subscriber(self, transport: Any, protocol: int = 2) -> Subscriber:
+        """Создает подписчика для транспорта соединения с лимитами сервера."""
+        return Subscriber(transport, self.HARD_LIMIT, self.SOFT_LIMIT, self.SOFT_SECONDS, protocol)
+
+    def subscribe(self, subscriber: Subscriber, channel: str) -> None:
+        subscribers = self.channels.get(channel)
+        if subscribers is None:
+            subscribers = self.channels[channel] = set()
+        subscribers.add(subscriber)
+        subscriber.channels.add(channel)
+
+    def unsubscribe(self, subscriber: Subscriber, channel: str) -> None:
+        subscriber.channels.discard(channel)
+        subscribers = self.channels.get(channel)
+        if subscribers is not None:
+            subscribers.discard(subscriber)
+            if not subscribers:
+                del self.channels[channel]
+
+    def psubscribe(self, subscriber: Subscriber, pattern: str) -> None:
+        entry = self.patterns.get(pattern)
+        if entry is None:
+            entry = self.patterns[pattern] = (re.compile(fnmatch.translate(pattern), re.DOTALL).match, set())
+        entry[1].add(subscriber)
+        subscriber.patterns.add(pattern)
+
+    def punsubscribe(self, subscriber: Subscriber, pattern: str) -> None:
+        subscriber.patterns.discard(pattern)
+        entry = self.patterns.get(pattern)
+        if entry is not None:
+            entry[1].discard(subscriber)
+            if not entry[1]:
+                del self.patterns[pattern]
+
+    def remove(self, subscriber: Subscriber) -> None:
+        """Удаляет все подписки соединения."""
+        for channel in list(subscriber.channels):
+            self.unsubscribe(subscriber, channel)
+        for pattern in list(subscriber.patterns):
+            self.punsubscribe(subscriber, pattern)
+
+    @property
+    def active(self) -> bool:
+        """Есть ли хотя бы одна подписка (проверка перед построением сообщения)."""
+        return bool(self.channels or self.patterns)
+
+    def publish(self, channel: str, message: Any) -> int:
+        """
+        Публикует сообщение.
+
+        Returns:
+            Число подписчиков, которым сообщение записано
+        """
+        delivered = 0
+        dropped: List[Subscriber] = []
+        subscribers = self.channels.get(channel)
+        if subscribers:
+            delivered += deliver(subscribers, Push(["message", channel, message]), dropped)
+        if self.patterns:
+            for pattern, (match, pattern_subscribers) in self.patterns.items():
+                if match(channel) is not None:
+                    delivered += deliver(pattern_subscribers, Push(["pmessage", pattern, channel, message]), dropped)
+        for subscriber in dropped:
+            if subscriber.channels or subscriber.patterns:
+                self.dropped_subscribers += 1
+                self.remove(subscriber)
+        return delivered
+
+    def numsub(self, channel: str) -> int:
+        """Число подписчиков канала (без подписок по шаблонам)."""
+        return len(self.channels.get(channel, ()))
+
+    def channel_names(self, pattern: Optional[str] = None) -> List[str]:
+        """Активные каналы, при наличии шаблона — только совпадающие."""
+        if pattern is None:
+            return list(self.channels)
+        return [channel for channel in self.channels if fnmatch.fnmatchcase(channel, pattern)]
@@ -0,0 +1,59 @@
+"""
+Ограничение частоты запросов по алгоритму GCRA (generic cell rate algorithm).
+
+Для ключа хранится одно число — TAT (theoretical arrival time), момент,
+когда ведро полностью «освободится». Запрос стоимостью quantity сдвигает
+TAT на quantity * emission_interval и допускается, если новый TAT не
+уходит дальше текущего момента более чем на допуск
+emission_interval * (max_burst + 1). Проверка и обновление — O(1), без
+счетчиков окон и фоновой очистки: TAT хранится с TTL до своего момента.
+"""
+import math
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass
+class ThrottleResult:
+    """Результат проверки лимита."""
+    limited: bool
+    limit: int
+    remaining: int
+    retry_after: float  # секунды до следующей попытки, -1 если запрос допущен
+    reset_after: float  # секунды до полного восстановления лимита
+    tat: float          # TAT для сохранения
+
+
+def throttle(tat: Optional[float], now: float, max_burst: int, count: int, period: float,
+             quantity: int = 1) -> ThrottleResult:
+    """
+    Проверяет запрос стоимостью quantity при лимите count запросов за period
+    секунд с допустимым всплеском max_burst.
+
+    Args:
+        tat: Сохраненный TAT или None, если ключа нет
+        now: Текущее время в секундах
+
+    Returns:
+        ThrottleResult; при limited=True TAT не меняется
+    """
+    emission_interval = period / count
+    tolerance = emission_interval * (max_burst + 1)
+    increment = emission_interval * quantity
+    tat = now if tat is None else max(tat, now)
+    new_tat = tat + increment
+
+    allow_at = new_tat - tolerance
+    if now < allow_at:
+        limited = True
+        retry_after = allow_at - now if increment <= tolerance else -1
+        reset_after = tat - now
+    else:
+        limited = False
+        retry_after = -1
+        reset_after = new_tat - now
+        tat = new_tat
+
+    # защищаемся от погрешности деления: 4.9999999 -> 5
+    remaining = max(0, math.floor((tolerance - reset_after) / emission_interval + 1e-9))
+    return ThrottleResult(limited, max_burst + 1, remaining, retry_after, reset_after, tat)
@@ -0,0 +1,744 @@
+"""
+Репликация ведущий — реплика (REPLICAOF, PSYNC).
+
+Поток репликации — команды, изменившие данные, в формате RESP с SELECT
+при смене базы (те же команды, что пишутся в журнал AOF). Смещение
+репликации — число байт потока с момента создания идентификатора
+репликации (replid). Ведущий собирает команды за итерацию цикла событий и
+пишет их одним блоком в кольцевой буфер (backlog) и в транспорты реплик.
+
+Реплика подключается командой PSYNC replid offset. Если replid совпадает,
+а смещение еще в буфере, ведущий отвечает +CONTINUE и досылает поток с
+этого смещения (частичная синхронизация). Иначе он отвечает +FULLRESYNC
+replid offset, и дочерний процесс (fork) пишет снимок данных на этот
+момент прямо в сокет реплики в форме `$EOF:<метка>` (без файла на диске).
+Команды, выполненные, пока пишется снимок, копятся для реплики и
+отправляются после него.
+
+Реплика загружает снимок, затем выполняет поток команд обработчиками баз,
+раз в секунду сообщает обработанное смещение (REPLCONF ACK) и пишет
+полученные байты в свой буфер без изменений: ее смещения совпадают со
+смещениями ведущего, поэтому после обрыва связи она продолжает с
+частичной синхронизации, а ее собственные реплики получают тот же поток.
+Реплика по умолчанию принимает только чтение.
+"""
+import asyncio
+import contextlib
+import gc
+import logging
+import os
+import select
+import signal
+import threading
+import time
+from typing import Any, List, Optional, Tuple
+
+from . import snapshot
+from .aof import FUNCTION_WRITES, encode_command
+
+logger = logging.getLogger(__name__)
+
+# команды, изменяющие данные (на реплике только для чтения отклоняются)
+WRITE_COMMANDS = frozenset({
+    "SET", "SETNX", "MSET", "MSETNX", "GETSET", "GETDEL", "GETEX", "APPEND", "SETRANGE",
+    "SETBIT", "BITOP", "DEL", "DELIFEQ", "EXPIRE", "PEXPIREAT", "MOVE", "SWAPDB",
+    "FLUSHDB", "FLUSHALL", "PFADD", "PFMERGE", "GEOADD", "HSET", "HDEL",
+    "XADD", "XTRIM", "XGROUP", "XREADGROUP", "XACK", "XCLAIM", "XAUTOCLAIM",
+    "TS.CREATE", "TS.ADD", "TS.DEL", "JSON.SET", "JSON.DEL", "JSON.NUMINCRBY", "JSON.ARRAPPEND",
+    "FT.CREATE", "FT.DROPINDEX", "CL.THROTTLE", "BF.RESERVE", "BF.ADD", "BF.MADD",
+    "CMS.INITBYDIM", "CMS.INITBYPROB", "CMS.INCRBY", "TOPK.RESERVE", "TOPK.ADD", "TOPK.INCRBY",
+    "FCALL",
+})
+
+READONLY_ERROR = "READONLY You can't write against a read only replica."
+
+# длина метки конца снимка в форме $EOF:<метка>
+EOF_MARK_SIZE = 40
+# лимит неотправленных данных реплики (как client-output-buffer-limit replica в Redis)
+OUTPUT_BUFFER_LIMIT = 256 * 1024 * 1024
+# период PING ведущего в поток (реплика по нему видит, что связь жива), с
+PING_PERIOD = 10.0
+# тайм-аут ожидания данных от ведущего, с
+TIMEOUT = 60.0
+
+
+def is_write_command(name: str, args: List[str]) -> bool:
+    """Изменяет ли команда данные."""
+    if name == "FUNCTION":
+        return bool(args) and args[0].upper() in FUNCTION_WRITES
+    return name in WRITE_COMMANDS
+
+
+def new_replid() -> str:
+    """Случайный идентификатор репликации из 40 шестнадцатеричных символов."""
+    return os.urandom(EOF_MARK_SIZE // 2).hex()
+
+
+class ReplicationError(Exception):
+    """Ведущий ответил не по протоколу репликации."""
+
+
+class ReplicationBacklog:
+    """
+    Кольцевой буфер последних байт потока репликации.
+
+    offset — смещение конца потока (число байт с начала идентификатора
+    репликации); в буфере хранятся последние histlen байт до него.
+    """
+
+    def __init__(self, size: int, offset: int = 0):
+        self.size = size
+        self.offset = offset
+        self.histlen = 0
+        self._buffer = bytearray(size)
+        # позиция записи в кольцевом буфере
+        self._index = 0
+
+    @property
+    def first_offset(self) -> int:
+        """Смещение первого байта буфера (как repl_backlog_first_byte_offset в Redis)."""
+        return self.offset - self.histlen + 1
+
+    def feed(self, data: bytes) -> None:
+        """Дописывает данные, вытесняя самые старые байты."""
+        n = len(data)
+        size = self.size
+        self.offset += n
+        if n >= size:
+            self._buffer[:] = data[n - size:]
+            self._index = 0
+            self.histlen = size
+            return
+        index = self._index
+        end = index + n
+        if end <= size:
+            self._buffer[index:end] = data
+        else:
+            first = size - index
+            self._buffer[index:] = data[:first]
+            self._buffer[:n - first] = data[first:]
+        self._index = end % size
+        self.histlen = min(size, self.histlen + n)
+
+    def read_from(self, offset: int) -> Optional[bytes]:
+        """
+        Байты потока, начиная с байта offset (смещение, которое реплика
+        передает в PSYNC: обработанное смещение плюс один).
+
+        Returns:
+            None, если этих байт уже нет в буфере
+        """
+        count = self.offset + 1 - offset
+        if count < 0 or count > self.histlen:
+            return None
+        start = (self._index - count) % self.size
+        if start + count <= self.size:
+            return bytes(self._buffer[start:start + count])
+        return bytes(self._buffer[start:]) + bytes(self._buffer[:count - (self.size - start)])
+
+    def resized(self, size: int) -> "ReplicationBacklog":
+        """Буфер другого размера с последними байтами этого."""
+        backlog = ReplicationBacklog(size, self.offset - min(self.histlen, size))
+        keep = min(self.histlen, size)
+        if keep:
+            backlog.feed(self.read_from(self.offset + 1 - keep))
+        return backlog
+
+
+class ReplicaLink:
+    """Подключенная реплика на стороне ведущего."""
+
+    def __init__(self, transport: Any, address: str, port: int):
+        self.transport = transport
+        self.address = address
+        # порт, на котором реплика принимает клиентов (REPLCONF listening-port)
+        self.port = port
+        # wait_bgsave — пишется снимок, online — получает поток
+        self.state = "wait_bgsave"
+        # команды, накопленные, пока пишется снимок
+        self.pending = bytearray()
+        # смещение, подтвержденное REPLCONF ACK, и время подтверждения
+        self.ack_offset = 0
+        self.ack_time = time.time()
+        self.closed = False
+
+    @property
+    def lag(self) -> int:
+        """Секунды с последнего подтверждения."""
+        return int(time.time() - self.ack_time)
+
+    def send(self, data: bytes) -> None:
+        """Пишет данные потока; реплику, не успевающую их принимать, отключает."""
+        if self.closed:
+            return
+        if self.state == "online":
+            self.transport.write(data)
+            size = self.transport.get_write_buffer_size()
+        else:
+            self.pending += data
+            size = len(self.pending)
+        if size > OUTPUT_BUFFER_LIMIT:
+            logger.warning(f"Replica {self.address}:{self.port} output buffer limit reached, disconnecting")
+            self.close()
+
+    def close(self) -> None:
+        self.closed = True
+        self.pending = bytearray()
+        self.transport.abort()
+
+
+class _SocketFile:
+    """Запись в неблокирующий сокет из дочернего процесса (ожидание готовности через select)."""
+
+    def __init__(self, fd: int):
+        self.fd = fd
+
+    def write(self, data: Any) -> None:
+        view = memoryview(data)
+        while view:
+            try:
+                written = os.write(self.fd, view)
+            except BlockingIOError:
+                select.select([], [self.fd], [])
+                continue
+            view = view[written:]
+
+
+class _PrefixedReader:
+    """Чтение потока ведущего, начиная с байт, прочитанных вместе с концом снимка."""
+
+    def __init__(self, prefix: bytes, reader: asyncio.StreamReader):
+        self._prefix = bytearray(prefix)
+        self._reader = reader
+
+    async def readline(self) -> bytes:
+        if not self._prefix:
+            return await self._reader.readline()
+        end = self._prefix.find(b"\n")
+        if end < 0:
+            line = bytes(self._prefix) + await self._reader.readline()
+            self._prefix.clear()
+            return line
+        line = bytes(self._prefix[:end + 1])
+        del self._prefix[:end + 1]
+        return line
+
+    async def readexactly(self, n: int) -> bytes:
+        if not self._prefix:
+            return await self._reader.readexactly(n)
+        data = bytes(self._prefix[:n])
+        del self._prefix[:n]
+        if len(data) < n:
+            data += await self._reader.readexactly(n - len(data))
+        return data
+
+
+class Replication:
+    """Состояние репликации сервера: роль, буфер потока, реплики и связь с ведущим."""
+
+    def __init__(self, storages: List[Any], persistence: Any):
+        self.storages = storages
+        self.persistence = persistence
+        # обработчики баз для выполнения потока ведущего
+        self.handlers: List[Any] = []
+        self.replid = new_replid()
+        # прежний идентификатор (после смены роли) и смещение, до которого он действителен
+        self.replid2 = "0" * EOF_MARK_SIZE
+        self.second_replid_offset = -1
+        self.backlog_size = 1024 * 1024
+        self.backlog: Optional[ReplicationBacklog] = None
+        self.replicas: List[ReplicaLink] = []
+        self.read_only = True
+        # порт сервера, сообщаемый ведущему
+        self.listening_port = 0
+        # цикл событий сервера (None, пока сервер не запущен)
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        # вызывается после выполнения команд потока (пробуждение заблокированных клиентов)
+        self.applied: Optional[Any] = None
+        self.sync_full = 0
+        self.sync_partial_ok = 0
+        self.sync_partial_err = 0
+        # команды итерации цикла событий, еще не записанные в буфер и репликам
+        self._pending = bytearray()
+        # база последней команды потока (-1 — следующей нужен SELECT)
+        self._seldb = -1
+        self._last_ping = time.monotonic()
+        self._children: List[int] = []
+        # сторона реплики
+        self.master_host: Optional[str] = None
+        self.master_port = 0
+        self.link_up = False
+        self.sync_in_progress = False
+        self.master_last_io = 0.0
+        self._link_task: Optional[asyncio.Task] = None
+        self._master_writer: Optional[asyncio.StreamWriter] = None
+        # база, выбранная потоком ведущего
+        self._db = 0
+
+    @property
+    def role(self) -> str:
+        return "master" if self.master_host is None else "slave"
+
+    @property
+    def feeding(self) -> bool:
+        """Получает ли сервер команды для потока репликации (ведущий с буфером)."""
+        return self.master_host is None and self.backlog is not None
+
+    @property
+    def offset(self) -> int:
+        """Смещение репликации сервера (master_repl_offset)."""
+        return self.backlog.offset if self.backlog is not None else 0
+
+    # --- ведущий ---
+
+    def feed(self, db: int, commands: List[List[str]]) -> None:
+        """Добавляет команды базы db в поток (запись — в конце итерации цикла событий)."""
+        pending = self._pending
+        schedule = not pending
+        if db != self._seldb:
+            encode_command(pending, ["SELECT", str(db)])
+            self._seldb = db
+        for argv in commands:
+            encode_command(pending, argv)
+        if schedule:
+            self._schedule_flush()
+
+    def _feed_raw(self, data: bytes) -> None:
+        """Добавляет в поток байты, полученные от ведущего (на реплике), без изменений."""
+        schedule = not self._pending
+        self._pending += data
+        if schedule:
+            self._schedule_flush()
+
+    def _schedule_flush(self) -> None:
+        loop = self.loop
+        if loop is None:
+            self.flush()
+        elif loop.is_running():
+            loop.call_soon_threadsafe(self.flush)
+
+    def flush(self) -> None:
+        """Записывает накопленные команды в буфер и транспорты реплик."""
+        if not self._pending or self.backlog is None:
+            return
+        data = bytes(self._pending)
+        self._pending.clear()
+        self.backlog.feed(data)
+        for link in self.replicas:
+            link.send(data)
+
+    def _create_backlog(self) -> None:
+        if self.backlog is None:
+            self.backlog = ReplicationBacklog(self.backlog_size)
+            self.persistence.refresh_propagate()
+
+    def set_backlog_size(self, size: int) -> None:
+        self.backlog_size = size
+        if self.backlog is not None:
+            self.flush()
+            self.backlog = self.backlog.resized(size)
+
+    def _can_continue(self, replid: str, offset: int) -> bool:
+        backlog = self.backlog
+        if backlog is None:
+            return False
+        if replid != self.replid and not (replid == self.replid2 and offset <= self.second_replid_offset):
+            return False
+        return backlog.read_from(offset) is not None
+
+    async def psync(self, writer: asyncio.StreamWriter, replid: str, offset_text: str, port: int) -> Optional[ReplicaLink]:
+        """
+        Выполняет PSYNC replid offset: частичную синхронизацию, если смещение
+        в буфере, иначе полную со снимком от дочернего процесса.
+
+        Returns:
+            Связь с репликой или None, если синхронизация не началась
+        """
+        if self.master_host is not None and not self.link_up:
+            writer.write(b"-NOMASTERLINK Can't SYNC while not connected with my master\r\n")
+            return None
+        try:
+            offset = int(offset_text)
+        except ValueError:
+            offset = -1
+        address = (writer.get_extra_info("peername") or ("?", 0))[0]
+        link = ReplicaLink(writer.transport, address, port)
+        self._create_backlog()
+        self.flush()
+        if self._can_continue(replid, offset):
+            data = self.backlog.read_from(offset)
+            # после смены роли реплика узнает новый идентификатор из ответа
+            reply = f"+CONTINUE {self.replid}\r\n" if replid != self.replid else "+CONTINUE\r\n"
+            writer.write(reply.encode() + data)
+            link.state = "online"
+            link.ack_offset = offset - 1
+            self.replicas.append(link)
+            self.sync_partial_ok += 1
+            return link
+        if replid != "?":
+            self.sync_partial_err += 1
+
+        # снимок пишется в сокет мимо транспорта: его буфер должен быть пуст
+        writer.transport.set_write_buffer_limits(0)
+        await writer.drain()
+        self.flush()
+        header = f"+FULLRESYNC {self.replid} {self.offset}\r\n".encode()
+        # реплика начинает с базы 0: следующая команда потока начнется с SELECT
+        self._seldb = -1
+        self.replicas.append(link)
+        self.sync_full += 1
+        sock = writer.get_extra_info("socket")
+        if hasattr(os, "fork") and sock is not None:
+            self._fork_sync(link, sock.fileno(), header)
+        else:
+            self._send_snapshot(link, header)
+        return link
+
+    def _fork_sync(self, link: ReplicaLink, fd: int, header: bytes) -> None:
+        """Дочерний процесс пишет в сокет реплики ответ FULLRESYNC и снимок данных."""
+        functions = self.storages[0].functions if self.storages else None
+        mark = new_replid().encode()
+        gc.freeze()
+        try:
+            pid = os.fork()
+        except OSError:
+            gc.unfreeze()
+            raise
+        if pid == 0:
+            code = 1
+            try:
+                gc.disable()
+                out = _SocketFile(fd)
+                out.write(header + b"$EOF:" + mark + b"\r\n")
+                snapshot.dump(out, self.storages, functions)
+                out.write(mark)
+                code = 0
+            finally:
+                os._exit(code)
+        gc.unfreeze()
+        self._children.append(pid)
+        loop = self.loop
+        threading.Thread(target=self._wait_sync, args=(pid, link, loop), daemon=True).start()
+
+    def _wait_sync(self, pid: int, link: ReplicaLink, loop: Optional[asyncio.AbstractEventLoop]) -> None:
+        """Фоновый поток: ждет дочерний процесс синхронизации и передает результат в цикл событий."""
+        _, status = os.waitpid(pid, 0)
+        ok = os.waitstatus_to_exitcode(status) == 0
+        if loop is not None and not loop.is_closed():
+            try:
+                loop.call_soon_threadsafe(self._sync_finished, link, ok, pid)
+                return
+            except RuntimeError:
+                pass
+        self._children.remove(pid)
+
+    def _sync_finished(self, link: ReplicaLink, ok: bool, pid: int) -> None:
+        """Снимок записан: реплике отправляются накопленные команды, дальше — поток."""
+        self._children.remove(pid)
+        if not ok:
+            logger.warning(f"Full sync of replica {link.address}:{link.port} failed")
+            link.close()
+        if link.closed:
+            self.detach(link)
+            return
+        link.transport.set_write_buffer_limits()
+        link.state = "online"
+        if link.pending:
+            link.transport.write(bytes(link.pending))
+            link.pending = bytearray()
+
+    def _send_snapshot(self, link: ReplicaLink, header: bytes) -> None:
+        """Без fork снимок строится в памяти и отправляется сразу (bulk-строкой с длиной)."""
+        functions = self.storages[0].functions if self.storages else None
+
+        class _Buffer(bytearray):
+            def write(self, data: Any) -> None:
+                self += data
+
+        out = _Buffer()
+        snapshot.dump(out, self.storages, functions)
+        link.transport.set_write_buffer_limits()
+        link.transport.write(header + b"$%d\r\n" % len(out) + bytes(out))
+        link.state = "online"
+
+    def ack(self, link: ReplicaLink, offset: int) -> None:
+        """REPLCONF ACK от реплики."""
+        link.ack_offset = max(link.ack_offset, offset)
+        link.ack_time = time.time()
+
+    def detach(self, link: ReplicaLink) -> None:
+        """Убирает реплику после закрытия соединения."""
+        link.closed = True
+        if link in self.replicas:
+            self.replicas.remove(link)
+
+    def cron(self) -> None:
+        """Раз в секунду: PING ведущего в поток, REPLCONF ACK реплики."""
+        now = time.monotonic()
+        if self.feeding and self.replicas and now - self._last_ping >= PING_PERIOD:
+            self._last_ping = now
+            encode_command(self._pending, ["PING"])
+            self.flush()
+        writer = self._master_writer
+        if self.link_up and writer is not None:
+            self._send_ack(writer)
+
+    def _send_ack(self, writer: asyncio.StreamWriter) -> None:
+        buffer = bytearray()
+        encode_command(buffer, ["REPLCONF", "ACK", str(self.offset)])
+        writer.write(bytes(buffer))
+
+    # --- реплика ---
+
+    def replicaof(self, host: Optional[str], port: int = 0) -> None:
+        """
+        REPLICAOF host port — стать репликой; REPLICAOF NO ONE (host None) — ведущим.
+
+        Подключенные реплики отключаются: при смене ведущего их данные
+        синхронизируются заново.
+        """
+        if host is not None and (host, port) == (self.master_host, self.master_port):
+            return
+        self._stop_link()
+        was_replica = self.master_host is not None
+        self.master_host, self.master_port = host, port
+        if host is None:
+            if was_replica:
+                # смещения потока продолжаются; прежние реплики ведущего могут
+                # подключиться с его идентификатором и получить частичную синхронизацию
+                self.replid2, self.second_replid_offset = self.replid, self.offset + 1
+                self.replid = new_replid()
+            self.persistence.refresh_propagate()
+            return
+        self.flush()
+        for link in list(self.replicas):
+            link.close()
+            self.detach(link)
+        self.persistence.refresh_propagate()
+        if self.loop is not None:
+            self._link_task = self.loop.create_task(self._replicate())
+
+    def start(self, loop: asyncio.AbstractEventLoop, port: int) -> None:
+        """Запуск сервера: цикл событий и порт; реплика подключается к ведущему."""
+        self.loop = loop
+        self.listening_port = port
+        if self.master_host is not None and self._link_task is None:
+            self._link_task = loop.create_task(self._replicate())
+
+    async def stop(self) -> None:
+        """Остановка сервера: разрыв связи с ведущим и репликами, ожидание дочерних процессов."""
+        task = self._stop_link()
+        if task is not None:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        for link in list(self.replicas):
+            link.close()
+            self.detach(link)
+        # дочерние процессы синхронизации пишут в уже закрытые соединения реплик
+        for pid in list(self._children):
+            with contextlib.suppress(OSError):
+                os.kill(pid, signal.SIGTERM)
+        while self._children:
+            await asyncio.sleep(0.01)
+
+    def _stop_link(self) -> Optional[asyncio.Task]:
+        task, self._link_task = self._link_task, None
+        if task is not None:
+            task.cancel()
+        if self._master_writer is not None:
+            self._master_writer.transport.abort()
+            self._master_writer = None
+        self.link_up = False
+        self.sync_in_progress = False
+        return task
+
+    async def _replicate(self) -> None:
+        """Связь с ведущим: синхронизация и поток команд; после обрыва — переподключение."""
+        while True:
+            try:
+                await self._sync_with_master()
+            except asyncio.CancelledError:
+                raise
+            except (OSError, EOFError, asyncio.IncompleteReadError, TimeoutError, ReplicationError,
+                    ValueError) as exc:
+                logger.warning(f"Replication link with {self.master_host}:{self.master_port} lost: {exc}")
+            finally:
+                self.link_up = False
+                self.sync_in_progress = False
+                writer, self._master_writer = self._master_writer, None
+                if writer is not None:
+                    writer.transport.abort()
+            await asyncio.sleep(1.0)
+
+    async def _sync_with_master(self) -> None:
+        reader, writer = await asyncio.open_connection(self.master_host, self.master_port)
+        self._master_writer = writer
+
+        async def call(*argv: str) -> bytes:
+            buffer = bytearray()
+            encode_command(buffer, list(argv))
+            writer.write(bytes(buffer))
+            async with asyncio.timeout(TIMEOUT):
+                line = await reader.readline()
+                if not line:
+                    raise EOFError("connection closed by master")
+                # простые строки в RESP2 приходят bulk-строками
+                if line.startswith(b"$") and not line.startswith(b"$-1"):
+                    line = await reader.readexactly(int(line[1:]) + 2)
+            return line.rstrip(b"\r\n")
+
+        reply = await call("PING")
+        if reply.startswith(b"-"):
+            raise ReplicationError(reply.decode(errors="replace"))
+        await call("REPLCONF", "listening-port", str(self.listening_port))
+        await call("REPLCONF", "capa", "eof", "psync2")
+        if self.backlog is not None:
+            reply = await call("PSYNC", self.replid, str(self.offset + 1))
+        else:
+            reply = await call("PSYNC", "?", "-1")
+
+        if reply.startswith(b"+FULLRESYNC"):
+            _, replid, offset = reply.decode().split()
+            rest = await self._full_sync(reader, replid, int(offset))
+            if rest:
+                reader = _PrefixedReader(rest, reader)
+        elif reply.startswith(b"+CONTINUE"):
+            parts = reply.decode().split()
+            if len(parts) > 1 and parts[1] != self.replid:
+                self.replid2, self.second_replid_offset = self.replid, self.offset + 1
+                self.replid = parts[1]
+        else:
+            raise ReplicationError(f"unexpected PSYNC reply: {reply.decode(errors='replace')}")
+        self.link_up = True
+        self.master_last_io = time.time()
+        logger.info(f"Replication link with {self.master_host}:{self.master_port} is up at offset {self.offset}")
+        self._send_ack(writer)
+        await self._stream(reader, writer)
+
+    async def _full_sync(self, reader: asyncio.StreamReader, replid: str, offset: int) -> bytes:
+        """
+        Читает снимок ведущего и заменяет им данные.
+
+        Returns:
+            Байты потока команд, прочитанные вместе с концом снимка
+        """
+        self.sync_in_progress = True
+        async with asyncio.timeout(TIMEOUT):
+            header = await reader.readline()
+        rest = b""
+        if header.startswith(b"$EOF:"):
+            mark = header[5:].rstrip(b"\r\n")
+            data = bytearray()
+            while True:
+                async with asyncio.timeout(TIMEOUT):
+                    chunk = await reader.read(1 << 20)
+                if not chunk:
+                    raise EOFError("connection closed during full sync")
+                # маркер может прийти по частям в двух чтениях, а за ним — начало потока команд
+                start = max(0, len(data) - len(mark) + 1)
+                data += chunk
+                end = data.find(mark, start)
+                if end >= 0:
+                    rest = bytes(data[end + len(mark):])
+                    del data[end:]
+                    break
+        elif header.startswith(b"$"):
+            async with asyncio.timeout(TIMEOUT):
+                data = bytearray(await reader.readexactly(int(header[1:])))
+        else:
+            raise ReplicationError(f"unexpected full sync payload: {header[:40]!r}")
+
+        persistence = self.persistence
+        persistence.loading = True
+        try:
+            loaded = await asyncio.to_thread(persistence.load_data, data)
+        finally:
+            persistence.loading = False
+            # загрузка шла в другом потоке: об очистке баз клиентам
+            # отслеживания сообщается отсюда, из цикла событий
+            for tracking in {storage.tracking for storage in self.storages}:
+                if tracking.active:
+                    tracking.invalidate_all()
+        self.replid = replid
+        self.replid2, self.second_replid_offset = "0" * EOF_MARK_SIZE, -1
+        self.backlog = ReplicationBacklog(self.backlog_size, offset)
+        self._db = 0
+        self.sync_in_progress = False
+        logger.info(f"Full sync from {self.master_host}:{self.master_port}: loaded {loaded} keys")
+        if self.applied is not None:
+            self.applied()
+        return rest
+
+    async def _stream(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        Выполняет поток команд ведущего; смещение — число обработанных байт.
+
+        Команды между MULTI и EXEC копятся и выполняются вместе по EXEC, и
+        только тогда их байты входят в смещение: после обрыва посреди
+        транзакции частичная синхронизация повторит ее с MULTI.
+        """
+        # команды открытой транзакции ведущего (база, имя, аргументы) и их байты
+        transaction: Optional[List[Tuple[int, str, List[str]]]] = None
+        transaction_raw = bytearray()
+        while True:
+            argv, raw = await self._read_command(reader)
+            self.master_last_io = time.time()
+            name = argv[0].upper()
+            if name == "MULTI":
+                transaction, transaction_raw = [], bytearray(raw)
+                continue
+            if name == "SELECT":
+                self._db = int(argv[1])
+            elif name == "REPLCONF":
+                if len(argv) > 1 and argv[1].upper() == "GETACK":
+                    self._feed_raw(raw)
+                    self.flush()
+                    self._send_ack(writer)
+                    continue
+            elif name == "EXEC":
+                if transaction is None:
+                    raise ReplicationError("EXEC without MULTI in the replication stream")
+                with self.persistence.transaction():
+                    for db, command, args in transaction:
+                        self._apply(db, command, args)
+                transaction_raw += raw
+                raw, transaction = bytes(transaction_raw), None
+            elif name != "PING":
+                if transaction is not None:
+                    transaction.append((self._db, name, argv[1:]))
+                    transaction_raw += raw
+                    continue
+                self._apply(self._db, name, argv[1:])
+            if transaction is not None:
+                transaction_raw += raw
+                continue
+            self._feed_raw(raw)
+            if self.applied is not None:
+                self.applied()
+
+    def _apply(self, db: int, name: str, args: List[str]) -> None:
+        ok, result = self.handlers[db].handle(name, args)
+        if not ok:
+            logger.warning(f"Replicated command {name} failed: {result}")
+
+    async def _read_command(self, reader: asyncio.StreamReader) -> Tuple[List[str], bytes]:
+        """Читает команду потока (массив RESP); возвращает аргументы и исходные байты."""
+        async with asyncio.timeout(TIMEOUT):
+            head = await reader.readline()
+            if not head:
+                raise EOFError("connection closed by master")
+            if not head.startswith(b"*"):
+                raise ReplicationError(f"unexpected data in the replication stream: {head[:40]!r}")
+            parts = [head]
+            argv = []
+            for _ in range(int(head[1:])):
+                header = await reader.readline()
+                if not header.startswith(b"$"):
+                    raise ReplicationError("expected bulk string in the replication stream")
+                data = await reader.readexactly(int(header[1:]) + 2)
+                parts.append(header)
+                parts.append(data)
+                argv.append(data[:-2].decode('utf-8', errors='surrogatepass'))
+        return argv, b"".join(parts)
@@ -0,0 +1,363 @@
+"""
+Вторичные индексы по полям хэшей и разбор запросов FT.SEARCH.
+
+Индекс охватывает хэши, ключи которых начинаются с одного из префиксов,
+и поддерживает поля трех типов:
+- NUMERIC — sorted set (ключ документа -> число) для диапазонных запросов;
+- TAG — инвертированный индекс тег -> множество ключей;
+- TEXT — инвертированный индекс токен -> множество ключей.
+
+Хранилище сообщает индексам о каждом изменении хэша, и индекс обновляет
+только поля, значения которых изменились. Запрос — конъюнкция условий:
+условия упорядочиваются по оценке размера, кандидаты берутся из самого
+маленького списка, а остальные условия по очереди сужают их
+(пересечение множеств или чтение числа за O(1) на кандидата).
+"""
+import heapq
+import math
+import re
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from .sorted_set import SortedSet
+
+_TOKEN_RE = re.compile(r"\w+")
+_QUERY_RE = re.compile(
+    r"\s*(?:@(?P<field>\w+):\s*(?:\[(?P<range>[^\]]*)\]|\{(?P<tags>[^}]*)\}|\((?P<words>[^)]*)\)|(?P<word>\w+))"
+    r"|(?P<all>\*)|(?P<bare>\w+))"
+)
+
+
+class SearchError(ValueError):
+    """Некорректная схема индекса или запрос."""
+
+
+def tokenize(text: str) -> Set[str]:
+    """Токены текстового поля в нижнем регистре."""
+    return set(_TOKEN_RE.findall(text.lower()))
+
+
+class NumericField:
+    """Числовое поле: sorted set ключей по значению."""
+
+    kind = "NUMERIC"
+
+    def __init__(self, name: str):
+        self.name = name
+        self.values = SortedSet()
+
+    @staticmethod
+    def parse(raw: str) -> Optional[float]:
+        try:
+            value = float(raw)
+        except ValueError:
+            return None
+        return None if math.isnan(value) else value
+
+    def add(self, key: str, value: float) -> None:
+        self.values.add(key, value)
+
+    def remove(self, key: str, value: float) -> None:
+        self.values.remove(key)
+
+    def clear(self) -> None:
+        self.values = SortedSet()
+
+
+class _InvertedField:
+    """Поле с инвертированным индексом: терм -> множество ключей."""
+
+    kind = ""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.postings: Dict[str, Set[str]] = {}
+
+    def add(self, key: str, terms: frozenset) -> None:
+        postings = self.postings
+        for term in terms:
+            keys = postings.get(term)
+            if keys is None:
+                postings[term] = {key}
+            else:
+                keys.add(key)
+
+    def remove(self, key: str, terms: frozenset) -> None:
+        postings = self.postings
+        for term in terms:
+            keys = postings.get(term)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del postings[term]
+
+    def clear(self) -> None:
+        self.postings = {}
+
+
+class TagField(_InvertedField):
+    """Поле-тег: значение делится по разделителю, теги без учета регистра."""
+
+    kind = "TAG"
+
+    def __init__(self, name: str, separator: str = ","):
+        super().__init__(name)
+        self.separator = separator
+
+    def parse(self, raw: str) -> Optional[frozenset]:
+        tags = frozenset(tag.strip().lower() for tag in raw.split(self.separator))
+        return tags - {""} or None
+
+
+class TextField(_InvertedField):
+    """Текстовое поле: множество токенов."""
+
+    kind = "TEXT"
+
+    @staticmethod
+    def parse(raw: str) -> Optional[frozenset]:
+        return frozenset(tokenize(raw)) or None
+
+
+FIELD_TYPES = {"NUMERIC": NumericField, "TAG": TagField, "TEXT": TextField}
+
+
+class _NumericClause:
+    """Условие @field:[min max]."""
+
+    def __init__(self, field: NumericField, low: float, high: float):
+        self.field = field
+        self.low = low
+        self.high = high
+
+    def estimate(self) -> int:
+        return self.field.values.count_by_score(self.low, self.high)
+
+    def candidates(self) -> Iterable[str]:
+        return (member for _, member in self.field.values.irange_by_score(self.low, self.high))
+
+    def filter(self, keys: Iterable[str]) -> List[str]:
+        score = self.field.values.score
+        low, high = self.low, self.high
+        return [key for key in keys if (value := score(key)) is not None and low <= value <= high]
+
+
+class _TermsClause:
+    """Условие «ключ есть хотя бы в одном из списков» (теги через | или токен по нескольким полям)."""
+
+    def __init__(self, postings: List[Set[str]]):
+        self.postings = postings
+
+    def estimate(self) -> int:
+        return sum(map(len, self.postings))
+
+    def candidates(self) -> Iterable[str]:
+        if len(self.postings) == 1:
+            return self.postings[0]
+        return set().union(*self.postings)
+
+    def filter(self, keys: Iterable[str]) -> Iterable[str]:
+        if len(self.postings) == 1:
+            # пересечение множеств выполняется на C-уровне
+            return self.postings[0].intersection(keys)
+        postings = self.postings
+        return [key for key in keys if any(key in posting for posting in postings)]
+
+
+class SearchIndex:
+    """Индекс хэшей с заданными префиксами ключей."""
+
+    def __init__(self, name: str, prefixes: List[str], fields: List[Any]):
+        self.name = name
+        self.prefixes = tuple(prefixes) or ("",)
+        self.fields: Dict[str, Any] = {field.name: field for field in fields}
+        # ключ -> {поле: проиндексированное значение}
+        self.documents: Dict[str, Dict[str, Any]] = {}
+
+    def update(self, key: str, fields: Optional[Dict[str, str]]) -> None:
+        """
+        Приводит индекс в соответствие с новым содержимым хэша.
+
+        Args:
+            key: Ключ
+            fields: Поля хэша или None, если ключ удален или больше не хэш
+        """
+        if not key.startswith(self.prefixes):
+            return
+        old = self.documents.get(key)
+        if fields is None:
+            if old is not None:
+                del self.documents[key]
+                for name, value in old.items():
+                    self.fields[name].remove(key, value)
+            return
+
+        new = {}
+        for name, field in self.fields.items():
+            raw = fields.get(name)
+            if raw is not None:
+                value = field.parse(raw)
+                if value is not None:
+                    new[name] = value
+        if old is not None:
+            for name, value in old.items():
+                if new.get(name) != value:
+                    self.fields[name].remove(key, value)
+        for name, value in new.items():
+            if old is None or old.get(name) != value:
+                self.fields[name].add(key, value)
+        self.documents[key] = new
+
+    def clear(self) -> None:
+        """Удаляет все документы из индекса."""
+        self.documents.clear()
+        for field in self.fields.values():
+            field.clear()
+
+    def _field(self, name: str, kind: Optional[str] = None) -> Any:
+        field = self.fields.get(name)
+        if field is None:
+            raise SearchError(f"Unknown field '{name}'")
+        if kind is not None and field.kind != kind:
+            raise SearchError(f"Field '{name}' is not a {kind} field")
+        return field
+
+    def _term_clause(self, token: str, field_name: Optional[str]) -> _TermsClause:
+        if field_name is not None:
+            fields = [self._field(field_name, "TEXT")]
+        else:
+            fields = [field for field in self.fields.values() if field.kind == "TEXT"]
+        return _TermsClause([field.postings.get(token, set()) for field in fields])
+
+    def parse_query(self, query: str) -> List[Any]:
+        """
+        Разбирает запрос в список условий, соединенных логическим И.
+
+        Raises:
+            SearchError: Если запрос некорректен или ссылается на неизвестное поле
+        """
+        clauses: List[Any] = []
+        position = 0
+        query = query.strip()
+        while position < len(query):
+            match = _QUERY_RE.match(query, position)
+            if match is None or match.end() == position:
+                raise SearchError(f"Syntax error at offset {position} near '{query[position:]}'")
+            position = match.end()
+            field_name = match.group("field")
+            if match.group("all"):
+                continue
+            if match.group("range") is not None:
+                bounds = match.group("range").split()
+                if len(bounds) != 2:
+                    raise SearchError("Bad numeric range")
+                field = self._field(field_name, "NUMERIC")
+                low, high = _parse_bound(bounds[0], math.inf), _parse_bound(bounds[1], -math.inf)
+                clauses.append(_NumericClause(field, low, high))
+            elif match.group("tags") is not None:
+                field = self._field(field_name, "TAG")
+                tags = {tag.strip().lower() for tag in match.group("tags").split("|")} - {""}
+                clauses.append(_TermsClause([field.postings.get(tag, set()) for tag in tags]))
+            else:
+                words = match.group("words") or match.group("word") or match.group("bare")
+                for token in tokenize(words):
+                    clauses.append(self._term_clause(token, field_name))
+        return clauses
+
+    def search(self, query: str, offset: int = 0, count: int = 10) -> Tuple[int, List[str]]:
+        """
+        Выполняет запрос.
+
+        Posting lists пересекаются начиная с самого маленького: кандидаты
+        берутся из условия с наименьшей оценкой, а остальные условия
+        в порядке возрастания оценки сужают их.
+
+        Returns:
+            (общее число совпадений, ключи страницы offset..offset+count в порядке ключей)
+        """
+        clauses = self.parse_query(query)
+        if not clauses:
+            matched: Iterable[str] = self.documents.keys()
+        else:
+            estimates = [clause.estimate() for clause in clauses]
+            order = sorted(range(len(clauses)), key=estimates.__getitem__)
+            if estimates[order[0]] == 0:
+                return 0, []
+            matched = clauses[order[0]].candidates()
+            for i in order[1:]:
+                matched = clauses[i].filter(matched)
+                if not matched:
+                    break
+        matched = list(matched)
+        if count <= 0:
+            return len(matched), []
+        return len(matched), heapq.nsmallest(offset + count, matched)[offset:]
+
+    def info(self) -> List[Any]:
+        """Сведения об индексе для FT.INFO."""
+        attributes = []
+        for field in self.fields.values():
+            attribute = ["identifier", field.name, "type", field.kind]
+            if field.kind == "TAG":
+                attribute += ["SEPARATOR", field.separator]
+            attributes.append(attribute)
+        return [
+            "index_name", self.name,
+            "prefixes", [prefix for prefix in self.prefixes if prefix],
+            "attributes", attributes,
+            "num_docs", len(self.documents),
+        ]
+
+    def definition(self) -> Dict[str, Any]:
+        """Определение индекса без данных (для снимка): имя, префиксы и SCHEMA."""
+        schema: List[str] = []
+        for field in self.fields.values():
+            schema += [field.name, field.kind]
+            if field.kind == "TAG":
+                schema += ["SEPARATOR", field.separator]
+        return {"name": self.name, "prefixes": [prefix for prefix in self.prefixes if prefix], "schema": schema}
+
+
+def _parse_bound(text: str, exclusive_step: float) -> float:
+    """Граница числового диапазона: число, -inf/+inf, '(' — исключающая граница."""
+    exclusive = text.startswith("(")
+    if exclusive:
+        text = text[1:]
+    try:
+        value = float(text)
+    except ValueError:
+        raise SearchError(f"Bad numeric range bound '{text}'")
+    if math.isnan(value):
+        raise SearchError(f"Bad numeric range bound '{text}'")
+    return math.nextafter(value, exclusive_step) if exclusive else value
+
+
+def parse_schema(args: List[str]) -> List[Any]:
+    """
+    Разбирает SCHEMA: field NUMERIC|TAG [SEPARATOR c]|TEXT ...
+
+    Raises:
+        SearchError: Если схема некорректна
+    """
+    fields = []
+    names = set()
+    i = 0
+    while i < len(args):
+        if i + 1 >= len(args):
+            raise SearchError(f"Missing type for field '{args[i]}'")
+        name, kind = args[i], args[i + 1].upper()
+        i += 2
+        if kind not in FIELD_TYPES:
+            raise SearchError(f"Unknown field type '{args[i - 1]}'")
+        if name in names:
+            raise SearchError(f"Duplicate field '{name}'")
+        names.add(name)
+        if kind == "TAG" and i < len(args) and args[i].upper() == "SEPARATOR":
+            if i + 1 >= len(args) or len(args[i + 1]) != 1:
+                raise SearchError("SEPARATOR requires a single character")
+            fields.append(TagField(name, args[i + 1]))
+            i += 2
+        else:
+            fields.append(FIELD_TYPES[kind](name))
+    if not fields:
+        raise SearchError("Schema must contain at least one field")
+    return fields
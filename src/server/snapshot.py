@@ -0,0 +1,652 @@
+"""
+Двоичный формат снимков данных (SAVE / BGSAVE).
+
+Файл начинается с сигнатуры и версии формата, затем идут записи:
+
+    AUX name value         служебные поля (время создания, библиотеки функций)
+    SELECTDB n             начало записей базы n
+    RESIZEDB count         число ключей базы (для предварительного выделения)
+    AUX index definition   определения индексов FT текущей базы
+    [EXPIRETIME_MS t] type key value
+    ...
+    EOF crc32
+
+Длины кодируются компактно: один байт для длин меньше 0xFD, иначе
+маркер и 4 или 8 байт. У каждого типа значения своя запись: строки,
+хэши, числа (CL.THROTTLE), потоки с группами потребителей, sorted set
+(гео-индексы), временные ряды (сжатые чанки пишутся как есть), JSON,
+фильтры Блума, Count-Min Sketch и Top-K. Формат не зависит от классов
+сервера, а загрузка снимка не выполняет кода из файла. Запись идет через
+буфер, который сбрасывается в файл большими блоками; итоговый файл
+атомарно заменяет прежний через rename.
+
+Чтение потоковое: декодер идет по буферу (обычно mmap файла) один раз,
+контрольная сумма считается по уже разобранным блокам, а ключи
+добавляются в хранилище пакетами по LOAD_BATCH.
+"""
+import json
+import os
+import struct
+import sys
+import time
+import zlib
+from array import array
+from typing import Any, BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple
+
+from .consumer_groups import ConsumerGroup
+from .json_document import JsonDocument, loads as json_loads
+from .probabilistic import BLOOM_TIGHTENING_RATIO, BloomLayer, CountMinSketch, ScalableBloomFilter, TopK
+from .search_index import SearchIndex, parse_schema
+from .sorted_set import SortedSet
+from .stream import Stream
+from .timeseries import Chunk, TimeSeries
+
+MAGIC = b"MINIREDIS"
+# версия 2: типы значений кодируются явно (версия 1 хранила их pickle)
+VERSION = 2
+HEADER = MAGIC + struct.pack("<H", VERSION)
+
+OP_AUX = 0xFA
+OP_RESIZEDB = 0xFB
+OP_EXPIRETIME_MS = 0xFC
+OP_SELECTDB = 0xFE
+OP_EOF = 0xFF
+
+TYPE_STRING = 0
+TYPE_BYTES = 1
+TYPE_BYTEARRAY = 2
+TYPE_HASH = 3
+TYPE_FLOAT = 4
+TYPE_STREAM = 5
+TYPE_SORTED_SET = 6
+TYPE_TIMESERIES = 7
+TYPE_JSON = 8
+TYPE_BLOOM = 9
+TYPE_CMS = 10
+TYPE_TOPK = 11
+# наибольший код типа значения (коды записей OP_* больше)
+TYPE_LAST = TYPE_TOPK
+
+# размер буфера записи, после которого он сбрасывается в файл
+FLUSH_SIZE = 1 << 20
+# число ключей в одном пакете загрузки (между пакетами сообщается прогресс)
+LOAD_BATCH = 10_000
+
+_LENGTH_4 = 0xFD
+_LENGTH_8 = 0xFE
+_SMALL_LENGTHS = [bytes((n,)) for n in range(_LENGTH_4)]
+
+
+class SnapshotError(ValueError):
+    """Файл снимка поврежден или имеет неизвестный формат."""
+
+
+def _length(n: int) -> bytes:
+    if n < _LENGTH_4:
+        return _SMALL_LENGTHS[n]
+    if n <= 0xFFFFFFFF:
+        return b"\xfd" + struct.pack("<I", n)
+    return b"\xfe" + struct.pack("<Q", n)
+
+
+def _string(data: bytes) -> bytes:
+    return _length(len(data)) + data
+
+
+def _aux(name: str, value: str) -> bytes:
+    return bytes((OP_AUX,)) + _string(name.encode()) + _string(value.encode())
+
+
+def _text(value: str) -> bytes:
+    return _string(value.encode('utf-8', errors='surrogatepass'))
+
+
+def _int64(value: int) -> bytes:
+    return struct.pack("<q", value)
+
+
+def _array(values: array) -> bytes:
+    """Массив чисел в порядке байт little-endian."""
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return _string(values.tobytes())
+
+
+def _encode_stream(stream: Stream) -> bytes:
+    parts = [_length(stream.block_size), _length(len(stream))]
+    for (ms, seq), values in stream.iter_range((0, 0), stream.last_id):
+        parts.append(struct.pack("<QQ", ms, seq))
+        parts.append(_length(len(values)))
+        parts.extend(_text(item) for item in values)
+    parts.append(struct.pack("<QQ", *stream.last_id))
+    parts.append(_length(stream.entries_added))
+    parts.append(_length(len(stream.groups)))
+    for group in stream.groups.values():
+        parts.append(_text(group.name))
+        parts.append(struct.pack("<QQ", *group.last_id))
+        parts.append(_int64(-1 if group.entries_read is None else group.entries_read))
+        parts.append(_length(len(group.consumers)))
+        for consumer in group.consumers.values():
+            parts.append(_text(consumer.name))
+            parts.append(_int64(consumer.seen_time) + _int64(consumer.active_time))
+        parts.append(_length(len(group.pel)))
+        for entry_id in sorted(group.pel):
+            entry = group.pel[entry_id]
+            parts.append(struct.pack("<QQ", *entry_id))
+            parts.append(_text(entry.consumer.name))
+            parts.append(_int64(entry.delivery_time) + _length(entry.delivery_count))
+    return b"".join(parts)
+
+
+def _encode_sorted_set(zset: SortedSet) -> bytes:
+    parts = [_length(len(zset))]
+    for score, member in zset:
+        parts.append(struct.pack("<d", score))
+        parts.append(_text(member))
+    return b"".join(parts)
+
+
+def _encode_timeseries(series: TimeSeries) -> bytes:
+    parts = [_int64(series.retention), _length(series.chunk_size), bytes((int(series.compressed),)),
+             _text(series.duplicate_policy), _length(len(series.labels))]
+    for name, value in series.labels.items():
+        parts.append(_text(name) + _text(value))
+    parts.append(_length(len(series.chunks)))
+    for chunk in series.chunks:
+        parts.append(bytes((int(chunk.compressed),)))
+        parts.append(_length(chunk.count))
+        if chunk.compressed:
+            parts.append(_int64(chunk.first_timestamp) + _int64(chunk.last_timestamp))
+            parts.append(_string(chunk.data))
+        else:
+            parts.append(_array(chunk.timestamps) + _array(chunk.values))
+    return b"".join(parts)
+
+
+def _encode_bloom(bloom: ScalableBloomFilter) -> bytes:
+    parts = [struct.pack("<d", bloom.error_rate), _length(bloom.capacity), _length(bloom.expansion),
+             bytes((int(bloom.scaling),)), _length(len(bloom.layers))]
+    for layer in bloom.layers:
+        parts.append(_length(layer.capacity) + _length(layer.count))
+        parts.append(_string(bytes(layer.bits)))
+    return b"".join(parts)
+
+
+def _encode_cms(sketch: CountMinSketch) -> bytes:
+    return _length(sketch.width) + _length(sketch.depth) + _length(sketch.total) + _array(sketch.counters)
+
+
+def _encode_topk(topk: TopK) -> bytes:
+    parts = [_length(topk.k), _length(topk.width), _length(topk.depth), struct.pack("<d", topk.decay),
+             _array(topk.fingerprints), _array(topk.counts), _length(len(topk.top))]
+    for item, count in topk.top.items():
+        parts.append(_text(item) + _length(count))
+    parts.append(_length(topk.draws))
+    return b"".join(parts)
+
+
+# типы значений, кроме строк и хэшей: класс -> (код типа, кодировщик)
+_ENCODERS: Dict[type, Tuple[int, Callable[[Any], bytes]]] = {
+    float: (TYPE_FLOAT, lambda value: struct.pack("<d", value)),
+    Stream: (TYPE_STREAM, _encode_stream),
+    SortedSet: (TYPE_SORTED_SET, _encode_sorted_set),
+    TimeSeries: (TYPE_TIMESERIES, _encode_timeseries),
+    JsonDocument: (TYPE_JSON, lambda document: _text(document.dumps())),
+    ScalableBloomFilter: (TYPE_BLOOM, _encode_bloom),
+    CountMinSketch: (TYPE_CMS, _encode_cms),
+    TopK: (TYPE_TOPK, _encode_topk),
+}
+
+
+def _encode_value(value: Any) -> Tuple[int, bytes]:
+    """
+    Тип записи и закодированное значение.
+
+    Raises:
+        SnapshotError: Если у типа значения нет кодировки
+    """
+    if isinstance(value, str):
+        return TYPE_STRING, _text(value)
+    if isinstance(value, bytes):
+        return TYPE_BYTES, _string(value)
+    if isinstance(value, bytearray):
+        return TYPE_BYTEARRAY, _string(bytes(value))
+    if isinstance(value, dict):
+        parts = [_length(len(value))]
+        for field, item in value.items():
+            parts.append(_text(field))
+            parts.append(_text(item))
+        return TYPE_HASH, b"".join(parts)
+    encoder = _ENCODERS.get(type(value))
+    if encoder is None:
+        raise SnapshotError(f"cannot save a value of type {type(value).__name__}")
+    value_type, encode = encoder
+    return value_type, _string(encode(value))
+
+
+def dump(out: BinaryIO, storages: List[Any], functions: Any = None) -> int:
+    """
+    Пишет снимок всех баз в файловый объект.
+
+    Вызывается без блокировок: в дочернем процессе BGSAVE других потоков
+    нет, а SAVE выполняется под блокировками хранилищ вызывающим кодом.
+
+    Returns:
+        Число записанных ключей
+    """
+    now = time.time()
+    written = 0
+    crc = 0
+    buf = bytearray(HEADER)
+    buf += _aux("ctime", str(int(now)))
+    if functions is not None and functions.libraries:
+        buf += _aux("functions", functions.dump())
+    for db, storage in enumerate(storages):
+        data = storage._data
+        if not data and not storage.indexes:
+            continue
+        buf.append(OP_SELECTDB)
+        buf += _length(db)
+        buf.append(OP_RESIZEDB)
+        buf += _length(len(data))
+        for index in storage.indexes.values():
+            buf += _aux("index", json.dumps(index.definition()))
+        for key, item in data.items():
+            expire_at = item.expire_at
+            if expire_at is not None:
+                if expire_at <= now:
+                    continue
+                buf.append(OP_EXPIRETIME_MS)
+                buf += struct.pack("<Q", int(expire_at * 1000))
+            value_type, encoded = _encode_value(item.value)
+            buf.append(value_type)
+            buf += _string(key.encode('utf-8', errors='surrogatepass'))
+            buf += encoded
+            written += 1
+            if len(buf) >= FLUSH_SIZE:
+                crc = zlib.crc32(buf, crc)
+                out.write(buf)
+                buf.clear()
+    buf.append(OP_EOF)
+    crc = zlib.crc32(buf, crc)
+    buf += struct.pack("<I", crc)
+    out.write(buf)
+    return written
+
+
+def write_snapshot(path: str, storages: List[Any], functions: Any = None) -> int:
+    """
+    Пишет снимок во временный файл рядом с path, сбрасывает его на диск и
+    атомарно переименовывает в path: читатели видят либо прежний, либо
+    новый файл целиком.
+
+    Returns:
+        Число записанных ключей
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    temp = os.path.join(directory, f"temp-{os.getpid()}.rdb")
+    try:
+        with open(temp, "wb", buffering=FLUSH_SIZE) as out:
+            written = dump(out, storages, functions)
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace(temp, path)
+    except BaseException:
+        try:
+            os.unlink(temp)
+        except OSError:
+            pass
+        raise
+    return written
+
+
+class _Position:
+    """Позиция декодера в буфере (читается загрузчиком для отчета о прогрессе)."""
+
+    def __init__(self):
+        self.pos = 0
+
+
+def _length_at(data: Any, pos: int) -> Tuple[int, int]:
+    """Длина, записанная с позиции pos, и позиция после нее."""
+    first = data[pos]
+    if first < _LENGTH_4:
+        return first, pos + 1
+    if first == _LENGTH_4:
+        return struct.unpack_from("<I", data, pos + 1)[0], pos + 5
+    return struct.unpack_from("<Q", data, pos + 1)[0], pos + 9
+
+
+class _Reader:
+    """Последовательное чтение полей значения составного типа."""
+
+    __slots__ = ("data", "pos")
+
+    def __init__(self, data: bytes):
+        self.data = data
+        self.pos = 0
+
+    def length(self) -> int:
+        value, self.pos = _length_at(self.data, self.pos)
+        return value
+
+    def unpack(self, fmt: str) -> Tuple[Any, ...]:
+        values = struct.unpack_from(fmt, self.data, self.pos)
+        self.pos += struct.calcsize(fmt)
+        return values
+
+    def flag(self) -> bool:
+        value = self.data[self.pos]
+        self.pos += 1
+        return bool(value)
+
+    def string(self) -> bytes:
+        size = self.length()
+        if self.pos + size > len(self.data):
+            raise IndexError("string past the end of the record")
+        value = self.data[self.pos:self.pos + size]
+        self.pos += size
+        return value
+
+    def text(self) -> str:
+        return str(self.string(), 'utf-8', 'surrogatepass')
+
+    def array(self, typecode: str, count: int) -> array:
+        values = array(typecode, self.string())
+        if len(values) != count:
+            raise SnapshotError("corrupted snapshot record")
+        if sys.byteorder == "big":
+            values.byteswap()
+        return values
+
+
+def _decode_stream(reader: _Reader) -> Stream:
+    stream = Stream(reader.length())
+    for _ in range(reader.length()):
+        entry_id = reader.unpack("<QQ")
+        stream.append(entry_id, tuple(reader.text() for _ in range(reader.length())))
+    stream.last_id = reader.unpack("<QQ")
+    stream.entries_added = reader.length()
+    for _ in range(reader.length()):
+        name = reader.text()
+        last_id = reader.unpack("<QQ")
+        entries_read = reader.unpack("<q")[0]
+        group = ConsumerGroup(name, last_id, None if entries_read < 0 else entries_read)
+        for _ in range(reader.length()):
+            consumer = group.get_consumer(reader.text())
+            consumer.seen_time, consumer.active_time = reader.unpack("<qq")
+        for _ in range(reader.length()):
+            entry_id = reader.unpack("<QQ")
+            consumer = group.get_consumer(reader.text())
+            group.deliver(entry_id, consumer, reader.unpack("<q")[0])
+            group.pel[entry_id].delivery_count = reader.length()
+        stream.groups[name] = group
+    return stream
+
+
+def _decode_sorted_set(reader: _Reader) -> SortedSet:
+    zset = SortedSet()
+    for _ in range(reader.length()):
+        score = reader.unpack("<d")[0]
+        zset.add(reader.text(), score)
+    return zset
+
+
+def _decode_timeseries(reader: _Reader) -> TimeSeries:
+    retention = reader.unpack("<q")[0]
+    chunk_size = reader.length()
+    compressed = reader.flag()
+    duplicate_policy = reader.text()
+    labels = {}
+    for _ in range(reader.length()):
+        name = reader.text()
+        labels[name] = reader.text()
+    series = TimeSeries(retention, chunk_size, compressed, duplicate_policy, labels)
+    chunks = []
+    for _ in range(reader.length()):
+        chunk_compressed = reader.flag()
+        count = reader.length()
+        if not count:
+            raise SnapshotError("corrupted snapshot record")
+        if chunk_compressed:
+            first_timestamp, last_timestamp = reader.unpack("<qq")
+            chunks.append(Chunk.from_compressed(reader.string(), count, first_timestamp, last_timestamp))
+        else:
+            chunks.append(Chunk(reader.array("q", count), reader.array("d", count)))
+    series.load_chunks(chunks)
+    return series
+
+
+def _decode_bloom(reader: _Reader) -> ScalableBloomFilter:
+    error_rate = reader.unpack("<d")[0]
+    bloom = ScalableBloomFilter(error_rate, reader.length(), reader.length(), reader.flag())
+    layers = []
+    for index in range(reader.length()):
+        layer = BloomLayer(reader.length(), error_rate * BLOOM_TIGHTENING_RATIO ** (index + 1))
+        layer.count = reader.length()
+        bits = reader.string()
+        if len(bits) != len(layer.bits):
+            raise SnapshotError("corrupted snapshot record")
+        layer.bits = bytearray(bits)
+        layers.append(layer)
+    if not layers:
+        raise SnapshotError("corrupted snapshot record")
+    bloom.layers = layers
+    return bloom
+
+
+def _decode_cms(reader: _Reader) -> CountMinSketch:
+    sketch = CountMinSketch(reader.length(), reader.length())
+    sketch.total = reader.length()
+    sketch.counters = reader.array("I", sketch.width * sketch.depth)
+    return sketch
+
+
+def _decode_topk(reader: _Reader) -> TopK:
+    topk = TopK(reader.length(), reader.length(), reader.length(), reader.unpack("<d")[0])
+    cells = topk.width * topk.depth
+    topk.fingerprints = reader.array("I", cells)
+    topk.counts = reader.array("I", cells)
+    top = {}
+    for _ in range(reader.length()):
+        item = reader.text()
+        top[item] = reader.length()
+    topk.load_top(top)
+    topk.draws = reader.length()
+    return topk
+
+
+# код типа -> декодер значения (обратные _ENCODERS)
+_DECODERS: Dict[int, Callable[[_Reader], Any]] = {
+    TYPE_FLOAT: lambda reader: reader.unpack("<d")[0],
+    TYPE_STREAM: _decode_stream,
+    TYPE_SORTED_SET: _decode_sorted_set,
+    TYPE_TIMESERIES: _decode_timeseries,
+    TYPE_JSON: lambda reader: JsonDocument(json_loads(reader.text())),
+    TYPE_BLOOM: _decode_bloom,
+    TYPE_CMS: _decode_cms,
+    TYPE_TOPK: _decode_topk,
+}
+
+
+def _decode_value(value_type: int, data: bytes) -> Any:
+    """Значение составного типа; запись должна быть прочитана целиком."""
+    reader = _Reader(data)
+    value = _DECODERS[value_type](reader)
+    if reader.pos != len(data):
+        raise SnapshotError("corrupted snapshot record")
+    return value
+
+
+def records(data: Any) -> Iterator[Tuple[int, Any, Any, Optional[float]]]:
+    """
+    Декодирует снимок.
+
+    Yields:
+        (OP_AUX, имя, значение, None), (OP_SELECTDB, номер, None, None),
+        (OP_RESIZEDB, число ключей, None, None) или (тип, ключ, значение,
+        время истечения в секундах либо None)
+
+    Raises:
+        SnapshotError: Если сигнатура, версия или контрольная сумма не совпадают
+    """
+    return _decode(data, _Position())
+
+
+def _decode(data: Any, position: _Position) -> Iterator[Tuple[int, Any, Any, Optional[float]]]:
+    """
+    Декодер записей: проверяет заголовок, затем читает записи до EOF.
+
+    Разбор идет по локальным переменным без вызова функции на каждое поле:
+    загрузка снимка упирается в интерпретатор, а не в чтение файла.
+    Контрольная сумма накапливается по мере чтения блоками не меньше
+    FLUSH_SIZE и сверяется в конце, поэтому буфер читается один раз.
+    """
+    if bytes(data[:len(MAGIC)]) != MAGIC:
+        raise SnapshotError("not a snapshot file")
+    version = struct.unpack_from("<H", data, len(MAGIC))[0]
+    if version != VERSION:
+        raise SnapshotError(f"unsupported snapshot version {version}")
+    if len(data) < len(HEADER) + 5 or data[len(data) - 5] != OP_EOF:
+        raise SnapshotError("truncated snapshot")
+
+    view = memoryview(data)
+    unpack_from = struct.unpack_from
+    pos = len(HEADER)
+    end = len(data) - 5
+    crc, checked = 0, 0
+    expire_at: Optional[float] = None
+    try:
+        while pos < end:
+            if pos - checked >= FLUSH_SIZE:
+                crc = zlib.crc32(view[checked:pos], crc)
+                checked = pos
+            op = data[pos]
+            pos += 1
+            if op == OP_EXPIRETIME_MS:
+                expire_at = unpack_from("<Q", data, pos)[0] / 1000
+                pos += 8
+                continue
+            if op > TYPE_LAST:
+                if op == OP_AUX:
+                    size, pos = _length_at(data, pos)
+                    name = str(data[pos:pos + size], 'utf-8')
+                    size, pos = _length_at(data, pos + size)
+                    value = str(data[pos:pos + size], 'utf-8')
+                    pos += size
+                    position.pos = pos
+                    yield OP_AUX, name, value, None
+                elif op == OP_SELECTDB or op == OP_RESIZEDB:
+                    size, pos = _length_at(data, pos)
+                    position.pos = pos
+                    yield op, size, None, None
+                else:
+                    raise SnapshotError(f"unknown record type {op}")
+                continue
+
+            size = data[pos]
+            if size < _LENGTH_4:
+                pos += 1
+            else:
+                size, pos = _length_at(data, pos)
+            key = str(data[pos:pos + size], 'utf-8', 'surrogatepass')
+            pos += size
+            if op == TYPE_HASH:
+                count, pos = _length_at(data, pos)
+                value = {}
+                for _ in range(count):
+                    size, pos = _length_at(data, pos)
+                    field = str(data[pos:pos + size], 'utf-8', 'surrogatepass')
+                    size, pos = _length_at(data, pos + size)
+                    value[field] = str(data[pos:pos + size], 'utf-8', 'surrogatepass')
+                    pos += size
+            else:
+                size = data[pos]
+                if size < _LENGTH_4:
+                    pos += 1
+                else:
+                    size, pos = _length_at(data, pos)
+                if op == TYPE_STRING:
+                    value = str(data[pos:pos + size], 'utf-8', 'surrogatepass')
+                elif op == TYPE_BYTES:
+                    value = bytes(data[pos:pos + size])
+                elif op == TYPE_BYTEARRAY:
+                    value = bytearray(data[pos:pos + size])
+                else:
+                    value = _decode_value(op, bytes(data[pos:pos + size]))
+                pos += size
+            position.pos = pos
+            yield op, key, value, expire_at
+            expire_at = None
+    except (IndexError, struct.error) as exc:
+        raise SnapshotError("unexpected end of snapshot") from exc
+    except SnapshotError:
+        raise
+    except ValueError as exc:
+        raise SnapshotError("corrupted snapshot record") from exc
+    finally:
+        view.release()
+    if pos != end:
+        raise SnapshotError("unexpected end of snapshot")
+    if zlib.crc32(memoryview(data)[checked:end + 1], crc) != unpack_from("<I", data, end + 1)[0]:
+        raise SnapshotError("snapshot checksum mismatch")
+
+
+def load(data: Any, storages: List[Any], functions: Any = None,
+         progress: Optional[Callable[[int, int], None]] = None, invalidate: bool = True) -> int:
+    """
+    Загружает снимок в хранилища, заменяя их содержимое.
+
+    Ключи, истекшие к моменту загрузки, пропускаются. Ключи добавляются
+    пакетами по LOAD_BATCH; после каждого пакета вызывается
+    progress(прочитано байт, загружено ключей). При invalidate=False
+    клиентам отслеживания об очистке баз сообщает вызывающий.
+
+    Returns:
+        Число загруженных ключей
+    """
+    now = time.time()
+    loaded = 0
+    storage = None
+    indexes: List[Tuple[Any, dict]] = []
+    batch: List[Tuple[str, Any, Optional[float]]] = []
+    for storage_ in storages:
+        storage_.clear(invalidate)
+    position = _Position()
+    decoder = _decode(data, position)
+    try:
+        for op, first, second, expire_at in decoder:
+            if op <= TYPE_LAST:
+                if storage is None:
+                    raise SnapshotError("key outside of a database section")
+                if expire_at is None or expire_at > now:
+                    batch.append((first, second, expire_at))
+                    loaded += 1
+                    if len(batch) >= LOAD_BATCH:
+                        storage.bulk_load(batch)
+                        batch = []
+                        if progress is not None:
+                            progress(position.pos, loaded)
+            elif op == OP_SELECTDB:
+                if storage is not None:
+                    storage.bulk_load(batch)
+                    batch = []
+                if first >= len(storages):
+                    raise SnapshotError(f"snapshot references database {first}, server has {len(storages)}")
+                storage = storages[first]
+            elif op == OP_AUX:
+                if first == "functions" and functions is not None:
+                    functions.restore(second, "FLUSH")
+                elif first == "index" and storage is not None:
+                    indexes.append((storage, json.loads(second)))
+    finally:
+        # закрытие генератора освобождает его представление буфера (иначе mmap не закрыть)
+        decoder.close()
+    if storage is not None:
+        storage.bulk_load(batch)
+    if progress is not None:
+        progress(len(data), loaded)
+    for storage, definition in indexes:
+        storage.add_index(SearchIndex(definition["name"], definition["prefixes"], parse_schema(definition["schema"])))
+    return loaded
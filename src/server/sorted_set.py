@@ -0,0 +1,127 @@
+"""
+Тип данных sorted set: члены, упорядоченные по score.
+
+Пары (score, member) хранятся в отсортированном списке, разбитом на
+подсписки ограниченного размера, и в словаре member -> score. Для
+подсписков хранится максимальная пара, поэтому поиск позиции — два
+бинарных поиска, а вставка и удаление сдвигают только один подсписок,
+а не весь набор.
+"""
+import math
+from bisect import bisect_left, insort
+from typing import Dict, Iterator, List, Optional, Tuple
+
+ScoredMember = Tuple[float, str]
+
+
+class SortedSet:
+    """Набор уникальных членов, упорядоченных по (score, member)."""
+
+    # Подсписок делится пополам, когда становится длиннее 2 * LOAD
+    LOAD = 512
+
+    def __init__(self):
+        self._scores: Dict[str, float] = {}
+        self._lists: List[List[ScoredMember]] = []
+        self._maxes: List[ScoredMember] = []
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+    def __contains__(self, member: str) -> bool:
+        return member in self._scores
+
+    def score(self, member: str) -> Optional[float]:
+        """Возвращает score члена или None."""
+        return self._scores.get(member)
+
+    def add(self, member: str, score: float) -> bool:
+        """
+        Добавляет член или обновляет его score.
+
+        Returns:
+            True, если член новый
+        """
+        old = self._scores.get(member)
+        if old is not None:
+            if old == score:
+                return False
+            self._remove_pair((old, member))
+        self._scores[member] = score
+        self._insert_pair((score, member))
+        return old is None
+
+    def remove(self, member: str) -> bool:
+        """Удаляет член. Возвращает True, если он был в наборе."""
+        score = self._scores.pop(member, None)
+        if score is None:
+            return False
+        self._remove_pair((score, member))
+        return True
+
+    def _insert_pair(self, pair: ScoredMember) -> None:
+        lists, maxes = self._lists, self._maxes
+        if not lists:
+            lists.append([pair])
+            maxes.append(pair)
+            return
+        index = bisect_left(maxes, pair)
+        if index == len(maxes):
+            index -= 1
+            lists[index].append(pair)
+            maxes[index] = pair
+        else:
+            insort(lists[index], pair)
+        sublist = lists[index]
+        if len(sublist) > 2 * self.LOAD:
+            tail = sublist[self.LOAD:]
+            del sublist[self.LOAD:]
+            lists.insert(index + 1, tail)
+            maxes[index] = sublist[-1]
+            maxes.insert(index + 1, tail[-1])
+
+    def _remove_pair(self, pair: ScoredMember) -> None:
+        index = bisect_left(self._maxes, pair)
+        sublist = self._lists[index]
+        del sublist[bisect_left(sublist, pair)]
+        if sublist:
+            self._maxes[index] = sublist[-1]
+        else:
+            del self._lists[index]
+            del self._maxes[index]
+
+    def _rank(self, pair: ScoredMember) -> int:
+        """Количество пар, меньших pair."""
+        index = bisect_left(self._maxes, pair)
+        if index == len(self._lists):
+            return len(self._scores)
+        return sum(map(len, self._lists[:index])) + bisect_left(self._lists[index], pair)
+
+    def count_by_score(self, min_score: float, max_score: float) -> int:
+        """Количество членов с min_score <= score <= max_score (без обхода диапазона)."""
+        if min_score > max_score:
+            return 0
+        upper = len(self._scores) if max_score == math.inf else self._rank((math.nextafter(max_score, math.inf), ""))
+        return upper - self._rank((min_score, ""))
+
+    def __iter__(self) -> Iterator[ScoredMember]:
+        for sublist in self._lists:
+            yield from sublist
+
+    def irange_by_score(self, min_score: float, max_score: float) -> Iterator[ScoredMember]:
+        """Итерирует пары с min_score <= score <= max_score по возрастанию."""
+        lists = self._lists
+        start = (min_score, "")
+        index = bisect_left(self._maxes, start)
+        if index == len(lists):
+            return
+        position = bisect_left(lists[index], start)
+        while index < len(lists):
+            sublist = lists[index]
+            for offset in range(position, len(sublist)):
+                pair = sublist[offset]
+                if pair[0] > max_score:
+                    return
+                yield pair
+            index += 1
+            position = 0
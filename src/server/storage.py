@@ -4,11 +4,26 @@
 import asyncio
 import heapq
 import time
-from typing import Any, Dict, Optional, Tuple
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple, Union
 import fnmatch
 from dataclasses import dataclass
 import threading
 
+from . import notifications
+from .command_parser import WIRE_ERRORS
+from .functions import FunctionRegistry
+from .persistence import Persistence
+from .pubsub import PubSub
+from .replication import Replication
+from .tracking import TrackingTable
+
+
+class WrongTypeError(TypeError):
+    """Операция применена к ключу с значением другого типа."""
+
+    def __init__(self, message: str = "WRONGTYPE Operation against a key holding the wrong kind of value"):
+        super().__init__(message)
+
 
 @dataclass
 class StorageItem:
@@ -29,12 +44,54 @@ class Storage:
     Потокобезопасное хранилище в памяти.
     """
     
-    def __init__(self):
+    def __init__(self, databases: Optional[Any] = None):
         self._data: Dict[str, StorageItem] = {}
         self._lock = threading.RLock()
         self._cleanup_task: Optional[asyncio.Task] = None
         self._cleanup_interval = 1.0 #сек
         self._expire_heap = []  
+        # ключи, на которых ждут заблокированные клиенты, и ключи с новыми данными
+        self.blocking_keys: Set[str] = set()
+        self.ready_keys: Set[str] = set()
+        # вторичные индексы по хэшам (имя -> SearchIndex), обновляются при изменении ключей
+        self.indexes: Dict[str, Any] = {}
+        # набор баз данных сервера, в который входит хранилище (None для отдельного хранилища)
+        self.databases = databases
+        # количество ключей, удаленных по истечении TTL
+        self.expired_keys = 0
+        # счетчики изменений ключей под WATCH: ключ -> [версия, число наблюдателей]
+        self._watched: Dict[str, List[int]] = {}
+        # есть ли наблюдатели изменений (WATCH или CLIENT TRACKING); единственная
+        # проверка в методах записи, пока никто не наблюдает
+        self._observed = False
+        # включенные классы уведомлений о ключах (notify-keyspace-events), 0 — выключены
+        self.notify_flags = 0
+        # счетчик изменений данных (для интервалов сохранения снимков)
+        self.dirty = 0
+        # таблица CLIENT TRACKING, библиотеки серверных функций, каналы и подписчики,
+        # сохранение снимков и репликация: у набора баз — общие для всех хранилищ,
+        # отдельное хранилище создает свои
+        if databases is not None:
+            self.tracking = databases.tracking
+            self.functions = databases.functions
+            self.pubsub = databases.pubsub
+            self.persistence = databases.persistence
+            self.replication = databases.replication
+        else:
+            self.tracking = TrackingTable([self])
+            self.functions = FunctionRegistry()
+            self.pubsub = PubSub()
+            self.persistence = Persistence([self])
+            self.replication = Replication([self], self.persistence)
+            self.persistence.replication = self.replication
+        # передача записывающих команд в журнал AOF и репликам: функция
+        # (хранилище, команда, аргументы, результат) или None, пока их некому передавать
+        self.propagate: Optional[Callable[["Storage", str, List[str], Any], None]] = None
+
+    @property
+    def lock(self) -> threading.RLock:
+        """Блокировка хранилища (удерживается на время выполнения транзакции)."""
+        return self._lock
     
     async def start_cleanup_task(self):
         """Запускает фоновую задачу очистки истекших элементов."""
@@ -68,7 +125,7 @@ class Storage:
             while self._expire_heap and self._expire_heap[0][0] <= current_time:
                 expire_at, key = heapq.heappop(self._expire_heap)
                 if key in self._data and self._data[key].expire_at == expire_at:
-                    del self._data[key]
+                    self._expire_key(key)
     
     def set(self, key: str, value: Any, ttl: Optional[float] = None) -> bool:
         """
@@ -86,9 +143,125 @@ class Storage:
             expire_at = None
             if ttl is not None and ttl > 0:
                 expire_at = time.time() + ttl
+            self._store(key, value, expire_at)
+            return True
+
+    def _store(self, key: str, value: Any, expire_at: Optional[float]) -> None:
+        """Записывает значение с абсолютным временем истечения (вызывается под блокировкой)."""
+        if expire_at is not None:
+            heapq.heappush(self._expire_heap, (expire_at, key))
+        self._data[key] = StorageItem(value=value, expire_at=expire_at)
+        if self.indexes:
+            self._reindex(key, value)
+        self.dirty += 1
+        if self._observed:
+            self._changed(key)
+        if self.notify_flags and isinstance(value, (str, bytes, bytearray)):
+            self._notify(notifications.STRING, "set", key)
+            if expire_at is not None:
+                self._notify(notifications.GENERIC, "expire", key)
+
+    @staticmethod
+    def _string_value(item: Optional[StorageItem]) -> Optional[Union[str, bytes, bytearray]]:
+        """Строковое значение элемента; для значений другого типа — WrongTypeError."""
+        if item is None:
+            return None
+        value = item.value
+        if not isinstance(value, (str, bytes, bytearray)):
+            raise WrongTypeError()
+        return value
+
+    @classmethod
+    def _string_equals(cls, item: Optional[StorageItem], expected: str) -> bool:
+        """Проверяет, что строковое значение элемента равно expected."""
+        value = cls._string_value(item)
+        if value is None:
+            return False
+        if isinstance(value, str):
+            return value == expected
+        return value == expected.encode('utf-8', WIRE_ERRORS)
+
+    def set_with_options(self, key: str, value: Any, expire_at: Optional[float] = None,
+                         nx: bool = False, xx: bool = False, if_equal: Optional[str] = None,
+                         keep_ttl: bool = False, get: bool = False) -> Tuple[bool, Optional[Any]]:
+        """
+        Условная запись значения одной атомарной операцией (SET с опциями).
+
+        Args:
+            key: Ключ
+            value: Значение
+            expire_at: Абсолютное время истечения (time.time()) или None
+            nx: Записать, только если ключа нет
+            xx: Записать, только если ключ есть
+            if_equal: Записать, только если текущее значение равно if_equal
+            keep_ttl: Сохранить TTL существующего ключа
+            get: Вернуть прежнее значение (оно должно быть строкой)
+
+        Returns:
+            (записано ли значение, прежнее значение при get=True, иначе None)
+        """
+        with self._lock:
+            item = self._get_live_item(key)
+            old = self._string_value(item) if get else None
+            if (nx and item is not None) or (xx and item is None):
+                return False, old
+            if if_equal is not None and not self._string_equals(item, if_equal):
+                return False, old
+            if keep_ttl and item is not None:
+                expire_at = item.expire_at
+            self._store(key, value, expire_at)
+            return True, old
+
+    def getex(self, key: str, expire_at: Optional[float] = None, persist: bool = False) -> Optional[Any]:
+        """
+        Возвращает строковое значение и одновременно меняет TTL ключа.
+
+        Args:
+            key: Ключ
+            expire_at: Новое абсолютное время истечения или None (TTL не меняется)
+            persist: Снять TTL
+
+        Returns:
+            Значение или None, если ключа нет
+        """
+        with self._lock:
+            item = self._get_live_item(key)
+            value = self._string_value(item)
+            if item is None:
+                return None
+            if persist:
+                item.expire_at = None
+            elif expire_at is not None:
+                item.expire_at = expire_at
                 heapq.heappush(self._expire_heap, (expire_at, key))
+            else:
+                return value
+            self.dirty += 1
+            if self._observed:
+                self._changed(key)
+            if self.notify_flags:
+                self._notify(notifications.GENERIC, "persist" if persist else "expire", key)
+            return value
+
+    def getdel(self, key: str) -> Optional[Any]:
+        """Возвращает строковое значение и удаляет ключ одной операцией."""
+        with self._lock:
+            item = self._get_live_item(key)
+            value = self._string_value(item)
+            if item is not None:
+                self._remove(key)
+                if self.notify_flags:
+                    self._notify(notifications.GENERIC, "del", key)
+            return value
 
-            self._data[key] = StorageItem(value=value, expire_at=expire_at)
+    def delete_if_equal(self, key: str, expected: str) -> bool:
+        """Удаляет ключ, только если его строковое значение равно expected."""
+        with self._lock:
+            if not self._string_equals(self._get_live_item(key), expected):
+                return False
+            self._remove(key)
+            if self.notify_flags:
+                self._notify(notifications.GENERIC, "del", key)
             return True
     
     def get(self, key: str) -> Tuple[bool, Optional[Any]]:
@@ -107,11 +280,66 @@ class Storage:
             
             item = self._data[key]
             if item.is_expired():
-                del self._data[key]
+                self._expire_key(key)
                 return False, None
             
             return True, item.value
     
+    def mget(self, keys: List[str]) -> List[Optional[Any]]:
+        """
+        Получает строковые значения нескольких ключей под одной блокировкой.
+
+        Args:
+            keys: Ключи
+
+        Returns:
+            Значения в порядке ключей; None для отсутствующих ключей и значений не строкового типа
+        """
+        result = []
+        append = result.append
+        with self._lock:
+            data = self._data
+            for key in keys:
+                item = data.get(key)
+                if item is None:
+                    append(None)
+                elif item.expire_at is not None and item.is_expired():
+                    self._expire_key(key)
+                    append(None)
+                else:
+                    value = item.value
+                    append(value if isinstance(value, (str, bytes, bytearray)) else None)
+        return result
+
+    def mset(self, mapping: Dict[str, Any], only_new: bool = False) -> bool:
+        """
+        Устанавливает несколько значений под одной блокировкой (TTL сбрасывается).
+
+        Args:
+            mapping: Ключи и значения
+            only_new: Записать только если ни один из ключей не существует (MSETNX)
+
+        Returns:
+            True, если значения записаны
+        """
+        with self._lock:
+            data = self._data
+            if only_new and any(self._get_live_item(key) is not None for key in mapping):
+                return False
+            for key, value in mapping.items():
+                data[key] = StorageItem(value=value)
+            if self.indexes:
+                for key, value in mapping.items():
+                    self._reindex(key, value)
+            self.dirty += len(mapping)
+            if self._observed:
+                for key in mapping:
+                    self._changed(key)
+            if self.notify_flags:
+                for key in mapping:
+                    self._notify(notifications.STRING, "set", key)
+            return True
+
     def delete(self, key: str) -> bool:
         """
         Удаляет ключ.
@@ -124,7 +352,9 @@ class Storage:
         """
         with self._lock:
             if key in self._data:
-                del self._data[key]
+                self._remove(key)
+                if self.notify_flags:
+                    self._notify(notifications.GENERIC, "del", key)
                 return True
             return False
     
@@ -144,7 +374,7 @@ class Storage:
             
             item = self._data[key]
             if item.is_expired():
-                del self._data[key]
+                self._expire_key(key)
                 return False
             
             return True
@@ -165,7 +395,7 @@ class Storage:
             
             item = self._data[key]
             if item.is_expired():
-                del self._data[key]
+                self._expire_key(key)
                 return -2
             
             if item.expire_at is None:
@@ -174,6 +404,12 @@ class Storage:
             remaining = int(item.expire_at - time.time())
             return max(0, remaining)
     
+    def expire_time(self, key: str) -> Optional[float]:
+        """Абсолютное время истечения ключа в секундах или None (нет ключа или TTL)."""
+        with self._lock:
+            item = self._get_live_item(key)
+            return item.expire_at if item is not None else None
+
     def expire(self, key: str, ttl: float) -> bool:
         """
         Устанавливает TTL для существующего ключа.
@@ -185,19 +421,563 @@ class Storage:
         Returns:
             True если TTL установлен, False если ключ не существует
         """
+        return self.expire_at(key, time.time() + ttl)
+
+    def expire_at(self, key: str, when: float) -> bool:
+        """
+        Устанавливает абсолютное время истечения существующего ключа.
+
+        Время в прошлом удаляет ключ сразу.
+
+        Args:
+            key: Ключ
+            when: Unix-время истечения в секундах
+
+        Returns:
+            True если время установлено (или ключ удален), False если ключ не существует
+        """
         with self._lock:
             if key not in self._data:
                 return False
 
             item = self._data[key]
             if item.is_expired():
-                del self._data[key]
+                self._expire_key(key)
                 return False
 
-            item.expire_at = time.time() + ttl
+            if when <= time.time():
+                self._remove(key)
+                if self.notify_flags:
+                    self._notify(notifications.GENERIC, "del", key)
+                return True
+
+            item.expire_at = when
             heapq.heappush(self._expire_heap, (item.expire_at, key))
+            self.dirty += 1
+            if self._observed:
+                self._changed(key)
+            if self.notify_flags:
+                self._notify(notifications.GENERIC, "expire", key)
             return True
-    
+
+    def _remove(self, key: str) -> None:
+        """Удаляет ключ из словаря данных (вызывается под блокировкой)."""
+        del self._data[key]
+        if self.indexes:
+            self._reindex(key, None)
+        self.dirty += 1
+        if self._observed:
+            self._changed(key)
+
+    def touch(self, key: str) -> None:
+        """
+        Отмечает изменение значения ключа на месте.
+
+        Методы записи хранилища учитывают изменения сами; команды, изменяющие
+        значение на месте (поток, фильтр, документ), вызывают этот метод.
+        """
+        self.dirty += 1
+        if self._observed:
+            self._changed(key)
+
+    def _changed(self, key: str) -> None:
+        """Сообщает об изменении ключа WATCH и CLIENT TRACKING (вызывается при наличии наблюдателей)."""
+        entry = self._watched.get(key)
+        if entry is not None:
+            entry[0] += 1
+        if self.tracking.active:
+            self.tracking.invalidate(key)
+
+    def touch_all(self, invalidate: bool = True) -> None:
+        """
+        Отмечает изменение всех наблюдаемых ключей (FLUSHDB, SWAPDB).
+
+        Args:
+            invalidate: Сообщить клиентам отслеживания; False — сообщение
+                отправит вызывающий в потоке цикла событий
+        """
+        self.dirty += 1
+        for entry in self._watched.values():
+            entry[0] += 1
+        if invalidate and self.tracking.active:
+            self.tracking.invalidate_all()
+
+    def _refresh_observed(self) -> None:
+        """Пересчитывает флаг наличия наблюдателей изменений."""
+        self._observed = bool(self._watched) or self.tracking.active
+
+    def watch(self, key: str) -> int:
+        """
+        Начинает отслеживать изменения ключа.
+
+        Returns:
+            Текущая версия ключа
+        """
+        with self._lock:
+            entry = self._watched.get(key)
+            if entry is None:
+                entry = self._watched[key] = [0, 0]
+                self._observed = True
+            entry[1] += 1
+            return entry[0]
+
+    def unwatch(self, key: str) -> None:
+        """Прекращает отслеживание ключа одним наблюдателем."""
+        with self._lock:
+            entry = self._watched.get(key)
+            if entry is not None:
+                entry[1] -= 1
+                if entry[1] <= 0:
+                    del self._watched[key]
+                    self._refresh_observed()
+
+    def version(self, key: str) -> int:
+        """
+        Текущая версия наблюдаемого ключа.
+
+        Истекший ключ сначала удаляется, поэтому истечение TTL после WATCH
+        тоже считается изменением.
+        """
+        with self._lock:
+            self._get_live_item(key)
+            entry = self._watched.get(key)
+            return entry[0] if entry is not None else -1
+
+    def _expire_key(self, key: str) -> None:
+        """Удаляет истекший ключ (вызывается под блокировкой)."""
+        self.expired_keys += 1
+        self._remove(key)
+        if self.propagate is not None:
+            # журнал получает явное удаление, а не повтор чтения, которое его вызвало
+            self.propagate(self, "DEL", [key], 1)
+        if self.notify_flags:
+            self._notify(notifications.EXPIRED, "expired", key)
+
+    def _notify(self, event_class: int, event: str, key: str) -> None:
+        """
+        Публикует уведомление о событии ключа, если класс события включен.
+
+        Вызывается только при ненулевом notify_flags, поэтому без настроенных
+        уведомлений методы записи платят одной проверкой атрибута.
+        """
+        flags = self.notify_flags
+        if not flags & event_class or not self.pubsub.active:
+            return
+        db = self.databases.storages.index(self) if self.databases is not None else 0
+        notifications.publish(self.pubsub, flags, event, key, db)
+
+    def _reindex(self, key: str, value: Any) -> None:
+        """Передает новое значение ключа вторичным индексам (вызывается под блокировкой)."""
+        if not isinstance(value, dict):
+            value = None
+        for index in self.indexes.values():
+            index.update(key, value)
+
+    def _get_live_item(self, key: str) -> Optional[StorageItem]:
+        """Возвращает неистекший элемент или None (вызывается под блокировкой)."""
+        item = self._data.get(key)
+        if item is None:
+            return None
+        if item.is_expired():
+            self._expire_key(key)
+            return None
+        return item
+
+    @staticmethod
+    def _as_bytearray(item: StorageItem) -> bytearray:
+        """
+        Переводит строковое значение элемента в изменяемый bytearray.
+
+        Значения, записанные через SET, хранятся как str; при первой
+        мутирующей операции они однократно кодируются в bytearray,
+        после чего дописывание выполняется на месте.
+        """
+        value = item.value
+        if isinstance(value, bytearray):
+            return value
+        if isinstance(value, str):
+            value = bytearray(value.encode('utf-8', WIRE_ERRORS))
+        elif isinstance(value, bytes):
+            value = bytearray(value)
+        else:
+            raise WrongTypeError()
+        item.value = value
+        return value
+
+    def append(self, key: str, data: Union[str, bytes]) -> int:
+        """
+        Дописывает данные в конец строкового значения.
+
+        Args:
+            key: Ключ
+            data: Дописываемые данные
+
+        Returns:
+            Длина значения в байтах после дописывания
+        """
+        if isinstance(data, str):
+            data = data.encode('utf-8', WIRE_ERRORS)
+        with self._lock:
+            item = self._get_live_item(key)
+            # тип проверяется до учета изменения: APPEND к не-строке ничего не меняет
+            buffer = None if item is None else self._as_bytearray(item)
+            self.dirty += 1
+            if self._observed:
+                self._changed(key)
+            if self.notify_flags:
+                self._notify(notifications.STRING, "append", key)
+            if buffer is None:
+                self._data[key] = StorageItem(value=bytearray(data))
+                return len(data)
+            buffer += data
+            return len(buffer)
+
+    def setrange(self, key: str, offset: int, data: Union[str, bytes]) -> int:
+        """
+        Перезаписывает часть строкового значения начиная с offset.
+
+        Недостающие байты до offset заполняются нулями.
+
+        Args:
+            key: Ключ
+            offset: Смещение в байтах (>= 0)
+            data: Записываемые данные
+
+        Returns:
+            Длина значения в байтах после записи
+        """
+        if offset < 0:
+            raise ValueError("offset is out of range")
+        if isinstance(data, str):
+            data = data.encode('utf-8', WIRE_ERRORS)
+        with self._lock:
+            item = self._get_live_item(key)
+            if item is None:
+                if not data:
+                    return 0
+                item = StorageItem(value=bytearray())
+                self._data[key] = item
+            buffer = self._as_bytearray(item)
+            if not data:
+                return len(buffer)
+            self.dirty += 1
+            if self._observed:
+                self._changed(key)
+            if self.notify_flags:
+                self._notify(notifications.STRING, "setrange", key)
+            end = offset + len(data)
+            if end > len(buffer):
+                buffer.extend(bytes(end - len(buffer)))
+            buffer[offset:end] = data
+            return len(buffer)
+
+    def getrange(self, key: str, start: int, end: int) -> bytes:
+        """
+        Возвращает подстроку значения (индексы включительно, как в Redis).
+
+        Отрицательные индексы отсчитываются от конца значения.
+
+        Args:
+            key: Ключ
+            start: Начальный индекс
+            end: Конечный индекс (включительно)
+
+        Returns:
+            Байты подстроки (пустые, если ключ не существует)
+        """
+        with self._lock:
+            item = self._get_live_item(key)
+            if item is None:
+                return b""
+            value = item.value
+            if isinstance(value, str):
+                value = value.encode('utf-8', WIRE_ERRORS)
+            elif not isinstance(value, (bytes, bytearray)):
+                raise WrongTypeError()
+            length = len(value)
+            if start < 0:
+                start = max(length + start, 0)
+            if end < 0:
+                end = length + end
+            end = min(end, length - 1)
+            if start > end or length == 0:
+                return b""
+            # срез через memoryview копирует только запрошенный диапазон
+            with memoryview(value) as view:
+                return view[start:end + 1].tobytes()
+
+    def strlen(self, key: str) -> int:
+        """
+        Возвращает длину строкового значения в байтах.
+
+        Args:
+            key: Ключ
+
+        Returns:
+            Длина в байтах, 0 если ключ не существует
+        """
+        with self._lock:
+            item = self._get_live_item(key)
+            if item is None:
+                return 0
+            value = item.value
+            if isinstance(value, (bytes, bytearray)):
+                return len(value)
+            if isinstance(value, str):
+                return len(value.encode('utf-8', WIRE_ERRORS))
+            raise WrongTypeError()
+
+    def get_typed(self, key: str, value_type: type) -> Optional[Any]:
+        """
+        Возвращает значение ключа, проверяя его тип.
+
+        Args:
+            key: Ключ
+            value_type: Ожидаемый тип значения
+
+        Returns:
+            Значение или None, если ключ не существует
+        """
+        with self._lock:
+            item = self._get_live_item(key)
+            if item is None:
+                return None
+            if not isinstance(item.value, value_type):
+                raise WrongTypeError()
+            return item.value
+
+    def signal_ready(self, key: str) -> None:
+        """Отмечает ключ, в который поступили данные для заблокированных клиентов."""
+        if key in self.blocking_keys:
+            self.ready_keys.add(key)
+
+    def get_buffer(self, key: str) -> Optional[bytearray]:
+        """
+        Возвращает буфер строкового значения для побитовых операций.
+
+        Args:
+            key: Ключ
+
+        Returns:
+            bytearray значения или None, если ключ не существует
+        """
+        with self._lock:
+            item = self._get_live_item(key)
+            if item is None:
+                return None
+            return self._as_bytearray(item)
+
+    def setbit(self, key: str, offset: int, bit: int) -> int:
+        """
+        Устанавливает бит по смещению (нумерация от старшего бита первого байта).
+
+        Args:
+            key: Ключ
+            offset: Номер бита (>= 0)
+            bit: Значение бита (0 или 1)
+
+        Returns:
+            Предыдущее значение бита
+        """
+        byte_index = offset >> 3
+        shift = 7 - (offset & 7)
+        with self._lock:
+            item = self._get_live_item(key)
+            if item is None:
+                item = StorageItem(value=bytearray())
+                self._data[key] = item
+            buffer = self._as_bytearray(item)
+            if byte_index >= len(buffer):
+                buffer.extend(bytes(byte_index + 1 - len(buffer)))
+            self.dirty += 1
+            if self._observed:
+                self._changed(key)
+            if self.notify_flags:
+                self._notify(notifications.STRING, "setbit", key)
+            old = (buffer[byte_index] >> shift) & 1
+            if bit:
+                buffer[byte_index] |= 1 << shift
+            else:
+                buffer[byte_index] &= ~(1 << shift) & 0xFF
+            return old
+
+    def getbit(self, key: str, offset: int) -> int:
+        """
+        Возвращает значение бита по смещению.
+
+        Args:
+            key: Ключ
+            offset: Номер бита (>= 0)
+
+        Returns:
+            Значение бита, 0 за пределами значения
+        """
+        byte_index = offset >> 3
+        with self._lock:
+            item = self._get_live_item(key)
+            if item is None:
+                return 0
+            buffer = self._as_bytearray(item)
+            if byte_index >= len(buffer):
+                return 0
+            return (buffer[byte_index] >> (7 - (offset & 7))) & 1
+
+    def hset(self, key: str, mapping: Dict[str, str]) -> int:
+        """
+        Записывает поля хэша.
+
+        Args:
+            key: Ключ
+            mapping: Поля и значения
+
+        Returns:
+            Количество новых полей
+        """
+        with self._lock:
+            item = self._get_live_item(key)
+            if item is None:
+                item = StorageItem(value={})
+                self._data[key] = item
+            elif not isinstance(item.value, dict):
+                raise WrongTypeError()
+            fields = item.value
+            added = len(mapping.keys() - fields.keys())
+            fields.update(mapping)
+            if self.indexes:
+                self._reindex(key, fields)
+            self.dirty += 1
+            if self._observed:
+                self._changed(key)
+            if self.notify_flags:
+                self._notify(notifications.HASH, "hset", key)
+            return added
+
+    def hdel(self, key: str, fields: Iterable[str]) -> int:
+        """
+        Удаляет поля хэша; пустой хэш удаляется целиком.
+
+        Args:
+            key: Ключ
+            fields: Удаляемые поля
+
+        Returns:
+            Количество удаленных полей
+        """
+        with self._lock:
+            item = self._get_live_item(key)
+            if item is None:
+                return 0
+            if not isinstance(item.value, dict):
+                raise WrongTypeError()
+            hash_fields = item.value
+            removed = 0
+            for field in fields:
+                if hash_fields.pop(field, None) is not None:
+                    removed += 1
+            if not hash_fields:
+                self._remove(key)
+            elif removed:
+                if self.indexes:
+                    self._reindex(key, hash_fields)
+                self.dirty += 1
+                if self._observed:
+                    self._changed(key)
+            if removed and self.notify_flags:
+                self._notify(notifications.HASH, "hdel", key)
+                if not hash_fields:
+                    self._notify(notifications.GENERIC, "del", key)
+            return removed
+
+    def bulk_load(self, items: List[Tuple[str, Any, Optional[float]]]) -> None:
+        """
+        Добавляет ключи из снимка одной операцией: без уведомлений, версий и
+        отдельного обновления кучи TTL для каждого ключа.
+
+        Снимок загружается пакетами, поэтому куча перестраивается целиком,
+        только если пакет сопоставим с ней по размеру; иначе новые сроки
+        добавляются по одному.
+
+        Args:
+            items: (ключ, значение, абсолютное время истечения или None)
+        """
+        with self._lock:
+            data = self._data
+            heap = self._expire_heap
+            expiring = []
+            for key, value, expire_at in items:
+                data[key] = StorageItem(value, expire_at)
+                if expire_at is not None:
+                    expiring.append((expire_at, key))
+            if len(expiring) * 8 >= len(heap):
+                heap.extend(expiring)
+                heapq.heapify(heap)
+            else:
+                for entry in expiring:
+                    heapq.heappush(heap, entry)
+            if self.indexes:
+                for key, _, _ in items:
+                    self._reindex(key, data[key].value)
+
+    def add_index(self, index: Any) -> None:
+        """Регистрирует вторичный индекс и заполняет его существующими хэшами."""
+        with self._lock:
+            self.indexes[index.name] = index
+            for key, item in list(self._data.items()):
+                if isinstance(item.value, dict) and not item.is_expired():
+                    index.update(key, item.value)
+
+    def move(self, key: str, target: "Storage") -> bool:
+        """
+        Переносит ключ вместе с TTL в другое хранилище.
+
+        Args:
+            key: Ключ
+            target: Хранилище назначения
+
+        Returns:
+            True, если ключ перенесен; False, если его нет здесь или он уже есть в target
+        """
+        with self._lock, target._lock:
+            item = self._get_live_item(key)
+            if item is None or target._get_live_item(key) is not None:
+                return False
+            target._data[key] = item
+            if item.expire_at is not None:
+                heapq.heappush(target._expire_heap, (item.expire_at, key))
+            if target.indexes:
+                target._reindex(key, item.value)
+            target.dirty += 1
+            if target._observed:
+                target._changed(key)
+            self._remove(key)
+            if self.notify_flags:
+                self._notify(notifications.GENERIC, "move_from", key)
+            if target.notify_flags:
+                target._notify(notifications.GENERIC, "move_to", key)
+            return True
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Статистика пространства ключей.
+
+        Returns:
+            keys — число ключей, expires — число ключей с TTL, avg_ttl — средний
+            оставшийся TTL в миллисекундах, expired_keys — число истекших ключей
+        """
+        with self._lock:
+            now = time.time()
+            keys = expires = 0
+            total_ttl = 0.0
+            for item in self._data.values():
+                if item.expire_at is None:
+                    keys += 1
+                elif item.expire_at >= now:
+                    keys += 1
+                    expires += 1
+                    total_ttl += item.expire_at - now
+            avg_ttl = int(total_ttl * 1000 / expires) if expires else 0
+            return {"keys": keys, "expires": expires, "avg_ttl": avg_ttl, "expired_keys": self.expired_keys}
+
     def keys(self, pattern: str = "*") -> list:
         """
         Возвращает список ключей, соответствующих паттерну.
@@ -214,7 +994,7 @@ class Storage:
                 if item.is_expired()
             ]
             for key in expired_keys:
-                del self._data[key]
+                self._expire_key(key)
             
             if pattern == "*":
                 return list(self._data.keys())
@@ -237,12 +1017,15 @@ class Storage:
                 if item.is_expired()
             ]
             for key in expired_keys:
-                del self._data[key]
+                self._expire_key(key)
             
             return len(self._data)
     
-    def clear(self):
-        """Очищает все данные."""
+    def clear(self, invalidate: bool = True):
+        """Очищает все данные; invalidate — как в touch_all."""
         with self._lock:
             self._data.clear()
             self._expire_heap.clear()
+            for index in self.indexes.values():
+                index.clear()
+            self.touch_all(invalidate)
@@ -0,0 +1,289 @@
+"""
+Тип данных stream: журнал записей с монотонно возрастающими ID.
+
+Записи хранятся блоками фиксированного размера. Для каждого блока
+известен ID первой записи, поэтому поиск начала диапазона выполняется
+двумя бинарными поисками (по блокам и внутри блока) за O(log n).
+Приблизительная обрезка (MAXLEN ~ / MINID ~) удаляет блоки целиком.
+"""
+import time
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+StreamID = Tuple[int, int]
+StreamEntry = Tuple[StreamID, Tuple[str, ...]]
+
+MIN_ID: StreamID = (0, 0)
+MAX_ID: StreamID = (2 ** 64 - 1, 2 ** 64 - 1)
+
+
+class StreamIDError(ValueError):
+    """Некорректный или неподходящий ID записи."""
+
+
+def format_id(entry_id: StreamID) -> str:
+    """Форматирует ID в вид ms-seq."""
+    return f"{entry_id[0]}-{entry_id[1]}"
+
+
+def parse_id(text: str, default_seq: int = 0) -> StreamID:
+    """
+    Разбирает ID вида ms-seq или ms.
+
+    Args:
+        text: Текстовое представление ID
+        default_seq: Номер последовательности, если он не указан
+
+    Returns:
+        Кортеж (ms, seq)
+    """
+    ms_part, _, seq_part = text.partition("-")
+    try:
+        ms = int(ms_part)
+        seq = int(seq_part) if seq_part else default_seq
+    except ValueError:
+        raise StreamIDError("Invalid stream ID specified as stream command argument")
+    if ms < 0 or seq < 0 or ms > MAX_ID[0] or seq > MAX_ID[1]:
+        raise StreamIDError("Invalid stream ID specified as stream command argument")
+    return ms, seq
+
+
+def parse_range_id(text: str, is_end: bool) -> Tuple[StreamID, bool]:
+    """
+    Разбирает границу диапазона XRANGE: "-", "+", "(id" или id.
+
+    Returns:
+        (ID, исключающая ли граница)
+    """
+    if text == "-":
+        return MIN_ID, False
+    if text == "+":
+        return MAX_ID, False
+    exclusive = text.startswith("(")
+    if exclusive:
+        text = text[1:]
+    return parse_id(text, default_seq=MAX_ID[1] if is_end else 0), exclusive
+
+
+def increment_id(entry_id: StreamID) -> Optional[StreamID]:
+    """Следующий возможный ID или None при переполнении."""
+    ms, seq = entry_id
+    if seq < MAX_ID[1]:
+        return ms, seq + 1
+    if ms < MAX_ID[0]:
+        return ms + 1, 0
+    return None
+
+
+def decrement_id(entry_id: StreamID) -> Optional[StreamID]:
+    """Предыдущий возможный ID или None, если ID минимальный."""
+    ms, seq = entry_id
+    if seq > 0:
+        return ms, seq - 1
+    if ms > 0:
+        return ms - 1, MAX_ID[1]
+    return None
+
+
+class StreamBlock:
+    """Блок записей: параллельные списки ID и значений."""
+
+    __slots__ = ("ids", "values")
+
+    def __init__(self):
+        self.ids: List[StreamID] = []
+        self.values: List[Tuple[str, ...]] = []
+
+
+class Stream:
+    """Журнал записей с поиском по ID за O(log n)."""
+
+    BLOCK_SIZE = 100
+
+    def __init__(self, block_size: Optional[int] = None):
+        self.block_size = block_size or self.BLOCK_SIZE
+        self._blocks: List[StreamBlock] = []
+        self._first_ids: List[StreamID] = []
+        self.length = 0
+        self.last_id: StreamID = MIN_ID
+        self.entries_added = 0
+        # группы потребителей: имя -> ConsumerGroup
+        self.groups: Dict[str, Any] = {}
+
+    def __len__(self) -> int:
+        return self.length
+
+    def next_id(self, ms: Optional[int] = None) -> StreamID:
+        """
+        Генерирует следующий ID.
+
+        Args:
+            ms: Явная миллисекундная часть (для "ms-*"), иначе текущее время
+        """
+        last_ms, last_seq = self.last_id
+        if ms is None:
+            ms = max(int(time.time() * 1000), last_ms)
+        if ms == last_ms:
+            if last_seq == MAX_ID[1]:
+                raise StreamIDError("The stream has exhausted the last possible ID, unable to add more items")
+            return ms, last_seq + 1
+        if ms < last_ms:
+            raise StreamIDError("The ID specified in XADD is equal or smaller than the target stream top item")
+        return ms, 0
+
+    def append(self, entry_id: StreamID, values: Tuple[str, ...]) -> StreamID:
+        """
+        Добавляет запись в конец журнала.
+
+        Args:
+            entry_id: ID записи (строго больше последнего)
+            values: Плоский кортеж field, value, ...
+        """
+        if entry_id <= self.last_id:
+            if entry_id == MIN_ID:
+                raise StreamIDError("The ID specified in XADD must be greater than 0-0")
+            raise StreamIDError("The ID specified in XADD is equal or smaller than the target stream top item")
+        if not self._blocks or len(self._blocks[-1].ids) >= self.block_size:
+            self._blocks.append(StreamBlock())
+            self._first_ids.append(entry_id)
+        block = self._blocks[-1]
+        block.ids.append(entry_id)
+        block.values.append(values)
+        self.length += 1
+        self.entries_added += 1
+        self.last_id = entry_id
+        return entry_id
+
+    def first_id(self) -> Optional[StreamID]:
+        """ID первой записи или None для пустого журнала."""
+        return self._first_ids[0] if self._first_ids else None
+
+    def _seek(self, entry_id: StreamID) -> Tuple[int, int]:
+        """Позиция (блок, индекс) первой записи с ID >= entry_id."""
+        block_index = max(bisect_right(self._first_ids, entry_id) - 1, 0)
+        position = bisect_left(self._blocks[block_index].ids, entry_id)
+        if position == len(self._blocks[block_index].ids):
+            return block_index + 1, 0
+        return block_index, position
+
+    def get_entry(self, entry_id: StreamID) -> Optional[Tuple[str, ...]]:
+        """Возвращает значения записи по ID или None, если записи нет."""
+        if not self._blocks:
+            return None
+        block_index, position = self._seek(entry_id)
+        if block_index >= len(self._blocks):
+            return None
+        block = self._blocks[block_index]
+        if block.ids[position] != entry_id:
+            return None
+        return block.values[position]
+
+    def iter_range(self, start: StreamID, end: StreamID) -> Iterator[StreamEntry]:
+        """Итерирует записи с start <= ID <= end в порядке возрастания."""
+        if not self._blocks or start > end:
+            return
+        block_index, position = self._seek(start)
+        blocks = self._blocks
+        while block_index < len(blocks):
+            block = blocks[block_index]
+            ids = block.ids
+            values = block.values
+            for index in range(position, len(ids)):
+                if ids[index] > end:
+                    return
+                yield ids[index], values[index]
+            block_index += 1
+            position = 0
+
+    def iter_range_reverse(self, start: StreamID, end: StreamID) -> Iterator[StreamEntry]:
+        """Итерирует записи с start <= ID <= end в порядке убывания."""
+        if not self._blocks or start > end:
+            return
+        block_index = bisect_right(self._first_ids, end) - 1
+        if block_index < 0:
+            return
+        position = bisect_right(self._blocks[block_index].ids, end) - 1
+        while block_index >= 0:
+            block = self._blocks[block_index]
+            for index in range(position, -1, -1):
+                if block.ids[index] < start:
+                    return
+                yield block.ids[index], block.values[index]
+            block_index -= 1
+            if block_index >= 0:
+                position = len(self._blocks[block_index].ids) - 1
+
+    def range(self, start: StreamID, end: StreamID, count: Optional[int] = None,
+              reverse: bool = False) -> List[StreamEntry]:
+        """Возвращает записи диапазона (не более count)."""
+        iterator = self.iter_range_reverse(start, end) if reverse else self.iter_range(start, end)
+        result = []
+        for entry in iterator:
+            if count is not None and len(result) >= count:
+                break
+            result.append(entry)
+        return result
+
+    def _drop_blocks(self, count: int) -> int:
+        removed = sum(len(block.ids) for block in self._blocks[:count])
+        del self._blocks[:count]
+        del self._first_ids[:count]
+        self.length -= removed
+        return removed
+
+    def _drop_from_first_block(self, count: int) -> int:
+        block = self._blocks[0]
+        if count >= len(block.ids):
+            return self._drop_blocks(1)
+        del block.ids[:count]
+        del block.values[:count]
+        self._first_ids[0] = block.ids[0]
+        self.length -= count
+        return count
+
+    def trim_maxlen(self, maxlen: int, approximate: bool = False, limit: Optional[int] = None) -> int:
+        """
+        Обрезает журнал до maxlen последних записей.
+
+        При approximate удаляются только целые блоки, поэтому в журнале
+        может остаться немного больше maxlen записей.
+
+        Returns:
+            Количество удаленных записей
+        """
+        removed = 0
+        while self._blocks and self.length > maxlen:
+            if limit is not None and removed >= limit:
+                break
+            block_size = len(self._blocks[0].ids)
+            if self.length - block_size >= maxlen:
+                if limit is not None and removed + block_size > limit:
+                    break
+                removed += self._drop_blocks(1)
+            elif approximate:
+                break
+            else:
+                removed += self._drop_from_first_block(self.length - maxlen)
+        return removed
+
+    def trim_minid(self, minid: StreamID, approximate: bool = False, limit: Optional[int] = None) -> int:
+        """
+        Удаляет записи с ID меньше minid.
+
+        Returns:
+            Количество удаленных записей
+        """
+        removed = 0
+        while self._blocks and self._first_ids[0] < minid:
+            if limit is not None and removed >= limit:
+                break
+            block = self._blocks[0]
+            if block.ids[-1] < minid:
+                if limit is not None and removed + len(block.ids) > limit:
+                    break
+                removed += self._drop_blocks(1)
+            elif approximate:
+                break
+            else:
+                removed += self._drop_from_first_block(bisect_left(block.ids, minid))
+        return removed
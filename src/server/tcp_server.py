@@ -2,36 +2,125 @@
 Базовый asyncio TCP сервер.
 """
 import asyncio
+import contextlib
+import itertools
 import logging
-from typing import Optional, List
-from .command_parser import CommandParser
-from .command_handler import CommandHandler
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, Optional, List, Tuple
+from .command_parser import OK, WIRE_ERRORS, CommandParser, ErrorReply, MapReply, Push, SimpleString
+from .commands.base_abstraction import BlockRequest, SelectDatabase
+from .aof import FSYNC_POLICIES, AppendOnlyFile
+from .databases import Databases
+from .persistence import parse_save_params
+from .pubsub import Subscriber
+from .replication import READONLY_ERROR, ReplicaLink, is_write_command
 from .storage import Storage
+from .tracking import READ_COMMAND_KEYS, TrackingClient
+
+
+@dataclass
+class ClientState:
+    """Состояние соединения клиента."""
+    # идентификатор соединения (CLIENT ID)
+    id: int = 0
+    # транспорт соединения (для push-кадров и подписок)
+    transport: Any = None
+    # версия протокола RESP, выбранная через HELLO
+    protocol: int = 2
+    # имя соединения (HELLO SETNAME / CLIENT SETNAME)
+    name: Optional[str] = None
+    # номер выбранной базы
+    db: int = 0
+    # очередь команд после MULTI (None вне транзакции)
+    queue: Optional[List[Tuple[str, List[str]]]] = None
+    # в очередь пыталась попасть неизвестная команда — EXEC будет отклонен
+    dirty: bool = False
+    # ключи под WATCH: (хранилище, ключ, версия на момент WATCH)
+    watched: List[Tuple[Storage, str, int]] = field(default_factory=list)
+    # подписки Pub/Sub (создаются при первой подписке)
+    subscriber: Optional[Subscriber] = None
+    # настройки CLIENT TRACKING (None — отслеживание выключено)
+    tracking: Optional[TrackingClient] = None
+    # порт реплики из REPLCONF listening-port
+    replica_port: int = 0
+    # связь с репликой после PSYNC (None — обычный клиент)
+    replica: Optional[ReplicaLink] = None
+
+
+QUEUED = SimpleString("QUEUED")
 
 
 class TCPServer:
+    SERVER_NAME = "mini-redis-server"
+    SERVER_VERSION = "1.0.0"
     MAX_ARRAY_SIZE = 1000
     MAX_BULK_STRING_SIZE = 1024 * 1024  # 1MB
     MAX_COMMAND_SIZE = 10 * 1024 * 1024  # 10MB
     READ_TIMEOUT = 30.0  
+    # команды транзакций выполняются сервером, а не обработчиком базы
+    TRANSACTION_COMMANDS = frozenset({"MULTI", "EXEC", "DISCARD", "WATCH", "UNWATCH"})
+    SUBSCRIBE_COMMANDS = frozenset({"SUBSCRIBE", "UNSUBSCRIBE", "PSUBSCRIBE", "PUNSUBSCRIBE"})
+    # команды протокола репликации, превращающие соединение в связь с репликой
+    REPLICATION_COMMANDS = frozenset({"PSYNC", "SYNC", "REPLCONF"})
+    # команды, доступные во время загрузки снимка (остальные получают -LOADING)
+    LOADING_COMMANDS = frozenset({"INFO", "CONFIG", "CLIENT"})
+    LOADING_ERROR = "LOADING Redis is loading the dataset in memory"
+    # период проверки интервалов автоматического сохранения, с
+    CRON_INTERVAL = 1.0
 
-    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, databases: int = 16,
+                 dir: Optional[str] = None, save: Optional[str] = None,
+                 appendonly: bool = False, appendfsync: str = "everysec",
+                 replicaof: Optional[str] = None):
         self.host = host
         self.port = port
         self._server: Optional[asyncio.base_events.Server] = None
         self._logger = logging.getLogger(__name__)
 
-        self._storage = Storage()
-        self._handler = CommandHandler(self._storage)
+        self._databases = Databases(databases)
+        self._persistence = self._databases.persistence
+        # каталог данных; если задан (или включен журнал), данные загружаются при запуске
+        self._load_data = dir is not None or appendonly
+        if dir is not None:
+            self._persistence.dir = dir
+        if save is not None:
+            self._persistence.save_params = parse_save_params(save)
+        if appendfsync not in FSYNC_POLICIES:
+            raise ValueError("appendfsync must be one of always, everysec, no")
+        self._persistence.appendonly = appendonly
+        self._persistence.appendfsync = appendfsync
+        self._replication = self._databases.replication
+        # команды потока ведущего будят заблокированных клиентов и пишутся в журнал
+        self._replication.applied = self._replicated
+        if replicaof is not None:
+            # "host port" — сервер запускается репликой
+            master_host, master_port = replicaof.split()
+            self._replication.replicaof(master_host, int(master_port))
+        self._cron_task: Optional[asyncio.Task] = None
+        # ожидание ближайшей записи буфера журнала (одна на итерацию цикла событий)
+        self._aof_flush: Optional[asyncio.Future] = None
+        # база 0, выбранная у новых соединений
+        self._storage = self._databases[0]
         self._parser = CommandParser()
+        # очереди клиентов, заблокированных в ожидании данных по (хранилище, ключ)
+        self._blocked: Dict[Tuple[Storage, str], Deque[asyncio.Future]] = {}
+        # открытые соединения по CLIENT ID
+        self._clients: Dict[int, ClientState] = {}
+        self._client_ids = itertools.count(1)
 
     async def start(self):
         """Запускает TCP сервер и начинает приём клиентских соединений."""
         # запуск фоновой очистки TTL
-        try:
-            await self._storage.start_cleanup_task()
-        except Exception:
-            pass
+        for storage in self._databases.storages:
+            try:
+                await storage.start_cleanup_task()
+            except Exception:
+                pass
+        # соединения принимаются сразу, но до конца загрузки данных получают -LOADING
+        self._persistence.loading = self._load_data
+        self._cron_task = asyncio.create_task(self._cron())
         self._server = await asyncio.start_server(self._handle_client, self.host, self.port, reuse_address=True)
         sock = self._server.sockets[0] if self._server and self._server.sockets else None
         if sock is not None:
@@ -39,18 +128,89 @@ class TCPServer:
         self._logger.info(f"TCP server started on {self.host}:{self.port}")
 
         async with self._server:
+            if self._load_data:
+                await self._load()
+            # реплика подключается к ведущему после загрузки своих данных
+            self._replication.start(asyncio.get_running_loop(), self.port)
             await self._server.serve_forever()
 
+    async def _load(self) -> None:
+        """Загружает данные в отдельном потоке, чтобы цикл событий отвечал клиентам."""
+        started = time.monotonic()
+        try:
+            loaded = await asyncio.to_thread(self._persistence.load)
+        finally:
+            self._persistence.loading = False
+        elapsed = time.monotonic() - started
+        source = "AOF" if self._persistence.aof is not None else self._persistence.path
+        self._logger.info(f"Loaded {loaded} keys from {source} in {elapsed:.3f} s")
+
     async def stop(self):
         """Останавливает сервер и корректно закрывает все ресурсы."""
+        await self._replication.stop()
         if self._server is not None:
             self._server.close()
             await self._server.wait_closed()
             self._logger.info("TCP server stopped")
-        try:
-            await self._storage.stop_cleanup_task()
-        except Exception:
-            pass
+        for storage in self._databases.storages:
+            try:
+                await storage.stop_cleanup_task()
+            except Exception:
+                pass
+        if self._cron_task is not None:
+            self._cron_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._cron_task
+            self._cron_task = None
+        await asyncio.to_thread(self._persistence.wait)
+        self._persistence.disable_aof()
+
+    async def _cron(self) -> None:
+        """Периодические задачи сервера: автоматическое сохранение снимков и перезапись журнала."""
+        while True:
+            await asyncio.sleep(self.CRON_INTERVAL)
+            try:
+                self._persistence.cron()
+            except OSError as exc:
+                self._logger.warning(f"Background save or AOF rewrite failed to start: {exc}")
+            self._replication.cron()
+            # команды вне соединений клиентов (удаление истекших ключей фоновой очисткой)
+            aof = self._persistence.aof
+            if aof is not None and aof.pending:
+                self._flush_aof()
+
+    async def _aof_commit(self, aof: AppendOnlyFile) -> None:
+        """
+        Планирует запись буфера журнала в конце итерации цикла событий.
+
+        Команды всех клиентов, выполненные за итерацию, записываются одним
+        вызовом write. При appendfsync always ответ отправляется только
+        после записи и fsync пакета с командой клиента.
+        """
+        self._schedule_aof_flush()
+        if aof.fsync == "always":
+            await asyncio.shield(self._aof_flush)
+
+    def _schedule_aof_flush(self) -> None:
+        if self._aof_flush is None:
+            loop = asyncio.get_running_loop()
+            self._aof_flush = loop.create_future()
+            loop.call_soon(self._flush_aof)
+
+    def _replicated(self) -> None:
+        """Выполнены команды потока ведущего (на реплике)."""
+        self._wake_blocked()
+        aof = self._persistence.aof
+        if aof is not None and aof.pending:
+            self._schedule_aof_flush()
+
+    def _flush_aof(self) -> None:
+        future, self._aof_flush = self._aof_flush, None
+        aof = self._persistence.aof
+        if aof is not None and not aof.flush():
+            self._logger.error(f"Error writing to the AOF file {aof.path}")
+        if future is not None and not future.done():
+            future.set_result(None)
 
     async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
         """
@@ -62,6 +222,8 @@ class TCPServer:
         """
         addr = writer.get_extra_info('peername')
         self._logger.debug(f"Client connected: {addr}")
+        client = ClientState(id=next(self._client_ids), transport=writer.transport)
+        self._clients[client.id] = client
         try:
             while True:
                 parts = await self._read_next_command(reader)
@@ -76,20 +238,459 @@ class TCPServer:
                 name = parts[0]
                 args = parts[1:]
 
-                ok, result = self._handler.handle(name, args)
+                command = name.upper()
+                if command in self.SUBSCRIBE_COMMANDS and client.queue is None:
+                    writer.write(self._subscribe_command(client, command, args))
+                    await writer.drain()
+                    continue
+                if command == "HELLO":
+                    ok, result = self._hello_command(client, args)
+                elif self._persistence.loading and command not in self.LOADING_COMMANDS:
+                    ok, result = False, self.LOADING_ERROR
+                elif client.protocol == 2 and client.subscriber is not None and client.subscriber.count:
+                    # в RESP3 сообщения приходят push-кадрами, и соединению доступны все команды
+                    ok, result = self._subscribed_mode_command(command, args)
+                elif command in self.TRANSACTION_COMMANDS:
+                    ok, result = self._transaction_command(client, command, args)
+                    self._wake_blocked()
+                elif command == "CLIENT":
+                    ok, result = self._client_command(client, args)
+                elif command in self.REPLICATION_COMMANDS:
+                    reply = await self._replication_command(client, writer, command, args)
+                    if reply is None:
+                        continue
+                    ok, result = reply
+                elif self._read_only_rejects(command, args):
+                    if client.queue is not None:
+                        client.dirty = True
+                    ok, result = False, READONLY_ERROR
+                elif client.queue is not None:
+                    ok, result = self._queue_command(client, name, args)
+                else:
+                    ok, result = self._databases.handlers[client.db].handle(name, args)
+                    self._wake_blocked()
+                    if ok and isinstance(result, BlockRequest):
+                        ok, result = await self._wait_for_keys(result, client.db)
+                    elif ok and isinstance(result, SelectDatabase):
+                        client.db = result.index
+                        result = OK
+                    if client.tracking is not None:
+                        self._track_reads(client.tracking, command, args, ok)
                 if ok:
-                    resp = self._parser.format_response(result)
+                    resp = self._parser.format_response(result, client.protocol)
                 else:
                     resp = self._parser.format_error(result)
-                writer.write(resp.encode('utf-8'))
+                aof = self._persistence.aof
+                if aof is not None and aof.pending:
+                    await self._aof_commit(aof)
+                writer.write(self._parser.encode(resp))
                 await writer.drain()
         except asyncio.CancelledError:
             pass
         finally:
+            del self._clients[client.id]
+            if client.replica is not None:
+                self._replication.detach(client.replica)
+            if client.tracking is not None:
+                self._storage.tracking.disable(client.tracking)
+            self._unwatch_all(client)
+            if client.subscriber is not None:
+                self._storage.pubsub.remove(client.subscriber)
             writer.close()
             await writer.wait_closed()
             self._logger.debug(f"Client disconnected: {addr}")
 
+    def _subscriber(self, client: ClientState) -> Subscriber:
+        """Подписчик соединения: создается при первой подписке или включении push-инвалидаций."""
+        if client.subscriber is None:
+            client.subscriber = self._storage.pubsub.subscriber(client.transport, client.protocol)
+        return client.subscriber
+
+    def _subscribe_command(self, client: ClientState, command: str, args: List[str]) -> bytes:
+        """
+        Выполняет SUBSCRIBE, UNSUBSCRIBE, PSUBSCRIBE или PUNSUBSCRIBE.
+
+        На каждый канал (шаблон) отправляется отдельное подтверждение
+        [тип, канал, число подписок соединения] (в RESP3 — push-кадром).
+        """
+        pubsub = self._storage.pubsub
+        if command in ("SUBSCRIBE", "PSUBSCRIBE") and not args:
+            return self._parser.format_error(
+                f"ERR: wrong number of arguments for '{command.lower()}' command").encode('utf-8')
+        subscriber = self._subscriber(client)
+
+        kind = command.lower()
+        if command == "SUBSCRIBE":
+            action, targets = pubsub.subscribe, args
+        elif command == "PSUBSCRIBE":
+            action, targets = pubsub.psubscribe, args
+        elif command == "UNSUBSCRIBE":
+            action, targets = pubsub.unsubscribe, args or sorted(subscriber.channels)
+        else:
+            action, targets = pubsub.punsubscribe, args or sorted(subscriber.patterns)
+        if not targets:
+            reply = self._parser.format_response(Push([kind, None, subscriber.count]), client.protocol)
+            return self._parser.encode(reply)
+        frames = []
+        for target in targets:
+            action(subscriber, target)
+            frames.append(self._parser.format_response(Push([kind, target, subscriber.count]), client.protocol))
+        return self._parser.encode("".join(frames))
+
+    def _subscribed_mode_command(self, command: str, args: List[str]) -> Tuple[bool, Any]:
+        """Команда соединения с активными подписками: разрешены только подписка и PING."""
+        if command == "PING" and len(args) <= 1:
+            return True, ["pong", args[0] if args else ""]
+        return False, (f"ERR: Can't execute '{command.lower()}': only (P)SUBSCRIBE / "
+                       f"(P)UNSUBSCRIBE / PING are allowed in this context")
+
+    def _hello_command(self, client: ClientState, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет HELLO [protover [AUTH username password] [SETNAME name]].
+
+        Переключает протокол соединения (2 или 3) и возвращает сведения о
+        сервере. В RESP3 ответы типизированы (map, set, double, boolean,
+        null), а сообщения Pub/Sub и инвалидации приходят push-кадрами
+        вперемешку с ответами. Пароли на сервере не настраиваются, поэтому
+        AUTH принимается без проверки.
+        """
+        protocol = client.protocol
+        if args:
+            try:
+                protocol = int(args[0])
+            except ValueError:
+                return False, "ERR: Protocol version is not an integer or out of range"
+            if protocol not in (2, 3):
+                return False, "NOPROTO unsupported protocol version"
+        name = client.name
+        i = 1
+        while i < len(args):
+            option = args[i].upper()
+            if option == "AUTH" and i + 2 < len(args):
+                i += 3
+            elif option == "SETNAME" and i + 1 < len(args):
+                name = args[i + 1]
+                i += 2
+            else:
+                return False, f"ERR: Syntax error in HELLO option '{args[i]}'"
+
+        client.protocol = protocol
+        client.name = name
+        if client.subscriber is not None:
+            client.subscriber.protocol = protocol
+        return True, MapReply([
+            "server", self.SERVER_NAME,
+            "version", self.SERVER_VERSION,
+            "proto", protocol,
+            "id", client.id,
+            "mode", "standalone",
+            "role", self._replication.role,
+            "modules", [],
+        ])
+
+    async def _replication_command(self, client: ClientState, writer: asyncio.StreamWriter,
+                                   command: str, args: List[str]) -> Optional[Tuple[bool, Any]]:
+        """
+        Выполняет PSYNC, SYNC или REPLCONF.
+
+        Returns:
+            Ответ клиенту или None, если отвечать не нужно (ответ PSYNC
+            пишет репликация, REPLCONF ACK и GETACK остаются без ответа)
+        """
+        if command == "REPLCONF":
+            if len(args) % 2:
+                return False, "ERR: wrong number of arguments for 'replconf' command"
+            option = args[0].upper() if args else ""
+            if option == "ACK":
+                if client.replica is not None:
+                    with contextlib.suppress(ValueError):
+                        self._replication.ack(client.replica, int(args[1]))
+                return None
+            if option == "GETACK":
+                return None
+            for i in range(0, len(args), 2):
+                if args[i].lower() == "listening-port":
+                    try:
+                        client.replica_port = int(args[i + 1])
+                    except ValueError:
+                        return False, "ERR: value is not an integer or out of range"
+            return True, OK
+        if client.queue is not None or client.replica is not None:
+            return False, f"ERR: {command} is not allowed in this context"
+        if command == "SYNC":
+            replid, offset = "?", "-1"
+        elif len(args) == 2:
+            replid, offset = args
+        else:
+            return False, "ERR: wrong number of arguments for 'psync' command"
+        client.replica = await self._replication.psync(writer, replid, offset, client.replica_port)
+        return None
+
+    def _read_only_rejects(self, command: str, args: List[str]) -> bool:
+        """Отклоняется ли команда записи на реплике только для чтения."""
+        replication = self._replication
+        return replication.master_host is not None and replication.read_only and is_write_command(command, args)
+
+    def _client_command(self, client: ClientState, args: List[str]) -> Tuple[bool, Any]:
+        """
+        Выполняет CLIENT ID, CLIENT SETNAME, CLIENT GETNAME, CLIENT TRACKING,
+        CLIENT CACHING или CLIENT GETREDIR.
+
+        CLIENT TRACKING ON [REDIRECT id] [BCAST] [PREFIX prefix ...] [OPTIN]
+        включает рассылку инвалидаций в канал __redis__:invalidate соединения
+        id (или самого соединения, если оно подписано на этот канал). Соединение
+        RESP3 без REDIRECT получает инвалидации push-кадрами.
+        """
+        if not args:
+            return False, "ERR: wrong number of arguments for 'client' command"
+        subcommand = args[0].upper()
+        if subcommand == "ID" and len(args) == 1:
+            return True, client.id
+        if subcommand == "SETNAME" and len(args) == 2:
+            client.name = args[1] or None
+            return True, OK
+        if subcommand == "GETNAME" and len(args) == 1:
+            return True, client.name
+        if subcommand == "GETREDIR" and len(args) == 1:
+            if client.tracking is None:
+                return True, -1
+            return True, client.tracking.redirect
+        if subcommand == "CACHING" and len(args) == 2:
+            if client.tracking is None or not client.tracking.optin:
+                return False, "ERR: CLIENT CACHING can be called only when the client is in tracking mode with OPTIN enabled"
+            if args[1].upper() != "YES":
+                return False, "ERR: syntax error"
+            client.tracking.caching = True
+            return True, OK
+        if subcommand != "TRACKING" or len(args) < 2:
+            return False, f"ERR: unknown subcommand or wrong number of arguments for '{args[0]}'"
+
+        table = self._storage.tracking
+        mode = args[1].upper()
+        if mode == "OFF" and len(args) == 2:
+            if client.tracking is not None:
+                table.disable(client.tracking)
+                client.tracking = None
+            return True, OK
+        if mode != "ON":
+            return False, "ERR: syntax error"
+
+        redirect, bcast, optin, prefixes = 0, False, False, []
+        i = 2
+        while i < len(args):
+            option = args[i].upper()
+            if option == "BCAST":
+                bcast = True
+            elif option == "OPTIN":
+                optin = True
+            elif option in ("REDIRECT", "PREFIX") and i + 1 < len(args):
+                i += 1
+                if option == "PREFIX":
+                    prefixes.append(args[i])
+                else:
+                    try:
+                        redirect = int(args[i])
+                    except ValueError:
+                        return False, "ERR: value is not an integer or out of range"
+            else:
+                return False, "ERR: syntax error"
+            i += 1
+        if prefixes and not bcast:
+            return False, "ERR: PREFIX option requires BCAST mode to be enabled"
+        if bcast and optin:
+            return False, "ERR: You can't use BCAST mode together with OPTIN"
+        if redirect and redirect not in self._clients:
+            return False, "ERR: The client ID you want redirect to does not exist"
+
+        target_id = redirect or client.id
+        if not redirect:
+            # у соединения RESP3 инвалидации пишутся в его собственный транспорт
+            self._subscriber(client)
+
+        def target() -> Optional[Subscriber]:
+            target_client = self._clients.get(target_id)
+            return target_client.subscriber if target_client is not None else None
+
+        if client.tracking is not None:
+            table.disable(client.tracking)
+        client.tracking = TrackingClient(client.id, target, redirect, bcast=bcast, optin=optin, prefixes=prefixes)
+        table.enable(client.tracking)
+        return True, OK
+
+    def _track_reads(self, tracking: TrackingClient, command: str, args: List[str], ok: bool) -> None:
+        """Запоминает ключи, прочитанные соединением в режиме отслеживания."""
+        if tracking.bcast:
+            return
+        if tracking.optin:
+            caching, tracking.caching = tracking.caching, False
+            if not caching:
+                return
+        extract = READ_COMMAND_KEYS.get(command)
+        if ok and extract is not None:
+            self._storage.tracking.remember(tracking, extract(args))
+
+    def _transaction_command(self, client: ClientState, command: str, args: List[str]) -> Tuple[bool, Any]:
+        """Выполняет MULTI, EXEC, DISCARD, WATCH или UNWATCH для соединения."""
+        if command == "MULTI":
+            if args:
+                return False, "ERR: wrong number of arguments for 'multi' command"
+            if client.queue is not None:
+                return False, "ERR: MULTI calls can not be nested"
+            client.queue = []
+            client.dirty = False
+            return True, OK
+
+        if command == "WATCH":
+            if not args:
+                return False, "ERR: wrong number of arguments for 'watch' command"
+            if client.queue is not None:
+                return False, "ERR: WATCH inside MULTI is not allowed"
+            storage = self._databases[client.db]
+            for key in args:
+                client.watched.append((storage, key, storage.watch(key)))
+            return True, OK
+
+        if command == "UNWATCH":
+            if args:
+                return False, "ERR: wrong number of arguments for 'unwatch' command"
+            if client.queue is not None:
+                # внутри MULTI ставится в очередь; наблюдение все равно снимет EXEC
+                client.queue.append(("UNWATCH", args))
+                return True, QUEUED
+            self._unwatch_all(client)
+            return True, OK
+
+        if client.queue is None:
+            return False, f"ERR: {command} without MULTI"
+        queue, dirty = client.queue, client.dirty
+        client.queue = None
+        client.dirty = False
+        if command == "DISCARD":
+            self._unwatch_all(client)
+            return True, OK
+
+        # EXEC
+        if dirty:
+            self._unwatch_all(client)
+            return False, "EXECABORT Transaction discarded because of previous errors."
+        return True, self._execute_transaction(client, queue)
+
+    def _queue_command(self, client: ClientState, name: str, args: List[str]) -> Tuple[bool, Any]:
+        """Ставит команду в очередь транзакции; неизвестная команда помечает транзакцию как ошибочную."""
+        if not self._databases.handlers[client.db].has_command(name):
+            client.dirty = True
+            return False, f"ERR: unknown command '{name.upper()}'"
+        client.queue.append((name, args))
+        return True, QUEUED
+
+    def _execute_transaction(self, client: ClientState, queue: List[Tuple[str, List[str]]]) -> Optional[List[Any]]:
+        """
+        Выполняет команды транзакции подряд под блокировкой хранилища.
+
+        Версии ключей под WATCH сверяются под той же блокировкой; если хотя бы
+        один ключ изменился, ни одна команда не выполняется и возвращается None.
+        Ошибка отдельной команды не прерывает транзакцию и попадает в ответ
+        как элемент массива.
+        """
+        with contextlib.ExitStack() as locks:
+            storage = self._databases[client.db]
+            locks.enter_context(storage.lock)
+            held = {id(storage)}
+            try:
+                for watched, key, version in client.watched:
+                    if id(watched) not in held:
+                        locks.enter_context(watched.lock)
+                        held.add(id(watched))
+                    if watched.version(key) != version:
+                        return None
+            finally:
+                self._unwatch_all(client)
+
+            # эффекты команд уходят в журнал и репликам одной транзакцией MULTI/EXEC
+            locks.enter_context(self._persistence.transaction())
+            results: List[Any] = []
+            for name, args in queue:
+                if name == "UNWATCH":
+                    results.append(OK)
+                    continue
+                ok, result = self._databases.handlers[client.db].handle(name, args)
+                if not ok:
+                    result = ErrorReply(result)
+                elif isinstance(result, BlockRequest):
+                    # блокирующие команды внутри транзакции не ждут
+                    result = None
+                elif isinstance(result, SelectDatabase):
+                    client.db = result.index
+                    storage = self._databases[client.db]
+                    if id(storage) not in held:
+                        locks.enter_context(storage.lock)
+                        held.add(id(storage))
+                    result = OK
+                results.append(result)
+            return results
+
+    def _unwatch_all(self, client: ClientState) -> None:
+        """Снимает все наблюдения соединения."""
+        for storage, key, _ in client.watched:
+            storage.unwatch(key)
+        client.watched.clear()
+
+    async def _wait_for_keys(self, request: BlockRequest, db: int) -> Tuple[bool, Any]:
+        """
+        Паркует клиента в очередях ожидания по ключам запроса.
+
+        При поступлении данных команда выполняется повторно; если данных
+        снова не хватило (их забрал другой клиент), ожидание продолжается
+        до общего дедлайна. По таймауту возвращается null.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = None if request.timeout is None else loop.time() + request.timeout
+        while True:
+            storage = self._databases[db]
+            future = loop.create_future()
+            for key in request.keys:
+                self._blocked.setdefault((storage, key), deque()).append(future)
+                storage.blocking_keys.add(key)
+            try:
+                timeout = None if deadline is None else max(deadline - loop.time(), 0)
+                await asyncio.wait_for(future, timeout)
+            except asyncio.TimeoutError:
+                return True, None
+            finally:
+                self._unblock(storage, request.keys, future)
+
+            ok, result = self._databases.handlers[db].handle(request.command, request.args)
+            if not (ok and isinstance(result, BlockRequest)):
+                return ok, result
+
+    def _unblock(self, storage: Storage, keys: List[str], future: asyncio.Future) -> None:
+        """Удаляет ожидание из очередей по ключам хранилища."""
+        for key in keys:
+            waiters = self._blocked.get((storage, key))
+            if waiters is None:
+                continue
+            try:
+                waiters.remove(future)
+            except ValueError:
+                pass
+            if not waiters:
+                del self._blocked[(storage, key)]
+                storage.blocking_keys.discard(key)
+
+    def _wake_blocked(self) -> None:
+        """Будит клиентов, ожидающих ключи, в которые поступили данные."""
+        if not self._blocked:
+            return
+        for storage in self._databases.storages:
+            if not storage.ready_keys:
+                continue
+            ready = storage.ready_keys
+            storage.ready_keys = set()
+            for key in ready:
+                for future in self._blocked.get((storage, key), ()):
+                    if not future.done():
+                        future.set_result(key)
+
     async def _read_next_command(self, reader: asyncio.StreamReader) -> Optional[List[str]]:
         """
         Читает следующую команду, поддерживая RESP-массивы и inline-формат.
@@ -97,8 +698,9 @@ class TCPServer:
         При протокольной ошибке возвращает ["-ERR", message].
         """
         try:
-            first = await asyncio.wait_for(reader.readline(), timeout=self.READ_TIMEOUT)
-        except asyncio.TimeoutError:
+            async with asyncio.timeout(self.READ_TIMEOUT):
+                first = await reader.readline()
+        except TimeoutError:
             return ["-ERR", "Protocol error: read timeout"]
         if not first:
             return None
@@ -113,33 +715,13 @@ class TCPServer:
                     return ["-ERR", "Protocol error: invalid array length"]
             except ValueError:
                 return ["-ERR", "Protocol error: invalid array length"]
-            items: List[str] = []
-            for _ in range(count):
-                try:
-                    header = await asyncio.wait_for(reader.readline(), timeout=self.READ_TIMEOUT)
-                except asyncio.TimeoutError:
-                    return ["-ERR", "Protocol error: read timeout"]
-                if not header or not header.startswith(b"$"):
-                    return ["-ERR", "Protocol error: expected bulk string"]
-                try:
-                    length = int(header[1:].strip())
-                    if length < -1 or length > self.MAX_BULK_STRING_SIZE:
-                        return ["-ERR", "Protocol error: invalid bulk length"]
-                except ValueError:
-                    return ["-ERR", "Protocol error: invalid bulk length"]
-                if length < 0:
-                    items.append("")
-                    continue
-                try:
-                    data = await asyncio.wait_for(reader.readexactly(length + 2), timeout=self.READ_TIMEOUT)
-                except asyncio.IncompleteReadError:
-                    return ["-ERR", "Protocol error: unexpected EOF"]
-                except asyncio.TimeoutError:
-                    return ["-ERR", "Protocol error: read timeout"]
-                if not data.endswith(b"\r\n"):
-                    return ["-ERR", "Protocol error: bulk not terminated"]
-                items.append(data[:-2].decode('utf-8', errors='replace'))
-            return items
+            # один таймаут на все тело команды: asyncio.timeout не создает задачу,
+            # а таймер не перезапускается на каждый аргумент
+            try:
+                async with asyncio.timeout(self.READ_TIMEOUT):
+                    return await self._read_bulk_items(reader, count)
+            except TimeoutError:
+                return ["-ERR", "Protocol error: read timeout"]
         elif first.startswith(b"+"):
             return ["-ERR", "Protocol error: unexpected simple string"]
         elif first.startswith(b":"):
@@ -148,8 +730,33 @@ class TCPServer:
             return ["-ERR", "Protocol error: unexpected error"]
         else:
             # inline команда
-            line = first.decode('utf-8', errors='replace').strip()
+            line = first.decode('utf-8', WIRE_ERRORS).strip()
             return self._parser.parse_command(line)
 
-
-
+    async def _read_bulk_items(self, reader: asyncio.StreamReader, count: int) -> List[str]:
+        """
+        Читает count bulk-строк RESP-массива.
+        При протокольной ошибке возвращает ["-ERR", message].
+        """
+        items: List[str] = []
+        for _ in range(count):
+            header = await reader.readline()
+            if not header or not header.startswith(b"$"):
+                return ["-ERR", "Protocol error: expected bulk string"]
+            try:
+                length = int(header[1:].strip())
+                if length < -1 or length > self.MAX_BULK_STRING_SIZE:
+                    return ["-ERR", "Protocol error: invalid bulk length"]
+            except ValueError:
+                return ["-ERR", "Protocol error: invalid bulk length"]
+            if length < 0:
+                items.append("")
+                continue
+            try:
+                data = await reader.readexactly(length + 2)
+            except asyncio.IncompleteReadError:
+                return ["-ERR", "Protocol error: unexpected EOF"]
+            if not data.endswith(b"\r\n"):
+                return ["-ERR", "Protocol error: bulk not terminated"]
+            items.append(data[:-2].decode('utf-8', WIRE_ERRORS))
+        return items
@@ -0,0 +1,452 @@
+"""
+Тип данных time series: ряд (timestamp, value) с хранением блоками.
+
+Отсчеты хранятся чанками фиксированной емкости в array('q') (метки
+времени) и array('d') (значения). Заполненный чанк может сжиматься:
+метки времени кодируются как delta-of-delta в zigzag varint, значения —
+XOR с предыдущим значением с отбрасыванием нулевых старших и младших
+байт (байтовый вариант кодирования Gorilla). Последний (открытый) чанк
+всегда хранится несжатым, поэтому добавление в конец — это append.
+
+Агрегация выполняется над срезами массивов: границы корзин ищутся
+бинарным поиском, а sum/min/max считаются встроенными функциями по
+срезу целиком, без цикла по отдельным отсчетам на Python.
+"""
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterator, List, Optional, Tuple
+
+Sample = Tuple[int, float]
+
+DEFAULT_CHUNK_SIZE = 4096
+# Размер несжатого отсчета: 8 байт метки времени + 8 байт значения
+SAMPLE_SIZE = 16
+
+DUPLICATE_POLICIES = ("BLOCK", "FIRST", "LAST", "MIN", "MAX", "SUM")
+AGGREGATIONS = ("AVG", "SUM", "MIN", "MAX", "COUNT", "FIRST", "LAST", "RANGE")
+
+TIMESTAMP_MIN = 0
+TIMESTAMP_MAX = 2 ** 63 - 1
+
+
+class TimeSeriesError(ValueError):
+    """Ошибка операции над time series."""
+
+
+def _write_varint(out: bytearray, value: int) -> None:
+    """Записывает знаковое число как zigzag varint."""
+    value = value * 2 if value >= 0 else -value * 2 - 1
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data: bytes, offset: int) -> Tuple[int, int]:
+    """Читает zigzag varint, возвращает (значение, новое смещение)."""
+    value = 0
+    shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            break
+        shift += 7
+    return (value >> 1) if not value & 1 else -(value >> 1) - 1, offset
+
+
+def compress(timestamps: array, values: array) -> bytes:
+    """Сжимает отсчеты: delta-of-delta для меток, XOR для значений."""
+    out = bytearray()
+    previous = timestamps[0]
+    previous_delta = 0
+    for timestamp in timestamps[1:]:
+        delta = timestamp - previous
+        _write_varint(out, delta - previous_delta)
+        previous, previous_delta = timestamp, delta
+
+    # битовое представление значений без поэлементного struct.pack
+    bits = memoryview(values).cast("B").cast("Q")
+    previous_bits = bits[0]
+    out += previous_bits.to_bytes(8, "big")
+    for index in range(1, len(bits)):
+        current = bits[index]
+        xor = current ^ previous_bits
+        previous_bits = current
+        if not xor:
+            out.append(0)
+            continue
+        raw = xor.to_bytes(8, "big")
+        leading = (64 - xor.bit_length()) >> 3
+        trailing = ((xor & -xor).bit_length() - 1) >> 3
+        out.append(0x80 | (leading << 3) | trailing)
+        out += raw[leading:8 - trailing]
+    return bytes(out)
+
+
+def decompress(data: bytes, first_timestamp: int, count: int) -> Tuple[array, array]:
+    """Восстанавливает массивы меток времени и значений."""
+    timestamps = array("q", [first_timestamp])
+    offset = 0
+    previous = first_timestamp
+    delta = 0
+    for _ in range(count - 1):
+        delta_of_delta, offset = _read_varint(data, offset)
+        delta += delta_of_delta
+        previous += delta
+        timestamps.append(previous)
+
+    bits = array("Q", [int.from_bytes(data[offset:offset + 8], "big")])
+    offset += 8
+    previous_bits = bits[0]
+    for _ in range(count - 1):
+        header = data[offset]
+        offset += 1
+        if header:
+            leading = (header >> 3) & 0x07
+            trailing = header & 0x07
+            size = 8 - leading - trailing
+            xor = int.from_bytes(data[offset:offset + size], "big") << (8 * trailing)
+            offset += size
+            previous_bits ^= xor
+        bits.append(previous_bits)
+    values = array("d")
+    values.frombytes(bits.tobytes())
+    return timestamps, values
+
+
+class Chunk:
+    """Чанк отсчетов: несжатые массивы или сжатые байты."""
+
+    __slots__ = ("timestamps", "values", "data", "count", "first_timestamp", "last_timestamp")
+
+    def __init__(self, timestamps: array, values: array):
+        self.timestamps: Optional[array] = timestamps
+        self.values: Optional[array] = values
+        self.data: Optional[bytes] = None
+        self.count = len(timestamps)
+        self.first_timestamp = timestamps[0]
+        self.last_timestamp = timestamps[-1]
+
+    @classmethod
+    def from_compressed(cls, data: bytes, count: int, first_timestamp: int, last_timestamp: int) -> "Chunk":
+        """Сжатый чанк из байт compress() (загрузка снимка без распаковки)."""
+        chunk = cls.__new__(cls)
+        chunk.timestamps = chunk.values = None
+        chunk.data = data
+        chunk.count = count
+        chunk.first_timestamp = first_timestamp
+        chunk.last_timestamp = last_timestamp
+        return chunk
+
+    @property
+    def compressed(self) -> bool:
+        return self.data is not None
+
+    def arrays(self) -> Tuple[array, array]:
+        """Массивы меток и значений (для сжатого чанка — распакованные копии)."""
+        if self.data is not None:
+            return decompress(self.data, self.first_timestamp, self.count)
+        return self.timestamps, self.values
+
+    def compress(self) -> None:
+        """Сжимает чанк."""
+        if self.data is None:
+            self.data = compress(self.timestamps, self.values)
+            self.timestamps = self.values = None
+
+    def replace(self, timestamps: array, values: array, compressed: bool) -> None:
+        """Заменяет содержимое чанка."""
+        self.timestamps, self.values, self.data = timestamps, values, None
+        self.count = len(timestamps)
+        self.first_timestamp = timestamps[0]
+        self.last_timestamp = timestamps[-1]
+        if compressed:
+            self.compress()
+
+    def memory_usage(self) -> int:
+        """Размер данных чанка в байтах."""
+        if self.data is not None:
+            return len(self.data)
+        return self.count * SAMPLE_SIZE
+
+
+def _resolve_duplicate(policy: str, old: float, new: float) -> float:
+    if policy == "BLOCK":
+        raise TimeSeriesError(
+            "TSDB: Error at upsert, update is not supported when DUPLICATE_POLICY is set to BLOCK mode"
+        )
+    if policy == "FIRST":
+        return old
+    if policy == "LAST":
+        return new
+    if policy == "MIN":
+        return min(old, new)
+    if policy == "MAX":
+        return max(old, new)
+    return old + new
+
+
+class TimeSeries:
+    """Временной ряд с чанками, сжатием и удалением устаревших данных."""
+
+    def __init__(self, retention: int = 0, chunk_size: int = DEFAULT_CHUNK_SIZE, compressed: bool = False,
+                 duplicate_policy: str = "BLOCK", labels: Optional[Dict[str, str]] = None):
+        self.retention = retention
+        self.chunk_size = chunk_size
+        self.compressed = compressed
+        self.duplicate_policy = duplicate_policy
+        self.labels: Dict[str, str] = labels or {}
+        self.chunks: List[Chunk] = []
+        self._first_timestamps: List[int] = []
+        self.total_samples = 0
+
+    def load_chunks(self, chunks: List[Chunk]) -> None:
+        """Заменяет отсчеты ряда готовыми чанками (по возрастанию меток времени)."""
+        self.chunks = chunks
+        self._first_timestamps = [chunk.first_timestamp for chunk in chunks]
+        self.total_samples = sum(chunk.count for chunk in chunks)
+
+    @property
+    def samples_per_chunk(self) -> int:
+        return max(self.chunk_size // SAMPLE_SIZE, 2)
+
+    def __len__(self) -> int:
+        return self.total_samples
+
+    @property
+    def last_timestamp(self) -> Optional[int]:
+        return self.chunks[-1].last_timestamp if self.chunks else None
+
+    def last_sample(self) -> Optional[Sample]:
+        """Последний отсчет или None."""
+        if not self.chunks:
+            return None
+        timestamps, values = self.chunks[-1].arrays()
+        return timestamps[-1], values[-1]
+
+    def add(self, timestamp: int, value: float, policy: Optional[str] = None) -> int:
+        """
+        Добавляет отсчет.
+
+        Добавление в конец ряда — append в открытый чанк; отсчет в
+        прошлом вставляется в свой чанк, а совпадающая метка времени
+        разрешается политикой дубликатов.
+
+        Returns:
+            Метка времени добавленного отсчета
+        """
+        last = self.last_timestamp
+        if last is not None and self.retention and timestamp < last - self.retention:
+            raise TimeSeriesError("TSDB: Timestamp is older than retention")
+
+        if last is None or timestamp > last:
+            self._append(timestamp, value)
+        else:
+            self._upsert(timestamp, value, policy or self.duplicate_policy)
+        self._trim()
+        return timestamp
+
+    def _append(self, timestamp: int, value: float) -> None:
+        chunk = self.chunks[-1] if self.chunks else None
+        if chunk is None or chunk.count >= self.samples_per_chunk:
+            if chunk is not None and self.compressed:
+                chunk.compress()
+            self.chunks.append(Chunk(array("q", [timestamp]), array("d", [value])))
+            self._first_timestamps.append(timestamp)
+        else:
+            chunk.timestamps.append(timestamp)
+            chunk.values.append(value)
+            chunk.count += 1
+            chunk.last_timestamp = timestamp
+        self.total_samples += 1
+
+    def _upsert(self, timestamp: int, value: float, policy: str) -> None:
+        index = max(bisect_right(self._first_timestamps, timestamp) - 1, 0)
+        chunk = self.chunks[index]
+        timestamps, values = chunk.arrays()
+        position = bisect_left(timestamps, timestamp)
+        if position < len(timestamps) and timestamps[position] == timestamp:
+            values[position] = _resolve_duplicate(policy, values[position], value)
+        else:
+            timestamps.insert(position, timestamp)
+            values.insert(position, value)
+            self.total_samples += 1
+        is_open = index == len(self.chunks) - 1
+        chunk.replace(timestamps, values, compressed=chunk.compressed and not is_open)
+        self._first_timestamps[index] = chunk.first_timestamp
+
+    def _trim(self) -> None:
+        """Удаляет чанки, целиком вышедшие за пределы retention."""
+        if not self.retention or len(self.chunks) < 2:
+            return
+        threshold = self.chunks[-1].last_timestamp - self.retention
+        dropped = 0
+        while dropped < len(self.chunks) - 1 and self.chunks[dropped].last_timestamp < threshold:
+            self.total_samples -= self.chunks[dropped].count
+            dropped += 1
+        if dropped:
+            del self.chunks[:dropped]
+            del self._first_timestamps[:dropped]
+
+    def min_timestamp(self) -> int:
+        """Минимальная видимая метка времени с учетом retention."""
+        if not self.retention or not self.chunks:
+            return TIMESTAMP_MIN
+        return max(self.chunks[-1].last_timestamp - self.retention, TIMESTAMP_MIN)
+
+    def first_timestamp(self) -> Optional[int]:
+        """Первая видимая метка времени."""
+        for _, timestamps, _ in self.segments(TIMESTAMP_MIN, TIMESTAMP_MAX):
+            return timestamps[0]
+        return None
+
+    def segments(self, start: int, end: int) -> Iterator[Tuple[Chunk, array, array]]:
+        """
+        Итерирует срезы чанков с start <= timestamp <= end.
+
+        Returns:
+            (чанк, срез меток, срез значений) для каждого затронутого чанка
+        """
+        start = max(start, self.min_timestamp())
+        if not self.chunks or start > end:
+            return
+        index = max(bisect_right(self._first_timestamps, start) - 1, 0)
+        for chunk in self.chunks[index:]:
+            if chunk.first_timestamp > end:
+                return
+            if chunk.last_timestamp < start:
+                continue
+            timestamps, values = chunk.arrays()
+            low = bisect_left(timestamps, start)
+            high = bisect_right(timestamps, end)
+            if low < high:
+                yield chunk, timestamps[low:high], values[low:high]
+
+    def range(self, start: int, end: int, count: Optional[int] = None) -> List[Sample]:
+        """Отсчеты диапазона по возрастанию (не более count)."""
+        result: List[Sample] = []
+        for _, timestamps, values in self.segments(start, end):
+            result.extend(zip(timestamps, values))
+            if count is not None and len(result) >= count:
+                return result[:count]
+        return result
+
+    def delete_range(self, start: int, end: int) -> int:
+        """Удаляет отсчеты диапазона, возвращает их количество."""
+        removed = 0
+        kept_chunks: List[Chunk] = []
+        for position, chunk in enumerate(self.chunks):
+            if chunk.last_timestamp < start or chunk.first_timestamp > end:
+                kept_chunks.append(chunk)
+                continue
+            timestamps, values = chunk.arrays()
+            low = bisect_left(timestamps, start)
+            high = bisect_right(timestamps, end)
+            removed += high - low
+            if high - low == len(timestamps):
+                continue
+            timestamps = timestamps[:low] + timestamps[high:]
+            values = values[:low] + values[high:]
+            is_open = position == len(self.chunks) - 1
+            chunk.replace(timestamps, values, compressed=chunk.compressed and not is_open)
+            kept_chunks.append(chunk)
+        self.chunks = kept_chunks
+        self._first_timestamps = [chunk.first_timestamp for chunk in kept_chunks]
+        self.total_samples -= removed
+        return removed
+
+    def memory_usage(self) -> int:
+        """Размер данных всех чанков в байтах."""
+        return sum(chunk.memory_usage() for chunk in self.chunks)
+
+
+class _Bucket:
+    """Частичное состояние корзины агрегации."""
+
+    __slots__ = ("start", "total", "count", "minimum", "maximum", "first", "last")
+
+    def __init__(self, start: int):
+        self.start = start
+        self.total = 0.0
+        self.count = 0
+        self.minimum = float("inf")
+        self.maximum = float("-inf")
+        self.first: Optional[float] = None
+        self.last: Optional[float] = None
+
+
+def _bucket_result(aggregation: str, bucket: _Bucket) -> float:
+    if aggregation == "AVG":
+        return bucket.total / bucket.count
+    if aggregation == "SUM":
+        return bucket.total
+    if aggregation == "MIN":
+        return bucket.minimum
+    if aggregation == "MAX":
+        return bucket.maximum
+    if aggregation == "COUNT":
+        return float(bucket.count)
+    if aggregation == "FIRST":
+        return bucket.first
+    if aggregation == "LAST":
+        return bucket.last
+    return bucket.maximum - bucket.minimum
+
+
+def aggregate(series: TimeSeries, start: int, end: int, aggregation: str, bucket_duration: int,
+              count: Optional[int] = None, align: int = 0) -> List[Sample]:
+    """
+    Агрегирует отсчеты диапазона по корзинам длительностью bucket_duration.
+
+    Внутри чанка границы корзин находятся бинарным поиском, и каждая
+    корзина обрабатывается как срез массива встроенными sum/min/max;
+    корзина, пересекающая границу чанков, накапливается по частям.
+
+    Returns:
+        Список (начало корзины, значение) для непустых корзин
+    """
+    aggregation = aggregation.upper()
+    need_sum = aggregation in ("AVG", "SUM")
+    need_min = aggregation in ("MIN", "RANGE")
+    need_max = aggregation in ("MAX", "RANGE")
+    result: List[Sample] = []
+    current: Optional[_Bucket] = None
+
+    for _, timestamps, values in series.segments(start, end):
+        position = 0
+        size = len(timestamps)
+        while position < size:
+            timestamp = timestamps[position]
+            bucket_start = timestamp - (timestamp - align) % bucket_duration
+            stop = bisect_left(timestamps, bucket_start + bucket_duration, position)
+            segment = values[position:stop]
+            if current is None or current.start != bucket_start:
+                if current is not None:
+                    result.append((current.start, _bucket_result(aggregation, current)))
+                    if count is not None and len(result) >= count:
+                        return result
+                current = _Bucket(bucket_start)
+            if need_sum:
+                current.total += sum(segment)
+            if need_min:
+                current.minimum = min(current.minimum, min(segment))
+            if need_max:
+                current.maximum = max(current.maximum, max(segment))
+            if current.first is None:
+                current.first = segment[0]
+            current.last = segment[-1]
+            current.count += stop - position
+            position = stop
+
+    if current is not None and (count is None or len(result) < count):
+        result.append((current.start, _bucket_result(aggregation, current)))
+    return result
+
+
+def format_value(value: float) -> str:
+    """Форматирует значение отсчета для ответа."""
+    text = repr(float(value))
+    return text[:-2] if text.endswith(".0") else text
+
@@ -0,0 +1,155 @@
+"""
+Отслеживание ключей для кеширования на стороне клиента (CLIENT TRACKING).
+
+Таблица хранит, какие соединения читали какие ключи (обычный режим и
+OPTIN), и префиксы соединений в режиме BCAST. При изменении или
+истечении ключа хранилище вызывает invalidate(): клиентам, читавшим
+ключ, и клиентам BCAST с подходящим префиксом отправляется сообщение
+`__redis__:invalidate` со списком ключей (соединениям RESP3 без
+перенаправления — push-кадр `invalidate`), после чего ключ забывается до
+следующего чтения. Таблица ограничена по числу ключей: при переполнении
+самые старые ключи инвалидируются заранее.
+"""
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from .command_parser import CommandParser, Push
+
+INVALIDATE_CHANNEL = "__redis__:invalidate"
+
+
+def _first(args: List[str]) -> List[str]:
+    return args[:1]
+
+
+def _all(args: List[str]) -> List[str]:
+    return args
+
+
+# читающие команды и функции, выделяющие из аргументов прочитанные ключи
+READ_COMMAND_KEYS: Dict[str, Callable[[List[str]], List[str]]] = {
+    name: _first for name in (
+        "GET", "GETRANGE", "STRLEN", "GETBIT", "BITCOUNT", "BITPOS", "TTL",
+        "HGET", "HMGET", "HGETALL", "HLEN", "JSON.GET", "JSON.TYPE",
+        "XLEN", "XRANGE", "XREVRANGE", "GEOPOS", "GEODIST",
+        "BF.EXISTS", "BF.MEXISTS", "CMS.QUERY", "TOPK.QUERY", "TOPK.LIST",
+        "TS.GET", "TS.RANGE", "TS.REVRANGE", "TS.INFO",
+    )
+}
+READ_COMMAND_KEYS.update({"MGET": _all, "EXISTS": _all, "PFCOUNT": _all})
+
+
+class TrackingClient:
+    """Настройки отслеживания одного соединения."""
+
+    def __init__(self, client_id: int, target: Callable[[], Optional[Any]], redirect: int = 0,
+                 bcast: bool = False, optin: bool = False, prefixes: Iterable[str] = ()):
+        self.id = client_id
+        # функция, возвращающая подписчика, которому отправляются инвалидации
+        self.target = target
+        # CLIENT ID соединения для инвалидаций (0 — само соединение)
+        self.redirect = redirect
+        self.bcast = bcast
+        self.optin = optin
+        self.prefixes = list(prefixes) or [""]
+        # CLIENT CACHING YES: в режиме OPTIN отслеживать ключи следующей команды
+        self.caching = False
+
+
+class TrackingTable:
+    """Таблица отслеживаемых ключей, общая для всех баз сервера."""
+
+    def __init__(self, storages: List[Any], max_keys: int = 1_000_000):
+        self.storages = storages
+        # предел числа ключей в таблице (0 — без ограничения)
+        self.max_keys = max_keys
+        # ключ -> соединения, читавшие его (порядок — от давно записанных к новым)
+        self.keys: "OrderedDict[str, Set[TrackingClient]]" = OrderedDict()
+        # префикс -> соединения BCAST
+        self.prefixes: Dict[str, Set[TrackingClient]] = {}
+        self.clients: Set[TrackingClient] = set()
+
+    @property
+    def active(self) -> bool:
+        return bool(self.clients)
+
+    def enable(self, client: TrackingClient) -> None:
+        """Включает отслеживание для соединения."""
+        was_active = self.active
+        self.clients.add(client)
+        if client.bcast:
+            for prefix in client.prefixes:
+                self.prefixes.setdefault(prefix, set()).add(client)
+        if not was_active:
+            self._refresh_storages()
+
+    def disable(self, client: TrackingClient) -> None:
+        """Выключает отслеживание; ключи соединения удаляются из таблицы лениво."""
+        if client not in self.clients:
+            return
+        self.clients.discard(client)
+        if client.bcast:
+            for prefix in client.prefixes:
+                clients = self.prefixes.get(prefix)
+                if clients is not None:
+                    clients.discard(client)
+                    if not clients:
+                        del self.prefixes[prefix]
+        if not self.clients:
+            self.keys.clear()
+            self._refresh_storages()
+
+    def _refresh_storages(self) -> None:
+        for storage in self.storages:
+            storage._refresh_observed()
+
+    def remember(self, client: TrackingClient, keys: Iterable[str]) -> None:
+        """Запоминает ключи, прочитанные соединением."""
+        table = self.keys
+        for key in keys:
+            clients = table.get(key)
+            if clients is None:
+                clients = table[key] = set()
+            clients.add(client)
+        while self.max_keys and len(table) > self.max_keys:
+            key, clients = table.popitem(last=False)
+            self._send(clients, [key])
+
+    def invalidate(self, key: str) -> None:
+        """Сообщает об изменении ключа читавшим его соединениям и подписчикам BCAST."""
+        clients = self.keys.pop(key, None)
+        if self.prefixes:
+            matched = {client for prefix, bcast in self.prefixes.items()
+                       if key.startswith(prefix) for client in bcast}
+            clients = matched | clients if clients else matched
+        if clients:
+            self._send(clients, [key])
+
+    def invalidate_all(self) -> None:
+        """Сообщает об очистке базы: сообщение с null вместо списка ключей."""
+        self.keys.clear()
+        if self.clients:
+            self._send(self.clients, None)
+
+    def _send(self, clients: Iterable[TrackingClient], keys: Optional[List[str]]) -> None:
+        """
+        Отправляет инвалидацию: соединению RESP3 без перенаправления — push-кадром
+        `invalidate`, иначе — сообщением канала __redis__:invalidate получателю.
+        """
+        # кадры по (push-кадр invalidate, версия протокола получателя)
+        frames: Dict[Tuple[bool, int], bytes] = {}
+        for client in clients:
+            if client not in self.clients:
+                continue
+            target = client.target()
+            if target is None:
+                continue
+            direct = not client.redirect and target.protocol == 3
+            if not direct and INVALIDATE_CHANNEL not in target.channels:
+                continue
+            frame = frames.get((direct, target.protocol))
+            if frame is None:
+                message = Push(["invalidate", keys] if direct else ["message", INVALIDATE_CHANNEL, keys])
+                frame = frames[(direct, target.protocol)] = \
+                    CommandParser.encode(CommandParser.format_response(message, target.protocol))
+            target.deliver(frame)
@@ -1,4 +1,9 @@
 import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
 from contextlib import suppress
 
 from src.server.tcp_server import TCPServer
@@ -126,7 +131,7 @@ def test_tcp_unknown_command_error():
         port = server.port
 
         reader, writer = await asyncio.open_connection('127.0.0.1', port)
-        writer.write(b"PING\r\n")
+        writer.write(b"NOSUCHCOMMAND\r\n")
         await writer.drain()
         err_line = await reader.readline()
         assert err_line.startswith(b"-") # Ожидаем ошибку: неизвестная команда
@@ -369,7 +374,7 @@ def test_tcp_incomplete_bulk_data():
         reader, writer = await asyncio.open_connection('127.0.0.1', port)
 
         # Bulk string с обещанной длиной, но неполными данными
-        writer.write(b"*1\r\n$5\r\nhello\r\n") 
+        writer.write(b"*1\r\n$5\r\nhowdy\r\n") 
         await writer.drain()
         _ = await reader.readline() 
 
@@ -531,3 +536,707 @@ def test_tcp_resp_unexpected_types():
     asyncio.run(scenario())
 
 
+
+
+def test_tcp_xread_block_wakes_on_xadd():
+    """Тест XREAD BLOCK: клиент ждет, пока другой клиент не выполнит XADD."""
+    async def scenario():
+        server = TCPServer(host="127.0.0.1", port=0)
+        task = asyncio.create_task(server.start())
+        await asyncio.sleep(0.1)
+        port = server.port
+
+        reader1, writer1 = await asyncio.open_connection('127.0.0.1', port)
+        reader2, writer2 = await asyncio.open_connection('127.0.0.1', port)
+
+        # Первый клиент блокируется в ожидании новых записей
+        writer1.write(b"XREAD BLOCK 0 STREAMS events $\r\n")
+        await writer1.drain()
+        await asyncio.sleep(0.1)
+        assert server._blocked.get((server._storage, "events"))
+
+        # Второй клиент добавляет запись
+        writer2.write(b"XADD events 1-0 type click\r\n")
+        await writer2.drain()
+        assert (await reader2.readline()).startswith(b"$")
+        assert (await reader2.readline()).strip() == b"1-0"
+
+        # Первый клиент получает запись
+        head = await asyncio.wait_for(reader1.readline(), timeout=1.0)
+        assert head == b"*1\r\n"
+        await reader1.readline()  # *2
+        await reader1.readline()  # $6
+        assert (await reader1.readline()).strip() == b"events"
+        assert not server._blocked
+
+        # Таймаут без данных возвращает null
+        writer1.write(b"XREAD BLOCK 50 STREAMS events $\r\n")
+        await writer1.drain()
+        # дочитываем остаток предыдущего ответа
+        while True:
+            line = await asyncio.wait_for(reader1.readline(), timeout=1.0)
+            if line.strip() == b"$-1":
+                break
+
+        for writer in (writer1, writer2):
+            writer.close()
+            await writer.wait_closed()
+
+        await server.stop()
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+
+    asyncio.run(scenario())
+
+
+def test_tcp_select_is_per_connection():
+    """Тест: SELECT меняет базу только для своего соединения, SWAPDB виден всем."""
+    async def scenario():
+        server = TCPServer(host="127.0.0.1", port=0)
+        task = asyncio.create_task(server.start())
+        await asyncio.sleep(0.1)
+        reader1, writer1 = await asyncio.open_connection('127.0.0.1', server.port)
+        reader2, writer2 = await asyncio.open_connection('127.0.0.1', server.port)
+
+        async def call(reader, writer, command):
+            writer.write(command)
+            await writer.drain()
+            head = await reader.readline()
+            if head.startswith(b"$") and head.strip() != b"$-1":
+                return (await reader.readline()).strip()
+            return head.strip()
+
+        assert await call(reader1, writer1, b"SELECT 1\r\n") == b"OK"
+        assert await call(reader1, writer1, b"SET k one\r\n") == b"OK"
+        assert await call(reader2, writer2, b"GET k\r\n") == b"$-1"
+        assert await call(reader2, writer2, b"SELECT 16\r\n") == b"-ERR: DB index is out of range"
+
+        assert await call(reader2, writer2, b"SWAPDB 0 1\r\n") == b"OK"
+        assert await call(reader2, writer2, b"GET k\r\n") == b"one"
+        assert await call(reader1, writer1, b"GET k\r\n") == b"$-1"
+
+        for writer in (writer1, writer2):
+            writer.close()
+            await writer.wait_closed()
+
+        await server.stop()
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+
+    asyncio.run(scenario())
+
+
+def test_client_mget_mset():
+    """Тест методов RedisClient.mget/mset через TCP, включая значения с пробелами."""
+    from src.client import RedisClient
+
+    async def scenario():
+        server = TCPServer(host="127.0.0.1", port=0)
+        task = asyncio.create_task(server.start())
+        await asyncio.sleep(0.1)
+
+        def client_calls():
+            with RedisClient(port=server.port) as client:
+                assert client.mset({"k1": "hello world", "k2": "привет"}) is True
+                assert client.mset({"k1": "x", "k3": "y"}, nx=True) is False
+                return client.mget("k1", "missing", "k2")
+
+        loop = asyncio.get_running_loop()
+        assert await loop.run_in_executor(None, client_calls) == ["hello world", None, "привет"]
+
+        await server.stop()
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+
+    asyncio.run(scenario())
+
+
+def test_tcp_multi_exec_and_watch():
+    """Тест: MULTI/EXEC выполняет очередь, WATCH отменяет транзакцию после чужой записи."""
+    async def scenario():
+        server = TCPServer(host="127.0.0.1", port=0)
+        task = asyncio.create_task(server.start())
+        await asyncio.sleep(0.1)
+        reader1, writer1 = await asyncio.open_connection('127.0.0.1', server.port)
+        reader2, writer2 = await asyncio.open_connection('127.0.0.1', server.port)
+
+        async def read_reply(reader):
+            head = (await reader.readline()).strip()
+            if head.startswith(b"*") and head != b"*-1":
+                return [await read_reply(reader) for _ in range(int(head[1:]))]
+            if head.startswith(b"$") and head != b"$-1":
+                return (await reader.readline()).strip()
+            return head
+
+        async def call(reader, writer, command):
+            writer.write(command)
+            await writer.drain()
+            return await read_reply(reader)
+
+        assert await call(reader1, writer1, b"MULTI\r\n") == b"OK"
+        assert await call(reader1, writer1, b"SET a 1\r\n") == b"QUEUED"
+        assert await call(reader1, writer1, b"APPEND a 2\r\n") == b"QUEUED"
+        assert await call(reader1, writer1, b"HGET a f\r\n") == b"QUEUED"
+        assert await call(reader2, writer2, b"GET a\r\n") == b"$-1"
+        result = await call(reader1, writer1, b"EXEC\r\n")
+        assert result[:2] == [b"OK", b":2"]
+        assert result[2].startswith(b"-WRONGTYPE")
+
+        # чужая запись после WATCH отменяет транзакцию без изменений
+        assert await call(reader1, writer1, b"WATCH a\r\n") == b"OK"
+        assert await call(reader2, writer2, b"SET a changed\r\n") == b"OK"
+        assert await call(reader1, writer1, b"MULTI\r\n") == b"OK"
+        assert await call(reader1, writer1, b"SET a mine\r\n") == b"QUEUED"
+        assert await call(reader1, writer1, b"EXEC\r\n") == b"$-1"
+        assert await call(reader1, writer1, b"GET a\r\n") == b"changed"
+
+        # без чужих записей транзакция проходит
+        assert await call(reader1, writer1, b"WATCH a\r\n") == b"OK"
+        assert await call(reader1, writer1, b"MULTI\r\n") == b"OK"
+        assert await call(reader1, writer1, b"SET a mine\r\n") == b"QUEUED"
+        assert await call(reader1, writer1, b"EXEC\r\n") == [b"OK"]
+
+        # ошибка постановки в очередь отклоняет EXEC целиком
+        assert await call(reader1, writer1, b"MULTI\r\n") == b"OK"
+        assert await call(reader1, writer1, b"SET a lost\r\n") == b"QUEUED"
+        assert (await call(reader1, writer1, b"NOSUCH\r\n")).startswith(b"-ERR")
+        assert (await call(reader1, writer1, b"EXEC\r\n")).startswith(b"-EXECABORT")
+        assert await call(reader1, writer1, b"GET a\r\n") == b"mine"
+        assert await call(reader1, writer1, b"DISCARD\r\n") == b"-ERR: DISCARD without MULTI"
+
+        for writer in (writer1, writer2):
+            writer.close()
+            await writer.wait_closed()
+
+        await server.stop()
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+
+    asyncio.run(scenario())
+
+
+def test_tcp_subscribe_publish():
+    """Тест: SUBSCRIBE/PSUBSCRIBE получают сообщения PUBLISH, в режиме подписки доступны не все команды."""
+    async def scenario():
+        server = TCPServer(host="127.0.0.1", port=0)
+        task = asyncio.create_task(server.start())
+        await asyncio.sleep(0.1)
+        subscriber_reader, subscriber_writer = await asyncio.open_connection('127.0.0.1', server.port)
+        publisher_reader, publisher_writer = await asyncio.open_connection('127.0.0.1', server.port)
+
+        async def read_reply(reader):
+            head = (await asyncio.wait_for(reader.readline(), 2)).strip()
+            if head.startswith(b"*"):
+                return [await read_reply(reader) for _ in range(int(head[1:]))]
+            if head.startswith(b"$") and head != b"$-1":
+                return (await reader.readline()).strip()
+            return head
+
+        subscriber_writer.write(b"SUBSCRIBE news alerts\r\nPSUBSCRIBE user:*\r\n")
+        await subscriber_writer.drain()
+        assert await read_reply(subscriber_reader) == [b"subscribe", b"news", b":1"]
+        assert await read_reply(subscriber_reader) == [b"subscribe", b"alerts", b":2"]
+        assert await read_reply(subscriber_reader) == [b"psubscribe", b"user:*", b":3"]
+
+        publisher_writer.write(b"PUBLISH news hello\r\nPUBLISH user:7 bye\r\nPUBLISH other x\r\n")
+        await publisher_writer.drain()
+        assert [await read_reply(publisher_reader) for _ in range(3)] == [b":1", b":1", b":0"]
+        assert await read_reply(subscriber_reader) == [b"message", b"news", b"hello"]
+        assert await read_reply(subscriber_reader) == [b"pmessage", b"user:*", b"user:7", b"bye"]
+
+        subscriber_writer.write(b"GET k\r\nPING\r\nUNSUBSCRIBE\r\n")
+        await subscriber_writer.drain()
+        assert (await read_reply(subscriber_reader)).startswith(b"-ERR: Can't execute 'get'")
+        assert await read_reply(subscriber_reader) == [b"pong", b""]
+        assert await read_reply(subscriber_reader) == [b"unsubscribe", b"alerts", b":2"]
+        assert await read_reply(subscriber_reader) == [b"unsubscribe", b"news", b":1"]
+
+        subscriber_writer.close()
+        await subscriber_writer.wait_closed()
+        await asyncio.sleep(0.05)
+        assert server._storage.pubsub.patterns == {}
+
+        publisher_writer.close()
+        await publisher_writer.wait_closed()
+        await server.stop()
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+
+    asyncio.run(scenario())
+
+
+def test_client_side_caching_with_tracking():
+    """Тест: RedisClient с кешем читает ключ локально и сбрасывает его по инвалидации сервера."""
+    from src.client import RedisClient
+
+    async def scenario():
+        server = TCPServer(host="127.0.0.1", port=0)
+        task = asyncio.create_task(server.start())
+        await asyncio.sleep(0.1)
+
+        def client_calls():
+            with RedisClient(port=server.port, cache_size=10) as cached, RedisClient(port=server.port) as writer:
+                writer.set("hot", "v1")
+                assert cached.get("hot") == "v1"
+                assert "hot" in cached._cache
+                assert server._storage.tracking.keys.keys() == {"hot"}
+
+                writer.set("hot", "v2")
+                deadline = time.time() + 2
+                while "hot" in cached._cache and time.time() < deadline:
+                    time.sleep(0.01)
+                assert "hot" not in cached._cache
+                return cached.get("hot")
+
+        loop = asyncio.get_running_loop()
+        assert await loop.run_in_executor(None, client_calls) == "v2"
+        await asyncio.sleep(0.05)
+        assert not server._storage.tracking.active
+
+        await server.stop()
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+
+    asyncio.run(scenario())
+
+
+def test_tcp_resp3_hello_typed_replies_and_push():
+    """Тест: HELLO 3 включает типизированные ответы и push-кадры на одном соединении."""
+    async def scenario():
+        server = TCPServer(host="127.0.0.1", port=0)
+        task = asyncio.create_task(server.start())
+        await asyncio.sleep(0.1)
+
+        reader, writer = await asyncio.open_connection('127.0.0.1', server.port)
+        other_reader, other_writer = await asyncio.open_connection('127.0.0.1', server.port)
+
+        writer.write(b"HELLO 3\r\n")
+        await writer.drain()
+        assert await reader.readline() == b"%7\r\n"
+        hello = [await reader.readline() for _ in range(25)]
+        assert hello[8:11] == [b"$5\r\n", b"proto\r\n", b":3\r\n"]
+        assert hello[-1] == b"*0\r\n"
+
+        writer.write(b"SET a 1\r\nGET missing\r\nHSET h f v\r\nHGETALL h\r\n")
+        await writer.drain()
+        assert await reader.readline() == b"+OK\r\n"
+        assert await reader.readline() == b"_\r\n"
+        assert await reader.readline() == b":1\r\n"
+        assert await reader.readuntil(b"v\r\n") == b"%1\r\n$1\r\nf\r\n$1\r\nv\r\n"
+
+        # подписка и обычные команды на одном соединении
+        writer.write(b"SUBSCRIBE news\r\nGET a\r\n")
+        await writer.drain()
+        assert await reader.readuntil(b":1\r\n") == b">3\r\n$9\r\nsubscribe\r\n$4\r\nnews\r\n:1\r\n"
+        assert [await reader.readline() for _ in range(2)] == [b"$1\r\n", b"1\r\n"]
+
+        other_writer.write(b"PUBLISH news hi\r\n")
+        await other_writer.drain()
+        assert await other_reader.readline() == b":1\r\n"
+        assert await reader.readuntil(b"hi\r\n") == b">3\r\n$7\r\nmessage\r\n$4\r\nnews\r\n$2\r\nhi\r\n"
+
+        # инвалидации без REDIRECT приходят push-кадром invalidate
+        writer.write(b"CLIENT TRACKING ON\r\nGET a\r\n")
+        await writer.drain()
+        assert await reader.readline() == b"+OK\r\n"
+        assert [await reader.readline() for _ in range(2)] == [b"$1\r\n", b"1\r\n"]
+        other_writer.write(b"SET a 2\r\n")
+        await other_writer.drain()
+        assert await other_reader.readline() == b"$2\r\n"
+        assert await reader.readuntil(b"a\r\n") == b">2\r\n$10\r\ninvalidate\r\n*1\r\n$1\r\na\r\n"
+
+        writer.write(b"HELLO 4\r\n")
+        await writer.drain()
+        assert (await reader.readline()).startswith(b"-NOPROTO")
+
+        for w in (writer, other_writer):
+            w.close()
+            await w.wait_closed()
+        await server.stop()
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+
+    asyncio.run(scenario())
+
+
+def test_client_side_caching_resp3_single_connection():
+    """Тест: RedisClient(protocol=3) получает инвалидации и сообщения по одному соединению."""
+    from src.client import RedisClient
+
+    async def scenario():
+        server = TCPServer(host="127.0.0.1", port=0)
+        task = asyncio.create_task(server.start())
+        await asyncio.sleep(0.1)
+
+        def client_calls():
+            with RedisClient(port=server.port, cache_size=10, protocol=3) as cached, \
+                    RedisClient(port=server.port) as writer:
+                assert cached._listener is None
+                writer.set("hot", "v1")
+                assert cached.get("hot") == "v1"
+                assert "hot" in cached._cache
+
+                writer.set("hot", "v2")
+                time.sleep(0.05)
+                assert cached.get("hot") == "v2"
+
+                cached.subscribe("news")
+                assert cached.get("hot") == "v2"
+                writer.mset({"other": 1})
+                assert writer._execute("PUBLISH", "news", "hi") == 1
+                return cached.get_message(timeout=1), cached._execute("HGETALL", "missing")
+
+        loop = asyncio.get_running_loop()
+        message, empty_map = await loop.run_in_executor(None, client_calls)
+        assert message == ["message", "news", "hi"]
+        assert empty_map == {}
+
+        await server.stop()
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+
+    asyncio.run(scenario())
+
+
+def test_tcp_bgsave_survives_restart(tmp_path):
+    """Тест: снимок BGSAVE загружается сервером с тем же каталогом; во время загрузки — -LOADING."""
+    async def call(reader, writer, command):
+        writer.write(command)
+        await writer.drain()
+        head = await reader.readline()
+        if head.startswith(b"$") and head.strip() != b"$-1":
+            return (await reader.readline()).strip()
+        return head.strip()
+
+    async def scenario():
+        server = TCPServer(host="127.0.0.1", port=0, dir=str(tmp_path))
+        task = asyncio.create_task(server.start())
+        await asyncio.sleep(0.1)
+        reader, writer = await asyncio.open_connection('127.0.0.1', server.port)
+        assert await call(reader, writer, b"SET k saved\r\n") == b"OK"
+        assert await call(reader, writer, b"SELECT 3\r\n") == b"OK"
+        assert await call(reader, writer, b"SET t v EX 100\r\n") == b"OK"
+        assert await call(reader, writer, b"BGSAVE\r\n") == b"Background saving started"
+        writer.close()
+        await writer.wait_closed()
+        await server.stop()
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+
+        server = TCPServer(host="127.0.0.1", port=0, dir=str(tmp_path))
+        task = asyncio.create_task(server.start())
+        await asyncio.sleep(0.1)
+        reader, writer = await asyncio.open_connection('127.0.0.1', server.port)
+        assert await call(reader, writer, b"GET k\r\n") == b"saved"
+        assert await call(reader, writer, b"SELECT 3\r\n") == b"OK"
+        ttl = await call(reader, writer, b"TTL t\r\n")
+        assert ttl.startswith(b":") and 0 < int(ttl[1:]) <= 100
+
+        # пока идет загрузка, команды с данными отклоняются, а INFO доступна
+        server._persistence.loading = True
+        assert await call(reader, writer, b"GET t\r\n") == b"-LOADING Redis is loading the dataset in memory"
+        writer.write(b"INFO persistence\r\n")
+        await writer.drain()
+        size = int((await reader.readline())[1:])
+        info = (await reader.readexactly(size + 2)).decode()
+        assert info.startswith("# Persistence\r\nloading:1\r\n")
+        server._persistence.loading = False
+        assert await call(reader, writer, b"GET t\r\n") == b"v"
+        writer.close()
+        await writer.wait_closed()
+        await server.stop()
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+
+    asyncio.run(scenario())
+
+
+def test_tcp_appendonly_always_survives_restart(tmp_path):
+    """Тест: при appendfsync always команда в файле журнала до ответа; журнал после BGREWRITEAOF восстанавливается при запуске."""
+    async def call(reader, writer, command):
+        writer.write(command)
+        await writer.drain()
+        head = await reader.readline()
+        if head.startswith(b"$") and head.strip() != b"$-1":
+            return (await reader.readline()).strip()
+        return head.strip()
+
+    def logged():
+        aof_dir = tmp_path / "appendonlydir"
+        return b"".join(path.read_bytes() for path in sorted(aof_dir.glob("*.incr.aof")))
+
+    async def scenario():
+        server = TCPServer(host="127.0.0.1", port=0, dir=str(tmp_path), appendonly=True, appendfsync="always")
+        task = asyncio.create_task(server.start())
+        await asyncio.sleep(0.1)
+        reader, writer = await asyncio.open_connection('127.0.0.1', server.port)
+        assert await call(reader, writer, b"SET k v EX 100\r\n") == b"OK"
+        assert b"$1\r\nk\r\n$1\r\nv\r\n$4\r\nPXAT" in logged()
+        writer.write(b"APPEND n x\r\nAPPEND n x\r\nAPPEND n x\r\n")
+        await writer.drain()
+        for expected in (b":1", b":2", b":3"):
+            assert (await reader.readline()).strip() == expected
+        assert logged().count(b"APPEND") == 3
+        assert await call(reader, writer, b"BGREWRITEAOF\r\n") == b"Background append only file rewriting started"
+        assert await call(reader, writer, b"APPEND n y\r\n") == b":4"
+        writer.close()
+        await writer.wait_closed()
+        await server.stop()
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+
+        server = TCPServer(host="127.0.0.1", port=0, dir=str(tmp_path), appendonly=True)
+        task = asyncio.create_task(server.start())
+        await asyncio.sleep(0.1)
+        reader, writer = await asyncio.open_connection('127.0.0.1', server.port)
+        assert await call(reader, writer, b"GET k\r\n") == b"v"
+        assert await call(reader, writer, b"GET n\r\n") == b"xxxy"
+        ttl = await call(reader, writer, b"TTL k\r\n")
+        assert ttl.startswith(b":") and 0 < int(ttl[1:]) <= 100
+        writer.close()
+        await writer.wait_closed()
+        await server.stop()
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+
+    asyncio.run(scenario())
+
+
+async def _call(reader, writer, command):
+    writer.write(command)
+    await writer.drain()
+    head = await reader.readline()
+    if head.startswith(b"$") and head.strip() != b"$-1":
+        return (await reader.readexactly(int(head[1:]) + 2))[:-2]
+    return head.strip()
+
+
+async def _info(reader, writer, section):
+    text = await _call(reader, writer, b"INFO %s\r\n" % section)
+    return dict(line.split(":", 1) for line in text.decode().split("\r\n") if ":" in line)
+
+
+async def _wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not await predicate():
+        assert time.monotonic() < deadline, "condition not reached"
+        await asyncio.sleep(0.05)
+
+
+def test_tcp_replication_full_sync_stream_and_partial_resync():
+    """Тест: реплика получает снимок и поток команд, отклоняет запись и после обрыва связи продолжает с PSYNC."""
+    async def scenario():
+        master = TCPServer(host="127.0.0.1", port=0)
+        tasks = [asyncio.create_task(master.start())]
+        await asyncio.sleep(0.1)
+        mr, mw = await asyncio.open_connection('127.0.0.1', master.port)
+        for i in range(50):
+            await _call(mr, mw, b"SET key:%d value:%d\r\n" % (i, i))
+        await _call(mr, mw, b"SELECT 2\r\n")
+        await _call(mr, mw, b"HSET h f v\r\n")
+
+        replica = TCPServer(host="127.0.0.1", port=0, replicaof=f"127.0.0.1 {master.port}")
+        tasks.append(asyncio.create_task(replica.start()))
+        await asyncio.sleep(0.1)
+        rr, rw = await asyncio.open_connection('127.0.0.1', replica.port)
+
+        async def replica_has(key, value, db=b"0"):
+            await _call(rr, rw, b"SELECT " + db + b"\r\n")
+            return await _call(rr, rw, b"GET " + key + b"\r\n") == value
+
+        await _wait_for(lambda: replica_has(b"key:49", b"value:49"))
+        assert await _call(rr, rw, b"SELECT 2\r\n") == b"OK"
+        assert await _call(rr, rw, b"HGET h f\r\n") == b"v"
+
+        # цепочка: реплика реплики получает тот же поток
+        chained = TCPServer(host="127.0.0.1", port=0, replicaof=f"127.0.0.1 {replica.port}")
+        tasks.append(asyncio.create_task(chained.start()))
+        await asyncio.sleep(0.1)
+        cr, cw = await asyncio.open_connection('127.0.0.1', chained.port)
+
+        await _call(mr, mw, b"SET k v EX 100\r\n")
+        await _wait_for(lambda: replica_has(b"k", b"v", b"2"))
+        ttl = await _call(rr, rw, b"TTL k\r\n")
+        assert 0 < int(ttl[1:]) <= 100
+        assert await _call(rr, rw, b"SET k other\r\n") == b"-READONLY You can't write against a read only replica."
+
+        async def chained_has_k():
+            await _call(cr, cw, b"SELECT 2\r\n")
+            return await _call(cr, cw, b"GET k\r\n") == b"v"
+        await _wait_for(chained_has_k)
+
+        # транзакция ведущего приходит в MULTI/EXEC и применяется репликой целиком
+        for command in (b"MULTI\r\n", b"SET tx:a 1\r\n", b"SET tx:b 2\r\n"):
+            await _call(mr, mw, command)
+        mw.write(b"EXEC\r\n")
+        reply = b"*2\r\n$2\r\nOK\r\n$2\r\nOK\r\n"
+        assert await mr.readexactly(len(reply)) == reply
+        await _wait_for(lambda: replica_has(b"tx:b", b"2", b"2"))
+        assert await _call(rr, rw, b"GET tx:a\r\n") == b"1"
+
+        master_info = await _info(mr, mw, b"replication")
+        assert master_info["role"] == "master" and master_info["connected_slaves"] == "1"
+        assert master_info["slave0"].startswith(f"ip=127.0.0.1,port={replica.port},state=online")
+        replica_info = await _info(rr, rw, b"replication")
+        assert replica_info["role"] == "slave" and replica_info["master_link_status"] == "up"
+        assert replica_info["master_replid"] == master_info["master_replid"]
+        assert replica_info["slave_repl_offset"] == master_info["master_repl_offset"]
+        assert (await _info(cr, cw, b"replication"))["master_repl_offset"] == master_info["master_repl_offset"]
+
+        # обрыв связи: реплика переподключается и получает пропущенное из буфера ведущего
+        replica._replication._master_writer.transport.abort()
+        await _call(mr, mw, b"SET missed yes\r\n")
+        await _wait_for(lambda: replica_has(b"missed", b"yes", b"2"))
+        stats = await _info(mr, mw, b"stats")
+        assert (stats["sync_full"], stats["sync_partial_ok"]) == ("1", "1")
+
+        async def replica_acked():
+            info = await _info(mr, mw, b"replication")
+            return f"offset={info['master_repl_offset']}," in info.get("slave0", "")
+        await _wait_for(replica_acked)
+
+        # NO ONE: реплика становится ведущим и принимает запись
+        assert await _call(rr, rw, b"REPLICAOF NO ONE\r\n") == b"OK"
+        assert await _call(rr, rw, b"SET k mine\r\n") == b"OK"
+
+        for writer in (mw, rw, cw):
+            writer.close()
+            await writer.wait_closed()
+        for server in (chained, replica, master):
+            await server.stop()
+        for task in tasks:
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
+
+    asyncio.run(asyncio.wait_for(scenario(), 30))
+
+
+def test_replication_between_processes():
+    """Тест: ведущий и реплика в отдельных процессах (REDIS_REPLICAOF), реплика получает данные ведущего."""
+    def free_port():
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            return sock.getsockname()[1]
+
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    master_port, replica_port = free_port(), free_port()
+
+    def spawn(port, replicaof=None):
+        env = dict(os.environ, REDIS_HOST="127.0.0.1", REDIS_PORT=str(port))
+        if replicaof is not None:
+            env["REDIS_REPLICAOF"] = replicaof
+        return subprocess.Popen([sys.executable, os.path.join(root, "entrypoint.py")], env=env,
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    async def connect(port):
+        deadline = time.monotonic() + 10
+        while True:
+            try:
+                return await asyncio.open_connection("127.0.0.1", port)
+            except OSError:
+                assert time.monotonic() < deadline, "server did not start"
+                await asyncio.sleep(0.05)
+
+    async def scenario():
+        mr, mw = await connect(master_port)
+        assert await _call(mr, mw, b"SET before sync\r\n") == b"OK"
+        replica = spawn(replica_port, f"127.0.0.1 {master_port}")
+        try:
+            rr, rw = await connect(replica_port)
+            await _call(mr, mw, b"SET after sync\r\n")
+
+            async def replicated():
+                return (await _call(rr, rw, b"GET before\r\n") == b"sync"
+                        and await _call(rr, rw, b"GET after\r\n") == b"sync")
+            await _wait_for(replicated, 10)
+            role = await _call(rr, rw, b"ROLE\r\n")
+            assert role == b"*5"
+            rw.close()
+        finally:
+            replica.terminate()
+            replica.wait(10)
+        mw.close()
+
+    master = spawn(master_port)
+    try:
+        asyncio.run(asyncio.wait_for(scenario(), 30))
+    finally:
+        master.terminate()
+        master.wait(10)
+
+
+def test_tcp_binary_values_are_framed_in_bytes():
+    """Тест: двоичное значение приходит с длиной в байтах, поток ответов не сбивается."""
+    async def scenario():
+        server = TCPServer(host="127.0.0.1", port=0)
+        task = asyncio.create_task(server.start())
+        await asyncio.sleep(0.1)
+        reader, writer = await asyncio.open_connection('127.0.0.1', server.port)
+        assert await _call(reader, writer, b"SETBIT bm 0 1\r\n") == b":0"
+        writer.write(b"GET bm\r\nSET s \xd0\xb6\r\nGET s\r\n")
+        await writer.drain()
+        assert await reader.readexactly(7) == b"$1\r\n\x80\r\n"
+        assert await _call(reader, writer, b"") == b"OK"
+        assert await reader.readexactly(8) == b"$2\r\n\xd0\xb6\r\n"
+        writer.close()
+        await writer.wait_closed()
+        await server.stop()
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+
+    asyncio.run(scenario())
+
+
+def test_tcp_binary_arguments_round_trip(tmp_path):
+    """Тест: двоичные аргументы не искажаются при записи, чтении по смещениям и загрузке журнала."""
+    def command(*args):
+        return b"*%d\r\n" % len(args) + b"".join(b"$%d\r\n%s\r\n" % (len(arg), arg) for arg in args)
+
+    async def scenario():
+        value = b"\xff\xe2\x82\x80\xc3"
+        server = TCPServer(host="127.0.0.1", port=0, dir=str(tmp_path), appendonly=True)
+        task = asyncio.create_task(server.start())
+        await asyncio.sleep(0.1)
+        reader, writer = await asyncio.open_connection('127.0.0.1', server.port)
+        assert await _call(reader, writer, command(b"SET", b"k\xfe", b"\xff\x00\xfe")) == b"OK"
+        assert await _call(reader, writer, command(b"APPEND", b"k\xfe", b"\x80\xc3")) == b":5"
+        assert await _call(reader, writer, command(b"SETRANGE", b"k\xfe", b"1", b"\xe2\x82")) == b":5"
+        assert await _call(reader, writer, command(b"STRLEN", b"k\xfe")) == b":5"
+        assert await _call(reader, writer, command(b"GETRANGE", b"k\xfe", b"1", b"3")) == b"\xe2\x82\x80"
+        assert await _call(reader, writer, command(b"SET", b"s", b"\xd0\xb6\xff")) == b"OK"
+        assert await _call(reader, writer, command(b"STRLEN", b"s")) == b":3"
+        writer.close()
+        await writer.wait_closed()
+        await server.stop()
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+
+        server = TCPServer(host="127.0.0.1", port=0, dir=str(tmp_path), appendonly=True)
+        task = asyncio.create_task(server.start())
+        await asyncio.sleep(0.1)
+        reader, writer = await asyncio.open_connection('127.0.0.1', server.port)
+        assert await _call(reader, writer, command(b"GET", b"k\xfe")) == value
+        assert await _call(reader, writer, command(b"GET", b"s")) == b"\xd0\xb6\xff"
+        writer.close()
+        await writer.wait_closed()
+        await server.stop()
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+
+    asyncio.run(scenario())
@@ -0,0 +1,304 @@
+import os
+
+from src.server.aof import AppendOnlyFile, Manifest, command_effects, encode_command, replay
+from src.server.databases import Databases
+from src.server.stream import Stream
+
+FUNCTION_LIBRARY = '''#!python name=lib
+def put(keys, args):
+    return redis.call("SET", keys[0], args[0])
+
+redis.register_function("put", put)
+
+
+def put_both(keys, args):
+    redis.call("SET", keys[0], args[0])
+    return redis.call("SET", keys[1], args[0])
+
+redis.register_function("put_both", put_both)
+'''
+
+
+def _databases(tmp_path, fsync="no"):
+    databases = Databases(4)
+    databases.persistence.dir = str(tmp_path)
+    databases.persistence.appendonly = True
+    databases.persistence.appendfsync = fsync
+    return databases
+
+
+def _incr_file(databases):
+    persistence = databases.persistence
+    persistence.aof.flush()
+    with open(persistence.aof.path, "rb") as file:
+        return file.read()
+
+
+def test_aof_logs_writes_and_replays(tmp_path):
+    """Тест: журнал содержит только записи, относительные TTL и `*` переписаны, запуск восстанавливает данные."""
+    seeded = _databases(tmp_path)
+    seeded[0].set("before", "snapshot")
+    seeded.persistence.save()
+    databases = _databases(tmp_path)
+    assert databases.persistence.load() == 1
+    db0, db2 = databases.handlers[0], databases.handlers[2]
+
+    db0.handle("SET", ["a", "1", "EX", "100"])
+    db0.handle("GET", ["a"])
+    db0.handle("SET", ["nx", "1", "NX"])
+    db0.handle("SET", ["nx", "2", "NX"])
+    db0.handle("EXPIRE", ["nx", "50"])
+    stream_id = db0.handle("XADD", ["st", "*", "f", "v"])[1]
+    db2.handle("HSET", ["h", "f", "v"])
+    db0.handle("FUNCTION", ["LOAD", FUNCTION_LIBRARY])
+    db0.handle("FCALL", ["put", "1", "viafunc", "x"])
+    db0.handle("MOVE", ["nx", "3"])
+
+    log = _incr_file(databases)
+    assert b"GET" not in log and b"EXPIRE\r\n" not in log and b"FCALL" not in log
+    assert b"PXAT" in log and b"PEXPIREAT" in log and stream_id.encode() in log
+    assert log.count(b"SELECT") == 3
+    assert b"$7\r\nviafunc" in log
+    databases.persistence.disable_aof()
+
+    restored = _databases(tmp_path)
+    restored.persistence.load()
+    r0, r3 = restored.handlers[0], restored.handlers[3]
+    assert r0.handle("GET", ["before"]) == (True, "snapshot")
+    assert r0.handle("GET", ["a"]) == (True, "1")
+    assert 0 < r0.handle("TTL", ["a"])[1] <= 100
+    assert r3.handle("GET", ["nx"]) == (True, "1")
+    assert 0 < r3.handle("TTL", ["nx"])[1] <= 50
+    assert r0.handle("XRANGE", ["st", "-", "+"])[1][0][0] == stream_id
+    assert restored.handlers[2].handle("HGET", ["h", "f"]) == (True, "v")
+    assert r0.handle("GET", ["viafunc"]) == (True, "x")
+    assert r0.handle("FCALL", ["put", "1", "again", "y"]) == (True, "OK")
+    restored.persistence.disable_aof()
+
+
+def test_aof_expired_keys_logged_as_del_and_truncated_tail(tmp_path):
+    """Тест: удаление истекшего ключа пишется как DEL; незавершенная последняя команда отбрасывается."""
+    databases = _databases(tmp_path)
+    databases.persistence.load()
+    handler = databases.handlers[0]
+    handler.handle("SET", ["gone", "v", "PX", "1"])
+    handler.handle("SET", ["kept", "v"])
+    databases[0]._data["gone"].expire_at = 0
+    assert handler.handle("GET", ["gone"]) == (True, None)
+    log = _incr_file(databases)
+    assert log.endswith(b"*2\r\n$3\r\nDEL\r\n$4\r\ngone\r\n")
+    path = databases.persistence.aof.path
+    databases.persistence.disable_aof()
+
+    with open(path, "ab") as file:
+        file.write(b"*3\r\n$3\r\nSET\r\n$4\r\nhalf")
+    restored = _databases(tmp_path)
+    restored.persistence.load()
+    assert restored.handlers[0].handle("GET", ["kept"]) == (True, "v")
+    assert restored.handlers[0].handle("GET", ["half"]) == (True, None)
+    assert os.path.getsize(path) == len(log)
+    restored.persistence.disable_aof()
+
+
+def test_xadd_effects_rewrite_only_the_id():
+    """Тест: XADD пишется с фактическим ID на месте аргумента ID (после опций); неудачный — не пишется."""
+    assert command_effects(None, "XADD", ["s", "1-1", "f", "*"], "1-1") == [["XADD", "s", "1-1", "f", "*"]]
+    args = ["s", "NOMKSTREAM", "MAXLEN", "~", "10", "LIMIT", "5", "*", "f", "v"]
+    assert command_effects(None, "XADD", args, "5-0") == [["XADD", *args[:7], "5-0", "f", "v"]]
+    assert command_effects(None, "XADD", ["s", "MINID", "0", "5-*", "f", "*"], "5-3") == \
+        [["XADD", "s", "MINID", "0", "5-3", "f", "*"]]
+    assert command_effects(None, "XADD", ["s", "*", "f", "v"], "ERR: syntax error") == []
+    assert command_effects(None, "XADD", ["s", "NOMKSTREAM", "*", "f", "v"], None) == []
+
+
+def test_aof_logs_claims_as_they_happened(tmp_path):
+    """Тест: XCLAIM/XAUTOCLAIM пишутся фактически переданными записями; отклоненные команды не пишутся."""
+    databases = _databases(tmp_path)
+    databases.persistence.load()
+    handler = databases.handlers[0]
+    handler.handle("XADD", ["s", "1-1", "f", "v"])
+    handler.handle("XADD", ["s", "2-1", "f", "v"])
+    handler.handle("XGROUP", ["CREATE", "s", "g", "0"])
+    handler.handle("XREADGROUP", ["GROUP", "g", "c1", "STREAMS", "s", ">"])
+    size = len(_incr_file(databases))
+    assert handler.handle("XCLAIM", ["s", "nogroup", "c2", "0", "1-1"])[0] is False
+    assert handler.handle("XGROUP", ["SETID", "s", "nogroup", "0"])[0] is False
+    assert handler.handle("XAUTOCLAIM", ["missing", "g", "c2", "0", "0"])[0] is False
+    assert len(_incr_file(databases)) == size
+
+    group = databases[0].get_typed("s", Stream).groups["g"]
+    group.pel[(1, 1)].delivery_time -= 2000
+    assert handler.handle("XCLAIM", ["s", "g", "c2", "1000", "1-1", "2-1", "JUSTID"]) == (True, ["1-1"])
+    assert handler.handle("XAUTOCLAIM", ["s", "g", "c3", "0", "2-1"])[1][1][0][0] == "2-1"
+    expected = handler.handle("XPENDING", ["s", "g", "-", "+", "10"])[1]
+    log = _incr_file(databases)
+    assert b"$4\r\n1000" not in log and b"XAUTOCLAIM" not in log
+    databases.persistence.disable_aof()
+
+    restored = _databases(tmp_path)
+    restored.persistence.load()
+    pending = restored.handlers[0].handle("XPENDING", ["s", "g", "-", "+", "10"])[1]
+    assert [(entry[0], entry[1], entry[3]) for entry in pending] == \
+        [(entry[0], entry[1], entry[3]) for entry in expected]
+    assert [entry[1] for entry in pending] == ["c2", "c3"]
+    restored.persistence.disable_aof()
+
+
+def test_aof_logs_throttle_as_stored_tat(tmp_path):
+    """Тест: CL.THROTTLE пишется сохраненным TAT с PXAT, и после загрузки лимит продолжается."""
+    databases = _databases(tmp_path)
+    databases.persistence.load()
+    handler = databases.handlers[0]
+    for _ in range(3):
+        handler.handle("CL.THROTTLE", ["rate", "4", "1", "60"])
+    assert handler.handle("CL.THROTTLE", ["rate", "0", "1", "60"])[1][0] == 1
+    log = _incr_file(databases)
+    assert b"CL.THROTTLE" not in log and log.count(b"PXAT") == 3
+    expire_at = databases[0].expire_time("rate")
+    databases.persistence.disable_aof()
+
+    restored = _databases(tmp_path)
+    restored.persistence.load()
+    assert abs(restored[0].expire_time("rate") - expire_at) < 0.001
+    assert restored.handlers[0].handle("CL.THROTTLE", ["rate", "4", "1", "60"])[1][2] == 1
+    assert isinstance(restored[0].get("rate")[1], float)
+    restored.persistence.disable_aof()
+
+
+def test_aof_transactions_are_atomic(tmp_path):
+    """Тест: эффекты FCALL и транзакции пишутся в MULTI/EXEC; оборванная транзакция при загрузке отбрасывается."""
+    databases = _databases(tmp_path)
+    databases.persistence.load()
+    handler = databases.handlers[0]
+    handler.handle("FUNCTION", ["LOAD", FUNCTION_LIBRARY])
+    handler.handle("FCALL", ["put", "1", "single", "x"])
+    handler.handle("FCALL", ["put_both", "2", "a", "b", "x"])
+    with databases.persistence.transaction():
+        handler.handle("SET", ["c", "1"])
+        databases.handlers[1].handle("SET", ["d", "1"])
+    log = _incr_file(databases)
+    assert log.count(b"MULTI") == 2 and log.count(b"EXEC") == 2
+    assert b"$3\r\nSET\r\n$6\r\nsingle" in log.split(b"MULTI")[0]
+    path = databases.persistence.aof.path
+    databases.persistence.disable_aof()
+
+    tail = bytearray()
+    for argv in (["MULTI"], ["SET", "e", "1"], ["SET", "f", "1"]):
+        encode_command(tail, argv)
+    with open(path, "ab") as file:
+        file.write(tail)
+    restored = _databases(tmp_path)
+    restored.persistence.load()
+    r0 = restored.handlers[0]
+    assert [r0.handle("GET", [key])[1] for key in ("a", "b", "c", "e")] == ["x", "x", "1", None]
+    assert restored.handlers[1].handle("GET", ["d"]) == (True, "1")
+    assert os.path.getsize(path) == len(log)
+    restored.persistence.disable_aof()
+
+    assert replay(log + bytes(tail), restored.handlers)[1] == len(log)
+
+
+def test_aof_group_commit_and_manifest(tmp_path):
+    """Тест: команды накапливаются в буфере и пишутся одним пакетом; манифест перечисляет файлы."""
+    aof = AppendOnlyFile(str(tmp_path / "log.aof"), "always")
+    aof.feed(0, [["SET", "a", "1"], ["SET", "b", "2"]])
+    aof.feed(1, [["DEL", "a"]])
+    assert aof.pending and aof.size == 0
+    assert aof.flush() and not aof.pending
+    aof.close()
+    with open(tmp_path / "log.aof", "rb") as file:
+        data = file.read()
+    assert len(data) == aof.size
+
+    databases = Databases(2)
+    assert replay(data, databases.handlers) == (5, len(data))
+    assert databases[0].get("b") == (True, "2") and databases[1].size() == 0
+
+    manifest = Manifest(("x.1.base.rdb", 1), [("x.1.incr.aof", 1), ("x.2.incr.aof", 2)])
+    manifest.write(str(tmp_path / "x.manifest"))
+    loaded = Manifest.read(str(tmp_path / "x.manifest"))
+    assert loaded.files() == ["x.1.base.rdb", "x.1.incr.aof", "x.2.incr.aof"] and loaded.seq == 2
+
+
+def test_config_appendonly_and_info(tmp_path):
+    """Тест CONFIG SET appendonly/appendfsync во время работы и полей INFO persistence."""
+    databases = Databases(2)
+    databases.persistence.dir = str(tmp_path)
+    handler = databases.handlers[0]
+    handler.handle("SET", ["k", "v"])
+    assert "aof_enabled:0" in handler.handle("INFO", ["persistence"])[1]
+
+    assert handler.handle("CONFIG", ["SET", "appendonly", "yes"]) == (True, "OK")
+    databases.persistence.wait()
+    assert handler.handle("CONFIG", ["SET", "appendfsync", "sometimes"])[0] is False
+    assert handler.handle("CONFIG", ["SET", "appendfsync", "always"]) == (True, "OK")
+    assert handler.handle("CONFIG", ["SET", "appendfilename", "x.aof"])[0] is False
+    handler.handle("SET", ["k2", "v2"])
+    info = handler.handle("INFO", ["persistence"])[1]
+    assert "aof_enabled:1" in info and "aof_buffer_length:" in info
+    assert handler.handle("CONFIG", ["SET", "appendonly", "no"]) == (True, "OK")
+    assert databases[0].propagate is None
+
+    restored = _databases(tmp_path)
+    restored.persistence.load()
+    assert restored[0].get("k") == (True, "v") and restored[0].get("k2") == (True, "v2")
+    restored.persistence.disable_aof()
+
+
+def test_bgrewriteaof_compacts_log_without_losing_concurrent_writes(tmp_path):
+    """Тест: перезапись заменяет журнал снимком; записи во время перезаписи попадают в новый файл."""
+    databases = _databases(tmp_path)
+    databases.persistence.load()
+    persistence, handler = databases.persistence, databases.handlers[0]
+    for i in range(200):
+        handler.handle("SET", ["counter", str(i)])
+    handler.handle("APPEND", ["log", "a"])
+    persistence.aof.flush()
+    grown = persistence.aof_current_size
+
+    assert handler.handle("BGREWRITEAOF", []) == (True, "Background append only file rewriting started")
+    assert handler.handle("BGREWRITEAOF", [])[0] is False
+    assert handler.handle("BGSAVE", [])[0] is False
+    handler.handle("APPEND", ["log", "b"])
+    assert "aof_rewrite_in_progress:1" in handler.handle("INFO", ["persistence"])[1]
+    assert persistence.wait(10)
+
+    info = handler.handle("INFO", ["persistence"])[1]
+    assert "aof_rewrite_in_progress:0" in info and "aof_last_bgrewrite_status:ok" in info
+    assert persistence.aof_rewrites == 2 and persistence.aof_current_size < grown
+    names = sorted(os.listdir(persistence.aof_dir))
+    assert names == ["appendonly.aof.2.base.rdb", "appendonly.aof.2.incr.aof", "appendonly.aof.manifest"]
+    handler.handle("APPEND", ["log", "c"])
+    persistence.disable_aof()
+
+    restored = _databases(tmp_path)
+    restored.persistence.load()
+    assert restored[0].get("counter") == (True, "199")
+    assert restored.handlers[0].handle("STRLEN", ["log"]) == (True, 3)
+    assert restored.handlers[0].handle("GETRANGE", ["log", "0", "-1"])[1] == b"abc"
+    # после загрузки рост журнала отсчитывается от его размера при запуске
+    assert restored.persistence.aof_base_size == restored.persistence.aof_current_size == sum(
+        os.path.getsize(os.path.join(persistence.aof_dir, name)) for name in names[:2])
+    restored.persistence.disable_aof()
+
+
+def test_auto_aof_rewrite_on_growth(tmp_path):
+    """Тест: cron запускает перезапись, когда журнал вырос на заданный процент и больше минимума."""
+    databases = _databases(tmp_path)
+    databases.persistence.load()
+    persistence, handler = databases.persistence, databases.handlers[0]
+    assert handler.handle("CONFIG", ["SET", "auto-aof-rewrite-min-size", "1000"]) == (True, "OK")
+    assert handler.handle("CONFIG", ["GET", "auto-aof-rewrite-percentage"]) == \
+        (True, ["auto-aof-rewrite-percentage", "100"])
+    handler.handle("SET", ["k", "v"])
+    persistence.aof.flush()
+    persistence.cron()
+    assert not persistence.aof_rewrite_in_progress and persistence.aof_rewrites == 1
+
+    for i in range(100):
+        handler.handle("SET", ["k", str(i)])
+    persistence.aof.flush()
+    persistence.cron()
+    assert persistence.wait(10) and persistence.aof_rewrites == 2
+    assert persistence.aof_current_size == persistence.aof_base_size < 1000
+    persistence.disable_aof()
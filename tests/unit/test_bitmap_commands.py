@@ -0,0 +1,128 @@
+import random
+
+from src.server import bitops
+from src.server.commands.bitmaps import (
+    SetBitCommand, GetBitCommand, BitCountCommand, BitPosCommand, BitOpCommand
+)
+from src.server.storage import Storage
+
+
+def test_setbit_and_getbit():
+    """Тест команд SETBIT и GETBIT."""
+    storage = Storage()
+    setbit = SetBitCommand(storage)
+    getbit = GetBitCommand(storage)
+
+    assert setbit.execute(["bm", "7", "1"]) == (True, 0)
+    assert setbit.execute(["bm", "7", "1"]) == (True, 1)
+    assert getbit.execute(["bm", "7"]) == (True, 1)
+    assert getbit.execute(["bm", "6"]) == (True, 0)
+    assert getbit.execute(["bm", "1000"]) == (True, 0)
+    assert storage.get_buffer("bm") == bytearray(b"\x01")
+
+    assert setbit.execute(["bm", "7", "0"]) == (True, 1)
+    assert getbit.execute(["bm", "7"]) == (True, 0)
+
+    # Неверные аргументы
+    success, result = setbit.execute(["bm", "-1", "1"])
+    assert success is False and "out of range" in result
+    success, result = setbit.execute(["bm", "1", "2"])
+    assert success is False and "out of range" in result
+    success, result = getbit.execute(["bm"])
+    assert success is False and "wrong number of arguments" in result
+
+
+def test_bitcount_command():
+    """Тест команды BITCOUNT с диапазонами BYTE и BIT."""
+    storage = Storage()
+    cmd = BitCountCommand(storage)
+    storage.set("k", "foobar")
+
+    assert cmd.execute(["k"]) == (True, 26)
+    assert cmd.execute(["k", "0", "0"]) == (True, 4)
+    assert cmd.execute(["k", "1", "1"]) == (True, 6)
+    assert cmd.execute(["k", "1", "1", "BYTE"]) == (True, 6)
+    assert cmd.execute(["k", "5", "30", "BIT"]) == (True, 17)
+    assert cmd.execute(["k", "-2", "-1"]) == (True, 7)
+    assert cmd.execute(["absent"]) == (True, 0)
+
+    success, result = cmd.execute(["k", "0"])
+    assert success is False and "wrong number of arguments" in result
+    success, result = cmd.execute(["k", "0", "1", "WORD"])
+    assert success is False and "syntax error" in result
+
+
+def test_bitpos_command():
+    """Тест команды BITPOS."""
+    storage = Storage()
+    cmd = BitPosCommand(storage)
+
+    storage.setrange("k", 0, b"\xff\xf0\x00")
+    assert cmd.execute(["k", "0"]) == (True, 12)
+
+    storage.setrange("k2", 0, b"\x00\xff\xf0")
+    assert cmd.execute(["k2", "1", "0"]) == (True, 8)
+    assert cmd.execute(["k2", "1", "2", "-1", "BYTE"]) == (True, 16)
+    assert cmd.execute(["k2", "1", "7", "15", "BIT"]) == (True, 8)
+
+    # Все биты установлены: без end возвращается позиция за концом значения
+    storage.setrange("ones", 0, b"\xff\xff")
+    assert cmd.execute(["ones", "0"]) == (True, 16)
+    assert cmd.execute(["ones", "0", "0", "-1"]) == (True, -1)
+
+    assert cmd.execute(["absent", "1"]) == (True, -1)
+    assert cmd.execute(["absent", "0"]) == (True, 0)
+
+    success, result = cmd.execute(["k", "2"])
+    assert success is False
+
+
+def test_bitop_command():
+    """Тест команды BITOP."""
+    storage = Storage()
+    cmd = BitOpCommand(storage)
+    storage.set("a", "foobar")
+    storage.set("b", "abcdef")
+
+    assert cmd.execute(["AND", "dest", "a", "b"]) == (True, 6)
+    assert storage.get_buffer("dest") == bytearray(b"`bc`ab")
+
+    assert cmd.execute(["OR", "dest", "a", "b"]) == (True, 6)
+    assert storage.get_buffer("dest") == bytearray(b"goofev")
+
+    # Короткое значение дополняется нулями
+    storage.setrange("short", 0, b"\xff")
+    storage.setrange("long", 0, b"\x0f\x0f")
+    assert cmd.execute(["XOR", "dest", "short", "long"]) == (True, 2)
+    assert storage.get_buffer("dest") == bytearray(b"\xf0\x0f")
+
+    assert cmd.execute(["NOT", "dest", "short"]) == (True, 1)
+    assert storage.get_buffer("dest") == bytearray(b"\x00")
+
+    # Пустой результат удаляет ключ назначения
+    assert cmd.execute(["AND", "dest", "absent1", "absent2"]) == (True, 0)
+    assert storage.exists("dest") is False
+
+    success, result = cmd.execute(["NOT", "dest", "a", "b"])
+    assert success is False and "single source key" in result
+    success, result = cmd.execute(["NAND", "dest", "a"])
+    assert success is False and "syntax error" in result
+
+
+def test_bitops_match_per_bit_reference():
+    """Тест векторизованных функций против поразрядной эталонной реализации."""
+    rng = random.Random(42)
+    data = bytes(rng.getrandbits(8) for _ in range(257))
+    bits = [(byte >> (7 - i)) & 1 for byte in data for i in range(8)]
+
+    assert bitops.count_bytes(data) == sum(bits)
+    for start, end in [(0, 0), (3, 1000), (-50, -3), (13, 13), (100, 99)]:
+        bounds = bitops.normalize_range(start, end, len(bits))
+        expected = sum(bits[bounds[0]:bounds[1] + 1]) if bounds else 0
+        assert bitops.bitcount(data, start, end, bit_unit=True) == expected
+
+    for bit in (0, 1):
+        for start, end in [(0, 2055), (9, 700), (1001, 1001)]:
+            window = bits[start:end + 1]
+            expected = start + window.index(bit) if bit in window else -1
+            assert bitops.bitpos(data, bit, start, end, bit_unit=True) == expected
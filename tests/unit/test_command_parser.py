@@ -39,3 +39,35 @@ def test_parse_command_with_quotes():
     assert CommandParser.parse_command("") == []
 
 
+
+
+def test_format_error_reply_inside_array():
+    """Тест, что ErrorReply внутри массива кодируется как RESP-ошибка."""
+    from src.server.command_parser import ErrorReply
+
+    assert CommandParser.format_response(["OK", ErrorReply("ERR: boom")]) == "*2\r\n$2\r\nOK\r\n-ERR: boom\r\n"
+
+
+def test_format_response_resp3_types():
+    """Тест типизированных ответов RESP3 и их совместимого вида в RESP2."""
+    from src.server.command_parser import OK, MapReply, Push, SetReply
+
+    assert CommandParser.format_response(None, 3) == "_\r\n"
+    assert CommandParser.format_response(True, 3) == "#t\r\n"
+    assert CommandParser.format_response(1.5, 3) == ",1.5\r\n"
+    assert CommandParser.format_response(float("inf"), 3) == ",inf\r\n"
+    assert CommandParser.format_response(OK, 3) == "+OK\r\n"
+    assert CommandParser.format_response(MapReply(["f", 1]), 3) == "%1\r\n$1\r\nf\r\n:1\r\n"
+    assert CommandParser.format_response(SetReply(["a"]), 3) == "~1\r\n$1\r\na\r\n"
+    assert CommandParser.format_response(Push(["invalidate", None]), 3) == ">2\r\n$10\r\ninvalidate\r\n_\r\n"
+
+    assert CommandParser.format_response(OK) == "$2\r\nOK\r\n"
+    assert CommandParser.format_response(MapReply(["f", 1])) == "*2\r\n$1\r\nf\r\n:1\r\n"
+    assert CommandParser.format_response(Push(["message", "c", "m"])) == "*3\r\n$7\r\nmessage\r\n$1\r\nc\r\n$1\r\nm\r\n"
+
+
+def test_format_response_byte_lengths():
+    """Тест: длина bulk-строки считается в байтах, двоичные значения передаются без изменений."""
+    assert CommandParser.encode(CommandParser.format_response("привет")) == b"$12\r\n" + "привет".encode() + b"\r\n"
+    assert CommandParser.encode(CommandParser.format_response(bytearray(b"\x80\xff"))) == b"$2\r\n\x80\xff\r\n"
+    assert CommandParser.encode(CommandParser.format_response([b"\x00\xc3"])) == b"*1\r\n$2\r\n\x00\xc3\r\n"
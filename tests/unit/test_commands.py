@@ -1,6 +1,11 @@
-from src.server.commands.set import SetCommand
-from src.server.commands.get import GetCommand
-from src.server.storage import Storage
+import time
+
+import pytest
+
+from src.server.commands.set import SetCommand, SetNxCommand, MSetCommand, MSetNxCommand
+from src.server.commands.get import GetCommand, MGetCommand, GetExCommand, GetDelCommand, GetSetCommand
+from src.server.commands.ttl import DelIfEqCommand
+from src.server.storage import Storage, WrongTypeError
 
 
 def test_set_command_basic():
@@ -148,3 +153,96 @@ def test_set_command_storage_failure():
     success, result = cmd.execute(["key", "value"])
     assert success is False
     assert result == "ERR: failed to set value"
+
+
+def test_mget_mset_and_msetnx():
+    """Тест пакетных команд MGET, MSET и MSETNX."""
+    storage = Storage()
+    assert MSetCommand(storage).execute(["a", "1", "b", "2"]) == (True, "OK")
+    assert MSetCommand(storage).execute(["a", "1", "b"])[0] is False
+    storage.set("ttl", "x", ttl=100)
+    storage.hset("hash", {"f": "v"})
+    storage.set("expired", "x", ttl=100)
+    storage._data["expired"].expire_at = 0
+
+    assert MGetCommand(storage).execute(["a", "missing", "b", "hash", "expired"]) == (
+        True, ["1", None, "2", None, None]
+    )
+    assert storage.exists("expired") is False
+
+    assert MSetNxCommand(storage).execute(["c", "3", "a", "9"]) == (True, 0)
+    assert storage.get("c") == (False, None)
+    assert MSetNxCommand(storage).execute(["c", "3", "d", "4"]) == (True, 1)
+    assert MSetCommand(storage).execute(["ttl", "y"]) == (True, "OK")
+    assert storage.ttl("ttl") == -1
+    assert MGetCommand(storage).execute(["c", "d", "ttl"]) == (True, ["3", "4", "y"])
+
+
+def test_set_conditional_options():
+    """Тест SET NX/XX/GET/KEEPTTL/EXAT и SETNX/GETSET."""
+    storage = Storage()
+    cmd = SetCommand(storage)
+
+    assert cmd.execute(["k", "v1", "XX"]) == (True, None)
+    assert cmd.execute(["k", "v1", "NX", "EX", "100"]) == (True, "OK")
+    assert cmd.execute(["k", "v2", "NX"]) == (True, None)
+    assert cmd.execute(["k", "v2", "XX", "KEEPTTL", "GET"]) == (True, "v1")
+    assert storage.get("k") == (True, "v2")
+    assert 0 < storage.ttl("k") <= 100
+    assert cmd.execute(["k", "v3", "GET"]) == (True, "v2")
+    assert storage.ttl("k") == -1
+    assert cmd.execute(["k", "v4", "NX", "GET"]) == (True, "v3")
+    assert storage.get("k") == (True, "v3")
+
+    assert cmd.execute(["k", "v", "NX", "XX"]) == (False, "ERR: syntax error")
+    assert cmd.execute(["k", "v", "EX", "10", "KEEPTTL"]) == (False, "ERR: syntax error")
+    assert cmd.execute(["k", "v", "EXAT", str(int(time.time()) + 100)]) == (True, "OK")
+    assert 90 < storage.ttl("k") <= 100
+    assert cmd.execute(["k", "v", "PXAT", str(int(time.time() * 1000) - 1000)]) == (True, "OK")
+    assert storage.exists("k") is False
+
+    assert SetNxCommand(storage).execute(["n", "1"]) == (True, 1)
+    assert SetNxCommand(storage).execute(["n", "2"]) == (True, 0)
+    assert GetSetCommand(storage).execute(["n", "3"]) == (True, "1")
+    assert GetSetCommand(storage).execute(["new", "3"]) == (True, None)
+
+    storage.hset("h", {"f": "v"})
+    with pytest.raises(WrongTypeError):
+        cmd.execute(["h", "v", "GET"])
+
+
+def test_getex_and_getdel():
+    """Тест GETEX (изменение TTL при чтении) и GETDEL."""
+    storage = Storage()
+    storage.set("s", "data", ttl=10)
+    getex = GetExCommand(storage)
+
+    assert getex.execute(["s"]) == (True, "data")
+    assert 0 < storage.ttl("s") <= 10
+    assert getex.execute(["s", "EX", "1000"]) == (True, "data")
+    assert storage.ttl("s") > 900
+    assert getex.execute(["s", "PERSIST"]) == (True, "data")
+    assert storage.ttl("s") == -1
+    assert getex.execute(["s", "PX", "0"]) == (False, "ERR: invalid expire time in 'getex' command")
+    assert getex.execute(["s", "PERSIST", "1"]) == (False, "ERR: syntax error")
+    assert getex.execute(["missing", "EX", "10"]) == (True, None)
+
+    storage.append("s", "!")
+    assert GetDelCommand(storage).execute(["s"]) == (True, bytearray(b"data!"))
+    assert storage.exists("s") is False
+    assert GetDelCommand(storage).execute(["s"]) == (True, None)
+
+
+def test_lock_acquire_extend_release():
+    """Тест блокировки с токеном: захват, продление и освобождение — по одной команде."""
+    storage = Storage()
+    cmd = SetCommand(storage)
+
+    assert cmd.execute(["lock", "token-a", "NX", "PX", "30000"]) == (True, "OK")
+    assert cmd.execute(["lock", "token-b", "NX", "PX", "30000"]) == (True, None)
+    assert cmd.execute(["lock", "token-a", "IFEQ", "token-b", "PX", "60000"]) == (True, None)
+    assert cmd.execute(["lock", "token-a", "IFEQ", "token-a", "PX", "60000"]) == (True, "OK")
+    assert storage.ttl("lock") > 30
+    assert DelIfEqCommand(storage).execute(["lock", "token-b"]) == (True, 0)
+    assert DelIfEqCommand(storage).execute(["lock", "token-a"]) == (True, 1)
+    assert storage.exists("lock") is False
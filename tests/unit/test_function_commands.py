@@ -0,0 +1,141 @@
+from src.server.command_handler import CommandHandler
+from src.server.databases import Databases
+from src.server.storage import Storage
+
+LIBRARY = '''#!python name=counters
+def incr_max(keys, args):
+    current = int(redis.call("GET", keys[0]) or 0) + int(args[0])
+    limit = int(args[1])
+    if current > limit:
+        return redis.error_reply("ERR limit exceeded")
+    redis.call("SET", keys[0], current)
+    return current
+
+def safe_hget(keys, args):
+    reply = redis.pcall("HGET", keys[0], args[0])
+    return [reply, [x * 2 for x in range(3)]]
+
+def spin(keys, args):
+    while True:
+        pass
+
+redis.register_function("incr_max", incr_max)
+redis.register_function("safe_hget", safe_hget)
+redis.register_function("spin", spin)
+'''
+
+
+def test_function_load_and_fcall():
+    """Тест FUNCTION LOAD и FCALL: несколько команд за один вызов и ошибки функции."""
+    handler = CommandHandler(Storage())
+    assert handler.handle("FUNCTION", ["LOAD", LIBRARY]) == (True, "counters")
+    assert handler.handle("FUNCTION", ["LOAD", LIBRARY])[1] == "ERR: Library 'counters' already exists"
+    assert handler.handle("FUNCTION", ["LOAD", "REPLACE", LIBRARY]) == (True, "counters")
+
+    assert handler.handle("FCALL", ["incr_max", "1", "hits", "3", "5"]) == (True, 3)
+    assert handler.handle("FCALL", ["incr_max", "1", "hits", "2", "5"]) == (True, 5)
+    assert handler.handle("FCALL", ["incr_max", "1", "hits", "1", "5"]) == (False, "ERR limit exceeded")
+    assert handler.handle("GET", ["hits"]) == (True, "5")
+
+    # pcall возвращает ошибку команды значением, а не прерывает функцию
+    ok, result = handler.handle("FCALL", ["safe_hget", "1", "hits", "f"])
+    assert ok is True
+    assert result[0].startswith("WRONGTYPE") and result[1] == [0, 2, 4]
+
+    assert handler.handle("FCALL", ["missing", "0"]) == (False, "ERR: Function not found")
+    assert handler.handle("FCALL", ["incr_max", "2", "k"])[1] == \
+        "ERR: Number of keys can't be greater than number of args"
+
+
+def test_function_limits_and_restricted_environment():
+    """Тест лимита шагов и запрета небезопасных конструкций."""
+    storage = Storage()
+    storage.functions.max_steps = 10_000
+    handler = CommandHandler(storage)
+    handler.handle("FUNCTION", ["LOAD", LIBRARY])
+    ok, error = handler.handle("FCALL", ["spin", "0"])
+    assert ok is False and "limit of 10000 steps" in error
+
+    for code in ("import os", "x = ().__class__", "y = '{0.__class__}'.format(1)", "open('/etc/passwd')"):
+        ok, error = handler.handle("FUNCTION", ["LOAD", "#!python name=bad\n" + code])
+        assert ok is False, code
+    assert handler.handle("FUNCTION", ["LOAD", "#!lua name=bad\nreturn 1"])[1] == "ERR: Engine 'lua' not found"
+
+
+ADMIN = '''#!python name=admin
+def run(keys, args):
+    return redis.pcall(*args)
+
+redis.register_function("run", run)
+'''
+
+
+def test_functions_cannot_call_admin_commands():
+    """Тест: команды администрирования и смены базы недоступны из функций, команды данных — доступны."""
+    databases = Databases(2)
+    handler = databases.handlers[0]
+    handler.handle("SET", ["k", "v"])
+    handler.handle("FUNCTION", ["LOAD", ADMIN])
+    for argv in (["FLUSHALL"], ["FLUSHDB"], ["CONFIG", "SET", "appendonly", "yes"], ["SWAPDB", "0", "1"],
+                 ["REPLICAOF", "127.0.0.1", "6390"], ["SLAVEOF", "127.0.0.1", "6390"], ["SAVE"],
+                 ["BGSAVE"], ["BGREWRITEAOF"], ["SELECT", "1"], ["FCALL", "run", "0"], ["FUNCTION", "FLUSH"]):
+        assert handler.handle("FCALL", ["run", "0", *argv]) == \
+            (False, f"ERR: command '{argv[0]}' is not allowed from functions"), argv
+    assert handler.handle("FCALL", ["run", "0", "GET", "k"]) == (True, "v")
+    assert databases.replication.role == "master" and databases.persistence.appendonly is False
+
+
+ESCAPING = '''#!python name=escaping
+def swallow(keys, args):
+    while True:
+        try:
+            try:
+                while True:
+                    pass
+            except Undefined:
+                pass
+        except Exception:
+            redis.call("SET", keys[0], "after kill")
+            return "survived"
+
+def builtin_loop(keys, args):
+    return sum(range(300000000))
+
+redis.register_function("swallow", swallow)
+redis.register_function("builtin_loop", builtin_loop)
+'''
+
+
+def test_function_kill_cannot_be_caught():
+    """Тест: прерывание по лимиту не перехватывается кодом функции, range ограничен лимитом шагов."""
+    storage = Storage()
+    storage.functions.max_steps = 10_000
+    handler = CommandHandler(storage)
+    catch_base = "#!python name=bad\ntry:\n    pass\nexcept Exception.mro()[1]:\n    pass"
+    assert handler.handle("FUNCTION", ["LOAD", catch_base]) == (False, "ERR: attribute 'mro' is not allowed (line 4)")
+
+    assert handler.handle("FUNCTION", ["LOAD", ESCAPING]) == (True, "escaping")
+    ok, error = handler.handle("FCALL", ["swallow", "1", "k"])
+    assert ok is False and "limit of 10000 steps" in error
+    assert storage.exists("k") is False
+    ok, error = handler.handle("FCALL", ["builtin_loop", "0"])
+    assert ok is False and "range of more than 10000 elements" in error
+
+
+def test_function_dump_restore_shared_between_databases():
+    """Тест, что библиотеки общие для всех баз и переносятся через DUMP/RESTORE."""
+    databases = Databases(2)
+    first, second = databases.handlers
+    first.handle("FUNCTION", ["LOAD", LIBRARY])
+    second.handle("FCALL", ["incr_max", "1", "k", "1", "10"])
+    assert databases[1].get("k") == (True, "1")
+    assert databases[0].exists("k") is False
+
+    ok, payload = first.handle("FUNCTION", ["DUMP"])
+    assert first.handle("FUNCTION", ["RESTORE", payload])[0] is False
+    assert first.handle("FUNCTION", ["FLUSH"]) == (True, "OK")
+    assert second.handle("FUNCTION", ["LIST"]) == (True, [])
+    assert first.handle("FUNCTION", ["RESTORE", payload]) == (True, "OK")
+    libraries = second.handle("FUNCTION", ["LIST", "WITHCODE"])[1]
+    assert libraries[0][:2] == ["library_name", "counters"]
+    assert libraries[0][-1] == LIBRARY
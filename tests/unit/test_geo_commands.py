@@ -0,0 +1,138 @@
+import random
+
+import pytest
+
+from src.server import geohash
+from src.server.commands.geo import GeoAddCommand, GeoPosCommand, GeoDistCommand, GeoSearchCommand
+from src.server.sorted_set import SortedSet
+from src.server.storage import Storage, WrongTypeError
+
+
+def _sicily():
+    storage = Storage()
+    GeoAddCommand(storage).execute(
+        ["Sicily", "13.361389", "38.115556", "Palermo", "15.087269", "37.502669", "Catania"]
+    )
+    return storage
+
+
+def test_geoadd_geopos_geodist():
+    """Тест команд GEOADD, GEOPOS и GEODIST."""
+    storage = _sicily()
+    geoadd = GeoAddCommand(storage)
+
+    assert geoadd.execute(["Sicily", "13.361389", "38.115556", "Palermo"]) == (True, 0)
+    assert geoadd.execute(["Sicily", "CH", "13.4", "38.1", "Palermo"]) == (True, 1)
+    assert geoadd.execute(["Sicily", "XX", "1", "1", "Nowhere"]) == (True, 0)
+    geoadd.execute(["Sicily", "13.361389", "38.115556", "Palermo"])
+
+    success, result = geoadd.execute(["Sicily", "0", "89", "Pole"])
+    assert success is False
+    assert "invalid longitude,latitude" in result
+
+    zset = storage.get_typed("Sicily", SortedSet)
+    assert zset.score("Palermo") == 3479099956230698
+
+    success, result = GeoPosCommand(storage).execute(["Sicily", "Palermo", "missing"])
+    lon, lat = map(float, result[0])
+    assert lon == pytest.approx(13.361389, abs=1e-5)
+    assert lat == pytest.approx(38.115556, abs=1e-5)
+    assert result[1] is None
+
+    geodist = GeoDistCommand(storage)
+    assert geodist.execute(["Sicily", "Palermo", "Catania"]) == (True, "166274.1516")
+    assert geodist.execute(["Sicily", "Palermo", "Catania", "km"]) == (True, "166.2742")
+    assert geodist.execute(["Sicily", "Palermo", "missing"]) == (True, None)
+
+
+def test_geoadd_touches_key_only_when_points_change():
+    """Тест: GEOADD без добавленных или сдвинутых точек не считается изменением."""
+    storage = _sicily()
+    geoadd = GeoAddCommand(storage)
+    version, dirty = storage.watch("Sicily"), storage.dirty
+    assert geoadd.execute(["Sicily", "13.361389", "38.115556", "Palermo"]) == (True, 0)
+    assert geoadd.execute(["Sicily", "NX", "13.4", "38.1", "Palermo"]) == (True, 0)
+    assert geoadd.execute(["Sicily", "XX", "1", "1", "Nowhere"]) == (True, 0)
+    assert geoadd.execute(["Missing", "XX", "1", "1", "Nowhere"]) == (True, 0)
+    assert (storage.version("Sicily"), storage.dirty) == (version, dirty)
+    assert geoadd.execute(["Sicily", "13.4", "38.1", "Palermo"]) == (True, 0)
+    assert storage.version("Sicily") != version and storage.dirty == dirty + 1
+    assert geoadd.execute(["New", "1", "1", "Point"]) == (True, 1)
+    assert storage.dirty == dirty + 2
+
+
+def test_geosearch_radius_and_box():
+    """Тест команды GEOSEARCH по радиусу и прямоугольнику."""
+    storage = _sicily()
+    geosearch = GeoSearchCommand(storage)
+
+    success, result = geosearch.execute(
+        ["Sicily", "FROMLONLAT", "15", "37", "BYRADIUS", "200", "km", "ASC", "WITHDIST", "WITHHASH"]
+    )
+    assert result == [["Catania", "56.4413", 3479447370796909], ["Palermo", "190.4424", 3479099956230698]]
+
+    success, result = geosearch.execute(["Sicily", "FROMLONLAT", "15", "37", "BYRADIUS", "100", "km"])
+    assert result == ["Catania"]
+
+    success, result = geosearch.execute(
+        ["Sicily", "FROMLONLAT", "15", "37", "BYBOX", "400", "400", "km", "DESC", "COUNT", "1"]
+    )
+    assert result == ["Palermo"]
+
+    success, result = geosearch.execute(["Sicily", "FROMMEMBER", "Palermo", "BYRADIUS", "1", "km", "WITHCOORD"])
+    assert [item[0] for item in result] == ["Palermo"]
+
+    success, result = geosearch.execute(["Sicily", "FROMLONLAT", "15", "37", "BYRADIUS", "1", "parsec"])
+    assert success is False
+    assert "unsupported unit" in result
+    success, result = geosearch.execute(["Sicily", "FROMLONLAT", "15", "37", "COUNT", "1"])
+    assert success is False
+    assert "BYRADIUS" in result
+
+    storage.set("str", "value")
+    with pytest.raises(WrongTypeError):
+        geosearch.execute(["str", "FROMLONLAT", "15", "37", "BYRADIUS", "1", "km"])
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_geosearch_matches_full_scan(seed):
+    """Покрытие ячейками геохеша находит те же точки, что и полный перебор."""
+    rnd = random.Random(seed)
+    storage = Storage()
+    geoadd = GeoAddCommand(storage)
+    center_lon = rnd.uniform(-179, 179)
+    center_lat = rnd.uniform(-80, 80)
+    args = ["points"]
+    for i in range(2000):
+        lon = (center_lon + rnd.uniform(-3, 3) + 180) % 360 - 180
+        lat = min(max(center_lat + rnd.uniform(-3, 3), -85), 85)
+        args += [str(lon), str(lat), f"p{i}"]
+    geoadd.execute(args)
+
+    zset = storage.get_typed("points", SortedSet)
+    radius_km = rnd.choice([1, 10, 50, 150])
+    expected = set()
+    for score, member in zset:
+        lon, lat = geohash.decode(int(score))
+        if geohash.distance(center_lon, center_lat, lon, lat) <= radius_km * 1000:
+            expected.add(member)
+
+    success, result = GeoSearchCommand(storage).execute(
+        ["points", "FROMLONLAT", str(center_lon), str(center_lat), "BYRADIUS", str(radius_km), "km"]
+    )
+    assert success is True
+    assert set(result) == expected
+
+
+def test_sorted_set_splits_and_ranges():
+    """Тест разбиения sorted set на подсписки и выборки по score."""
+    zset = SortedSet()
+    for i in range(5000):
+        assert zset.add(f"m{i}", float(i % 2500)) is True
+    assert zset.add("m0", 0.0) is False
+    assert len(zset._lists) > 1
+    assert [member for _, member in zset.irange_by_score(10, 11)] == ["m10", "m2510", "m11", "m2511"]
+    assert zset.remove("m10") is True
+    assert zset.remove("m10") is False
+    assert len(zset) == 4999
+    assert list(zset.irange_by_score(3000, 4000)) == []
@@ -0,0 +1,27 @@
+import pytest
+
+from src.server.commands.hashes import (
+    HSetCommand, HGetCommand, HMGetCommand, HDelCommand, HGetAllCommand, HLenCommand
+)
+from src.server.storage import Storage, WrongTypeError
+
+
+def test_hash_commands():
+    """Тест команд HSET, HGET, HMGET, HDEL, HGETALL и HLEN."""
+    storage = Storage()
+    assert HSetCommand(storage).execute(["user:1", "name", "Ann", "age", "30"]) == (True, 2)
+    assert HSetCommand(storage).execute(["user:1", "age", "31", "city", "Berlin"]) == (True, 1)
+    assert HGetCommand(storage).execute(["user:1", "age"]) == (True, "31")
+    assert HGetCommand(storage).execute(["user:1", "missing"]) == (True, None)
+    assert HMGetCommand(storage).execute(["user:1", "name", "missing"]) == (True, ["Ann", None])
+    assert HGetAllCommand(storage).execute(["user:1"]) == (True, ["name", "Ann", "age", "31", "city", "Berlin"])
+    assert HLenCommand(storage).execute(["user:1"]) == (True, 3)
+    assert HSetCommand(storage).execute(["user:1", "name"])[0] is False
+
+    assert HDelCommand(storage).execute(["user:1", "name", "age", "missing"]) == (True, 2)
+    assert HDelCommand(storage).execute(["user:1", "city"]) == (True, 1)
+    assert storage.exists("user:1") is False
+
+    storage.set("plain", "value")
+    with pytest.raises(WrongTypeError):
+        HSetCommand(storage).execute(["plain", "f", "v"])
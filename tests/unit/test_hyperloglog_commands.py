@@ -0,0 +1,135 @@
+import random
+
+from src.server import hyperloglog as hll
+from src.server.commands.hyperloglog import PfAddCommand, PfCountCommand, PfMergeCommand
+from src.server.storage import Storage
+
+
+def test_pfadd_and_pfcount():
+    """Тест команд PFADD и PFCOUNT на малом множестве."""
+    storage = Storage()
+    pfadd = PfAddCommand(storage)
+    pfcount = PfCountCommand(storage)
+
+    assert pfadd.execute(["hll", "a", "b", "c", "d", "e", "f", "g"]) == (True, 1)
+    assert pfcount.execute(["hll"]) == (True, 7)
+
+    # Повторное добавление не меняет регистры
+    assert pfadd.execute(["hll", "a", "b"]) == (True, 0)
+
+    # PFADD без элементов создает ключ
+    assert pfadd.execute(["empty"]) == (True, 1)
+    assert pfadd.execute(["empty"]) == (True, 0)
+    assert pfcount.execute(["empty"]) == (True, 0)
+
+    assert pfcount.execute(["absent"]) == (True, 0)
+
+    success, result = pfadd.execute([])
+    assert success is False
+    assert "wrong number of arguments" in result
+
+
+def test_pfcount_uses_cache_until_pfadd():
+    """Тест кэширования кардинальности в заголовке до следующего PFADD."""
+    storage = Storage()
+    pfadd = PfAddCommand(storage)
+    pfcount = PfCountCommand(storage)
+
+    pfadd.execute(["hll", "x", "y"])
+    buffer = storage.get_buffer("hll")
+    assert buffer[15] & 0x80
+
+    assert pfcount.execute(["hll"]) == (True, 2)
+    assert not buffer[15] & 0x80
+    assert int.from_bytes(buffer[8:16], "little") == 2
+
+    pfadd.execute(["hll", "z"])
+    assert buffer[15] & 0x80
+    assert pfcount.execute(["hll"]) == (True, 3)
+
+
+def test_sparse_promotes_to_dense_with_low_error():
+    """Тест перехода sparse -> dense и точности оценки."""
+    storage = Storage()
+    pfadd = PfAddCommand(storage)
+    pfcount = PfCountCommand(storage)
+
+    pfadd.execute(["hll"] + [f"user:{i}" for i in range(100)])
+    assert storage.get_buffer("hll")[4] == hll.HLL_SPARSE
+
+    total = 50000
+    batch = [f"user:{i}" for i in range(total)]
+    pfadd.execute(["hll"] + batch)
+    buffer = storage.get_buffer("hll")
+    assert buffer[4] == hll.HLL_DENSE
+    assert len(buffer) == hll.HLL_DENSE_SIZE
+
+    _, estimate = pfcount.execute(["hll"])
+    assert abs(estimate - total) / total < 0.03
+
+
+def test_pfmerge_command():
+    """Тест команды PFMERGE и PFCOUNT по нескольким ключам."""
+    storage = Storage()
+    pfadd = PfAddCommand(storage)
+    pfcount = PfCountCommand(storage)
+    pfmerge = PfMergeCommand(storage)
+
+    pfadd.execute(["h1"] + [str(i) for i in range(0, 3000)])
+    pfadd.execute(["h2"] + [str(i) for i in range(2000, 5000)])
+
+    _, union = pfcount.execute(["h1", "h2"])
+    assert abs(union - 5000) / 5000 < 0.03
+
+    assert pfmerge.execute(["dest", "h1", "h2"]) == (True, "OK")
+    assert pfcount.execute(["dest"]) == (True, union)
+
+    # Слияние в существующий ключ учитывает его регистры
+    pfadd.execute(["small", "a", "b"])
+    assert pfmerge.execute(["small", "absent"]) == (True, "OK")
+    assert pfcount.execute(["small"]) == (True, 2)
+
+
+def test_invalid_hyperloglog_value():
+    """Тест отклонения строк, не являющихся HyperLogLog."""
+    storage = Storage()
+    storage.set("plain", "not a hll")
+
+    success, result = PfAddCommand(storage).execute(["plain", "a"])
+    assert success is False
+    assert "WRONGTYPE" in result
+
+    success, result = PfCountCommand(storage).execute(["plain"])
+    assert success is False
+    assert "WRONGTYPE" in result
+
+
+def test_pf_commands_count_only_real_changes():
+    """Тест: отклоненные PFADD/PFMERGE и PFADD без изменения регистров не считаются изменением ключа."""
+    storage = Storage()
+    storage.set("plain", "not a hll")
+    PfAddCommand(storage).execute(["h", "a"])
+    version, dirty = storage.watch("h"), storage.dirty
+
+    assert PfAddCommand(storage).execute(["h", "a"]) == (True, 0)
+    assert PfAddCommand(storage).execute(["plain", "a"])[0] is False
+    assert PfMergeCommand(storage).execute(["h", "plain"])[0] is False
+    assert (storage.version("h"), storage.dirty) == (version, dirty)
+
+    assert PfAddCommand(storage).execute(["h", "b"]) == (True, 1)
+    assert storage.version("h") != version
+    version = storage.version("h")
+    assert PfMergeCommand(storage).execute(["h"])[0] is True
+    assert storage.version("h") != version
+
+
+def test_register_packing_helpers():
+    """Тест упаковки регистров и векторизованного максимума."""
+    rng = random.Random(7)
+    left = bytes(rng.randrange(52) for _ in range(hll.HLL_REGISTERS))
+    right = bytes(rng.randrange(52) for _ in range(hll.HLL_REGISTERS))
+
+    dense = hll.registers_to_dense(left)
+    assert len(dense) == hll.HLL_DENSE_SIZE
+    assert hll.dense_to_registers(dense) == left
+    assert hll.registers_max(left, right) == bytes(map(max, left, right))
@@ -0,0 +1,102 @@
+import json
+
+from src.server.commands.json_document import (
+    JsonSetCommand, JsonGetCommand, JsonDelCommand, JsonNumIncrByCommand, JsonArrAppendCommand, JsonTypeCommand
+)
+from src.server.json_document import JsonDocument, parse_path
+from src.server.storage import Storage
+
+
+def _document(storage, key="doc", value=None):
+    value = value if value is not None else {"name": "Ann", "age": 30, "tags": ["a"], "address": {"city": "Berlin"}}
+    assert JsonSetCommand(storage).execute([key, "$", json.dumps(value)]) == (True, "OK")
+
+
+def test_json_set_and_get():
+    """Тест команд JSON.SET и JSON.GET с путями JSONPath и устаревшими путями."""
+    storage = Storage()
+    _document(storage)
+    json_get = JsonGetCommand(storage)
+
+    assert json.loads(json_get.execute(["doc"])[1])["address"] == {"city": "Berlin"}
+    assert json_get.execute(["doc", "$.address.city"]) == (True, '["Berlin"]')
+    assert json_get.execute(["doc", ".address.city"]) == (True, '"Berlin"')
+    assert json_get.execute(["doc", "$..missing"])[0] is False
+    assert json_get.execute(["doc", ".missing"]) == (False, "ERR: Path '.missing' does not exist")
+    assert json_get.execute(["doc", "$.missing"]) == (True, "[]")
+    assert json.loads(json_get.execute(["doc", "$.name", "$.age"])[1]) == {"$.name": ["Ann"], "$.age": [30]}
+    assert json_get.execute(["missing"]) == (True, None)
+
+    json_set = JsonSetCommand(storage)
+    assert json_set.execute(["doc", "$.address['zip']", '"10115"']) == (True, "OK")
+    assert json_set.execute(["doc", "$.age", "31", "NX"]) == (True, None)
+    assert json_set.execute(["doc", "$.email", '"a@b.c"', "XX"]) == (True, None)
+    assert json_set.execute(["doc", "$.tags[0]", '"b"']) == (True, "OK")
+    assert json.loads(json_get.execute(["doc"])[1])["address"] == {"city": "Berlin", "zip": "10115"}
+    assert json_get.execute(["doc", "$.tags[*]"]) == (True, '["b"]')
+    assert json_set.execute(["new", "$.a", "1"]) == (False, "ERR: new objects must be created at the root")
+    assert json_set.execute(["doc", "$", "NaN"])[0] is False
+
+
+def test_json_numincrby_arrappend_del_and_type():
+    """Тест команд JSON.NUMINCRBY, JSON.ARRAPPEND, JSON.DEL и JSON.TYPE."""
+    storage = Storage()
+    _document(storage, value={"a": 1, "b": {"a": 2.5}, "c": {"a": "x"}, "list": [1, 2]})
+
+    json_incr = JsonNumIncrByCommand(storage)
+    assert json_incr.execute(["doc", ".a", "2"]) == (True, "3")
+    assert json_incr.execute(["doc", "$.*.a", "1"]) == (True, "[3.5,null]")
+    assert json_incr.execute(["doc", ".c.a", "1"]) == (
+        False, "ERR: wrong type of path value - expected a number but found string"
+    )
+
+    json_append = JsonArrAppendCommand(storage)
+    assert json_append.execute(["doc", "$.list", "3", '{"x": 1}']) == (True, [4])
+    assert json_append.execute(["doc", ".a", "1"])[0] is False
+
+    json_type = JsonTypeCommand(storage)
+    assert json_type.execute(["doc"]) == (True, "object")
+    assert json_type.execute(["doc", "$.list[*]"]) == (True, ["integer", "integer", "integer", "object"])
+
+    json_del = JsonDelCommand(storage)
+    assert json_del.execute(["doc", "$.list[*]"]) == (True, 4)
+    assert json_del.execute(["doc", "$.*.a"]) == (True, 2)
+    assert JsonGetCommand(storage).execute(["doc"]) == (True, '{"a":3,"b":{},"c":{},"list":[]}')
+    assert json_del.execute(["doc"]) == (True, 1)
+    assert storage.exists("doc") is False
+
+
+def test_rejected_json_writes_do_not_touch_key():
+    """Тест: JSON-команды, не изменившие документ, не считаются изменением ключа."""
+    storage = Storage()
+    _document(storage, value={"a": 1, "s": "x", "list": [1]})
+    version, dirty = storage.watch("doc"), storage.dirty
+    assert JsonSetCommand(storage).execute(["doc", "$", "{}", "NX"]) == (True, None)
+    assert JsonSetCommand(storage).execute(["doc", "$.a", "2", "NX"]) == (True, None)
+    assert JsonSetCommand(storage).execute(["doc", "$.b", "2", "XX"]) == (True, None)
+    assert JsonSetCommand(storage).execute(["new", "$.a", "1"])[0] is False
+    assert JsonDelCommand(storage).execute(["doc", "$.missing"]) == (True, 0)
+    assert JsonNumIncrByCommand(storage).execute(["doc", ".s", "1"])[0] is False
+    assert JsonNumIncrByCommand(storage).execute(["doc", "$.s", "1"]) == (True, "[null]")
+    assert JsonArrAppendCommand(storage).execute(["doc", ".a", "1"])[0] is False
+    assert JsonArrAppendCommand(storage).execute(["doc", "$.a", "1"]) == (True, [None])
+    assert (storage.version("doc"), storage.dirty) == (version, dirty)
+    assert JsonSetCommand(storage).execute(["doc", "$.a", "2"]) == (True, "OK")
+    assert storage.version("doc") != version and storage.dirty == dirty + 1
+
+
+def test_json_serialization_cache_invalidated_along_path():
+    """Тест: изменение поля сбрасывает кэш только на пути к полю."""
+    sections = {f"s{i}": {"items": list(range(100)), "label": "x" * 50} for i in range(20)}
+    document = JsonDocument({"meta": {"version": 1}, "sections": sections})
+    first = document.dumps()
+
+    document.incr_number(document.find(parse_path("$.sections.s3.items[5]"))[0], 1000)
+    assert id(sections["s7"]) in document._cache
+    assert id(sections["s3"]) not in document._cache
+    assert id(document.root) not in document._cache
+
+    second = document.dumps()
+    assert second != first
+    assert json.loads(second) == document.root
+    assert document._cache[id(sections["s7"])][1] == json.dumps(sections["s7"], separators=(",", ":"))
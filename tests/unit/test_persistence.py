@@ -0,0 +1,196 @@
+import os
+import time
+
+import pytest
+
+from src.server.databases import Databases
+from src.server import snapshot
+from src.server.persistence import parse_save_params
+from src.server.snapshot import SnapshotError, load
+
+FUNCTION_LIBRARY = '''#!python name=lib
+def one(keys, args):
+    return 1
+
+redis.register_function("f", one)
+'''
+
+
+def _databases(tmp_path, count=4):
+    databases = Databases(count)
+    databases.persistence.dir = str(tmp_path)
+    return databases
+
+
+def test_snapshot_round_trip(tmp_path):
+    """Тест: SAVE и загрузка восстанавливают строки, TTL, хэши с индексом, потоки, базы и функции."""
+    databases = _databases(tmp_path)
+    db0, db2 = databases.handlers[0], databases.handlers[2]
+    db0.handle("SET", ["s", "строка"])
+    db0.handle("SET", ["t", "v", "EX", "100"])
+    db0.handle("HSET", ["doc:1", "title", "hello world", "n", "5"])
+    db0.handle("FT.CREATE", ["idx", "ON", "HASH", "PREFIX", "1", "doc:", "SCHEMA", "title", "TEXT", "n", "NUMERIC"])
+    db0.handle("XADD", ["st", "1-1", "f", "v"])
+    db2.handle("SETBIT", ["bits", "7", "1"])
+    assert db0.handle("FUNCTION", ["LOAD", FUNCTION_LIBRARY]) == (True, "lib")
+    assert db0.handle("SAVE", []) == (True, "OK")
+    assert databases.persistence.changes_since_save == 0
+
+    restored = _databases(tmp_path)
+    assert restored.persistence.load() == 5
+    r0, r2 = restored.handlers[0], restored.handlers[2]
+    assert r0.handle("GET", ["s"]) == (True, "строка")
+    assert 0 < r0.handle("TTL", ["t"])[1] <= 100
+    assert r0.handle("HGET", ["doc:1", "title"]) == (True, "hello world")
+    assert r0.handle("FT.SEARCH", ["idx", "hello"])[1][0] == 1
+    assert r0.handle("XLEN", ["st"]) == (True, 1)
+    assert r2.handle("GETBIT", ["bits", "7"]) == (True, 1)
+    assert r0.handle("FCALL", ["f", "0"]) == (True, 1)
+    assert restored.persistence.changes_since_save == 0
+
+
+def test_snapshot_round_trip_value_types(tmp_path):
+    """Тест: потоки с группами, гео, временные ряды, JSON, вероятностные структуры и GCRA сохраняются без pickle."""
+    databases = _databases(tmp_path)
+    db = databases.handlers[0]
+    for entry_id in ("1-1", "2-1", "3-1"):
+        db.handle("XADD", ["st", entry_id, "f", entry_id])
+    db.handle("XGROUP", ["CREATE", "st", "g", "0"])
+    db.handle("XREADGROUP", ["GROUP", "g", "alice", "COUNT", "2", "STREAMS", "st", ">"])
+    db.handle("GEOADD", ["geo", "13.361389", "38.115556", "Palermo"])
+    db.handle("TS.CREATE", ["raw", "LABELS", "sensor", "1"])
+    db.handle("TS.CREATE", ["packed", "ENCODING", "COMPRESSED", "CHUNK_SIZE", "48"])
+    for timestamp in range(1, 11):
+        db.handle("TS.ADD", ["raw", str(timestamp), str(timestamp / 2)])
+        db.handle("TS.ADD", ["packed", str(timestamp), str(timestamp * 3)])
+    db.handle("JSON.SET", ["j", "$", '{"a": [1, 2.5, "x"], "b": null}'])
+    db.handle("BF.ADD", ["bf", "item"])
+    db.handle("CMS.INITBYDIM", ["cms", "16", "4"])
+    db.handle("CMS.INCRBY", ["cms", "a", "5"])
+    db.handle("TOPK.RESERVE", ["tk", "2"])
+    db.handle("TOPK.ADD", ["tk", "a", "a", "b"])
+    db.handle("CL.THROTTLE", ["rate", "10", "1", "60"])
+    db.handle("PFADD", ["hll", "a", "b"])
+    expected = {
+        ("XPENDING", ("st", "g")): db.handle("XPENDING", ["st", "g"]),
+        ("XRANGE", ("st", "-", "+")): db.handle("XRANGE", ["st", "-", "+"]),
+        ("GEOPOS", ("geo", "Palermo")): db.handle("GEOPOS", ["geo", "Palermo"]),
+        ("TS.RANGE", ("raw", "-", "+")): db.handle("TS.RANGE", ["raw", "-", "+"]),
+        ("TS.RANGE", ("packed", "-", "+")): db.handle("TS.RANGE", ["packed", "-", "+"]),
+        ("JSON.GET", ("j",)): db.handle("JSON.GET", ["j"]),
+        ("BF.EXISTS", ("bf", "item")): (True, 1),
+        ("CMS.QUERY", ("cms", "a")): (True, [5]),
+        ("TOPK.LIST", ("tk",)): db.handle("TOPK.LIST", ["tk"]),
+        ("PFCOUNT", ("hll",)): (True, 2),
+    }
+    assert db.handle("SAVE", []) == (True, "OK")
+
+    restored = _databases(tmp_path)
+    assert restored.persistence.load() == 10
+    r0 = restored.handlers[0]
+    for (command, args), reply in expected.items():
+        assert r0.handle(command, list(args)) == reply, command
+    assert r0.handle("XREADGROUP", ["GROUP", "g", "bob", "STREAMS", "st", ">"])[1][0][1][0][0] == "3-1"
+    assert r0.handle("CL.THROTTLE", ["rate", "10", "1", "60"])[1][2] == 9
+    assert isinstance(restored[0].get("rate")[1], float)
+
+
+def test_snapshot_rejects_unknown_value_type(tmp_path):
+    """Тест: значение без явной кодировки не сохраняется, а снимок прежней версии не загружается."""
+    databases = _databases(tmp_path)
+    databases[0].set("a", object())
+    with pytest.raises(SnapshotError):
+        databases.persistence.save()
+    old = snapshot.MAGIC + (1).to_bytes(2, "little")
+    with pytest.raises(SnapshotError, match="version 1"):
+        load(old + bytes(16), databases.storages)
+
+
+def test_snapshot_rejects_corrupted_file(tmp_path):
+    """Тест: поврежденный снимок не загружается."""
+    databases = _databases(tmp_path)
+    databases[0].set("a", "1")
+    databases.persistence.save()
+    with open(databases.persistence.path, "rb") as file:
+        data = bytearray(file.read())
+    data[-8] ^= 0xFF
+    with pytest.raises(SnapshotError):
+        load(bytes(data), databases.storages)
+    with pytest.raises(SnapshotError):
+        load(b"not a snapshot", databases.storages)
+
+
+def test_bgsave_lastsave_and_config(tmp_path):
+    """Тест BGSAVE в дочернем процессе, LASTSAVE, INFO persistence и параметров CONFIG."""
+    databases = _databases(tmp_path)
+    handler = databases.handlers[0]
+    handler.handle("SET", ["a", "1"])
+    assert databases.persistence.changes_since_save == 1
+
+    assert handler.handle("BGSAVE", []) == (True, "Background saving started")
+    assert databases.persistence.wait(10)
+    assert os.path.exists(tmp_path / "dump.rdb")
+    assert handler.handle("LASTSAVE", [])[1] == databases.persistence.lastsave
+    info = handler.handle("INFO", ["persistence"])[1]
+    assert "rdb_changes_since_last_save:0" in info
+    assert "rdb_last_bgsave_status:ok" in info
+    assert "rdb_saves:1" in info
+
+    assert handler.handle("CONFIG", ["SET", "save", "60 1 10 100"]) == (True, "OK")
+    assert handler.handle("CONFIG", ["GET", "save"]) == (True, ["save", "60 1 10 100"])
+    assert handler.handle("CONFIG", ["SET", "save", "60"])[0] is False
+    assert handler.handle("CONFIG", ["SET", "dir", str(tmp_path / "missing")])[0] is False
+    assert handler.handle("CONFIG", ["SET", "dbfilename", "a/b.rdb"])[0] is False
+    assert handler.handle("CONFIG", ["SET", "dbfilename", "other.rdb"]) == (True, "OK")
+    assert handler.handle("SAVE", []) == (True, "OK")
+    assert os.path.exists(tmp_path / "other.rdb")
+
+
+def test_cron_saves_after_interval(tmp_path):
+    """Тест: автоматическое сохранение, когда набралось изменений за интервал."""
+    databases = _databases(tmp_path)
+    persistence = databases.persistence
+    persistence.save_params = parse_save_params("100 2")
+    now = persistence.lastsave
+
+    databases[0].set("a", "1")
+    persistence.cron(now + 200)
+    assert persistence.saves == 0
+
+    databases[1].set("b", "1")
+    persistence.cron(now + 50)
+    assert persistence.saves == 0
+    persistence.cron(now + 200)
+    assert persistence.wait(10)
+    assert persistence.saves == 1 and persistence.changes_since_save == 0
+    assert parse_save_params("") == []
+
+
+def test_streaming_load_reports_progress(tmp_path, monkeypatch):
+    """Тест: загрузка пакетами сообщает прогресс в INFO persistence и пропускает истекшие ключи."""
+    monkeypatch.setattr(snapshot, "LOAD_BATCH", 100)
+    databases = _databases(tmp_path)
+    databases[0].mset({f"k{i}": str(i) for i in range(1000)})
+    databases[1].set("short", "v", ttl=0.05)
+    databases.persistence.save()
+    time.sleep(0.1)
+
+    restored = _databases(tmp_path)
+    persistence = restored.persistence
+    handler = restored.handlers[0]
+    reports = []
+
+    def progress(loaded_bytes, loaded_keys):
+        original(loaded_bytes, loaded_keys)
+        reports.append(handler.handle("INFO", ["persistence"])[1])
+
+    original = persistence._loading_progress
+    monkeypatch.setattr(persistence, "_loading_progress", progress)
+    assert persistence.load() == 1000
+    assert len(reports) == 11
+    assert "loading:1" in reports[0] and "loading_loaded_keys:100" in reports[0]
+    assert f"loading_total_bytes:{os.path.getsize(persistence.path)}" in reports[0]
+    assert "loading_loaded_perc:100.00" in reports[-1]
+    assert persistence.loading is False
+    assert restored.handlers[0].handle("DBSIZE", []) == (True, 1000)
+    assert restored.handlers[1].handle("DBSIZE", []) == (True, 0)
@@ -0,0 +1,121 @@
+from src.server.commands.probabilistic import (
+    BfReserveCommand, BfAddCommand, BfMAddCommand, BfExistsCommand, BfMExistsCommand,
+    CmsInitByDimCommand, CmsInitByProbCommand, CmsIncrByCommand, CmsQueryCommand,
+    TopkReserveCommand, TopkAddCommand, TopkIncrByCommand, TopkQueryCommand, TopkListCommand,
+)
+from src.server.probabilistic import ScalableBloomFilter, TopK, hash_items
+from src.server.storage import Storage
+
+
+def test_bloom_add_and_exists():
+    """Тест команд BF.ADD/BF.MADD/BF.EXISTS/BF.MEXISTS."""
+    storage = Storage()
+
+    assert BfAddCommand(storage).execute(["bf", "a"]) == (True, 1)
+    assert BfAddCommand(storage).execute(["bf", "a"]) == (True, 0)
+    assert BfMAddCommand(storage).execute(["bf", "b", "c", "b"]) == (True, [1, 1, 0])
+    assert BfExistsCommand(storage).execute(["bf", "c"]) == (True, 1)
+    assert BfMExistsCommand(storage).execute(["bf", "a", "zzz"]) == (True, [1, 0])
+    assert BfMExistsCommand(storage).execute(["missing", "a"]) == (True, [0])
+
+    success, result = BfReserveCommand(storage).execute(["bf", "0.01", "100"])
+    assert success is False
+    assert "exists" in result
+
+
+def test_bloom_scales_and_keeps_error_rate():
+    """Масштабируемый фильтр растет слоями и держит долю ложных срабатываний."""
+    storage = Storage()
+    assert BfReserveCommand(storage).execute(["bf", "0.01", "1000", "EXPANSION", "2"]) == (True, "OK")
+    items = [f"item:{i}" for i in range(10000)]
+    success, result = BfMAddCommand(storage).execute(["bf"] + items)
+    assert sum(result) >= 9900
+
+    bloom = storage.get_typed("bf", ScalableBloomFilter)
+    assert len(bloom.layers) > 1
+    assert all(bloom.contains(pair) for pair in hash_items(items))
+    probes = [f"other:{i}" for i in range(10000)]
+    false_positives = sum(BfMExistsCommand(storage).execute(["bf"] + probes)[1])
+    assert false_positives < 200
+
+
+def test_bloom_nonscaling_filter_is_full():
+    """Тест фильтра NONSCALING при переполнении."""
+    storage = Storage()
+    BfReserveCommand(storage).execute(["bf", "0.01", "2", "NONSCALING"])
+    BfMAddCommand(storage).execute(["bf", "a", "b"])
+    success, result = BfAddCommand(storage).execute(["bf", "c"])
+    assert success is False
+    assert "full" in result
+
+
+def test_count_min_sketch():
+    """Тест команд CMS.INITBYDIM/CMS.INITBYPROB/CMS.INCRBY/CMS.QUERY."""
+    storage = Storage()
+    assert CmsInitByDimCommand(storage).execute(["cms", "2000", "5"]) == (True, "OK")
+    assert CmsIncrByCommand(storage).execute(["cms", "a", "5", "b", "3", "a", "2"]) == (True, [5, 3, 7])
+    for i in range(1000):
+        CmsIncrByCommand(storage).execute(["cms", f"noise:{i}", "1"])
+    success, (a_count, b_count, missing) = CmsQueryCommand(storage).execute(["cms", "a", "b", "zzz"])
+    assert 7 <= a_count <= 9
+    assert 3 <= b_count <= 5
+    assert missing <= 2
+
+    assert CmsInitByProbCommand(storage).execute(["cms2", "0.001", "0.01"]) == (True, "OK")
+    success, result = CmsQueryCommand(storage).execute(["missing", "a"])
+    assert success is False
+    assert "does not exist" in result
+    success, result = CmsIncrByCommand(storage).execute(["cms", "a", "x"])
+    assert success is False
+
+
+def test_topk_finds_heavy_hitters():
+    """Тест TOPK: тяжелые элементы вытесняют редкие."""
+    storage = Storage()
+    assert TopkReserveCommand(storage).execute(["top", "3", "50", "5", "0.9"]) == (True, "OK")
+    stream = []
+    for i in range(3000):
+        stream.append(f"rare:{i}")
+        if i % 3 == 0:
+            stream += ["hot:a", "hot:b", "hot:c"]
+    for start in range(0, len(stream), 500):
+        assert TopkAddCommand(storage).execute(["top"] + stream[start:start + 500])[0] is True
+
+    success, result = TopkListCommand(storage).execute(["top"])
+    assert sorted(result) == ["hot:a", "hot:b", "hot:c"]
+    success, result = TopkListCommand(storage).execute(["top", "WITHCOUNT"])
+    assert all(count >= 900 for count in result[1::2])
+    assert TopkQueryCommand(storage).execute(["top", "hot:a", "rare:1"]) == (True, [1, 0])
+
+    success, result = TopkIncrByCommand(storage).execute(["top", "new", "100000", "new", "100000"])
+    assert result[0] is None or result[0].startswith("hot:")
+    assert TopkQueryCommand(storage).execute(["top", "new"]) == (True, [1])
+
+    success, result = TopkAddCommand(storage).execute(["missing", "a"])
+    assert success is False
+
+
+def test_rejected_probabilistic_writes_do_not_touch_key():
+    """Тест: команды на отсутствующем ключе и BF.ADD без новых элементов не считаются изменением."""
+    storage = Storage()
+    BfAddCommand(storage).execute(["bf", "a"])
+    version, dirty = storage.watch("bf"), storage.dirty
+    assert BfAddCommand(storage).execute(["bf", "a"]) == (True, 0)
+    assert CmsIncrByCommand(storage).execute(["nokey", "a", "1"])[0] is False
+    assert TopkAddCommand(storage).execute(["nokey", "a"])[0] is False
+    assert TopkIncrByCommand(storage).execute(["nokey", "a", "1"])[0] is False
+    assert (storage.version("bf"), storage.dirty) == (version, dirty)
+    assert BfAddCommand(storage).execute(["bf", "b"]) == (True, 1)
+    assert storage.version("bf") != version
+
+
+def test_topk_decay_is_reproducible():
+    """Тест: одинаковая последовательность TOPK.ADD дает одинаковый top-k (загрузка журнала, реплики)."""
+    lists = []
+    for _ in range(2):
+        storage = Storage()
+        TopkReserveCommand(storage).execute(["top", "5", "8", "3", "0.9"])
+        for i in range(2000):
+            TopkAddCommand(storage).execute(["top", f"item:{i % 37}", f"item:{i % 11}"])
+        lists.append((TopkListCommand(storage).execute(["top", "WITHCOUNT"]), storage.get_typed("top", TopK).draws))
+    assert lists[0] == lists[1] and lists[0][1] > 0
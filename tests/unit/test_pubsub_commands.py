@@ -0,0 +1,114 @@
+from src.server.command_handler import CommandHandler
+from src.server.pubsub import PubSub
+from src.server.storage import Storage
+
+
+class FakeTransport:
+    """Транспорт, который запоминает записанные кадры и не отправляет их."""
+
+    def __init__(self):
+        self.frames = []
+        self.buffered = 0
+        self.aborted = False
+
+    def write(self, data):
+        self.frames.append(data)
+
+    def get_write_buffer_size(self):
+        return self.buffered
+
+    def abort(self):
+        self.aborted = True
+
+
+def test_publish_encodes_once_for_channels_and_patterns():
+    """Тест: кадр кодируется один раз и пишется всем подписчикам канала и шаблона."""
+    storage = Storage()
+    pubsub = storage.pubsub
+    transports = [FakeTransport() for _ in range(3)]
+    subscribers = [pubsub.subscriber(transport) for transport in transports]
+    pubsub.subscribe(subscribers[0], "news")
+    pubsub.subscribe(subscribers[1], "news")
+    pubsub.psubscribe(subscribers[2], "n*")
+
+    handler = CommandHandler(storage)
+    assert handler.handle("PUBLISH", ["news", "hello"]) == (True, 3)
+    assert handler.handle("PUBLISH", ["nothing", "x"]) == (True, 1)
+    assert handler.handle("PUBLISH", ["other", "x"]) == (True, 0)
+
+    assert transports[0].frames[0] == b"*3\r\n$7\r\nmessage\r\n$4\r\nnews\r\n$5\r\nhello\r\n"
+    assert transports[0].frames[0] is transports[1].frames[0]
+    assert transports[2].frames == [
+        b"*4\r\n$8\r\npmessage\r\n$2\r\nn*\r\n$4\r\nnews\r\n$5\r\nhello\r\n",
+        b"*4\r\n$8\r\npmessage\r\n$2\r\nn*\r\n$7\r\nnothing\r\n$1\r\nx\r\n",
+    ]
+
+    assert handler.handle("PUBSUB", ["CHANNELS"]) == (True, ["news"])
+    assert handler.handle("PUBSUB", ["NUMSUB", "news", "none"]) == (True, ["news", 2, "none", 0])
+    assert handler.handle("PUBSUB", ["NUMPAT"]) == (True, 1)
+
+    pubsub.remove(subscribers[0])
+    pubsub.remove(subscribers[2])
+    assert pubsub.numsub("news") == 1 and pubsub.patterns == {}
+
+
+def test_slow_subscriber_is_dropped_by_buffer_limits(monkeypatch):
+    """Тест: подписчик отключается при превышении жесткого лимита или мягкого дольше заданного."""
+    import time
+
+    now = [100.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    pubsub = PubSub()
+    pubsub.HARD_LIMIT, pubsub.SOFT_LIMIT, pubsub.SOFT_SECONDS = 1000, 100, 5.0
+    slow, stuck, fast = FakeTransport(), FakeTransport(), FakeTransport()
+    for transport in (slow, stuck, fast):
+        pubsub.subscribe(pubsub.subscriber(transport), "ch")
+
+    stuck.buffered = 2000
+    slow.buffered = 500
+    assert pubsub.publish("ch", "a") == 2
+    assert stuck.aborted and not slow.aborted
+    now[0] += 10.0
+    assert pubsub.publish("ch", "b") == 1
+    assert slow.aborted and not fast.aborted
+    assert pubsub.dropped_subscribers == 2
+    assert pubsub.numsub("ch") == 1
+
+
+def test_keyspace_notifications():
+    """Тест notify-keyspace-events: события записи, удаления и истечения TTL по классам."""
+    import asyncio
+    import time
+
+    from src.server.databases import Databases
+
+    databases = Databases(2)
+    handler = databases.handlers[1]
+    pubsub = databases.pubsub
+    transport = FakeTransport()
+    subscriber = pubsub.subscriber(transport)
+    pubsub.psubscribe(subscriber, "__key*__:*")
+
+    handler.handle("SET", ["k", "v"])
+    assert transport.frames == []
+
+    assert handler.handle("CONFIG", ["SET", "notify-keyspace-events", "Ex$"]) == (True, "OK")
+    assert databases.handlers[0].handle("CONFIG", ["GET", "notify-*"]) == (True, ["notify-keyspace-events", "E$x"])
+    handler.handle("SET", ["k", "v2"])
+    handler.handle("DEL", ["k"])
+    handler.handle("SET", ["t", "v", "PX", "10"])
+    time.sleep(0.02)
+    asyncio.run(databases[1]._cleanup_expired_items())
+
+    messages = [frame.split(b"\r\n")[6:9:2] for frame in transport.frames]
+    assert messages == [[b"__keyevent@1__:set", b"k"], [b"__keyevent@1__:set", b"t"],
+                        [b"__keyevent@1__:expired", b"t"]]
+
+    transport.frames.clear()
+    handler.handle("CONFIG", ["SET", "notify-keyspace-events", "KA"])
+    handler.handle("HSET", ["h", "f", "1"])
+    assert transport.frames == [b"*4\r\n$8\r\npmessage\r\n$10\r\n__key*__:*\r\n$16\r\n__keyspace@1__:h\r\n$4\r\nhset\r\n"]
+
+    assert handler.handle("CONFIG", ["SET", "notify-keyspace-events", "Q"])[0] is False
+    assert handler.handle("CONFIG", ["SET", "notify-keyspace-events", ""]) == (True, "OK")
+    assert databases[0].notify_flags == 0
@@ -0,0 +1,53 @@
+import time
+
+import pytest
+
+from src.server.commands.rate_limit import ClThrottleCommand
+from src.server.storage import Storage, WrongTypeError
+
+
+def test_cl_throttle_burst_and_refill(monkeypatch):
+    """Тест CL.THROTTLE: всплеск max_burst + 1 запросов, затем один запрос в интервал."""
+    now = [1_000_000.0]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    storage = Storage()
+    throttle = ClThrottleCommand(storage)
+
+    replies = [throttle.execute(["user:1", "4", "1", "1"])[1] for _ in range(5)]
+    assert [reply[2] for reply in replies] == [4, 3, 2, 1, 0]
+    assert all(reply[0] == 0 and reply[1] == 5 and reply[3] == -1 for reply in replies)
+    assert replies[-1][4] == 5
+
+    assert throttle.execute(["user:1", "4", "1", "1"]) == (True, [1, 5, 0, 1, 5])
+    assert isinstance(storage.get_typed("user:1", float), float)
+    assert 0 < storage.ttl("user:1") <= 5
+
+    now[0] += 1.0
+    assert throttle.execute(["user:1", "4", "1", "1"])[1][:4] == [0, 5, 0, -1]
+    assert throttle.execute(["user:1", "4", "1", "1"])[1][0] == 1
+
+    now[0] += 10.0
+    assert storage.exists("user:1") is False
+    assert throttle.execute(["user:1", "4", "1", "1", "3"])[1][:3] == [0, 5, 2]
+    # запрос дороже всего допуска никогда не пройдет
+    assert throttle.execute(["user:2", "4", "1", "1", "6"])[1][:4] == [1, 5, 5, -1]
+
+
+def test_cl_throttle_validation():
+    """Тест проверки аргументов CL.THROTTLE."""
+    throttle = ClThrottleCommand(Storage())
+    assert throttle.execute(["k", "1", "0", "1"])[0] is False
+    assert throttle.execute(["k", "x", "1", "1"])[0] is False
+    assert throttle.execute(["k", "1", "1"])[0] is False
+
+
+def test_cl_throttle_reads_tat_stored_as_string():
+    """Тест: TAT, записанный командой SET из журнала, читается как число; другая строка — WRONGTYPE."""
+    storage = Storage()
+    throttle = ClThrottleCommand(storage)
+    storage.set("k", repr(time.time() + 2.0))
+    assert throttle.execute(["k", "4", "1", "1"])[1][2] == 2
+    assert isinstance(storage.get_typed("k", float), float)
+    storage.set("bad", "abc")
+    with pytest.raises(WrongTypeError):
+        throttle.execute(["bad", "4", "1", "1"])
@@ -0,0 +1,197 @@
+import asyncio
+import io
+import pickle
+import struct
+import threading
+import zlib
+
+import pytest
+
+from src.server import snapshot
+from src.server.commands.base_abstraction import get_registered_commands
+from src.server.databases import Databases
+from src.server.pubsub import PubSub
+from src.server.replication import WRITE_COMMANDS, ReplicationBacklog, _PrefixedReader, is_write_command
+from src.server.tracking import INVALIDATE_CHANNEL, TrackingClient
+
+
+def test_backlog_wraps_and_reads_from_offset():
+    """Тест: кольцевой буфер хранит последние байты потока и отдает их с заданного смещения."""
+    backlog = ReplicationBacklog(8)
+    backlog.feed(b"abcde")
+    assert (backlog.offset, backlog.histlen, backlog.first_offset) == (5, 5, 1)
+    assert backlog.read_from(1) == b"abcde"
+    assert backlog.read_from(6) == b""
+
+    backlog.feed(b"fghij")
+    assert (backlog.offset, backlog.histlen, backlog.first_offset) == (10, 8, 3)
+    assert backlog.read_from(3) == b"cdefghij"
+    assert backlog.read_from(8) == b"hij"
+    assert backlog.read_from(2) is None
+    assert backlog.read_from(12) is None
+
+    backlog.feed(b"0123456789")
+    assert backlog.read_from(13) == b"23456789"
+
+    smaller = backlog.resized(4)
+    assert (smaller.offset, smaller.first_offset) == (20, 17)
+    assert smaller.read_from(17) == b"6789"
+    larger = backlog.resized(16)
+    assert larger.read_from(13) == b"23456789"
+    larger.feed(b"xy")
+    assert larger.read_from(13) == b"23456789xy"
+
+
+def test_write_commands():
+    """Тест: команды записи известны серверу; FUNCTION — запись только для изменяющих подкоманд."""
+    registered = get_registered_commands()
+    assert WRITE_COMMANDS <= set(registered)
+    assert is_write_command("SET", ["k", "v"])
+    assert not is_write_command("GET", ["k"])
+    assert is_write_command("FUNCTION", ["LOAD", "code"])
+    assert not is_write_command("FUNCTION", ["LIST"])
+
+
+def test_master_feeds_stream_after_backlog_created():
+    """Тест: поток репликации пишется только при наличии буфера, с SELECT при смене базы."""
+    databases = Databases(4)
+    replication = databases.replication
+    db0, db2 = databases.handlers[0], databases.handlers[2]
+    db0.handle("SET", ["before", "1"])
+    assert replication.backlog is None and replication.offset == 0
+
+    replication._create_backlog()
+    db0.handle("SET", ["k", "v", "EX", "100"])
+    db0.handle("GET", ["k"])
+    db2.handle("HSET", ["h", "f", "v"])
+    stream = replication.backlog.read_from(1)
+    assert stream.startswith(b"*2\r\n$6\r\nSELECT\r\n$1\r\n0\r\n*5\r\n$3\r\nSET")
+    assert b"PXAT" in stream and b"GET" not in stream
+    assert b"$6\r\nSELECT\r\n$1\r\n2\r\n*4\r\n$4\r\nHSET" in stream
+    assert replication.offset == len(stream)
+
+
+def test_master_wraps_function_effects_in_multi_exec():
+    """Тест: команды, выполненные функцией, уходят репликам одной транзакцией MULTI/EXEC."""
+    databases = Databases(1)
+    replication = databases.replication
+    handler = databases.handlers[0]
+    handler.handle("FUNCTION", ["LOAD", "#!python name=lib\n"
+                                "redis.register_function('two', lambda keys, args: "
+                                "[redis.call('SET', keys[0], '1'), redis.call('SET', keys[1], '2')])\n"])
+    replication._create_backlog()
+    assert handler.handle("FCALL", ["two", "2", "a", "b"])[0]
+    stream = replication.backlog.read_from(1)
+    assert stream.index(b"MULTI") < stream.index(b"$1\r\na") < stream.index(b"$1\r\nb") < stream.index(b"EXEC")
+
+
+def test_replicaof_and_role():
+    """Тест: REPLICAOF переключает роль, NO ONE сохраняет прежний идентификатор для частичной синхронизации."""
+    databases = Databases(1)
+    handler = databases.handlers[0]
+    replication = databases.replication
+    assert handler.handle("ROLE", []) == (True, ["master", 0, []])
+    assert handler.handle("REPLICAOF", ["localhost", "abc"]) == (False, "ERR: Invalid master port")
+
+    assert handler.handle("REPLICAOF", ["127.0.0.1", "6390"])[0]
+    assert handler.handle("ROLE", []) == (True, ["slave", "127.0.0.1", 6390, "connect", 0])
+    assert replication.role == "slave" and not replication.feeding
+    replid = replication.replid
+
+    assert handler.handle("SLAVEOF", ["no", "one"])[0]
+    assert replication.role == "master"
+    assert replication.replid2 == replid and replication.second_replid_offset == 1
+    assert replication.replid != replid
+
+
+class _Exploit:
+    executed = False
+
+    def __reduce__(self):
+        return setattr, (_Exploit, "executed", True)
+
+
+def _snapshot_with_record(version: int, value_type: int, payload: bytes) -> bytes:
+    body = (snapshot.MAGIC + struct.pack("<H", version) + bytes((snapshot.OP_SELECTDB, 0, value_type))
+            + snapshot._string(b"key") + snapshot._string(payload) + bytes((snapshot.OP_EOF,)))
+    return body + struct.pack("<I", zlib.crc32(body))
+
+
+def test_full_sync_payload_is_never_unpickled():
+    """Тест: снимок от ведущего с записью pickle (как в прежнем формате) отклоняется без выполнения кода."""
+    databases = Databases(1)
+    payload = pickle.dumps(_Exploit())
+    for version, value_type in ((1, 4), (snapshot.VERSION, 4), (snapshot.VERSION, snapshot.TYPE_STREAM)):
+        with pytest.raises(snapshot.SnapshotError):
+            databases.persistence.load_data(_snapshot_with_record(version, value_type, payload))
+    assert not _Exploit.executed
+
+
+class _ThreadTransport:
+    """Транспорт, запоминающий поток, в котором в него писали."""
+
+    def __init__(self):
+        self.threads = []
+
+    def write(self, data):
+        self.threads.append(threading.get_ident())
+
+    def get_write_buffer_size(self):
+        return 0
+
+    def abort(self):
+        pass
+
+
+def _master_snapshot() -> bytes:
+    master = Databases(1)
+    master[0].set("a", "1")
+    out = io.BytesIO()
+    snapshot.dump(out, master.storages)
+    return out.getvalue()
+
+
+def test_full_sync_invalidates_tracking_on_event_loop():
+    """Тест: об очистке баз при полной синхронизации клиентам отслеживания пишут из цикла событий."""
+    databases = Databases(1)
+    transport = _ThreadTransport()
+    pubsub = PubSub()
+    subscriber = pubsub.subscriber(transport)
+    pubsub.subscribe(subscriber, INVALIDATE_CHANNEL)
+    client = TrackingClient(1, lambda: subscriber)
+    databases.tracking.enable(client)
+    databases.tracking.remember(client, ["a"])
+    transport.threads.clear()
+    payload = _master_snapshot()
+
+    async def sync():
+        reader = asyncio.StreamReader()
+        reader.feed_data(b"$%d\r\n" % len(payload) + payload)
+        await databases.replication._full_sync(reader, "r" * 40, 0)
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(sync())
+    assert databases[0].get("a") == (True, "1")
+    assert transport.threads == [loop_thread]
+
+
+def test_full_sync_finds_marker_across_reads_and_keeps_stream_bytes():
+    """Тест: маркер конца снимка ищется на стыке чтений, а байты потока после него не теряются."""
+    mark = b"m" * 40
+    command = b"*3\r\n$3\r\nSET\r\n$1\r\nb\r\n$1\r\n2\r\n"
+    data = b"$EOF:" + mark + b"\r\n" + _master_snapshot() + mark + command
+    split = data.index(mark, 50) + 10
+
+    async def sync():
+        databases = Databases(1)
+        reader = asyncio.StreamReader()
+        reader.feed_data(data[:split])
+        asyncio.get_running_loop().call_later(0.01, reader.feed_data, data[split:split + 20])
+        asyncio.get_running_loop().call_later(0.02, reader.feed_data, data[split + 20:])
+        rest = await databases.replication._full_sync(reader, "r" * 40, 0)
+        argv, raw = await databases.replication._read_command(_PrefixedReader(rest, reader))
+        return databases, argv, raw
+
+    databases, argv, raw = asyncio.run(sync())
+    assert databases[0].get("a") == (True, "1")
+    assert argv == ["SET", "b", "2"] and raw == command
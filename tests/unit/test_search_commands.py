@@ -0,0 +1,82 @@
+import random
+
+from src.server.commands.hashes import HSetCommand, HDelCommand
+from src.server.commands.search import FtCreateCommand, FtSearchCommand, FtDropIndexCommand, FtInfoCommand
+from src.server.storage import Storage
+
+CITIES = ["Berlin", "Paris", "Rome", "Oslo"]
+
+
+def _users(storage, count=500, seed=7):
+    rng = random.Random(seed)
+    users = {}
+    hset = HSetCommand(storage)
+    for i in range(count):
+        user = {"age": str(rng.randint(18, 70)), "city": rng.choice(CITIES), "bio": rng.choice(["likes jazz", "likes rock music"])}
+        users[f"user:{i}"] = user
+        hset.execute([f"user:{i}"] + [item for pair in user.items() for item in pair])
+    return users
+
+
+def _create(storage):
+    return FtCreateCommand(storage).execute([
+        "idx", "ON", "HASH", "PREFIX", "1", "user:", "SCHEMA", "age", "NUMERIC", "city", "TAG", "bio", "TEXT"
+    ])
+
+
+def test_ft_search_matches_brute_force():
+    """Тест FT.SEARCH: результаты совпадают с полным перебором, LIMIT и NOCONTENT."""
+    storage = Storage()
+    users = _users(storage)
+    HSetCommand(storage).execute(["other:1", "age", "35", "city", "Berlin"])
+    assert _create(storage) == (True, "OK")
+
+    search = FtSearchCommand(storage)
+    expected = sorted(
+        key for key, user in users.items() if 30 <= int(user["age"]) <= 40 and user["city"] == "Berlin"
+    )
+    success, result = search.execute(["idx", "@age:[30 40] @city:{berlin}", "LIMIT", "0", "10"])
+    assert result[0] == len(expected)
+    assert result[1::2] == expected[:10]
+    assert result[2] == [item for pair in users[expected[0]].items() for item in pair]
+
+    success, result = search.execute(["idx", "@age:[(30 +inf] @city:{rome | oslo} rock", "NOCONTENT", "LIMIT", "0", "1000"])
+    assert result[1:] == sorted(
+        key for key, user in users.items()
+        if int(user["age"]) > 30 and user["city"] in ("Rome", "Oslo") and "rock" in user["bio"]
+    )
+    assert search.execute(["idx", "*", "LIMIT", "0", "0"]) == (True, [len(users)])
+    assert search.execute(["idx", "@missing:{x}"]) == (False, "ERR: Unknown field 'missing'")
+    assert search.execute(["nope", "*"]) == (False, "ERR: nope: no such index")
+
+
+def test_ft_index_updated_incrementally():
+    """Тест: индекс обновляется при HSET, HDEL, DEL, перезаписи и истечении ключа."""
+    storage = Storage()
+    assert _create(storage) == (True, "OK")
+    hset = HSetCommand(storage)
+    search = FtSearchCommand(storage)
+
+    hset.execute(["user:1", "age", "35", "city", "Berlin"])
+    hset.execute(["user:2", "age", "36", "city", "Paris"])
+    assert search.execute(["idx", "@age:[30 40]", "NOCONTENT"]) == (True, [2, "user:1", "user:2"])
+
+    hset.execute(["user:1", "age", "50"])
+    assert search.execute(["idx", "@age:[30 40]", "NOCONTENT"]) == (True, [1, "user:2"])
+    assert search.execute(["idx", "@city:{berlin}", "NOCONTENT"]) == (True, [1, "user:1"])
+
+    HDelCommand(storage).execute(["user:1", "city"])
+    assert search.execute(["idx", "@city:{berlin}", "NOCONTENT"]) == (True, [0])
+    storage.set("user:2", "now a string")
+    assert search.execute(["idx", "@age:[30 40]", "NOCONTENT"]) == (True, [0])
+    storage.delete("user:1")
+    info = FtInfoCommand(storage).execute(["idx"])[1]
+    assert info[info.index("num_docs") + 1] == 0
+
+    hset.execute(["user:3", "age", "31"])
+    storage.expire("user:3", -1)
+    assert storage.exists("user:3") is False
+    assert search.execute(["idx", "*", "NOCONTENT"]) == (True, [0])
+
+    assert FtDropIndexCommand(storage).execute(["idx"]) == (True, "OK")
+    assert storage.indexes == {}
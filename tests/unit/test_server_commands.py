@@ -0,0 +1,63 @@
+from src.server.command_handler import CommandHandler
+from src.server.commands.base_abstraction import SelectDatabase
+from src.server.databases import Databases
+from src.server.storage import Storage
+
+
+def test_select_swapdb_and_move():
+    """Тест SELECT, SWAPDB (обмен ссылок) и MOVE между базами."""
+    databases = Databases(4)
+    db0, db1 = databases.handlers[0], databases.handlers[1]
+
+    assert db0.handle("SELECT", ["2"]) == (True, SelectDatabase(2))
+    assert db0.handle("SELECT", ["4"]) == (False, "ERR: DB index is out of range")
+    assert db0.handle("SELECT", ["x"])[0] is False
+
+    db0.handle("SET", ["a", "old"])
+    db1.handle("SET", ["a", "new"])
+    db1.handle("SET", ["b", "new"])
+    first, second = databases[0], databases[1]
+    assert db0.handle("SWAPDB", ["0", "1"]) == (True, "OK")
+    assert databases[0] is second and databases[1] is first
+    assert databases.handlers[0].handle("GET", ["a"]) == (True, "new")
+    assert databases.handlers[0].handle("DBSIZE", []) == (True, 2)
+
+    storage = databases[0]
+    storage.set("ttl", "v", ttl=100)
+    assert databases.handlers[0].handle("MOVE", ["ttl", "3"]) == (True, 1)
+    assert databases.handlers[0].handle("MOVE", ["ttl", "3"]) == (True, 0)
+    assert databases.handlers[0].handle("MOVE", ["a", "1"]) == (True, 0)
+    assert databases[3].get("ttl") == (True, "v")
+    assert 0 < databases[3].ttl("ttl") <= 100
+    assert databases.handlers[0].handle("MOVE", ["b", "0"])[0] is False
+
+
+def test_flush_and_info_keyspace():
+    """Тест FLUSHDB, FLUSHALL и статистики INFO keyspace по базам."""
+    databases = Databases(3)
+    databases[0].set("a", "1")
+    databases[0].set("b", "1", ttl=100)
+    databases[2].set("c", "1", ttl=-1)
+    databases[2].set("d", "1", ttl=1)
+    databases[2]._data["d"].expire_at = 0
+    assert databases[2].get("d") == (False, None)
+
+    success, info = databases.handlers[1].handle("INFO", ["keyspace"])
+    lines = info.split("\r\n")
+    assert lines[0] == "# Keyspace"
+    assert lines[1].startswith("db0:keys=2,expires=1,avg_ttl=")
+    assert lines[2] == "db2:keys=1,expires=0,avg_ttl=0,expired_keys=1"
+    assert "expired_keys:1" in databases.handlers[0].handle("INFO", [])[1]
+
+    assert databases.handlers[0].handle("FLUSHDB", []) == (True, "OK")
+    assert databases[0].size() == 0 and databases[2].size() == 1
+    assert databases.handlers[0].handle("FLUSHALL", []) == (True, "OK")
+    assert databases[2].size() == 0
+
+
+def test_standalone_storage_has_single_database():
+    """Тест: отдельное хранилище ведет себя как сервер с одной базой."""
+    handler = CommandHandler(Storage())
+    assert handler.handle("SELECT", ["0"]) == (True, SelectDatabase(0))
+    assert handler.handle("SELECT", ["1"]) == (False, "ERR: DB index is out of range")
+    assert handler.handle("SWAPDB", ["0", "0"]) == (True, "OK")
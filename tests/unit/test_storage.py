@@ -1,7 +1,9 @@
 import asyncio
 import time
 
-from src.server.storage import Storage
+import pytest
+
+from src.server.storage import Storage, WrongTypeError
 
 
 def test_set_and_get_without_ttl():
@@ -228,3 +230,53 @@ def test_storage_keys_with_pattern():
     assert set(result) == {"user1", "user2"}
 
 
+
+
+def test_append_grows_bytearray_in_place():
+    """Тест, что append хранит значение в bytearray и дописывает на месте."""
+    storage = Storage()
+    storage.set("k", "ab")
+    assert storage.append("k", "cd") == 4
+
+    buffer = storage._data["k"].value
+    assert isinstance(buffer, bytearray)
+
+    storage.append("k", "ef")
+    assert storage._data["k"].value is buffer
+    assert storage.strlen("k") == 6
+
+
+def test_string_ops_on_wrong_type():
+    """Тест, что строковые операции отклоняют значения других типов."""
+    storage = Storage()
+    storage.set("obj", {"not": "a string"})
+    version, dirty = storage.watch("obj"), storage.dirty
+    with pytest.raises(WrongTypeError):
+        storage.append("obj", "x")
+    assert (storage.version("obj"), storage.dirty) == (version, dirty)
+    with pytest.raises(WrongTypeError):
+        storage.strlen("obj")
+
+
+def test_watch_versions_track_writes():
+    """Тест, что версия наблюдаемого ключа меняется при каждой записи, включая истечение TTL."""
+    storage = Storage()
+    version = storage.watch("k")
+    assert storage.version("k") == version
+
+    storage.set("k", "v")
+    assert storage.version("k") != version
+    version = storage.version("k")
+    storage.append("k", "x")
+    assert storage.version("k") != version
+    version = storage.version("k")
+    storage.touch("other")
+    assert storage.version("k") == version
+
+    storage.set("k", "v", ttl=0.01)
+    version = storage.version("k")
+    time.sleep(0.02)
+    assert storage.version("k") != version
+
+    storage.unwatch("k")
+    assert storage._watched == {}
@@ -0,0 +1,184 @@
+import pytest
+
+from src.server.commands.base_abstraction import BlockRequest
+from src.server.commands.streams import (
+    XAddCommand, XLenCommand, XRangeCommand, XRevRangeCommand, XTrimCommand, XReadCommand
+)
+from src.server.storage import Storage, WrongTypeError
+from src.server.stream import Stream
+
+
+def _fill(storage, key, count):
+    xadd = XAddCommand(storage)
+    for i in range(1, count + 1):
+        xadd.execute([key, f"{i}-0", "n", str(i)])
+
+
+def test_xadd_generates_increasing_ids():
+    """Тест команды XADD с автоматическими и явными ID."""
+    storage = Storage()
+    xadd = XAddCommand(storage)
+
+    success, first = xadd.execute(["s", "*", "f", "v"])
+    assert success is True
+    success, second = xadd.execute(["s", "*", "f", "v"])
+    assert success is True
+    ms1, seq1 = map(int, first.split("-"))
+    ms2, seq2 = map(int, second.split("-"))
+    assert (ms2, seq2) > (ms1, seq1)
+
+    assert xadd.execute(["e", "5-*", "f", "v"]) == (True, "5-0")
+    assert xadd.execute(["e", "5-*", "f", "v"]) == (True, "5-1")
+    assert xadd.execute(["e", "7", "f", "v"]) == (True, "7-0")
+
+    success, result = xadd.execute(["e", "6-0", "f", "v"])
+    assert success is False
+    assert "equal or smaller" in result
+
+    success, result = xadd.execute(["z", "0-0", "f", "v"])
+    assert success is False
+    assert "greater than 0-0" in result
+
+    # NOMKSTREAM не создает ключ
+    assert xadd.execute(["absent", "NOMKSTREAM", "*", "f", "v"]) == (True, None)
+    assert storage.exists("absent") is False
+
+    success, result = xadd.execute(["s", "*", "f"])
+    assert success is False
+    assert "wrong number of arguments" in result
+
+
+def test_xadd_wrong_type():
+    """Тест XADD на ключе другого типа."""
+    storage = Storage()
+    storage.set("str", "value")
+    with pytest.raises(WrongTypeError):
+        XAddCommand(storage).execute(["str", "*", "f", "v"])
+
+
+def test_xrange_and_xrevrange():
+    """Тест команд XRANGE и XREVRANGE, включая исключающие границы и COUNT."""
+    storage = Storage()
+    _fill(storage, "s", 250)
+
+    assert XLenCommand(storage).execute(["s"]) == (True, 250)
+
+    success, entries = XRangeCommand(storage).execute(["s", "-", "+"])
+    assert success is True
+    assert len(entries) == 250
+    assert entries[0] == ["1-0", ["n", "1"]]
+
+    success, entries = XRangeCommand(storage).execute(["s", "99", "102"])
+    assert [entry[0] for entry in entries] == ["99-0", "100-0", "101-0", "102-0"]
+
+    success, entries = XRangeCommand(storage).execute(["s", "(99-0", "+", "COUNT", "2"])
+    assert [entry[0] for entry in entries] == ["100-0", "101-0"]
+
+    success, entries = XRevRangeCommand(storage).execute(["s", "+", "-", "COUNT", "3"])
+    assert [entry[0] for entry in entries] == ["250-0", "249-0", "248-0"]
+
+    success, entries = XRevRangeCommand(storage).execute(["s", "(201-0", "199"])
+    assert [entry[0] for entry in entries] == ["200-0", "199-0"]
+
+    assert XRangeCommand(storage).execute(["absent", "-", "+"]) == (True, [])
+
+    success, result = XRangeCommand(storage).execute(["s", "bad", "+"])
+    assert success is False
+    assert "Invalid stream ID" in result
+
+
+def test_xtrim_maxlen_exact_and_approximate():
+    """Тест XTRIM: точная обрезка и приблизительная обрезка целыми блоками."""
+    storage = Storage()
+    _fill(storage, "s", 250)
+    xtrim = XTrimCommand(storage)
+
+    # Приблизительно: удаляются только целые блоки по 100 записей
+    assert xtrim.execute(["s", "MAXLEN", "~", "120"]) == (True, 100)
+    assert XLenCommand(storage).execute(["s"]) == (True, 150)
+
+    assert xtrim.execute(["s", "MAXLEN", "120"]) == (True, 30)
+    success, entries = XRangeCommand(storage).execute(["s", "-", "+", "COUNT", "1"])
+    assert entries[0][0] == "131-0"
+
+    assert xtrim.execute(["s", "MINID", "200"]) == (True, 69)
+    assert XLenCommand(storage).execute(["s"]) == (True, 51)
+
+    success, result = xtrim.execute(["s", "MAXLEN", "10", "LIMIT", "5"])
+    assert success is False
+    assert "LIMIT" in result
+
+
+def test_rejected_xadd_and_empty_xtrim_do_not_touch_key():
+    """Тест: XADD с недопустимым ID, NOMKSTREAM без потока и XTRIM без удалений не считаются изменением."""
+    storage = Storage()
+    _fill(storage, "s", 3)
+    version, dirty = storage.watch("s"), storage.dirty
+    assert XAddCommand(storage).execute(["s", "1-0", "f", "v"])[0] is False
+    assert XAddCommand(storage).execute(["missing", "NOMKSTREAM", "*", "f", "v"]) == (True, None)
+    assert XTrimCommand(storage).execute(["s", "MAXLEN", "10"]) == (True, 0)
+    assert XTrimCommand(storage).execute(["missing", "MAXLEN", "0"]) == (True, 0)
+    assert (storage.version("s"), storage.dirty) == (version, dirty)
+
+    assert XTrimCommand(storage).execute(["s", "MAXLEN", "1"]) == (True, 2)
+    assert storage.version("s") != version
+    version = storage.version("s")
+    assert XAddCommand(storage).execute(["s", "*", "f", "v"])[0] is True
+    assert storage.version("s") != version
+
+
+def test_xadd_with_maxlen():
+    """Тест XADD с MAXLEN."""
+    storage = Storage()
+    xadd = XAddCommand(storage)
+    for i in range(1, 11):
+        xadd.execute(["s", "MAXLEN", "3", f"{i}-0", "f", "v"])
+    assert XLenCommand(storage).execute(["s"]) == (True, 3)
+    success, entries = XRangeCommand(storage).execute(["s", "-", "+"])
+    assert [entry[0] for entry in entries] == ["8-0", "9-0", "10-0"]
+
+
+def test_xread_command():
+    """Тест команды XREAD без блокировки и с BLOCK."""
+    storage = Storage()
+    _fill(storage, "a", 3)
+    _fill(storage, "b", 2)
+    xread = XReadCommand(storage)
+
+    success, result = xread.execute(["STREAMS", "a", "b", "1-0", "0"])
+    assert success is True
+    assert result == [
+        ["a", [["2-0", ["n", "2"]], ["3-0", ["n", "3"]]]],
+        ["b", [["1-0", ["n", "1"]], ["2-0", ["n", "2"]]]],
+    ]
+
+    success, result = xread.execute(["COUNT", "1", "STREAMS", "a", "0"])
+    assert result == [["a", [["1-0", ["n", "1"]]]]]
+
+    # Нет новых данных без BLOCK
+    assert xread.execute(["STREAMS", "a", "$"]) == (True, None)
+
+    # С BLOCK возвращается запрос на ожидание с зафиксированным "$"
+    success, result = xread.execute(["BLOCK", "100", "STREAMS", "a", "$"])
+    assert success is True
+    assert isinstance(result, BlockRequest)
+    assert result.keys == ["a"]
+    assert result.timeout == 0.1
+    assert result.args[-1] == "3-0"
+
+    success, result = xread.execute(["STREAMS", "a"])
+    assert success is False
+    assert "Unbalanced" in result
+
+
+def test_stream_seek_across_blocks():
+    """Тест поиска по ID в stream из множества блоков."""
+    stream = Stream(block_size=4)
+    for i in range(1, 41):
+        stream.append((i * 2, 0), ("f", str(i)))
+
+    entries = stream.range((17, 0), (24, 0))
+    assert [entry_id for entry_id, _ in entries] == [(18, 0), (20, 0), (22, 0), (24, 0)]
+    entries = stream.range((1, 0), (80, 0), reverse=True, count=2)
+    assert [entry_id for entry_id, _ in entries] == [(80, 0), (78, 0)]
+    assert stream.range((81, 0), (100, 0)) == []
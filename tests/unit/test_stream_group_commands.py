@@ -0,0 +1,189 @@
+from src.server.commands.base_abstraction import BlockRequest
+from src.server.commands.stream_groups import (
+    XGroupCommand, XReadGroupCommand, XAckCommand, XPendingCommand, XClaimCommand, XAutoClaimCommand
+)
+from src.server.commands.streams import XAddCommand, XTrimCommand
+from src.server.consumer_groups import ConsumerGroup, now_ms
+from src.server.storage import Storage
+from src.server.stream import Stream
+
+
+def _setup(count=5):
+    storage = Storage()
+    xadd = XAddCommand(storage)
+    for i in range(1, count + 1):
+        xadd.execute(["s", f"{i}-0", "n", str(i)])
+    assert XGroupCommand(storage).execute(["CREATE", "s", "g", "0"]) == (True, "OK")
+    return storage
+
+
+def test_xgroup_create_and_errors():
+    """Тест команды XGROUP CREATE/DESTROY/CREATECONSUMER/DELCONSUMER."""
+    storage = _setup()
+    xgroup = XGroupCommand(storage)
+
+    success, result = xgroup.execute(["CREATE", "s", "g", "$"])
+    assert success is False
+    assert result.startswith("BUSYGROUP")
+
+    success, result = xgroup.execute(["CREATE", "missing", "g", "$"])
+    assert success is False
+    assert "MKSTREAM" in result
+    assert xgroup.execute(["CREATE", "missing", "g", "$", "MKSTREAM"]) == (True, "OK")
+
+    assert xgroup.execute(["CREATECONSUMER", "s", "g", "alice"]) == (True, 1)
+    assert xgroup.execute(["CREATECONSUMER", "s", "g", "alice"]) == (True, 0)
+    XReadGroupCommand(storage).execute(["GROUP", "g", "alice", "COUNT", "2", "STREAMS", "s", ">"])
+    assert xgroup.execute(["DELCONSUMER", "s", "g", "alice"]) == (True, 2)
+    assert XPendingCommand(storage).execute(["s", "g"]) == (True, [0, None, None, None])
+
+    assert xgroup.execute(["DESTROY", "s", "g"]) == (True, 1)
+    assert xgroup.execute(["DESTROY", "s", "g"]) == (True, 0)
+    success, result = XReadGroupCommand(storage).execute(["GROUP", "g", "c", "STREAMS", "s", ">"])
+    assert success is False
+    assert result.startswith("NOGROUP")
+
+
+def test_xreadgroup_delivers_new_entries_and_history():
+    """Тест XREADGROUP: новые записи, история PEL и XACK."""
+    storage = _setup()
+    xreadgroup = XReadGroupCommand(storage)
+
+    success, result = xreadgroup.execute(["GROUP", "g", "alice", "COUNT", "2", "STREAMS", "s", ">"])
+    assert success is True
+    assert result == [["s", [["1-0", ["n", "1"]], ["2-0", ["n", "2"]]]]]
+    success, result = xreadgroup.execute(["GROUP", "g", "bob", "STREAMS", "s", ">"])
+    assert [entry[0] for entry in result[0][1]] == ["3-0", "4-0", "5-0"]
+    assert xreadgroup.execute(["GROUP", "g", "bob", "STREAMS", "s", ">"]) == (True, None)
+
+    # история потребителя: только его записи
+    success, result = xreadgroup.execute(["GROUP", "g", "alice", "STREAMS", "s", "0"])
+    assert result == [["s", [["1-0", ["n", "1"]], ["2-0", ["n", "2"]]]]]
+
+    assert XAckCommand(storage).execute(["s", "g", "1-0", "1-0", "9-0"]) == (True, 1)
+    success, result = xreadgroup.execute(["GROUP", "g", "alice", "STREAMS", "s", "0"])
+    assert result == [["s", [["2-0", ["n", "2"]]]]]
+
+    # удаленная из stream запись возвращается с пустым значением
+    XTrimCommand(storage).execute(["s", "MAXLEN", "3"])
+    success, result = xreadgroup.execute(["GROUP", "g", "alice", "STREAMS", "s", "0"])
+    assert result == [["s", [["2-0", None]]]]
+
+
+def test_xreadgroup_noack_and_block():
+    """Тест XREADGROUP с NOACK и BLOCK."""
+    storage = _setup(2)
+    xreadgroup = XReadGroupCommand(storage)
+
+    xreadgroup.execute(["GROUP", "g", "alice", "NOACK", "STREAMS", "s", ">"])
+    assert XPendingCommand(storage).execute(["s", "g"]) == (True, [0, None, None, None])
+
+    success, result = xreadgroup.execute(["GROUP", "g", "alice", "BLOCK", "100", "STREAMS", "s", ">"])
+    assert success is True
+    assert isinstance(result, BlockRequest)
+    assert result.command == "XREADGROUP"
+    assert result.keys == ["s"]
+    assert result.timeout == 0.1
+
+
+def test_xpending_summary_and_extended():
+    """Тест команды XPENDING в кратком и расширенном виде."""
+    storage = _setup()
+    xreadgroup = XReadGroupCommand(storage)
+    xpending = XPendingCommand(storage)
+    xreadgroup.execute(["GROUP", "g", "alice", "COUNT", "2", "STREAMS", "s", ">"])
+    xreadgroup.execute(["GROUP", "g", "bob", "STREAMS", "s", ">"])
+
+    assert xpending.execute(["s", "g"]) == (True, [5, "1-0", "5-0", [["alice", "2"], ["bob", "3"]]])
+
+    success, result = xpending.execute(["s", "g", "-", "+", "3"])
+    assert [row[0] for row in result] == ["1-0", "2-0", "3-0"]
+    assert result[0][1] == "alice"
+    assert result[0][3] == 1
+
+    success, result = xpending.execute(["s", "g", "(2-0", "+", "10", "bob"])
+    assert [row[0] for row in result] == ["3-0", "4-0", "5-0"]
+
+    success, result = xpending.execute(["s", "g", "IDLE", "100000", "-", "+", "10"])
+    assert result == []
+    group = storage.get_typed("s", Stream).groups["g"]
+    group.claim(group.pel[(4, 0)], group.consumers["bob"], now_ms() - 200000, increment=False)
+    success, result = xpending.execute(["s", "g", "IDLE", "100000", "-", "+", "10"])
+    assert [row[0] for row in result] == ["4-0"]
+
+
+def test_xclaim_transfers_entries():
+    """Тест команды XCLAIM."""
+    storage = _setup()
+    XReadGroupCommand(storage).execute(["GROUP", "g", "alice", "STREAMS", "s", ">"])
+    xclaim = XClaimCommand(storage)
+
+    # записи недавно доставлены — min-idle не выполнено
+    assert xclaim.execute(["s", "g", "bob", "60000", "1-0"]) == (True, [])
+
+    assert xclaim.execute(["s", "g", "bob", "0", "1-0", "2-0"]) == (
+        True, [["1-0", ["n", "1"]], ["2-0", ["n", "2"]]]
+    )
+    success, result = XPendingCommand(storage).execute(["s", "g", "-", "+", "10", "bob"])
+    assert [(row[0], row[3]) for row in result] == [("1-0", 2), ("2-0", 2)]
+
+    assert xclaim.execute(["s", "g", "carol", "0", "3-0", "JUSTID", "RETRYCOUNT", "7"]) == (True, ["3-0"])
+    success, result = XPendingCommand(storage).execute(["s", "g", "3-0", "3-0", "1"])
+    assert result[0][1] == "carol"
+    assert result[0][3] == 7
+
+    XAckCommand(storage).execute(["s", "g", "4-0"])
+    assert xclaim.execute(["s", "g", "bob", "0", "4-0"]) == (True, [])
+    assert xclaim.execute(["s", "g", "bob", "0", "4-0", "FORCE", "JUSTID"]) == (True, ["4-0"])
+
+
+def test_xautoclaim_scans_with_cursor():
+    """Тест команды XAUTOCLAIM с курсором и удаленными записями."""
+    storage = _setup()
+    XReadGroupCommand(storage).execute(["GROUP", "g", "alice", "STREAMS", "s", ">"])
+    xautoclaim = XAutoClaimCommand(storage)
+
+    success, result = xautoclaim.execute(["s", "g", "bob", "0", "-", "COUNT", "2"])
+    assert success is True
+    assert result == ["3-0", [["1-0", ["n", "1"]], ["2-0", ["n", "2"]]], []]
+
+    XTrimCommand(storage).execute(["s", "MINID", "4-0"])
+    success, result = xautoclaim.execute(["s", "g", "bob", "0", result[0], "JUSTID"])
+    assert result == ["0-0", ["4-0", "5-0"], ["3-0"]]
+    assert XPendingCommand(storage).execute(["s", "g"])[1][0] == 4
+
+
+def test_rejected_group_commands_do_not_touch_key():
+    """Тест: отклоненные XGROUP/XCLAIM/XAUTOCLAIM и вызовы без изменений не считаются изменением ключа."""
+    storage = _setup()
+    XReadGroupCommand(storage).execute(["GROUP", "g", "c1", "STREAMS", "s", ">"])
+    version, dirty = storage.watch("s"), storage.dirty
+    assert XGroupCommand(storage).execute(["SETID", "s", "nogroup", "0"])[0] is False
+    assert XGroupCommand(storage).execute(["CREATE", "s", "g", "0"])[0] is False
+    assert XGroupCommand(storage).execute(["DESTROY", "s", "nogroup"]) == (True, 0)
+    assert XGroupCommand(storage).execute(["DELCONSUMER", "s", "g", "nobody"]) == (True, 0)
+    assert XGroupCommand(storage).execute(["CREATECONSUMER", "s", "g", "c1"]) == (True, 0)
+    assert XClaimCommand(storage).execute(["s", "nogroup", "c2", "0", "1-0"])[0] is False
+    assert XClaimCommand(storage).execute(["s", "g", "c1", "100000", "1-0"]) == (True, [])
+    assert XAutoClaimCommand(storage).execute(["missing", "g", "c2", "0", "0"])[0] is False
+    assert XAutoClaimCommand(storage).execute(["s", "g", "c1", "100000", "0"])[1][1] == []
+    assert (storage.version("s"), storage.dirty) == (version, dirty)
+
+    assert XClaimCommand(storage).execute(["s", "g", "c2", "0", "1-0", "JUSTID"]) == (True, ["1-0"])
+    assert storage.version("s") != version
+
+
+def test_consumer_group_indexes_compact():
+    """Тест уплотнения индексов PEL после множества подтверждений."""
+    group = ConsumerGroup("g", (0, 0))
+    consumer = group.get_consumer("c")
+    for i in range(1, 1001):
+        group.deliver((i, 0), consumer, i)
+    for i in range(1, 901):
+        group.ack((i, 0))
+
+    assert len(group) == 100
+    assert len(group._id_index.keys) < 1000
+    assert [entry.entry_id for entry in group.iter_pending((0, 0))][:2] == [(901, 0), (902, 0)]
+    assert group.first_and_last_pending() == ((901, 0), (1000, 0))
+    assert [entry.entry_id for entry in group.iter_idle(0, now=950)] == [(i, 0) for i in range(901, 951)]
@@ -0,0 +1,111 @@
+from src.server.commands.strings import AppendCommand, SetRangeCommand, GetRangeCommand, StrlenCommand
+from src.server.commands.get import GetCommand
+from src.server.storage import Storage
+
+
+def test_append_command():
+    """Тест команды APPEND."""
+    storage = Storage()
+    cmd = AppendCommand(storage)
+
+    # Несуществующий ключ создается
+    success, result = cmd.execute(["log", "abc"])
+    assert success is True
+    assert result == 3
+
+    # Дописывание к существующему значению
+    success, result = cmd.execute(["log", "de"])
+    assert success is True
+    assert result == 5
+
+    # Значение, записанное через SET, тоже дописывается
+    storage.set("s", "hello")
+    success, result = cmd.execute(["s", " world"])
+    assert success is True
+    assert result == 11
+
+    success, value = GetCommand(storage).execute(["s"])
+    assert success is True
+    assert bytes(value) == b"hello world"
+
+    # Неверное число аргументов
+    success, result = cmd.execute(["log"])
+    assert success is False
+    assert "wrong number of arguments" in result
+
+
+def test_append_keeps_ttl():
+    """Тест, что APPEND не сбрасывает TTL ключа."""
+    storage = Storage()
+    storage.set("k", "v", ttl=10)
+    AppendCommand(storage).execute(["k", "x"])
+    assert storage.ttl("k") > 0
+
+
+def test_setrange_command():
+    """Тест команды SETRANGE."""
+    storage = Storage()
+    cmd = SetRangeCommand(storage)
+
+    storage.set("k", "Hello World")
+    success, result = cmd.execute(["k", "6", "Redis"])
+    assert success is True
+    assert result == 11
+    assert storage.getrange("k", 0, -1) == b"Hello Redis"
+
+    # Дополнение нулями за пределами значения
+    success, result = cmd.execute(["pad", "3", "ab"])
+    assert success is True
+    assert result == 5
+    assert storage.getrange("pad", 0, -1) == b"\x00\x00\x00ab"
+
+    # Пустое значение не создает ключ
+    success, result = cmd.execute(["none", "5", ""])
+    assert success is True
+    assert result == 0
+    assert storage.exists("none") is False
+
+    # Неверные аргументы
+    success, result = cmd.execute(["k", "-1", "x"])
+    assert success is False
+    assert "out of range" in result
+
+    success, result = cmd.execute(["k", "abc", "x"])
+    assert success is False
+    assert "not an integer" in result
+
+
+def test_getrange_command():
+    """Тест команды GETRANGE с положительными и отрицательными индексами."""
+    storage = Storage()
+    cmd = GetRangeCommand(storage)
+    storage.set("k", "This is a string")
+
+    assert cmd.execute(["k", "0", "3"]) == (True, b"This")
+    assert cmd.execute(["k", "-3", "-1"]) == (True, b"ing")
+    assert cmd.execute(["k", "0", "-1"]) == (True, b"This is a string")
+    assert cmd.execute(["k", "10", "100"]) == (True, b"string")
+    assert cmd.execute(["k", "5", "3"]) == (True, b"")
+    assert cmd.execute(["absent", "0", "-1"]) == (True, b"")
+
+    success, result = cmd.execute(["k", "0"])
+    assert success is False
+    assert "wrong number of arguments" in result
+
+
+def test_strlen_command():
+    """Тест команды STRLEN."""
+    storage = Storage()
+    cmd = StrlenCommand(storage)
+
+    assert cmd.execute(["absent"]) == (True, 0)
+
+    storage.set("k", "привет")
+    assert cmd.execute(["k"]) == (True, 12)
+
+    storage.append("k", "!")
+    assert cmd.execute(["k"]) == (True, 13)
+
+    success, result = cmd.execute([])
+    assert success is False
+    assert "wrong number of arguments" in result
@@ -0,0 +1,134 @@
+import random
+from array import array
+
+import pytest
+
+from src.server.commands.timeseries import (
+    TsCreateCommand, TsAddCommand, TsGetCommand, TsRangeCommand, TsRevRangeCommand, TsDelCommand, TsInfoCommand
+)
+from src.server.storage import Storage, WrongTypeError
+from src.server.timeseries import TimeSeries, compress, decompress
+
+
+def _series(storage, key="temp", samples=600, *options):
+    TsCreateCommand(storage).execute([key, "CHUNK_SIZE", "160"] + list(options))
+    ts_add = TsAddCommand(storage)
+    for i in range(samples):
+        ts_add.execute([key, str(i * 1000), str(i % 60)])
+
+
+@pytest.mark.parametrize("encoding", ["UNCOMPRESSED", "COMPRESSED"])
+def test_ts_add_and_range(encoding):
+    """Тест команд TS.ADD, TS.GET и TS.RANGE в обоих форматах чанков."""
+    storage = Storage()
+    _series(storage, "temp", 600, "ENCODING", encoding)
+
+    assert TsGetCommand(storage).execute(["temp"]) == (True, [599000, "59"])
+    success, result = TsRangeCommand(storage).execute(["temp", "1000", "3000"])
+    assert result == [[1000, "1"], [2000, "2"], [3000, "3"]]
+    success, result = TsRangeCommand(storage).execute(["temp", "-", "+", "COUNT", "2"])
+    assert result == [[0, "0"], [1000, "1"]]
+    success, result = TsRevRangeCommand(storage).execute(["temp", "-", "+", "COUNT", "2"])
+    assert result == [[599000, "59"], [598000, "58"]]
+
+    success, info = TsInfoCommand(storage).execute(["temp"])
+    info = dict(zip(info[::2], info[1::2]))
+    assert info["totalSamples"] == 600
+    assert info["chunkCount"] == 60
+    assert info["chunkType"] == encoding.lower()
+
+
+def test_ts_range_aggregation():
+    """Тест TS.RANGE с AGGREGATION: корзины пересекают границы чанков."""
+    storage = Storage()
+    _series(storage, "temp", 600, "ENCODING", "COMPRESSED")
+
+    success, result = TsRangeCommand(storage).execute(["temp", "0", "+", "AGGREGATION", "avg", "60000"])
+    assert len(result) == 10
+    assert result[0] == [0, "29.5"]
+    success, result = TsRangeCommand(storage).execute(
+        ["temp", "30000", "150000", "AGGREGATION", "max", "60000"]
+    )
+    assert result == [[0, "59"], [60000, "59"], [120000, "30"]]
+    success, result = TsRangeCommand(storage).execute(["temp", "0", "+", "AGGREGATION", "count", "25000"])
+    assert result[:2] == [[0, "25"], [25000, "25"]]
+    success, result = TsRangeCommand(storage).execute(
+        ["temp", "0", "+", "COUNT", "2", "AGGREGATION", "range", "60000"]
+    )
+    assert result == [[0, "59"], [60000, "59"]]
+    success, result = TsRangeCommand(storage).execute(["temp", "0", "+", "AGGREGATION", "median", "10"])
+    assert success is False
+
+
+def test_ts_duplicates_out_of_order_and_retention():
+    """Тест политики дубликатов, вставки в прошлое и retention."""
+    storage = Storage()
+    ts_add = TsAddCommand(storage)
+    _series(storage, "temp", 100, "ENCODING", "COMPRESSED", "RETENTION", "50000")
+
+    success, result = ts_add.execute(["temp", "99000", "1"])
+    assert success is False
+    assert "BLOCK" in result
+    assert ts_add.execute(["temp", "99000", "5", "ON_DUPLICATE", "SUM"]) == (True, 99000)
+    assert TsGetCommand(storage).execute(["temp"]) == (True, [99000, "44"])
+
+    assert ts_add.execute(["temp", "60500", "7.25"]) == (True, 60500)
+    success, result = TsRangeCommand(storage).execute(["temp", "60000", "61000"])
+    assert result == [[60000, "0"], [60500, "7.25"], [61000, "1"]]
+
+    success, result = ts_add.execute(["temp", "1000", "1"])
+    assert success is False
+    assert "retention" in result
+    success, result = TsRangeCommand(storage).execute(["temp", "-", "+"])
+    assert result[0][0] == 49000
+
+    assert TsDelCommand(storage).execute(["temp", "60000", "61000"]) == (True, 3)
+    success, result = TsRangeCommand(storage).execute(["temp", "59000", "62000"])
+    assert result == [[59000, "59"], [62000, "2"]]
+
+
+def test_ts_add_touches_key_once_and_only_on_success():
+    """Тест: TS.ADD, создавший ряд, учитывается одним изменением, а отклоненный — не учитывается."""
+    storage = Storage()
+    dirty = storage.dirty
+    assert TsAddCommand(storage).execute(["temp", "1000", "1"]) == (True, 1000)
+    assert storage.dirty == dirty + 1
+    version, dirty = storage.watch("temp"), storage.dirty
+    assert TsAddCommand(storage).execute(["temp", "1000", "2"])[0] is False
+    assert TsDelCommand(storage).execute(["temp", "5000", "6000"]) == (True, 0)
+    assert TsDelCommand(storage).execute(["missing", "0", "1"])[0] is False
+    assert (storage.version("temp"), storage.dirty) == (version, dirty)
+    assert TsAddCommand(storage).execute(["temp", "2000", "2"]) == (True, 2000)
+    assert storage.version("temp") != version and storage.dirty == dirty + 1
+
+
+def test_ts_errors():
+    """Тест ошибок команд time series."""
+    storage = Storage()
+    assert TsCreateCommand(storage).execute(["temp", "LABELS", "room", "kitchen"]) == (True, "OK")
+    success, result = TsCreateCommand(storage).execute(["temp"])
+    assert success is False
+    assert "already exists" in result
+    success, result = TsRangeCommand(storage).execute(["missing", "-", "+"])
+    assert success is False
+    assert TsAddCommand(storage).execute(["temp", "1", "x"])[0] is False
+    assert TsCreateCommand(storage).execute(["other", "ENCODING", "zip"])[0] is False
+
+    storage.set("str", "value")
+    with pytest.raises(WrongTypeError):
+        TsAddCommand(storage).execute(["str", "1", "1"])
+
+
+def test_compression_roundtrip():
+    """Сжатие delta-of-delta/XOR восстанавливает отсчеты без потерь."""
+    rnd = random.Random(1)
+    timestamps = array("q", [10 ** 12 + i * 1000 + rnd.choice([0, 0, 1, -1, 500]) for i in range(500)])
+    values = array("d", [rnd.choice([20.0, 20.5, rnd.random(), -1e300, float("inf")]) for _ in range(500)])
+    data = compress(timestamps, values)
+    assert decompress(data, timestamps[0], len(timestamps)) == (timestamps, values)
+    assert len(data) < len(timestamps) * 16
+
+    series = TimeSeries(chunk_size=64, compressed=True)
+    for timestamp, value in zip(timestamps, values):
+        series.add(timestamp, value)
+    assert series.range(0, 2 ** 63 - 1) == list(zip(timestamps, values))
@@ -0,0 +1,77 @@
+from src.server.databases import Databases
+from src.server.pubsub import PubSub
+from src.server.tracking import INVALIDATE_CHANNEL, TrackingClient
+
+
+class FakeTransport:
+    def __init__(self):
+        self.frames = []
+
+    def write(self, data):
+        self.frames.append(data)
+
+    def get_write_buffer_size(self):
+        return 0
+
+    def abort(self):
+        pass
+
+
+def _listener(pubsub):
+    transport = FakeTransport()
+    subscriber = pubsub.subscriber(transport)
+    pubsub.subscribe(subscriber, INVALIDATE_CHANNEL)
+    return transport, subscriber
+
+
+def _invalidated(transport):
+    frames = [frame.split(b"\r\n") for frame in transport.frames]
+    transport.frames.clear()
+    return [None if frame[5] == b"$-1" else frame[7] for frame in frames]
+
+
+def test_tracking_invalidates_read_keys_once():
+    """Тест: запись в прочитанный ключ отправляет одну инвалидацию, дальше ключ не отслеживается."""
+    databases = Databases(2)
+    storage, table = databases[0], databases.tracking
+    transport, subscriber = _listener(PubSub())
+    client = TrackingClient(1, lambda: subscriber)
+
+    storage.mset({"a": "1", "b": "1"})
+    assert storage._observed is False
+    table.enable(client)
+    assert storage._observed and databases[1]._observed
+    table.remember(client, ["a", "b"])
+
+    storage.set("a", "2")
+    storage.set("a", "3")
+    storage.set("c", "x")
+    storage.delete("b")
+    assert _invalidated(transport) == [b"a", b"b"]
+
+    table.remember(client, ["a"])
+    storage.clear()
+    assert _invalidated(transport) == [None]
+
+    table.disable(client)
+    assert storage._observed is False and table.keys == {}
+
+
+def test_tracking_bcast_prefixes_and_table_limit():
+    """Тест режима BCAST с префиксами и вытеснения старых ключей при переполнении таблицы."""
+    databases = Databases(1)
+    storage, table = databases[0], databases.tracking
+    bcast_transport, bcast_subscriber = _listener(PubSub())
+    transport, subscriber = _listener(PubSub())
+    table.enable(TrackingClient(1, lambda: bcast_subscriber, bcast=True, prefixes=["user:"]))
+    client = TrackingClient(2, lambda: subscriber)
+    table.enable(client)
+
+    storage.hset("user:1", {"name": "x"})
+    storage.set("order:1", "y")
+    assert _invalidated(bcast_transport) == [b"user:1"]
+
+    table.max_keys = 2
+    table.remember(client, ["k1", "k2", "k3"])
+    assert _invalidated(transport) == [b"k1"]
+    assert list(table.keys) == ["k2", "k3"]